@@ -1,16 +1,32 @@
 import sqlite3
+import asyncio
 import json
-import traceback
+import logging
 import os
-from fastapi import FastAPI, HTTPException, Request
+import sys
+import threading
+from datetime import datetime
+from fastapi import Body, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 import os
-from downloads.download_all_user_tasks_v2 import baixar_tarefas_periodo
+from downloads.download_all_user_tasks_v2 import baixar_tarefas
+from downloads.customer_group_members import ensure_customer_group_members, get_schools_by_group
+from migrations import apply_migrations
+from dashboard_snapshots import get_or_build_snapshot, get_snapshot_stats
+from dashboard_batch import run_dashboard_batch
+from jobs import FINISHED_STATUSES, JobManager
+from webhook_ingest import ingest_task_webhook
+from live_deltas import DASHBOARD_TASK_TYPE_IDS, contract_deltas_since, format_cursor, parse_cursor
+from change_feed import feed
+from api_logging import get_logger, install_request_id_middleware
+from json_encoding import dumps as json_dumps, iter_json, loads as json_loads, parse_fields, project_row
 
 # --- Configuração ---
 app = FastAPI(title="Painel Admin API Auvo")
+logger = get_logger("api_backend")
+install_request_id_middleware(app)
 
 @app.on_event("startup")
 async def startup_event():
@@ -40,8 +56,18 @@ async def startup_event():
         );
     ''')
 
+    # Migrações versionadas (índices, tabelas auxiliares)
+    apply_migrations(conn)
+
+    # Associação normalizada contrato -> escola (populada a partir de customers.groupsId)
+    ensure_customer_group_members(conn)
+
     conn.commit()
     conn.close()
+
+    # Jobs em segundo plano (marca como interrompidos os que estavam pendentes)
+    global job_manager
+    job_manager = JobManager(DB_PATH, {"download-tasks": run_download_tasks_job})
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "*"],
@@ -82,6 +108,10 @@ class LoginRequest(BaseModel):
 
 class DashboardBatchRequest(BaseModel):
     contract_ids: List[int]
+    # Se True, responde {"results": [...], "errors": [...]} em vez da lista de dashboards
+    include_errors: Optional[bool] = False
+    # Projeção das colunas das tarefas, como no parâmetro fields= de /api/dashboard/{group_id}
+    fields: Optional[str] = None
 
 def dict_factory(cursor, row):
     d = {}
@@ -254,9 +284,9 @@ def initialize_database():
                     UNIQUE(contract_id, description)
                 )
             """)
-            print("Banco de dados inicializado com sucesso. Tabelas de faturamento verificadas/criadas.")
+            logger.info("Banco de dados inicializado com sucesso. Tabelas de faturamento verificadas/criadas.")
     except Exception as e:
-        print(f"Erro ao inicializar o banco de dados: {e}")
+        logger.error("Erro ao inicializar o banco de dados: %s", e)
 
 # --- Endpoints ---
 
@@ -321,13 +351,184 @@ class DownloadTasksRequest(BaseModel):
     start_date: str
     end_date: str
 
-@app.post("/api/download-tasks")
+job_manager = None
+
+
+def run_download_tasks_job(params, report):
+    """
+    Job de /api/download-tasks: baixa as tarefas do período para o auvo.db.
+
+    O job não gera arquivo: as tarefas ficam na tabela `tasks` e `file` na resposta
+    fica nulo (o CSV de exemplo de baixar_tarefas_periodo não é mais devolvido).
+    """
+    def on_progress(payload):
+        report(payload.get("percentage"), payload.get("message"))
+
+    totals = baixar_tarefas(params["start_date"], params["end_date"], on_progress=on_progress)
+    return dict(totals, status="ok", progress=100)
+
+
+def _job_response(job):
+    result = job["result"] or {}
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "start_date": job["period_start"],
+        "end_date": job["period_end"],
+        "file": result.get("file"),
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def _get_job_or_404(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+
+@app.post("/api/download-tasks", status_code=202)
 async def download_tasks(req: DownloadTasksRequest):
+    """
+    Enfileira o download de tarefas do período e devolve o ID do job na hora.
+    Pedidos para períodos sobrepostos a um job pendente reaproveitam esse job.
+    """
     try:
-        status, progress, file_path = baixar_tarefas_periodo(req.start_date, req.end_date)
-        return {"status": status, "progress": progress, "file": file_path}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao baixar tarefas: {e}")
+        start = datetime.strptime(req.start_date, "%Y-%m-%d").date().isoformat()
+        end = datetime.strptime(req.end_date, "%Y-%m-%d").date().isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD.")
+    if start > end:
+        raise HTTPException(status_code=400, detail="A data inicial deve ser anterior à data final.")
+
+    return _job_response(job_manager.submit("download-tasks", start, end))
+
+
+@app.get("/api/jobs")
+def list_jobs(limit: int = 50):
+    return [_job_response(job) for job in job_manager.list(limit)]
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: str):
+    return _job_response(_get_job_or_404(job_id))
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream SSE com o estado do job a cada mudança, até o fim do job."""
+    job = _get_job_or_404(job_id)
+
+    async def events():
+        last = None
+        current = job
+        while True:
+            payload = _job_response(current)
+            if payload != last:
+                yield f"data: {json_dumps(payload)}\n\n"
+                last = payload
+            if current["status"] in FINISHED_STATUSES:
+                break
+            await asyncio.sleep(0.5)
+            current = job_manager.get(job_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+# Token opcional do webhook (cabeçalho X-Webhook-Token ou ?token=)
+AUVO_WEBHOOK_TOKEN = os.getenv("AUVO_WEBHOOK_TOKEN")
+
+
+@app.post("/api/webhook/auvo")
+def auvo_webhook(request: Request, payload: dict = Body(...)):
+    """
+    Recebe os webhooks de tarefas da Auvo e grava as tarefas de `result.Entities`
+    direto no auvo.db, invalidando só os dashboards dos contratos afetados.
+    """
+    if AUVO_WEBHOOK_TOKEN:
+        token = request.headers.get("X-Webhook-Token") or request.query_params.get("token")
+        if token != AUVO_WEBHOOK_TOKEN:
+            raise HTTPException(status_code=401, detail="Token do webhook inválido")
+
+    try:
+        summary = ingest_task_webhook(DB_PATH, payload)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except sqlite3.Error as e:
+        logger.exception("Erro ao gravar as tarefas do webhook")
+        raise HTTPException(status_code=500, detail=f"Erro ao gravar tarefas: {e}")
+    return dict(summary, received=True, tasks=summary["received"])
+
+# Intervalo entre verificações do feed e entre comentários de keep-alive do SSE (segundos)
+LIVE_POLL_INTERVAL = 0.5
+LIVE_KEEPALIVE_INTERVAL = 15
+
+
+def _parse_cursor(value):
+    try:
+        parse_cursor(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return value or None
+
+
+def _live_period(start_date, end_date):
+    inicio, fim = _parse_optional_date(start_date), _parse_optional_date(end_date)
+    return (inicio.isoformat() if inicio else None), (fim.isoformat() if fim else None)
+
+
+@app.get("/api/live/{group_id}/deltas")
+def get_live_deltas(group_id: int, cursor: Optional[str] = None, start_date: Optional[str] = None,
+                    end_date: Optional[str] = None):
+    """Deltas do contrato depois do cursor (alternativa ao SSE, por polling)."""
+    start, end = _live_period(start_date, end_date)
+    deltas, next_cursor, reset = contract_deltas_since(group_id, _parse_cursor(cursor), start_date=start,
+                                                       end_date=end)
+    return {"cursor": next_cursor, "reset": reset, "deltas": deltas}
+
+
+@app.get("/api/live/{group_id}/events")
+async def live_events(group_id: int, request: Request, cursor: Optional[str] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """
+    Stream SSE com os deltas do dashboard do contrato (status de tarefas, contadores
+    por escola e KPIs). O `id` de cada evento é o cursor: ao reconectar, o navegador
+    o envia em Last-Event-ID e recebe os deltas perdidos. O evento `reset` pede ao
+    cliente que recarregue o dashboard completo. Com `start_date`/`end_date` (o
+    período do dashboard carregado), só as tarefas com taskDate no período contam.
+
+    O feed fica na memória do processo: a API deve rodar com um único worker, o
+    mesmo que recebe os webhooks (cursores de outro processo recebem `reset`).
+    """
+    position = _parse_cursor(request.headers.get("Last-Event-ID") or cursor)
+    start, end = _live_period(start_date, end_date)
+
+    async def events():
+        current = position if position is not None else format_cursor(feed.last_seq)
+        yield f"id: {current}\nevent: ready\ndata: {json_dumps({'cursor': current})}\n\n"
+        idle = 0.0
+        while not await request.is_disconnected():
+            deltas, current, reset = contract_deltas_since(group_id, current, start_date=start, end_date=end)
+            if reset:
+                yield f"id: {current}\nevent: reset\ndata: {json_dumps({'cursor': current})}\n\n"
+            for delta in deltas:
+                yield f"id: {delta['cursor']}\nevent: delta\ndata: {json_dumps(delta)}\n\n"
+            if reset or deltas:
+                idle = 0.0
+            elif idle >= LIVE_KEEPALIVE_INTERVAL:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(LIVE_POLL_INTERVAL)
+            idle += LIVE_POLL_INTERVAL
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.get("/api/download-tasks/file")
 def get_downloaded_file(path: str):
@@ -336,6 +537,80 @@ def get_downloaded_file(path: str):
     return FileResponse(path, filename=os.path.basename(path))
 
 
+def _parse_optional_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Formato de data inválido. Use YYYY-MM-DD.")
+
+
+# Módulos dos painéis Streamlit (painel/), usados só pela planilha de equipamentos
+PAINEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel")
+_painel_lock = threading.Lock()
+
+
+def _painel_exportacao():
+    """
+    Importa, no primeiro uso, os módulos de painel/ da planilha de equipamentos.
+
+    Os módulos dos painéis importam uns aos outros pelo nome (como nas páginas do
+    Streamlit), então painel/ entra no sys.path só durante a importação: o resto da
+    API não passa a resolver nomes como `dados` ou `mapa` nessa pasta.
+
+    Returns:
+        tuple: Módulos (dados, consolidacao, exportacao)
+    """
+    with _painel_lock:
+        sys.path.insert(0, PAINEL_DIR)
+        try:
+            import dados
+            import consolidacao
+            import exportacao
+            try:
+                # Cache Parquet (opcional), importado por dados.py no primeiro uso
+                import colunar  # noqa: F401
+            except ImportError:
+                pass
+        finally:
+            sys.path.remove(PAINEL_DIR)
+    return dados, consolidacao, exportacao
+
+
+@app.get("/api/painel/equipamentos.xlsx")
+def export_panel_equipments(relatorio: str = "nao_feitos", tipo: str = "Preventiva Mensal",
+                            setores: Optional[str] = None, data_ini: Optional[str] = None,
+                            data_fim: Optional[str] = None):
+    """
+    Planilha dos equipamentos não feitos (`relatorio=nao_feitos`) ou feitos
+    (`relatorio=feitos`) das preventivas do tipo, a mesma dos painéis mensal e
+    semestral, com uma aba por setor. `setores` é uma lista separada por vírgulas
+    (padrão: todos os setores e o geral); sem período, todas as tarefas contam.
+    A planilha é gerada fora do loop da API e fica em cache até os bancos mudarem.
+    """
+    dados, consolidacao, exportacao = _painel_exportacao()
+    if relatorio not in exportacao.RELATORIOS:
+        raise HTTPException(status_code=400, detail=f"Relatório inválido. Use: {', '.join(exportacao.RELATORIOS)}")
+    inicio, fim = _parse_optional_date(data_ini), _parse_optional_date(data_fim)
+    if inicio and fim and inicio > fim:
+        raise HTTPException(status_code=400, detail="A data inicial deve ser anterior à data final.")
+    ausentes = dados.bancos_ausentes(dados.DB_TAREFAS, dados.DB_EQUIPAMENTOS, dados.DB_CLIENTES)
+    if ausentes:
+        raise HTTPException(status_code=503, detail=f"Bancos do painel não encontrados: {', '.join(ausentes)}")
+
+    validos = list(dados.carregar_clientes_por_setor()) + [consolidacao.TODOS]
+    escolhidos = [setor.strip() for setor in setores.split(",") if setor.strip()] if setores else validos
+    invalidos = [setor for setor in escolhidos if setor not in validos]
+    if invalidos or not escolhidos:
+        raise HTTPException(status_code=400, detail=f"Setores inválidos: {', '.join(invalidos)}. Use: {', '.join(validos)}")
+
+    content = exportacao.exportar_equipamentos(tipo, relatorio, escolhidos, inicio, fim).result()
+    filename = exportacao.nome_arquivo(tipo, relatorio, escolhidos)
+    return Response(content=content, media_type=exportacao.MIME_XLSX,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
 @app.get("/api/escola/{school_id}/equipamentos-debug")
 def get_school_equipments_debug(school_id: int):
     """
@@ -359,8 +634,7 @@ def get_billing_report(group_id: int, start_date: str, end_date: str):
             cur = conn.cursor()
 
             # 1. Obter IDs das escolas do contrato
-            cur.execute("SELECT id FROM customers WHERE groupsId LIKE ?", (f'%{group_id}%',))
-            schools = cur.fetchall()
+            schools = get_schools_by_group(cur, group_id, columns="c.id")
             if not schools:
                 return []
             school_ids = [s['id'] for s in schools]
@@ -421,7 +695,7 @@ def get_billing_report(group_id: int, start_date: str, end_date: str):
             return sorted(final_report, key=lambda x: x['user_name'])
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Erro ao gerar relatório de faturamento")
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório de faturamento: {e}")
 
 @app.get("/api/contracts")
@@ -438,7 +712,129 @@ def get_contracts():
     except sqlite3.Error as e:
         raise HTTPException(status_code=500, detail=f"Erro no banco de dados: {e}")
 
-def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_date: str = None):
+def _index_school_tasks(tasks, task_type_map):
+    """
+    Percorre as tarefas uma única vez, decodificando equipmentsId e questionnaires.
+
+    Retorna:
+        completed_by_equipment: {(customerId, equipment_id): [tarefas concluídas]}, na ordem das tarefas
+        answered_by_task: {taskID: [questionnaireEquipamentId respondidos]} (apenas taskStatus 5)
+    """
+    completed_by_equipment = {}
+    answered_by_task = {}
+    for task in tasks:
+        task_status = task.get('taskStatus')
+
+        if task_status in [5, 6]:  # Tarefa Finalizada ou Concluída
+            try:
+                task_equip_ids_str = task.get('equipmentsId', '[]')
+                task_equip_ids = json.loads(task_equip_ids_str if task_equip_ids_str else '[]')
+            except (json.JSONDecodeError, TypeError):
+                task_equip_ids = []
+            if isinstance(task_equip_ids, list):
+                task_type_id = task.get('taskType')
+                completed_task = {
+                    'task_type_id': task_type_id,
+                    'task_type_description': task_type_map.get(task_type_id, "Desconhecido"),
+                    'task_id': task.get('taskID')
+                }
+                seen = set()
+                for equip_id in task_equip_ids:
+                    if isinstance(equip_id, (list, dict)) or equip_id in seen:
+                        continue
+                    seen.add(equip_id)
+                    key = (task['customerId'], equip_id)
+                    completed_by_equipment.setdefault(key, []).append(dict(completed_task))
+
+        if task_status == 5 and task.get('questionnaires'):
+            answered = []
+            try:
+                questionnaires_list = json.loads(task['questionnaires'])
+                if isinstance(questionnaires_list, list):
+                    for q in questionnaires_list:
+                        if isinstance(q, dict) and q.get('questionnaireEquipamentId'):
+                            answered.append(q['questionnaireEquipamentId'])
+            except (json.JSONDecodeError, TypeError): pass
+            answered_by_task[task.get('taskID')] = answered
+
+    return completed_by_equipment, answered_by_task
+
+def _build_schools_data(cur, schools_raw, tasks_to_process, task_type_map, pmoc_task_type_id):
+    """
+    Monta os dados por escola (equipamentos ativos com tarefas concluídas e métricas).
+
+    Usa uma única consulta de equipamentos para todas as escolas e um índice invertido
+    equipamento -> tarefas concluídas, em vez de uma consulta e um json.loads por
+    equipamento/tarefa de cada escola.
+    """
+    school_ids = [s['id'] for s in schools_raw]
+
+    # Tarefas agrupadas por escola (mantendo a ordem original)
+    tasks_by_school = {}
+    for task in tasks_to_process:
+        tasks_by_school.setdefault(task['customerId'], []).append(task)
+
+    # Buscar de uma vez os equipamentos ativos de todas as escolas
+    equipments_by_school = {}
+    if school_ids:
+        school_id_placeholders = ','.join('?' for _ in school_ids)
+        cur.execute(
+            f"SELECT * FROM equipments WHERE associatedCustomerId IN ({school_id_placeholders}) AND active = 1 ORDER BY id",
+            school_ids
+        )
+        for equip in cur.fetchall():
+            equipments_by_school.setdefault(equip['associatedCustomerId'], []).append(equip)
+
+    completed_by_equipment, answered_by_task = _index_school_tasks(tasks_to_process, task_type_map)
+
+    schools_data = []
+    all_tasks = []
+    debug = logger.isEnabledFor(logging.DEBUG)
+    # Processar todas as escolas, não apenas as que têm tarefas
+    for school_raw in schools_raw:
+        school_id = school_raw['id']
+        # Obter tarefas para esta escola (pode ser uma lista vazia)
+        school_tasks = tasks_by_school.get(school_id, [])
+        all_tasks.extend(school_tasks)
+
+        equipments_to_process = equipments_by_school.get(school_id, [])
+        total_ativos = len(equipments_to_process)
+
+        # Anexar status de tarefas concluídas a cada equipamento
+        equipments_with_status = []
+        for equip in equipments_to_process:
+            equip_dict = dict(equip)
+            equip_dict['completed_tasks'] = completed_by_equipment.get((school_id, equip_dict['id']), [])
+            equipments_with_status.append(equip_dict)
+
+        # Equipamentos respondidos em questionários (exclui PMOC das métricas)
+        answered_equipments_ids = set()
+        for task in school_tasks:
+            if task.get('taskType') != pmoc_task_type_id:
+                answered_equipments_ids.update(answered_by_task.get(task.get('taskID'), []))
+
+        total_realizadas = len(answered_equipments_ids)
+        percentual = round((total_realizadas / total_ativos) * 100) if total_ativos > 0 else 0
+
+        if debug:
+            first_equip = equipments_with_status[0] if equipments_with_status else None
+            logger.debug(
+                "Escola %s (%s): %d equipamentos ativos, %d tarefas, %d realizadas; primeiro equipamento: %s",
+                school_id, school_raw['description'], total_ativos, len(school_tasks), total_realizadas,
+                first_equip and {'id': first_equip['id'], 'name': first_equip.get('name')}
+            )
+
+        school_data_entry = {
+            "school_info": dict(school_raw),
+            "equipments": equipments_with_status,
+            "tasks": [dict(t) for t in school_tasks],
+            "metrics": {"ativos": total_ativos, "realizadas": total_realizadas, "percentual": percentual}
+        }
+        schools_data.append(school_data_entry)
+
+    return schools_data, all_tasks
+
+def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_date: str = None, conn=None):
     def _extract_manager_ids(school):
         managers = school.get('managersId', '[]')
         try:
@@ -449,14 +845,13 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
         return []
 
     try:
-        with get_db_connection() as conn:
+        with conn or get_db_connection() as conn:
             cur = conn.cursor()
             # 1. Obter contrato e escolas
             cur.execute("SELECT * FROM customer_groups WHERE id = ?", (group_id,))
             contract = cur.fetchone()
             if not contract: raise HTTPException(status_code=404, detail="Contrato não encontrado")
-            cur.execute("SELECT * FROM customers WHERE groupsId LIKE ?", (f'%{group_id}%',))
-            schools_raw = cur.fetchall()
+            schools_raw = get_schools_by_group(cur, group_id)
             school_ids = [s['id'] for s in schools_raw]
 
             if not school_ids:
@@ -494,13 +889,13 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
             }
             
             sector_name = sector_mapping.get(group_id)
-            print(f"\n=== DEBUG MANAGERS - Contract ID: {group_id}, Sector: {sector_name} ===")
+            logger.debug("Managers do contrato %s, setor %s", group_id, sector_name)
             
             if sector_name:
                 # Buscar equipe específica do setor na tabela teams (apenas STS)
                 cur.execute("SELECT teamUsers FROM teams WHERE description LIKE ? AND description LIKE 'STS%'", (f'%{sector_name}%',))
                 team_data = cur.fetchone()
-                print(f"Team data found: {team_data}")
+                logger.debug("Equipe encontrada: %s", team_data)
                 
                 team_users = []
                 if team_data and team_data['teamUsers']:
@@ -511,7 +906,7 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                     except (json.JSONDecodeError, TypeError):
                         team_users = []
                 
-                print(f"Team users extracted: {team_users}")
+                logger.debug("Usuários da equipe: %s", team_users)
                 
                 # Buscar managers das escolas do contrato (customers.managersId)
                 all_manager_ids = set()
@@ -544,15 +939,15 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                             'jobPosition': manager['jobPosition']
                         }
                 
-                print(f"Managers from customers: {list(managers_from_customers.keys())}")
+                logger.debug("Managers das escolas: %s", list(managers_from_customers))
                 
                 # Fazer depara: mostrar usuários da equipe, priorizando dados de customers quando disponível
                 for team_user_name in team_users:
                     if team_user_name in managers_from_customers:
-                        print(f"MATCH found: {team_user_name} -> {managers_from_customers[team_user_name]}")
+                        logger.debug("Manager encontrado nas escolas: %s -> %s", team_user_name, managers_from_customers[team_user_name])
                         contract_managers.append(managers_from_customers[team_user_name])
                     else:
-                        print(f"NO MATCH: {team_user_name} not found in customers, adding from teams")
+                        logger.debug("Manager %s não encontrado nas escolas, usando dados da equipe", team_user_name)
                         # Se não está em customers, adicionar apenas com nome da equipe
                         contract_managers.append({
                             'userId': None,
@@ -574,12 +969,11 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                 
                 contract_managers.sort(key=sort_managers)
                 
-                print(f"Final contract_managers (sorted): {contract_managers}")
-                print("=== END DEBUG MANAGERS ===")
+                logger.debug("Managers do contrato (ordenados): %s", contract_managers)
 
             # 2. Obter todos os dados relacionados
             school_id_placeholders = ','.join('?' for _ in school_ids)
-            allowed_task_type_ids = [175644, 175648, 175652, 175656, 175164, 175641, 175642, 175646, 175649, 175650, 175653, 175654, 177626, 184713, 184714, 184715, 184717]
+            allowed_task_type_ids = list(DASHBOARD_TASK_TYPE_IDS)
             task_type_placeholders = ','.join('?' for _ in allowed_task_type_ids)
 
             # Tarefas (apenas tipos permitidos e não canceladas)
@@ -595,103 +989,8 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
             tasks_to_process = cur.fetchall()
 
             # 3. Processar e agrupar dados por escola
-            schools_data = []
-            all_tasks = []
-            # Processar todas as escolas, não apenas as que têm tarefas
-            schools_to_process = schools_raw
-
-            print("\n" + "="*50)
-            print("INICIANDO PROCESSAMENTO DE DADOS POR ESCOLA")
-            print("="*50)
-            for school_raw in schools_to_process:
-                school_id = school_raw['id']
-                print(f"\n--- PROCESSANDO ESCOLA ID: {school_id} ({school_raw['description']}) ---")
-                # Obter tarefas para esta escola (pode ser uma lista vazia)
-                school_tasks = [t for t in tasks_to_process if t['customerId'] == school_id]
-                all_tasks.extend(school_tasks)
-
-                # Buscar apenas os equipamentos ativos da escola
-                cur.execute("SELECT * FROM equipments WHERE associatedCustomerId = ? AND active = 1", (school_id,))
-                equipments_to_process = cur.fetchall()
-                total_ativos = len(equipments_to_process)
-
-                print(f"[LOG] Total de equipamentos ativos: {total_ativos}")
-
-                # Anexar status de tarefas concluídas a cada equipamento
-                equipments_with_status = []
-                for equip in equipments_to_process:
-                    equip_dict = dict(equip)
-                    equip_dict['completed_tasks'] = []
-                    for task in school_tasks:
-                        if task.get('taskStatus') in [5, 6]:  # Tarefa Finalizada ou Concluída
-                            try:
-                                task_equip_ids_str = task.get('equipmentsId', '[]')
-                                task_equip_ids = json.loads(task_equip_ids_str if task_equip_ids_str else '[]')
-                                if equip_dict['id'] in task_equip_ids:
-                                    task_type_id = task.get('taskType')
-                                    task_type_desc = task_type_map.get(task_type_id, "Desconhecido")
-                                    equip_dict['completed_tasks'].append({
-                                        'task_type_id': task_type_id,
-                                        'task_type_description': task_type_desc,
-                                        'task_id': task.get('taskID')
-                                    })
-                            except (json.JSONDecodeError, TypeError):
-                                continue
-                        # Adicionar informação se é ativo ou não para facilitar filtragem no frontend
-                    equipments_with_status.append(equip_dict)
-                
-                # Log extra para depuração
-                if 'WALDERY' in school_raw['description'] or 'CELY' in school_raw['description']:
-                    print(f"======= ESCOLA ESPECIAL: {school_raw['description']} =======")
-                    print(f">>> Equipamentos na lista: {len(equipments_with_status)}")
-                    if len(equipments_with_status) > 0:
-                        first_equip = equipments_with_status[0]
-                        print(f">>> Primeiro equipamento: ID={first_equip['id']}, Nome={first_equip.get('name', 'N/A')}, Ativo={first_equip.get('ativo', 'N/A')}")
-                    print("====================================================")
-                    
-                print(f"[LOG] Lista final de equipamentos para esta escola contém: {len(equipments_with_status)} itens.")
-
-                # Filtra tarefas para cálculo de métricas (exclui PMOC)
-                tasks_for_metrics = [t for t in school_tasks if t.get('taskType') != pmoc_task_type_id]
-                answered_equipments_ids = set()
-                for task in tasks_for_metrics:
-                    if task['taskStatus'] == 5 and task.get('questionnaires'):
-                        try:
-                            questionnaires_list = json.loads(task['questionnaires'])
-                            if isinstance(questionnaires_list, list):
-                                for q in questionnaires_list:
-                                    if q and q.get('questionnaireEquipamentId'):
-                                        answered_equipments_ids.add(q['questionnaireEquipamentId'])
-                        except (json.JSONDecodeError, TypeError): pass
-                
-                total_realizadas = len(answered_equipments_ids)
-                percentual = round((total_realizadas / total_ativos) * 100) if total_ativos > 0 else 0
-
-                school_data_entry = {
-                    "school_info": dict(school_raw),
-                    "equipments": equipments_with_status,
-                    "tasks": [dict(t) for t in school_tasks],
-                    "metrics": {"ativos": total_ativos, "realizadas": total_realizadas, "percentual": percentual}
-                }
-                
-                # Verificar se os equipamentos estão sendo adicionados corretamente aos dados da escola
-                if 'WALDERY' in school_raw['description'] or 'CELY' in school_raw['description']:
-                    print(f">>> Equipamentos adicionados aos dados da escola {school_raw['description']}: {len(school_data_entry['equipments'])}")
-                    
-                schools_data.append(school_data_entry)
+            schools_data, all_tasks = _build_schools_data(cur, schools_raw, tasks_to_process, task_type_map, pmoc_task_type_id)
 
-            # Log para debug - verificar estrutura de dados
-            print("\n=== RESUMO DAS ESCOLAS PROCESSADAS ===\n")
-            for school_data in schools_data:
-                try:
-                    school_name = school_data['school_info']['description']
-                    equip_count = len(school_data.get('equipments', [])) 
-                    print(f"Escola: {school_name}, Total de equipamentos: {equip_count}")
-                    if equip_count > 0 and 'CAMARA' in school_name:
-                        print(f"  Amostra de equipamento: {school_data['equipments'][0]}")
-                except Exception as e:
-                    print(f"Erro ao processar escola: {e}")
-            
             # 4. Filtrar colaboradores a partir das tarefas (idUserTo), como estava originalmente
             final_collaborator_ids = list({task['idUserTo'] for task in all_tasks if task.get('idUserTo')})
             final_collaborators = []
@@ -713,12 +1012,7 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                     tasks_by_type[type_id] = tasks_by_type.get(type_id, 0) + 1
             task_type_kpis = [{"id": tid, "description": task_type_map.get(tid, "Desconhecido"), "count": count} for tid, count in tasks_by_type.items()]
 
-            print("\n" + "="*50)
-            print("FINALIZANDO CÁLCULO DOS INDICADORES GERAIS")
-            print("="*50)
             total_equipments_in_view = sum(s['metrics']['ativos'] for s in schools_data)
-            print(f"[LOG] Soma de 's['metrics']['ativos']' de todas as escolas processadas: {total_equipments_in_view}")
-            print(f"[LOG] Valor final a ser enviado para o KPI 'Total de Equipamentos': {total_equipments_in_view}")
 
             indicators = {
                 "total_schools": len(schools_data),
@@ -741,18 +1035,7 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                 else:
                     # Valores primitivos são retornados como estão
                     return obj
-            
-            # LOG: Conferir se 'equipments' está presente em cada escola antes da sanitização
-            print('\n===== DEBUG schools_data antes da sanitização =====')
-            for idx, school in enumerate(schools_data):
-                print(f"Escola #{idx+1}: {school['school_info'].get('description', 'N/A')}")
-                print(f"  school.keys: {list(school.keys())}")
-                print(f"  Tem campo 'equipments'? {'equipments' in school}")
-                if 'equipments' in school:
-                    print(f"  Quantidade de equipamentos: {len(school['equipments'])}")
-                else:
-                    print("  ALERTA: Campo 'equipments' NÃO presente nesta escola!")
-            print('===============================================\n')
+
 
             # Sanitizar todos os dados para garantir serialização
             sanitized_schools = []
@@ -768,9 +1051,8 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                         "metrics": school.get("metrics", {})
                     }
                     sanitized_schools.append(sanitized_school)
-                except Exception as e:
-                    print(f"Erro ao sanitizar escola: {e}")
-                    print(f"Dados da escola com erro: {school}")
+                except Exception:
+                    logger.exception("Erro ao sanitizar escola %s", school.get("school_info", {}).get("id"))
             
             # Criar a resposta final com dados sanitizados
             final_response = {
@@ -781,59 +1063,114 @@ def _get_dashboard_by_contract_data(group_id: int, start_date: str = None, end_d
                 "tasks": [dict(t) for t in all_tasks],
                 "managers": contract_managers  # Adicionar informações dos managers
             }
-            
-            print("\n==== VERIFICAÇÃO FINAL DE RESPOSTA PARA O FRONTEND =====\n")
-            print(f"Total de escolas sanitizadas: {len(final_response['schools'])}")
-            
-            try:
-                if final_response['schools']:
-                    first_school = final_response['schools'][0]
-                    print(f"Primeira escola: {first_school['school_info']['description']}")
-                    print(f"Equipamentos na primeira escola: {len(first_school.get('equipments', []))}")
-                
-                # Teste de serialização
-                json_str = json.dumps(final_response)
-                print("Serialização para JSON bem-sucedida!")
-            except Exception as json_err:
-                print(f"ERRO DE SERIALIZAÇÃO: {json_err}")
-                # Em caso de erro, retornar uma resposta simplificada
-                return {"error": "Erro ao serializar dados", "detail": str(json_err)}
-            
+
+            logger.info(
+                "Dashboard do contrato %s montado: %d escolas, %d equipamentos, %d tarefas",
+                group_id, len(sanitized_schools), total_equipments_in_view, total_tasks
+            )
             return final_response
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Erro ao montar o dashboard do contrato %s", group_id)
         raise HTTPException(status_code=500, detail=f"Ocorreu um erro inesperado: {e}")
 
+def _get_dashboard_snapshot(group_id: int, start_date: str = None, end_date: str = None, read_conn=None):
+    """
+    Retorna o payload serializado do dashboard do contrato, servindo o snapshot
+    materializado quando os dados do contrato não mudaram desde a última montagem.
+
+    `read_conn` (opcional) é a conexão usada para montar o payload, ex.: a conexão
+    somente leitura de um worker do lote.
+
+    Returns:
+        tuple: (payload_json, cache_status, idade do snapshot em segundos)
+    """
+    with get_db_connection() as conn:
+        return get_or_build_snapshot(
+            conn, group_id, start_date, end_date,
+            lambda: _get_dashboard_by_contract_data(group_id, start_date=start_date, end_date=end_date, conn=read_conn)
+        )
+
+def _project_dashboard(data: dict, fields: str):
+    """
+    Aplica a projeção `fields=` às linhas de tarefas do dashboard (tarefas de cada
+    escola e lista geral), ex.: fields=-questionnaires,-products,-services,-summary.
+    """
+    include, exclude = parse_fields(fields)
+    if include is None and not exclude:
+        return data
+    for school in data.get("schools", []):
+        school["tasks"] = [project_row(task, include, exclude) for task in school.get("tasks", [])]
+    if "tasks" in data:
+        data["tasks"] = [project_row(task, include, exclude) for task in data["tasks"]]
+    return data
+
+def _snapshot_response(payload: str, cache_status: str, age_seconds: int, fields: str = None):
+    headers = {"X-Snapshot-Cache": cache_status, "X-Snapshot-Age": str(age_seconds)}
+    if not fields:
+        return Response(content=payload, media_type="application/json", headers=headers)
+    # Com projeção, a resposta é codificada e enviada escola a escola
+    data = _project_dashboard(json_loads(payload), fields)
+    return StreamingResponse(iter_json(data), media_type="application/json", headers=headers)
+
+def _iter_batch_json(payloads: list):
+    yield "["
+    for index, payload in enumerate(payloads):
+        yield ("," if index else "") + payload
+    yield "]"
+
 @app.post("/api/dashboard/batch")
 def get_dashboard_batch(request: DashboardBatchRequest):
     """
     Recebe uma lista de IDs de contrato e retorna os dados do dashboard para cada um.
+
+    Os contratos são montados em paralelo. Contratos com erro não derrubam o lote:
+    a lista traz apenas os dashboards montados e os erros vão no cabeçalho
+    X-Batch-Errors (ou no corpo, com include_errors=True).
     """
-    results = []
+    def build(contract_id, read_conn):
+        payload = _get_dashboard_snapshot(group_id=contract_id, read_conn=read_conn)[0]
+        if request.fields:
+            payload = json_dumps(_project_dashboard(json_loads(payload), request.fields))
+        return payload
+
     try:
-        for contract_id in request.contract_ids:
-            data = _get_dashboard_by_contract_data(group_id=contract_id)
-            results.append(data)
-        return results
+        payloads, errors = run_dashboard_batch(request.contract_ids, build, DB_PATH, dict_factory)
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Erro ao processar lote de dashboards")
         raise HTTPException(status_code=500, detail=f"Erro ao processar lote de dashboards: {e}")
 
+    if errors and not payloads:
+        raise HTTPException(status_code=500, detail={"message": "Nenhum dashboard do lote pôde ser montado", "errors": errors})
+
+    if request.include_errors:
+        chunks = ['{"results":', *_iter_batch_json(payloads), ',"errors":', json_dumps(errors), '}']
+        return StreamingResponse(iter(chunks), media_type="application/json")
+    headers = {"X-Batch-Errors": json.dumps(errors)} if errors else None
+    return StreamingResponse(_iter_batch_json(payloads), media_type="application/json", headers=headers)
+
+
+@app.get("/api/dashboard-snapshots/stats")
+def get_dashboard_snapshots_stats():
+    """Contadores de hit/miss dos snapshots do dashboard e idade de cada snapshot gravado."""
+    try:
+        with get_db_connection() as conn:
+            return get_snapshot_stats(conn)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar snapshots: {e}")
 
 @app.get("/api/dashboard/{group_id}")
-def get_dashboard_by_contract(group_id: int):
-    return _get_dashboard_by_contract_data(group_id)
+def get_dashboard_by_contract(group_id: int, fields: Optional[str] = None):
+    return _snapshot_response(*_get_dashboard_snapshot(group_id), fields=fields)
 
 @app.get("/api/faturamento-report/{group_id}")
-def get_faturamento_report(group_id: int, start_date: str, end_date: str):
-    return _get_dashboard_by_contract_data(group_id, start_date=start_date, end_date=end_date)
+def get_faturamento_report(group_id: int, start_date: str, end_date: str, fields: Optional[str] = None):
+    return _snapshot_response(*_get_dashboard_snapshot(group_id, start_date=start_date, end_date=end_date), fields=fields)
 
 @app.get("/api/contract-collaborators/{group_id}")
 def get_contract_collaborators(group_id: int):
     with get_db_connection() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT * FROM customers WHERE groupsId LIKE ?", (f'%{group_id}%',))
-        schools = cur.fetchall()
+        schools = get_schools_by_group(cur, group_id)
         all_manager_ids = set()
         for school in schools:
             managers_field = school.get('managersId', '[]')
@@ -900,7 +1237,7 @@ def get_financial_summary(group_id: int, start_date: str, end_date: str):
 
         conn.close()
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Erro ao gerar resumo financeiro")
         raise HTTPException(status_code=500, detail=f"Erro ao gerar resumo financeiro: {e}")
 
 
@@ -1,16 +1,25 @@
 import sqlite3
 import json
-import traceback
 import os
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List, Optional
 import bcrypt
+import asyncio
 from datetime import datetime, timedelta
+from downloads.customer_group_members import ensure_customer_group_members, get_school_ids_by_group, get_schools_by_group
+from migrations import apply_migrations
+from dashboard_batch import run_dashboard_batch
+from api_logging import get_logger, install_request_id_middleware
+from json_encoding import dumps as json_dumps
 
 # --- Configuração ---
 app = FastAPI(title="Painel Auvo Mobile API")
+logger = get_logger("api_backend_mobile")
+install_request_id_middleware(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +31,15 @@ app.add_middleware(
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'auvo.db')
 
+@app.on_event("startup")
+async def startup_event():
+    # Associação normalizada contrato -> escola (populada a partir de customers.groupsId)
+    conn = sqlite3.connect(DB_PATH)
+    # Migrações versionadas (índices, tabelas auxiliares)
+    apply_migrations(conn)
+    ensure_customer_group_members(conn)
+    conn.close()
+
 # --- Models ---
 class LoginRequest(BaseModel):
     username: str
@@ -39,6 +57,8 @@ class User(BaseModel):
 
 class DashboardBatchRequest(BaseModel):
     contract_ids: List[int]
+    # Se True, responde {"results": [...], "errors": [...]} em vez da lista de dashboards
+    include_errors: Optional[bool] = False
 
 class School(BaseModel):
     id: int
@@ -186,34 +206,47 @@ async def login(login_data: LoginRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Erro no login: {str(e)}")
+        logger.exception("Erro no login")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 @app.post("/api/dashboard/batch")
 async def get_dashboard_batch(request: DashboardBatchRequest):
     """
     Retorna dados do dashboard para múltiplos contratos (otimizado para mobile)
+
+    Os contratos são montados em paralelo fora do event loop. Contratos com erro não
+    derrubam o lote: a lista traz apenas os dashboards montados e os erros vão no
+    cabeçalho X-Batch-Errors (ou no corpo, com include_errors=True).
     """
     try:
-        dashboard_data = []
-        
-        for contract_id in request.contract_ids:
-            print(f"Processando contrato: {contract_id}")
-            data = await get_dashboard_by_contract_mobile(contract_id)
-            dashboard_data.append(data)
-        
-        return dashboard_data
-        
+        # to_thread copia o contexto (ID da requisição) para a thread
+        dashboard_data, errors = await asyncio.to_thread(
+            run_dashboard_batch, request.contract_ids, get_dashboard_by_contract_mobile, DB_PATH, dict_factory
+        )
     except Exception as e:
-        print(f"Erro ao buscar dashboard batch: {str(e)}")
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Erro ao buscar dashboard batch")
         raise HTTPException(status_code=500, detail=f"Erro ao carregar dados do dashboard: {str(e)}")
 
-async def get_dashboard_by_contract_mobile(contract_id: int) -> DashboardData:
+    if errors:
+        logger.warning("Erros no dashboard batch: %s", errors)
+        if not dashboard_data:
+            raise HTTPException(status_code=500, detail={"message": "Erro ao carregar dados do dashboard", "errors": errors})
+
+    if request.include_errors:
+        return {"results": dashboard_data, "errors": errors}
+    headers = {"X-Batch-Errors": json.dumps(errors)} if errors else None
+    return Response(content=json_dumps(jsonable_encoder(dashboard_data)), media_type="application/json", headers=headers)
+
+def get_dashboard_by_contract_mobile(contract_id: int, conn=None) -> DashboardData:
     """
     Busca dados do dashboard para um contrato específico (usa a mesma lógica do backend principal)
+
+    `conn` (opcional) é uma conexão já aberta, ex.: a conexão somente leitura de um
+    worker do lote; nesse caso ela não é fechada aqui.
     """
-    conn = get_db_connection()
+    owns_connection = conn is None
+    if owns_connection:
+        conn = get_db_connection()
     
     try:
         cursor = conn.cursor()
@@ -225,8 +258,7 @@ async def get_dashboard_by_contract_mobile(contract_id: int) -> DashboardData:
             raise HTTPException(status_code=404, detail="Contrato não encontrado")
         
         # 2. Busca escolas do contrato
-        cursor.execute("SELECT * FROM customers WHERE groupsId LIKE ?", (f'%{contract_id}%',))
-        schools_raw = cursor.fetchall()
+        schools_raw = get_schools_by_group(cursor, contract_id)
         school_ids = [s['id'] for s in schools_raw]
         
         if not school_ids:
@@ -427,7 +459,8 @@ async def get_dashboard_by_contract_mobile(contract_id: int) -> DashboardData:
         return dashboard_data
         
     finally:
-        conn.close()
+        if owns_connection:
+            conn.close()
 
 @app.get("/api/contracts")
 async def get_contracts():
@@ -453,7 +486,7 @@ async def get_contracts():
         return contracts
         
     except Exception as e:
-        print(f"Erro ao buscar contratos: {str(e)}")
+        logger.exception("Erro ao buscar contratos")
         raise HTTPException(status_code=500, detail="Erro ao carregar contratos")
 
 @app.get("/api/tasks/pending")
@@ -467,13 +500,7 @@ async def get_pending_tasks(contract_ids: str):
         conn = get_db_connection()
         
         # Busca escolas dos contratos
-        placeholders = ','.join(['?' for _ in contract_id_list])
-        cursor = conn.execute(f"""
-            SELECT id FROM customers 
-            WHERE groupsId IN ({placeholders}) OR groupsId LIKE '%' || ? || '%'
-        """, contract_id_list + [str(contract_id_list[0])])
-        
-        school_ids = [row['id'] for row in cursor.fetchall()]
+        school_ids = get_school_ids_by_group(conn, contract_id_list)
         
         if not school_ids:
             return []
@@ -519,7 +546,7 @@ async def get_pending_tasks(contract_ids: str):
         return tasks
         
     except Exception as e:
-        print(f"Erro ao buscar tarefas pendentes: {str(e)}")
+        logger.exception("Erro ao buscar tarefas pendentes")
         raise HTTPException(status_code=500, detail="Erro ao carregar tarefas pendentes")
 
 @app.get("/api/tasks/due")
@@ -537,13 +564,7 @@ async def get_due_tasks(contract_ids: str, days_ahead: int = 7):
         conn = get_db_connection()
         
         # Busca escolas dos contratos
-        placeholders = ','.join(['?' for _ in contract_id_list])
-        cursor = conn.execute(f"""
-            SELECT id FROM customers 
-            WHERE groupsId IN ({placeholders}) OR groupsId LIKE '%' || ? || '%'
-        """, contract_id_list + [str(contract_id_list[0])])
-        
-        school_ids = [row['id'] for row in cursor.fetchall()]
+        school_ids = get_school_ids_by_group(conn, contract_id_list)
         
         if not school_ids:
             return []
@@ -590,7 +611,7 @@ async def get_due_tasks(contract_ids: str, days_ahead: int = 7):
         return tasks
         
     except Exception as e:
-        print(f"Erro ao buscar tarefas próximas do prazo: {str(e)}")
+        logger.exception("Erro ao buscar tarefas próximas do prazo")
         raise HTTPException(status_code=500, detail="Erro ao carregar tarefas próximas do prazo")
 
 if __name__ == '__main__':
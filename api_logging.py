@@ -0,0 +1,122 @@
+"""
+Logging das APIs (api_backend, api_backend_mobile e módulos do dashboard).
+
+Cada módulo obtém seu logger com `get_logger("nome_do_modulo")`. O nível é lido de
+variáveis de ambiente, por módulo:
+
+    LOG_LEVEL=INFO                  # padrão para todos os módulos
+    LOG_LEVEL_API_BACKEND=DEBUG     # só o api_backend em DEBUG
+
+As mensagens de depuração do dashboard (escolas, managers, equipamentos) são
+emitidas em DEBUG e, por padrão, não são montadas nem impressas.
+
+Toda linha de log inclui o ID da requisição, recebido no cabeçalho X-Request-ID ou
+gerado pelo middleware instalado com `install_request_id_middleware(app)`, e
+devolvido no mesmo cabeçalho da resposta.
+"""
+import contextvars
+import logging
+import os
+import sys
+import uuid
+
+REQUEST_ID_HEADER = "X-Request-ID"
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] [req=%(request_id)s] %(message)s"
+DEFAULT_LEVEL = "INFO"
+
+_request_id = contextvars.ContextVar("request_id", default="-")
+_handler = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Adiciona o ID da requisição atual (`request_id`) aos registros de log."""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+def _get_handler():
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler(sys.stdout)
+        _handler.addFilter(RequestIdFilter())
+        _handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    return _handler
+
+
+def get_log_level(name):
+    """
+    Retorna o nível de log configurado para um módulo.
+
+    Args:
+        name (str): Nome do logger (ex.: "api_backend")
+
+    Returns:
+        int: Nível (logging.DEBUG, logging.INFO, ...); INFO se o valor for inválido
+    """
+    env_name = "LOG_LEVEL_" + name.upper().replace(".", "_")
+    value = (os.getenv(env_name) or os.getenv("LOG_LEVEL") or DEFAULT_LEVEL).strip().upper()
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else logging.INFO
+
+
+def get_logger(name):
+    """
+    Retorna o logger de um módulo das APIs, configurado com o nível do ambiente.
+
+    Args:
+        name (str): Nome do módulo (ex.: "api_backend", "dashboard_batch")
+
+    Returns:
+        logging.Logger: Logger com saída em stdout e ID da requisição
+    """
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, RequestIdFilter) for h in logger.handlers for f in h.filters):
+        logger.addHandler(_get_handler())
+        logger.propagate = False
+        logger.setLevel(get_log_level(name))
+    return logger
+
+
+def get_request_id():
+    """Retorna o ID da requisição atual ("-" fora de uma requisição)."""
+    return _request_id.get()
+
+
+def set_request_id(request_id=None):
+    """
+    Define o ID da requisição do contexto atual.
+
+    Args:
+        request_id (str | None): ID recebido do cliente; se vazio, um novo é gerado
+
+    Returns:
+        contextvars.Token: Token para restaurar o valor anterior com `reset_request_id`
+    """
+    request_id = (request_id or "").strip()[:64] or uuid.uuid4().hex[:12]
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    """Restaura o ID de requisição anterior a `set_request_id`."""
+    _request_id.reset(token)
+
+
+def install_request_id_middleware(app):
+    """
+    Registra no app FastAPI o middleware que define o ID de cada requisição.
+
+    O ID é propagado para os endpoints síncronos (threadpool) e para os workers do
+    dashboard batch, que copiam o contexto ao serem enfileirados.
+    """
+    @app.middleware("http")
+    async def request_id_middleware(request, call_next):
+        token = set_request_id(request.headers.get(REQUEST_ID_HEADER))
+        request_id = get_request_id()
+        try:
+            response = await call_next(request)
+        finally:
+            reset_request_id(token)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
@@ -1,54 +1,55 @@
-import requests
+import json
+import threading
+
+from auvo_client import AuvoAPIError, AuvoClient
 from .env_reader import API_URL, API_KEY, API_TOKEN
 
+# Cliente único do processo: guarda o accessToken até perto do `expiration`
+# devolvido pelo login e é seguro para uso entre threads.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Retorna o cliente da API Auvo compartilhado pelo processo (criado na primeira chamada)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AuvoClient(API_KEY, API_TOKEN, base_url=API_URL)
+        return _client
+
+
+def _erro(e):
+    if e.status_code is None:
+        return {"erro": str(e)}
+    return {"erro": f"Erro {e.status_code}", "detalhes": e.body}
+
+
 def autenticar():
-    """Realiza a autenticação na API da Auvo e retorna o accessToken."""
+    """Retorna o accessToken da API da Auvo, fazendo login só quando o token em cache expira."""
     try:
-        url = f"{API_URL}/login/?apiKey={API_KEY}&apiToken={API_TOKEN}"
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            return response.json()["result"]["accessToken"]
-        else:
-            print(f"Erro ao autenticar: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Exceção na autenticação: {str(e)}")
+        return get_client().login()
+    except AuvoAPIError as e:
+        print(f"Erro ao autenticar: {e}")
         return None
 
+
 def get_user_json(user_id):
     """Recupera informações de um usuário pelo ID."""
-    token = autenticar()
-    if not token:
+    if not autenticar():
         return {"erro": "Falha na autenticação"}
 
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'x-api-key': API_KEY,
-        'Content-Type': 'application/json'
-    }
-
-    url = f"{API_URL}/users/{user_id}"
-    response = requests.get(url, headers=headers)
+    try:
+        return get_client().get(f"/users/{user_id}").get("result", {})
+    except AuvoAPIError as e:
+        return _erro(e)
 
-    if response.status_code == 200:
-        return response.json().get("result", {})
-    else:
-        return {"erro": f"Erro {response.status_code}", "detalhes": response.text}
 
 def get_user_tasks(user_id, data_inicio, data_fim):
     """Busca tarefas de um usuário no intervalo de datas informado via GET."""
-    import json
-    token = autenticar()
-    if not token:
+    if not autenticar():
         return {"erro": "Falha na autenticação"}
 
-    headers = {
-        'Authorization': f'Bearer {token}',
-        'x-api-key': API_KEY,
-        'Content-Type': 'application/json'
-    }
-
     params = {
         "paramFilter": json.dumps({
             "idUserTo": user_id,
@@ -60,10 +61,32 @@ def get_user_tasks(user_id, data_inicio, data_fim):
         "order": "asc"
     }
 
-    url = f"{API_URL}/tasks/"
-    response = requests.get(url, headers=headers, params=params)
+    try:
+        return get_client().get("/tasks/", params=params).get("result", {}).get("entityList", [])
+    except AuvoAPIError as e:
+        return _erro(e)
+
+
+def get_tasks_periodo(data_inicio, data_fim, user_id=None):
+    """
+    Busca todas as tarefas do intervalo de datas, percorrendo todas as páginas.
 
-    if response.status_code == 200:
-        return response.json().get("result", {}).get("entityList", [])
-    else:
-        return {"erro": f"Erro {response.status_code}", "detalhes": response.text}
+    Sem `user_id`, traz as tarefas de todos os usuários (cada tarefa informa o
+    responsável em `idUserTo`). Se alguma página falhar, retorna o erro (dict com
+    "erro") em vez das páginas obtidas até ali.
+    """
+    if not autenticar():
+        return {"erro": "Falha na autenticação"}
+
+    filtro = {
+        "startDate": f"{data_inicio}T00:00:00",
+        "endDate": f"{data_fim}T23:59:59"
+    }
+    if user_id is not None:
+        filtro["idUserTo"] = user_id
+
+    try:
+        return get_client().get_all("/tasks/", params={"paramFilter": json.dumps(filtro)},
+                                    entity_name="tarefas", verbose=False, strict=True)
+    except AuvoAPIError as e:
+        return _erro(e)
@@ -1,15 +1,19 @@
+import argparse
 import os
 import sys
 import sqlite3
+import time
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
 from calendar import monthrange
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'painel')))
 
-from app.api_auvo import get_user_tasks
+from app.api_auvo import get_client, get_tasks_periodo, get_user_tasks
 from app.env_reader import USUARIOS
+from tarefas_normalizadas import criar_tabelas_normalizadas
 
 # Detectar o sistema operacional
 is_windows = os.name == 'nt'
@@ -48,8 +52,14 @@ def criar_tabela_tarefas():
         )
     """)
     conn.commit()
+    # Colunas tipadas/indexadas mantidas por gatilhos a cada gravação em tarefas_raw
+    criar_tabelas_normalizadas(conn)
     conn.close()
 
+# Tarefas gravadas por transação (executemany)
+TAMANHO_LOTE = 500
+
+
 def salvar_tarefa(task, user_id, data_ref):
     conn = sqlite3.connect(DB_TAREFAS)
     cursor = conn.cursor()
@@ -62,12 +72,135 @@ def salvar_tarefa(task, user_id, data_ref):
     conn.commit()
     conn.close()
 
-def baixar_tarefas_mes_atual():
-    criar_tabela_tarefas()
+def salvar_tarefas(conn, linhas):
+    """
+    Grava as tarefas em uma única transação.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco de tarefas
+        linhas (list): Tuplas (taskID, user_id, data_referencia, json)
+
+    Returns:
+        int: Linhas gravadas
+    """
+    if not linhas:
+        return 0
+    with conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO tarefas_raw (taskID, user_id, data_referencia, json)
+            VALUES (?, ?, ?, ?)
+        """, linhas)
+    return len(linhas)
 
+def linha_tarefa(task, user_id, data_padrao):
+    """Monta a linha de tarefas_raw; data_referencia é o dia da tarefa (taskDate)."""
+    task_date = task.get("taskDate") or ""
+    data_ref = task_date[:10] if len(task_date) >= 10 else data_padrao
+    return (task.get("taskID"), user_id, data_ref, json.dumps(task))
+
+def exportar_cache_parquet():
+    """
+    Regrava o cache Parquet dos painéis (painel/colunar.py) a partir dos bancos
+    atualizados. Sem o pyarrow instalado, os painéis continuam lendo o SQLite.
+
+    Returns:
+        dict: Manifesto do cache, ou None se não foi gerado
+    """
+    try:
+        from colunar import exportar
+    except ImportError:
+        print("⚠️ pyarrow não instalado: cache Parquet dos painéis não atualizado")
+        return None
+    manifesto = exportar(os.path.join(os.path.dirname(DB_TAREFAS), "parquet"),
+                         DB_TAREFAS, DB_EQUIPAMENTOS, DB_CLIENTES)
+    if manifesto is None:
+        return None
+    print(f"🗂️ Cache Parquet dos painéis atualizado em {manifesto['segundos']:.1f}s")
+    return manifesto
+
+def periodo_mes_atual():
     hoje = datetime.now()
     data_inicio = hoje.replace(day=1)
     data_fim = hoje.replace(day=monthrange(hoje.year, hoje.month)[1])
+    return data_inicio, data_fim
+
+def imprimir_resumo(inicio, requisicoes, linhas, erros):
+    duracao = time.perf_counter() - inicio
+    print(f"\n⏱️ Tempo: {duracao:.1f}s | requisições à API: {requisicoes} | linhas gravadas: {linhas} | erros: {erros}")
+    return {"segundos": round(duracao, 2), "requisicoes": requisicoes, "linhas": linhas, "erros": erros}
+
+def baixar_tarefas_mes_atual(todos_usuarios=False):
+    """
+    Baixa as tarefas do mês atual para tarefas_raw.
+
+    Cada usuário é consultado uma vez para o mês inteiro (com paginação), em vez
+    de uma consulta por usuário e por dia. Com `todos_usuarios`, faz uma única
+    consulta paginada sem filtro de usuário e distribui as tarefas pelo `idUserTo`
+    (apenas usuários de USUARIOS). As tarefas são gravadas em lotes de TAMANHO_LOTE
+    por transação.
+
+    Returns:
+        dict: Tempo (s), requisições à API, linhas gravadas e erros
+    """
+    criar_tabela_tarefas()
+    inicio = time.perf_counter()
+    requisicoes_antes = get_client().stats["requests"]
+
+    data_inicio, data_fim = periodo_mes_atual()
+    data_inicio_str = data_inicio.strftime("%Y-%m-%d")
+    data_fim_str = data_fim.strftime("%Y-%m-%d")
+
+    if todos_usuarios:
+        print(f"\n🔍 Buscando tarefas de todos os usuários ({data_inicio_str} a {data_fim_str})")
+        consultas = [(None, "todos os usuários")]
+    else:
+        consultas = list(USUARIOS.items())
+
+    conn = sqlite3.connect(DB_TAREFAS)
+    pendentes = []
+    linhas_gravadas = 0
+    erros = 0
+    try:
+        for user_id, nome in consultas:
+            if user_id is not None:
+                print(f"\n🔍 Buscando tarefas de {nome} (ID {user_id})")
+            tarefas = get_tasks_periodo(data_inicio_str, data_fim_str, user_id)
+            if not isinstance(tarefas, list):
+                erros += 1
+                print(f"⚠️ Erro ao buscar tarefas de {nome}: {tarefas}")
+                continue
+
+            salvas = 0
+            for tarefa in tarefas:
+                if not isinstance(tarefa, dict) or not tarefa.get("taskID"):
+                    continue
+                responsavel = user_id if user_id is not None else tarefa.get("idUserTo")
+                if responsavel not in USUARIOS:
+                    continue
+                pendentes.append(linha_tarefa(tarefa, responsavel, data_inicio_str))
+                salvas += 1
+                if len(pendentes) >= TAMANHO_LOTE:
+                    linhas_gravadas += salvar_tarefas(conn, pendentes)
+                    pendentes = []
+            print(f"✔️ {salvas} tarefa(s) de {nome} no mês")
+        linhas_gravadas += salvar_tarefas(conn, pendentes)
+    finally:
+        conn.close()
+
+    return imprimir_resumo(inicio, get_client().stats["requests"] - requisicoes_antes, linhas_gravadas, erros)
+
+def baixar_tarefas_mes_atual_por_dia():
+    """
+    Versão anterior (uma consulta por usuário e por dia, uma conexão por tarefa),
+    mantida para comparar tempo e número de requisições com baixar_tarefas_mes_atual.
+    """
+    criar_tabela_tarefas()
+    inicio = time.perf_counter()
+    requisicoes_antes = get_client().stats["requests"]
+    linhas_gravadas = 0
+    erros = 0
+
+    data_inicio, data_fim = periodo_mes_atual()
 
     datas = [data_inicio + timedelta(days=i) for i in range((data_fim - data_inicio).days + 1)]
 
@@ -79,10 +212,28 @@ def baixar_tarefas_mes_atual():
             if isinstance(tarefas, list):
                 for tarefa in tarefas:
                     salvar_tarefa(tarefa, user_id, data_str)
+                linhas_gravadas += len(tarefas)
                 print(f"✔️ {len(tarefas)} tarefa(s) salvas em {data_str} para {nome}")
             else:
+                erros += 1
                 print(f"⚠️ Erro ao buscar tarefas de {nome} em {data_str}: {tarefas}")
 
+    return imprimir_resumo(inicio, get_client().stats["requests"] - requisicoes_antes, linhas_gravadas, erros)
+
 if __name__ == "__main__":
-    baixar_tarefas_mes_atual()
+    parser = argparse.ArgumentParser(description="Atualiza tarefas_raw com as tarefas do mês atual")
+    parser.add_argument("--todos-usuarios", action="store_true",
+                        help="uma única consulta paginada sem filtro de usuário")
+    parser.add_argument("--por-dia", action="store_true",
+                        help="modo anterior (usuário × dia), para comparação")
+    parser.add_argument("--sem-parquet", action="store_true",
+                        help="não regrava o cache Parquet dos painéis")
+    args = parser.parse_args()
+
+    if args.por_dia:
+        baixar_tarefas_mes_atual_por_dia()
+    else:
+        baixar_tarefas_mes_atual(todos_usuarios=args.todos_usuarios)
+    if not args.sem_parquet:
+        exportar_cache_parquet()
     print("\n✅ Atualização concluída: banco tarefas.sqlite3 atualizado com sucesso.")
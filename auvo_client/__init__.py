@@ -0,0 +1,10 @@
+"""
+Cliente compartilhado da API Auvo (sessão com pool de conexões, cache do token,
+limite de taxa, novas tentativas e paginação concorrente).
+
+Uso:
+    from auvo_client import get_client
+    users = get_client().get_all("/users", entity_name="usuários")
+"""
+from auvo_client.client import AuvoAPIError, AuvoClient, extract_entities, get_client, get_page_count
+from auvo_client.rate_limit import TokenBucket
@@ -0,0 +1,406 @@
+"""
+Cliente HTTP da API Auvo compartilhado pelos scripts de download.
+
+- Sessão `requests.Session` com pool de conexões (keep-alive entre páginas).
+- Token de acesso em cache, renovado antes de expirar e após um 401.
+- Token bucket para respeitar o limite de requisições da API.
+- Novas tentativas com backoff exponencial em 429/5xx e erros de conexão
+  (respeitando o cabeçalho Retry-After).
+- Paginação com busca concorrente das páginas restantes quando o total de
+  páginas é conhecido pela primeira resposta.
+
+Configuração (variáveis de ambiente / .env):
+    API_KEY, API_TOKEN, API_URL   credenciais e URL base (padrão https://api.auvo.com.br/v2)
+    AUVO_MAX_WORKERS              páginas buscadas em paralelo (padrão 4)
+    AUVO_RATE_LIMIT               requisições por segundo (padrão 5; 0 desliga)
+    AUVO_RATE_BURST               rajada máxima do token bucket (padrão AUVO_RATE_LIMIT)
+    AUVO_MAX_RETRIES              novas tentativas por requisição (padrão 5)
+    AUVO_RECORD_DIR               se definido, grava as respostas para o servidor mock
+"""
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from auvo_client.rate_limit import TokenBucket
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASE_URL = "https://api.auvo.com.br/v2"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Duração assumida do token quando a resposta de login não informa created/expiration
+DEFAULT_TOKEN_LIFETIME = 30 * 60
+
+
+class AuvoAPIError(Exception):
+    """Erro de uma requisição à API Auvo (status diferente de 200 após as tentativas)."""
+
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+def _env_number(name, default, cast=int):
+    value = os.getenv(name)
+    try:
+        return cast(value) if value not in (None, "") else default
+    except ValueError:
+        return default
+
+
+def extract_entities(data):
+    """
+    Extrai a lista de entidades de uma resposta da API Auvo.
+
+    Aceita `result` como lista (formato antigo) ou como dict com `entityList`.
+
+    Args:
+        data (dict): Resposta da API
+
+    Returns:
+        list: Entidades da página (vazia se o formato for desconhecido)
+    """
+    if not isinstance(data, dict):
+        return []
+    result = data.get("result", data)
+    if isinstance(result, dict):
+        result = result.get("entityList", [])
+    return result if isinstance(result, list) else []
+
+
+def get_page_count(data, page_size):
+    """
+    Retorna o total de páginas informado pela resposta, ou None se desconhecido.
+
+    Usa `pageCount` (quando existe) ou `pagedSearchReturnData.totalItems`.
+    """
+    if not isinstance(data, dict):
+        return None
+    result = data.get("result")
+    for source in (result if isinstance(result, dict) else {}, data):
+        if source.get("pageCount"):
+            return int(source["pageCount"])
+        paged = source.get("pagedSearchReturnData")
+        if isinstance(paged, dict) and paged.get("totalItems") is not None:
+            return math.ceil(int(paged["totalItems"]) / page_size)
+    return None
+
+
+def _parse_api_datetime(value):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(str(value)[:19], fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class AuvoClient:
+    """
+    Cliente da API Auvo, seguro para uso por várias threads.
+
+    Args:
+        api_key (str): API_KEY (padrão: variável de ambiente)
+        api_token (str): API_TOKEN (padrão: variável de ambiente)
+        base_url (str): URL base da API (padrão: API_URL ou a URL pública v2)
+        max_workers (int): Páginas buscadas em paralelo em `get_all`
+        rate_limit (float): Requisições por segundo (0 desliga o limite)
+        burst (int): Rajada máxima do token bucket
+        max_retries (int): Novas tentativas em 429/5xx/erros de conexão
+        timeout (float): Timeout de cada requisição, em segundos
+        refresh_margin (float): Renova o token quando faltar menos que isso (s)
+        backoff_base (float): Espera base do backoff exponencial (s)
+        record_dir (str): Diretório onde gravar as respostas (para o servidor mock)
+    """
+
+    def __init__(self, api_key=None, api_token=None, base_url=None, max_workers=None, rate_limit=None,
+                 burst=None, max_retries=None, timeout=60, refresh_margin=120, backoff_base=0.5,
+                 record_dir=None):
+        load_dotenv(os.path.join(ROOT_DIR, ".env"))
+        self.api_key = api_key or os.getenv("API_KEY")
+        self.api_token = api_token or os.getenv("API_TOKEN")
+        self.base_url = (base_url or os.getenv("API_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.max_workers = max_workers or _env_number("AUVO_MAX_WORKERS", 4)
+        self.max_retries = max_retries if max_retries is not None else _env_number("AUVO_MAX_RETRIES", 5)
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+        self.backoff_base = backoff_base
+        self.record_dir = record_dir or os.getenv("AUVO_RECORD_DIR") or None
+
+        rate = rate_limit if rate_limit is not None else _env_number("AUVO_RATE_LIMIT", 5, float)
+        self.rate_limiter = TokenBucket(rate, burst or _env_number("AUVO_RATE_BURST", None) or rate)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(10, self.max_workers * 2))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self.stats = {"requests": 0, "retries": 0, "logins": 0}
+        self._stats_lock = threading.Lock()
+
+    # --- Autenticação ---
+
+    def login(self, force=False, expired_token=None):
+        """
+        Retorna o token de acesso, fazendo login se não houver token válido.
+
+        O prazo do token é calculado pela diferença entre `expiration` e `created`
+        da resposta (ambos no relógio do servidor), então o fuso horário local não
+        interfere.
+
+        Args:
+            force (bool): Ignora o token em cache
+            expired_token (str): Token recusado com 401; só é renovado se ainda for o
+                token em cache (várias threads recebendo 401 geram um único login)
+
+        Returns:
+            str: Token de acesso
+        """
+        with self._token_lock:
+            if expired_token is not None and self._token != expired_token:
+                return self._token
+            if (not force and expired_token is None and self._token
+                    and time.monotonic() < self._token_expires_at - self.refresh_margin):
+                return self._token
+            if not self.api_key or not self.api_token:
+                raise AuvoAPIError("Credenciais da API não encontradas no arquivo .env!")
+
+            data = self._send("GET", f"{self.base_url}/login/",
+                              params={"apiKey": self.api_key, "apiToken": self.api_token}, authenticated=False)
+            result = data.get("result") or {}
+            if not result.get("authenticated") or not result.get("accessToken"):
+                raise AuvoAPIError("Falha na autenticação!", body=data)
+
+            created = _parse_api_datetime(result.get("created"))
+            expiration = _parse_api_datetime(result.get("expiration"))
+            lifetime = (expiration - created).total_seconds() if created and expiration else DEFAULT_TOKEN_LIFETIME
+            self._token = result["accessToken"]
+            self._token_expires_at = time.monotonic() + lifetime
+            self._count("logins")
+            print(f"Login realizado com sucesso! Token válido até: {result.get('expiration')}")
+            return self._token
+
+    def headers(self, token=None):
+        """Cabeçalhos autenticados para requisições à API."""
+        return {
+            "Authorization": f"Bearer {token or self.login()}",
+            "Content-Type": "application/json",
+            "x-api-key": self.api_key or "",
+        }
+
+    # --- Requisições ---
+
+    def url(self, path):
+        """Monta a URL de um endpoint (aceita caminho relativo ou URL completa)."""
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def request(self, method, path, params=None, json_body=None):
+        """
+        Faz uma requisição autenticada e retorna o JSON da resposta.
+
+        Raises:
+            AuvoAPIError: Se a resposta não for 200 após as novas tentativas
+        """
+        return self._send(method, self.url(path), params=params, json_body=json_body)
+
+    def get(self, path, params=None):
+        """GET autenticado; retorna o JSON da resposta."""
+        return self.request("GET", path, params=params)
+
+    def _send(self, method, url, params=None, json_body=None, authenticated=True):
+        reauthenticated = False
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            token = self.login() if authenticated else None
+            headers = self.headers(token) if authenticated else {"Content-Type": "application/json"}
+            self._count("requests")
+            try:
+                response = self.session.request(method, url, params=params, json=json_body,
+                                                headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise AuvoAPIError(f"Erro de conexão com a API Auvo: {e}") from e
+                self._wait_before_retry(attempt, None)
+                attempt += 1
+                continue
+
+            if response.status_code == 401 and authenticated and not reauthenticated:
+                # Token revogado ou expirado antes do previsto
+                self.login(expired_token=token)
+                reauthenticated = True
+                continue
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                self._wait_before_retry(attempt, response)
+                attempt += 1
+                continue
+
+            if response.status_code != 200:
+                raise AuvoAPIError(
+                    f"Erro {response.status_code} em {method} {urlsplit(url).path}: {response.text[:500]}",
+                    status_code=response.status_code, body=response.text
+                )
+
+            data = response.json()
+            # O login não é gravado (a URL contém as credenciais)
+            if self.record_dir and method == "GET" and authenticated:
+                self._record(url, params, data)
+            return data
+
+    def _wait_before_retry(self, attempt, response):
+        self._count("retries")
+        retry_after = None
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After"))
+            except (TypeError, ValueError):
+                retry_after = None
+        delay = retry_after if retry_after is not None else self.backoff_base * (2 ** attempt) * random.uniform(0.8, 1.2)
+        status = response.status_code if response is not None else "erro de conexão"
+        print(f"API Auvo respondeu {status}; nova tentativa em {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+        if response is not None and response.status_code == 429:
+            # Vale para todas as threads: o limite é por credencial
+            self.rate_limiter.pause(delay)
+        else:
+            time.sleep(delay)
+
+    def _count(self, counter):
+        with self._stats_lock:
+            self.stats[counter] += 1
+
+    def _record(self, url, params, data):
+        from auvo_client.mock_server import save_recording
+        base_path = urlsplit(self.base_url).path
+        path = urlsplit(url).path
+        if path.startswith(base_path):
+            path = path[len(base_path):]
+        save_recording(self.record_dir, path, params or {}, data)
+
+    # --- Paginação ---
+
+    def get_page(self, path, page, page_size=100, params=None, order="asc"):
+        """
+        Busca uma página de um endpoint paginado.
+
+        Returns:
+            tuple: (entidades da página, resposta completa)
+        """
+        page_params = {"page": page, "pageSize": page_size}
+        if order:
+            page_params["order"] = order
+        page_params.update(params or {})
+        data = self.get(path, params=page_params)
+        return extract_entities(data), data
+
+    def get_all(self, path, params=None, entity_name="registros", page_size=100, order="asc",
+                max_workers=None, verbose=True, strict=False):
+        """
+        Busca todas as páginas de um endpoint paginado.
+
+        A primeira página é buscada sozinha; se ela informar o total de páginas, as
+        demais são buscadas em paralelo (até `max_workers`), sujeitas ao limitador
+        de taxa. Caso contrário, as páginas são buscadas em sequência até uma página
+        incompleta.
+
+        Em caso de erro, retorna as entidades das páginas obtidas até a primeira
+        página que falhou (como os loops anteriores dos scripts). Com `strict`, o
+        AuvoAPIError é propagado: quem depende da listagem completa (sincronização,
+        atualização do mês) não confunde uma listagem parcial com a completa.
+
+        Args:
+            path (str): Endpoint (ex.: "/users") ou URL completa
+            params (dict): Parâmetros adicionais (ex.: paramFilter)
+            entity_name (str): Nome da entidade para as mensagens
+            page_size (int): Tamanho da página
+            order (str): Ordenação ("asc"); None para não enviar
+            max_workers (int): Páginas em paralelo (padrão: o do cliente)
+            verbose (bool): Imprime o progresso por página
+            strict (bool): Propaga o erro em vez de retornar as páginas obtidas
+
+        Returns:
+            list: Entidades de todas as páginas, na ordem das páginas
+
+        Raises:
+            AuvoAPIError: Com `strict`, se alguma página falhar
+        """
+        all_entities = []
+        try:
+            entities, data = self.get_page(path, 1, page_size, params, order)
+            all_entities.extend(entities)
+            if verbose:
+                print(f"Encontrados {len(entities)} {entity_name} na página 1")
+
+            page_count = get_page_count(data, page_size)
+            if len(entities) >= page_size and page_count and page_count > 1:
+                workers = max(1, min(max_workers or self.max_workers, page_count - 1))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auvo-page") as pool:
+                    futures = [pool.submit(self.get_page, path, page, page_size, params, order)
+                               for page in range(2, page_count + 1)]
+                    for page, future in enumerate(futures, start=2):
+                        entities, _ = future.result()
+                        all_entities.extend(entities)
+                        if verbose:
+                            print(f"Encontrados {len(entities)} {entity_name} na página {page}")
+                # O total pode ter crescido durante a busca: continua em sequência
+                page = page_count
+                while len(entities) >= page_size:
+                    page += 1
+                    entities, _ = self.get_page(path, page, page_size, params, order)
+                    all_entities.extend(entities)
+                    if verbose:
+                        print(f"Encontrados {len(entities)} {entity_name} na página {page}")
+            else:
+                page = 1
+                while len(entities) >= page_size:
+                    page += 1
+                    entities, _ = self.get_page(path, page, page_size, params, order)
+                    all_entities.extend(entities)
+                    if verbose:
+                        print(f"Encontrados {len(entities)} {entity_name} na página {page}")
+        except AuvoAPIError as e:
+            if strict:
+                raise
+            print(f"Erro ao buscar {entity_name}: {e}")
+
+        if verbose:
+            print(f"Total de {entity_name} encontrados: {len(all_entities)}")
+        return all_entities
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Retorna o cliente compartilhado do processo (criado na primeira chamada).
+
+    Raises:
+        AuvoAPIError: Se as credenciais não estiverem configuradas (os scripts
+            terminam com o erro; a API e os jobs o registram sem encerrar o processo)
+    """
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            client = AuvoClient()
+            if not client.api_key or not client.api_token:
+                raise AuvoAPIError("Credenciais da API não encontradas no arquivo .env!")
+            _shared_client = client
+        return _shared_client
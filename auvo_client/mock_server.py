@@ -0,0 +1,237 @@
+"""
+Servidor local que simula a API Auvo para testes do cliente e dos scripts de download.
+
+Responde a partir de:
+- respostas gravadas: arquivos JSON criados pelo cliente com AUVO_RECORD_DIR
+  (ou `save_recording`), casados por caminho + parâmetros da query;
+- coleções sintéticas: listas de entidades paginadas como a API real
+  (`entityList` + `pagedSearchReturnData`).
+
+O login é sempre simulado (as gravações não guardam credenciais nem tokens).
+
+Uso:
+    # 1. Gravar respostas reais
+    AUVO_RECORD_DIR=auvo_client/recordings python downloads/download_users.py
+    # 2. Reproduzir localmente
+    python -m auvo_client.mock_server --recordings auvo_client/recordings --port 8765
+    API_URL=http://127.0.0.1:8765/v2 python downloads/download_users.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+BASE_PATH = "/v2"
+# Parâmetros que nunca entram na chave das gravações
+IGNORED_PARAMS = {"apikey", "apitoken"}
+
+
+def _normalize_path(path):
+    return "/" + path.strip("/").lower()
+
+
+def recording_key(path, params):
+    """Chave de uma gravação: caminho (sem /v2) e parâmetros normalizados."""
+    query = sorted((str(k).lower(), str(v)) for k, v in dict(params).items() if str(k).lower() not in IGNORED_PARAMS)
+    return _normalize_path(path), tuple(query)
+
+
+def save_recording(record_dir, path, params, response):
+    """
+    Grava uma resposta da API para reprodução pelo servidor mock.
+
+    Args:
+        record_dir (str): Diretório das gravações
+        path (str): Caminho do endpoint relativo à URL base (ex.: "/users")
+        params (dict): Parâmetros da query
+        response (dict): JSON da resposta
+
+    Returns:
+        str: Caminho do arquivo gravado
+    """
+    os.makedirs(record_dir, exist_ok=True)
+    key_path, query = recording_key(path, params)
+    digest = hashlib.sha1(json.dumps([key_path, query]).encode("utf-8")).hexdigest()[:12]
+    slug = re.sub(r"[^a-z0-9]+", "_", key_path).strip("_") or "root"
+    file_path = os.path.join(record_dir, f"{slug}_{digest}.json")
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump({"path": key_path, "query": dict(query), "response": response}, f, ensure_ascii=False, indent=2)
+    return file_path
+
+
+def load_recordings(record_dir):
+    """Carrega as gravações de um diretório: {chave: resposta}."""
+    recordings = {}
+    if not record_dir or not os.path.isdir(record_dir):
+        return recordings
+    for file_name in sorted(os.listdir(record_dir)):
+        if file_name.endswith(".json"):
+            with open(os.path.join(record_dir, file_name), encoding="utf-8") as f:
+                recording = json.load(f)
+            recordings[recording_key(recording["path"], recording.get("query", {}))] = recording["response"]
+    return recordings
+
+
+class MockAuvoServer:
+    """
+    Servidor HTTP da API Auvo simulada, executado em uma thread.
+
+    Args:
+        recordings_dir (str): Diretório de respostas gravadas
+        collections (dict): {"/users": [entidades, ...]} servidas com paginação
+        token_lifetime (int): Validade dos tokens emitidos, em segundos
+        failures (dict): {"/users": [429, 500]} status devolvidos (em ordem) antes
+            das respostas normais do endpoint
+        latency (float): Atraso artificial por requisição, em segundos
+
+    Exemplo:
+        with MockAuvoServer(collections={"/users": users}) as server:
+            client = AuvoClient("key", "token", base_url=server.url)
+    """
+
+    def __init__(self, recordings_dir=None, collections=None, token_lifetime=1800, failures=None,
+                 latency=0, host="127.0.0.1", port=0):
+        self.recordings = load_recordings(recordings_dir)
+        self.collections = {_normalize_path(p): list(v) for p, v in (collections or {}).items()}
+        self.token_lifetime = token_lifetime
+        self.failures = {_normalize_path(p): list(v) for p, v in (failures or {}).items()}
+        self.latency = latency
+        self.requests_log = []
+        self.valid_tokens = set()
+        self._issued = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def revoke_tokens(self):
+        """Invalida os tokens emitidos (a próxima requisição recebe 401)."""
+        with self._lock:
+            self.valid_tokens.clear()
+
+    def count_requests(self, path):
+        """Número de requisições recebidas para um caminho (sem /v2)."""
+        path = _normalize_path(path)
+        return sum(1 for logged_path, _ in self.requests_log if logged_path == path)
+
+    # --- Respostas ---
+
+    def _login(self):
+        with self._lock:
+            self._issued += 1
+            token = f"mock-token-{self._issued}"
+            self.valid_tokens.add(token)
+        created = datetime.now()
+        return 200, {"result": {
+            "authenticated": True,
+            "created": created.strftime("%Y-%m-%d %H:%M:%S"),
+            "expiration": (created + timedelta(seconds=self.token_lifetime)).strftime("%Y-%m-%d %H:%M:%S"),
+            "accessToken": token,
+            "message": "OK",
+        }}
+
+    def _paginate(self, entities, params):
+        lower = {k.lower(): v for k, v in params.items()}
+        page = int(lower.get("page", 1))
+        page_size = int(lower.get("pagesize", 100))
+        start = (page - 1) * page_size
+        return {"result": {
+            "entityList": entities[start:start + page_size],
+            "pagedSearchReturnData": {"order": 0, "pageSize": page_size, "page": page, "totalItems": len(entities)},
+        }}
+
+    def respond(self, method, raw_path, query, authorization):
+        """Calcula (status, corpo, cabeçalhos) de uma requisição."""
+        if self.latency:
+            time.sleep(self.latency)
+        path = raw_path[len(BASE_PATH):] if raw_path.lower().startswith(BASE_PATH) else raw_path
+        path = _normalize_path(path)
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        with self._lock:
+            self.requests_log.append((path, params))
+
+        if path == "/login":
+            return (*self._login(), {})
+
+        token = (authorization or "").replace("Bearer ", "", 1)
+        with self._lock:
+            if token not in self.valid_tokens:
+                return 401, {"message": "Unauthorized"}, {}
+            pending = self.failures.get(path)
+            if pending:
+                status = pending.pop(0)
+                return status, {"message": f"Falha simulada {status}"}, {"Retry-After": "0"} if status == 429 else {}
+
+        recorded = self.recordings.get(recording_key(path, params))
+        if recorded is not None:
+            return 200, recorded, {}
+        if path in self.collections:
+            return 200, self._paginate(self.collections[path], params), {}
+        return 404, {"message": f"Endpoint não simulado: {method} {path}"}, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                status, body, headers = server.respond("GET", parts.path, parts.query,
+                                                       self.headers.get("Authorization"))
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock da API Auvo (respostas gravadas)")
+    parser.add_argument("--recordings", required=True, help="diretório das gravações (AUVO_RECORD_DIR)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = MockAuvoServer(recordings_dir=args.recordings, host=args.host, port=args.port)
+    print(f"API Auvo simulada em {server.url} ({len(server.recordings)} respostas gravadas)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Limitador de taxa (token bucket) compartilhado pelas threads do cliente Auvo.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe: permite rajadas de até `capacity` requisições e, em
+    regime, `rate` requisições por segundo.
+
+    Args:
+        rate (float): Tokens repostos por segundo (0 ou None desliga o limite)
+        capacity (int): Tamanho máximo da rajada
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate or 0)
+        self.capacity = float(capacity or max(1, self.rate))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self):
+        """Bloqueia até haver um token disponível e o consome."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """
+        Suspende a emissão de tokens por `seconds` (ex.: após um 429 com Retry-After),
+        valendo para todas as threads que usam o limitador.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0
+            self._paused_until = max(self._paused_until, now + seconds)
@@ -566,6 +566,11 @@ class AuvoDatabase:
             # Reativar a verificação de chaves estrangeiras
             self.cursor.execute("PRAGMA foreign_keys = ON")
             self.conn.commit()
+
+            # Índices e tabelas auxiliares (migrações versionadas)
+            print("\nAplicando migrações...")
+            from migrations import apply_migrations
+            apply_migrations(self.conn)
             
             print("\nTodas as tabelas foram criadas com sucesso!")
             return True
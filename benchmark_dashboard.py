@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da montagem do dashboard de contrato (_get_dashboard_by_contract_data).
+
+Gera um banco sintético com um contrato grande em diretório temporário e mede a
+montagem + serialização do payload (o caminho de um MISS do snapshot) em três
+cenários:
+
+- anterior: log em DEBUG (mensagens por escola e dos managers, equivalentes aos
+  prints que rodavam em toda requisição) + o json.dumps de teste que era feito
+  antes da serialização da resposta;
+- DEBUG: mensagens de depuração ligadas, sem a serialização de teste;
+- INFO: configuração padrão.
+
+Em seguida compara a serialização do payload com o json padrão e com o orjson
+(tempo e pico de memória alocada) e a resposta em streaming com
+fields=-questionnaires,-products,-services,-summary.
+
+O log é descartado (os.devnull) durante as medições; em terminal ou journald o custo
+da saída em DEBUG é ainda maior.
+
+Uso:
+    python benchmark_dashboard.py
+    python benchmark_dashboard.py --schools 500 --equipments 30 --tasks 60 --repeat 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import api_backend
+import api_logging
+import json_encoding
+from dashboard_snapshots import serialize_payload
+from downloads.customer_group_members import rebuild_customer_group_members
+
+CONTRACT_ID = 156750
+TASK_TYPE_IDS = [175644, 175648, 175164, 175646, 177626, 184717]
+HEAVY_TASK_FIELDS = "-questionnaires,-products,-services,-summary"
+
+
+def create_benchmark_db(db_path, schools, equipments_per_school, tasks_per_school, seed=42):
+    """
+    Cria um banco com um contrato e `schools` escolas, com equipamentos e tarefas.
+
+    Args:
+        db_path (str): Caminho do banco a criar
+        schools (int): Número de escolas do contrato
+        equipments_per_school (int): Equipamentos por escola
+        tasks_per_school (int): Tarefas por escola
+
+    Returns:
+        tuple: (total de equipamentos, total de tarefas)
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE customer_groups (id INTEGER PRIMARY KEY, description TEXT);
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, description TEXT, groupsId TEXT, managersId TEXT);
+        CREATE TABLE task_types (id INTEGER PRIMARY KEY, description TEXT);
+        CREATE TABLE teams (id INTEGER PRIMARY KEY, description TEXT, teamUsers TEXT);
+        CREATE TABLE users (userId INTEGER PRIMARY KEY, name TEXT, jobPosition TEXT);
+        CREATE TABLE equipments (id INTEGER PRIMARY KEY, name TEXT, description TEXT,
+                                 associatedCustomerId INTEGER, active INTEGER);
+        CREATE TABLE tasks (taskID INTEGER PRIMARY KEY, idUserTo INTEGER, customerId INTEGER,
+                            taskType INTEGER, taskStatus INTEGER, taskDate TEXT, date TEXT,
+                            equipmentsId TEXT, questionnaires TEXT, orientation TEXT,
+                            products TEXT, services TEXT, summary TEXT);
+    ''')
+    conn.execute("INSERT INTO customer_groups VALUES (?, ?)", (CONTRACT_ID, "SETOR 01"))
+    users = [(user_id, f"Usuario {user_id}", rng.choice(["Prestador de Serviços", "Oficial", "Técnico"]))
+             for user_id in range(1, 41)]
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)", users)
+    conn.execute("INSERT INTO teams VALUES (1, 'STS Setor 01', ?)", (json.dumps([u[1] for u in users[:10]]),))
+    conn.executemany("INSERT INTO task_types VALUES (?, ?)",
+                     [(type_id, f"Tipo {type_id}") for type_id in TASK_TYPE_IDS[:-1]] +
+                     [(TASK_TYPE_IDS[-1], "Levantamento de PMOC")])
+
+    customers, equipments, tasks = [], [], []
+    for school_id in range(1, schools + 1):
+        customers.append((school_id, f"ESCOLA {school_id}", json.dumps([CONTRACT_ID]),
+                          json.dumps(rng.sample(range(1, 41), 2))))
+        equipment_ids = []
+        for _ in range(equipments_per_school):
+            equipment_id = len(equipments) + 1
+            equipments.append((equipment_id, f"Split {equipment_id}", "Sala", school_id, rng.choice([0, 1, 1, 1])))
+            equipment_ids.append(equipment_id)
+        for _ in range(tasks_per_school):
+            sample = rng.sample(equipment_ids, min(len(equipment_ids), rng.randint(1, 5)))
+            tasks.append((
+                len(tasks) + 1, rng.randint(1, 40), school_id, rng.choice(TASK_TYPE_IDS),
+                rng.choice([1, 5, 5, 6, 6]), "2025-07-15", "2025-07-15", json.dumps(sample),
+                json.dumps([{"questionnaireEquipamentId": eq, "questionnaireAnswers": ["Sim", "Não", "Normal"] * 5}
+                            for eq in sample]),
+                "Tarefa", json.dumps([{"productId": 1, "amount": 2}]), json.dumps([{"serviceId": 3}]),
+                "Manutenção preventiva realizada conforme o plano. " * 4,
+            ))
+
+    conn.executemany("INSERT INTO customers VALUES (?, ?, ?, ?)", customers)
+    conn.executemany("INSERT INTO equipments VALUES (?, ?, ?, ?, ?)", equipments)
+    conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", tasks)
+    conn.commit()
+    rebuild_customer_group_members(conn)
+    conn.close()
+    return len(equipments), len(tasks)
+
+
+def measure(repeat, trial_serialization=False):
+    """Mede `repeat` montagens + serializações do dashboard; retorna os tempos em ms."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = api_backend._get_dashboard_by_contract_data(CONTRACT_ID)
+        if trial_serialization:
+            json.dumps(data)
+        serialize_payload(data)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def measure_encoding(data, repeat):
+    """
+    Compara o tempo e o pico de memória da serialização do payload com cada
+    codificador disponível e da resposta em streaming com projeção.
+    """
+    encoders = ["json"] + (["orjson"] if json_encoding.orjson else [])
+    original_encoder = json_encoding.JSON_ENCODER
+    results = {}
+    try:
+        for encoder in encoders:
+            json_encoding.JSON_ENCODER = encoder
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                payload = json_encoding.dumps(data)
+                timings.append((time.perf_counter() - start) * 1000)
+            tracemalloc.start()
+            json_encoding.dumps(data)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f"{encoder} (completo)"] = (timings, peak, len(payload.encode("utf-8")))
+
+            projected = api_backend._project_dashboard(json.loads(payload), HEAVY_TASK_FIELDS)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                size = sum(len(chunk.encode("utf-8")) for chunk in json_encoding.iter_json(projected))
+                timings.append((time.perf_counter() - start) * 1000)
+            tracemalloc.start()
+            for _chunk in json_encoding.iter_json(projected):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f"{encoder} (streaming, sem campos pesados)"] = (timings, peak, size)
+    finally:
+        json_encoding.JSON_ENCODER = original_encoder
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da montagem do dashboard de contrato")
+    parser.add_argument("--schools", type=int, default=300)
+    parser.add_argument("--equipments", type=int, default=20, help="equipamentos por escola")
+    parser.add_argument("--tasks", type=int, default=40, help="tarefas por escola")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "auvo.db")
+        total_equipments, total_tasks = create_benchmark_db(db_path, args.schools, args.equipments, args.tasks)
+        api_backend.DB_PATH = db_path
+        print(f"Contrato sintético: {args.schools} escolas, {total_equipments} equipamentos, {total_tasks} tarefas")
+
+        handler = api_logging._get_handler()
+        with open(os.devnull, "w") as devnull:
+            original_stream = handler.setStream(devnull)
+            original_level = api_backend.logger.level
+            try:
+                results = {}
+                measure(1)  # aquecimento (cache de páginas do SQLite)
+                for name, level, trial_serialization in (("anterior", logging.DEBUG, True),
+                                                         ("DEBUG", logging.DEBUG, False),
+                                                         ("INFO", logging.INFO, False)):
+                    api_backend.logger.setLevel(level)
+                    results[name] = measure(args.repeat, trial_serialization)
+                data = api_backend._get_dashboard_by_contract_data(CONTRACT_ID)
+            finally:
+                api_backend.logger.setLevel(original_level)
+                handler.setStream(original_stream)
+
+        for name, timings in results.items():
+            print(f"  {name:<8}: mediana {statistics.median(timings):8.1f} ms | "
+                  f"mín {min(timings):8.1f} ms | máx {max(timings):8.1f} ms")
+        gain = statistics.median(results["anterior"]) - statistics.median(results["INFO"])
+        print(f"  Ganho em relação ao comportamento anterior: {gain:.1f} ms por requisição "
+              f"({gain / statistics.median(results['anterior']) * 100:.0f}%)")
+
+        print("Serialização do payload:")
+        for name, (timings, peak, size) in measure_encoding(data, args.repeat).items():
+            print(f"  {name:<40}: mediana {statistics.median(timings):7.1f} ms | "
+                  f"pico {peak / 1024 / 1024:6.1f} MiB | resposta {size / 1024 / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark do achatamento das tarefas dos painéis Streamlit (painel/dados.py).
+
+Gera um ano de tarefas sintéticas no formato de `tarefas_raw` (json já decodificado,
+como em carregar_tarefas) e compara:
+
+- anterior: DataFrame montado com uma list comprehension sobre `df_raw.iterrows()`
+  e contagens de equipamentos esperados/respondidos com `iterrows` (como os painéis
+  faziam antes);
+- achatado: achatar_tarefas + explodir_equipamentos/explodir_questionarios e as
+  mesmas contagens com filtros/groupby (contar_por_tarefas,
+  equipamentos_das_tarefas, pendentes_por_tarefa).
+
+As contagens medidas são as dos painéis de setor: equipamentos respondidos em
+tarefas finalizadas e pausadas, equipamentos em aberto, equipamentos distintos das
+preventivas mensais finalizadas e pendências por escola (tooltip do mapa). Os
+resultados dos dois caminhos são conferidos.
+
+Uso:
+    python benchmark_painel_tarefas.py
+    python benchmark_painel_tarefas.py --tasks 80000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel"))
+
+from dados import (  # noqa: E402
+    achatar_tarefas,
+    contar_por_tarefas,
+    equipamentos_das_tarefas,
+    explodir_equipamentos,
+    explodir_questionarios,
+    pendentes_por_tarefa,
+)
+
+TIPOS = ["# 1 - Preventiva Mensal", "# 2 - Preventiva Semestral", "# 3 - Corretiva",
+         "# 4 - Preventiva Levantamento de PMOC"]
+STATUS = {1: "Aberta", 2: "Em Deslocamento", 3: "Check-in", 4: "Check-out", 5: "Finalizada", 6: "Pausada"}
+
+
+def make_raw(count, schools=400, seed=42):
+    rng = random.Random(seed)
+    inicio = date(2025, 1, 1)
+    linhas = []
+    for task_id in range(1, count + 1):
+        escola = rng.randint(1, schools)
+        equipamentos = [escola * 100 + rng.randint(1, 40) for _ in range(rng.randint(0, 8))]
+        respondidos = [e for e in equipamentos if rng.random() < 0.7]
+        data = inicio + timedelta(days=rng.randint(0, 364))
+        tipo = rng.randint(1, len(TIPOS))
+        linhas.append({
+            "taskID": task_id,
+            "user_id": rng.randint(1, 200),
+            "data_referencia": data.isoformat(),
+            "json": {
+                "taskID": task_id,
+                "customerId": escola,
+                "customerDescription": f"Escola {escola}",
+                "taskType": tipo,
+                "taskTypeDescription": TIPOS[tipo - 1],
+                "taskStatus": rng.randint(1, 6),
+                "checkIn": True,
+                "checkOut": True,
+                "signatureName": "Responsável",
+                "report": "Relatório da visita",
+                "equipmentsId": equipamentos,
+                "questionnaires": [{"questionnaireId": 1, "questionnaireEquipamentId": e,
+                                    "answers": [{"questionId": 1, "reply": "OK"}]} for e in respondidos],
+                "taskUrl": f"https://app.auvo.com.br/tarefa/{task_id}",
+                "deliveredDate": f"{data.isoformat()}T08:00:00",
+                "deliveredOnSmarthPhone": True,
+            },
+        })
+    return pd.DataFrame(linhas)
+
+
+def anterior(df_raw):
+    df = pd.DataFrame([
+        {
+            "taskID": row["taskID"],
+            "user_id": row["user_id"],
+            "data": row["data_referencia"],
+            "escola": row["json"].get("customerDescription"),
+            "customer_id": row["json"].get("customerId"),
+            "tipo": row["json"].get("taskTypeDescription"),
+            "status_id": row["json"].get("taskStatus"),
+            "checkin": row["json"].get("checkIn"),
+            "checkout": row["json"].get("checkOut"),
+            "assinatura": row["json"].get("signatureName"),
+            "observacao": row["json"].get("report"),
+            "equipamentos_id": row["json"].get("equipmentsId"),
+            "questionarios": row["json"].get("questionnaires"),
+            "taskUrl": row["json"].get("taskUrl"),
+            "deliveredDate": row["json"].get("deliveredDate", ""),
+            "deliveredOnSmarthPhone": row["json"].get("deliveredOnSmarthPhone", False),
+        }
+        for _, row in df_raw.iterrows()
+    ])
+    df["status"] = df["status_id"].map(STATUS).fillna("Desconhecido")
+
+    def respondidos(df_status):
+        return sum(
+            len({q.get("questionnaireEquipamentId") for q in row["questionarios"] if q.get("questionnaireEquipamentId")})
+            for _, row in df_status.iterrows()
+        )
+
+    mensal = set()
+    for _, row in df[df["tipo"].str.contains("Preventiva Mensal") & (df["status"] == "Finalizada")].iterrows():
+        mensal.update(q.get("questionnaireEquipamentId") for q in row["questionarios"]
+                      if q.get("questionnaireEquipamentId"))
+
+    pendencias = {}
+    for escola_id, tarefas_escola in df.groupby("customer_id"):
+        total = 0
+        for _, t in tarefas_escola.iterrows():
+            eq_q = [q.get("questionnaireEquipamentId") for q in t["questionarios"] or []
+                    if q.get("questionnaireEquipamentId")]
+            total += len(set(t["equipamentos_id"] or []) - set(eq_q))
+        pendencias[escola_id] = total
+
+    return {
+        "finalizadas": respondidos(df[df["status"] == "Finalizada"]),
+        "pausadas": respondidos(df[df["status"] == "Pausada"]),
+        "em_aberto": sum(len(row["equipamentos_id"] or [])
+                         for _, row in df[~df["status"].isin(["Finalizada", "Pausada"])].iterrows()),
+        "mensal": len(mensal),
+        "pendencias": pendencias,
+    }
+
+
+def achatado(df_raw):
+    df = achatar_tarefas(df_raw)
+    equipamentos_tarefa = explodir_equipamentos(df)
+    questionarios_tarefa = explodir_questionarios(df)
+    df["status"] = df["status_id"].map(STATUS).fillna("Desconhecido")
+
+    mensal = df[df["tipo"].str.contains("Preventiva Mensal") & (df["status"] == "Finalizada")]
+    pendentes = pendentes_por_tarefa(equipamentos_tarefa, questionarios_tarefa, df["taskID"])
+    pendencias = (df[["taskID", "customer_id"]]
+                  .assign(pendentes=df["taskID"].map(pendentes).fillna(0))
+                  .groupby("customer_id")["pendentes"].sum())
+
+    return {
+        "finalizadas": contar_por_tarefas(questionarios_tarefa, df.loc[df["status"] == "Finalizada", "taskID"]),
+        "pausadas": contar_por_tarefas(questionarios_tarefa, df.loc[df["status"] == "Pausada", "taskID"]),
+        "em_aberto": contar_por_tarefas(equipamentos_tarefa,
+                                        df.loc[~df["status"].isin(["Finalizada", "Pausada"]), "taskID"]),
+        "mensal": len(equipamentos_das_tarefas(questionarios_tarefa, mensal["taskID"])),
+        "pendencias": {int(k): int(v) for k, v in pendencias.items()},
+    }
+
+
+def measure(func, df_raw, repeat):
+    tempos = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        resultado = func(df_raw)
+        tempos.append(time.perf_counter() - start)
+    return statistics.median(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do achatamento das tarefas dos painéis")
+    parser.add_argument("--tasks", type=int, default=60000, help="tarefas no ano")
+    parser.add_argument("--schools", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df_raw = make_raw(args.tasks, args.schools)
+    print(f"{args.tasks} tarefas sintéticas (1 ano, {args.schools} escolas), mediana de {args.repeat} execuções")
+
+    t_anterior, r_anterior = measure(anterior, df_raw, args.repeat)
+    t_achatado, r_achatado = measure(achatado, df_raw, args.repeat)
+    assert r_anterior == r_achatado, "os dois caminhos deram contagens diferentes"
+
+    print(f"  anterior  {t_anterior:7.2f}s")
+    print(f"  achatado  {t_achatado:7.2f}s  ({t_anterior / t_achatado:.1f}x)")
+    print(f"  finalizadas={r_achatado['finalizadas']} pausadas={r_achatado['pausadas']} "
+          f"em_aberto={r_achatado['em_aberto']} mensal={r_achatado['mensal']}")
+
+
+if __name__ == "__main__":
+    main()
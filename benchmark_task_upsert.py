@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark da gravação de tarefas na tabela `tasks` (download_all_user_tasks_v2).
+
+Compara, sobre tarefas sintéticas no formato da API:
+
+- anterior: SELECT de existência + UPDATE ou INSERT por tarefa (o save_tasks_to_db
+  antes do downloads.task_upsert);
+- lote: downloads.task_upsert (um executemany com ON CONFLICT DO UPDATE por lote,
+  pulando tarefas com o mesmo lastUpdate).
+
+Cenários: carga inicial (banco vazio), nova gravação sem alterações e nova gravação
+com uma fração das tarefas alteradas. As tarefas são gravadas em lotes do tamanho de
+--batch (como as tarefas de um usuário no script).
+
+Uso:
+    python benchmark_task_upsert.py
+    python benchmark_task_upsert.py --tasks 100000 --batch 1000 --changed 0.1
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from downloads.download_all_user_tasks_v2 import TASK_COLUMNS, create_tasks_table, save_tasks_to_db, task_to_row
+
+
+def make_tasks(count, seed=42):
+    rng = random.Random(seed)
+    tasks = []
+    for task_id in range(1, count + 1):
+        tasks.append({
+            "taskID": task_id,
+            "externalId": f"EXT-{task_id}",
+            "idUserFrom": rng.randint(1, 50),
+            "userFromName": "Coordenador",
+            "idUserTo": rng.randint(1, 200),
+            "userToName": f"Técnico {rng.randint(1, 200)}",
+            "customerId": rng.randint(1, 5000),
+            "equipmentsId": [rng.randint(1, 90000) for _ in range(rng.randint(0, 4))],
+            "customerDescription": f"Escola {rng.randint(1, 5000)}",
+            "taskType": rng.randint(1, 30),
+            "creationDate": "2025-07-01T08:00:00",
+            "taskDate": f"2025-07-{rng.randint(1, 28):02d}T09:00:00",
+            "latitude": -8.0 - rng.random(),
+            "longitude": -34.9 - rng.random(),
+            "address": "Rua Exemplo, 123 - Recife/PE",
+            "orientation": "Manutenção preventiva",
+            "priority": rng.randint(1, 3),
+            "deliveredOnSmarthPhone": True,
+            "deliveredDate": "2025-07-01T08:05:00",
+            "finished": rng.random() < 0.7,
+            "report": "Relatório da visita",
+            "checkInDate": "2025-07-01T09:00:00",
+            "checkOutDate": "2025-07-01T10:00:00",
+            "products": [{"productId": rng.randint(1, 300), "quantity": 1}],
+            "services": [{"serviceId": rng.randint(1, 100), "quantity": 1}],
+            "summary": {"totalValue": round(rng.random() * 500, 2)},
+            "signatureUrl": "",
+            "taskUrl": f"https://app.auvo.com.br/tarefa/{task_id}",
+            "taskStatus": rng.randint(1, 6),
+            "lastUpdate": "2025-07-01T10:00:00",
+        })
+    return tasks
+
+
+def save_row_by_row(tasks, db_path):
+    """Caminho anterior: SELECT de existência e UPDATE ou INSERT por tarefa."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    inserted_count = updated_count = 0
+    update_sql = (
+        f"UPDATE tasks SET {', '.join(f'{column}=?' for column in TASK_COLUMNS[1:])} WHERE taskID=?"
+    )
+    insert_sql = f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}) VALUES ({', '.join('?' for _ in TASK_COLUMNS)})"
+    for task in tasks:
+        task_id = task.get("taskID") or task.get("id")
+        if not task_id:
+            continue
+        cursor.execute("SELECT taskID FROM tasks WHERE taskID = ?", (task_id,))
+        exists = cursor.fetchone()
+        task_data = task_to_row(task)
+        if task_data is None:
+            continue
+        if exists:
+            cursor.execute(update_sql, task_data[1:] + (task_id,))
+            updated_count += 1
+        else:
+            cursor.execute(insert_sql, task_data)
+            inserted_count += 1
+    conn.commit()
+    conn.close()
+    return inserted_count, updated_count
+
+
+def run(save, tasks, db_path, batch):
+    inserted = updated = 0
+    start = time.perf_counter()
+    for offset in range(0, len(tasks), batch):
+        batch_inserted, batch_updated = save(tasks[offset:offset + batch], db_path)
+        inserted += batch_inserted
+        updated += batch_updated
+    return time.perf_counter() - start, inserted, updated
+
+
+def change_tasks(tasks, fraction, seed=7):
+    rng = random.Random(seed)
+    changed = [dict(task) for task in tasks]
+    for task in rng.sample(changed, int(len(changed) * fraction)):
+        task["taskStatus"] = 5
+        task["lastUpdate"] = "2025-07-02T10:00:00"
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da gravação de tarefas em lote")
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=1000, help="tarefas por chamada de save_tasks_to_db")
+    parser.add_argument("--changed", type=float, default=0.1, help="fração de tarefas alteradas no 3º cenário")
+    args = parser.parse_args()
+
+    tasks = make_tasks(args.tasks)
+    changed = change_tasks(tasks, args.changed)
+    scenarios = [
+        ("carga inicial", tasks),
+        ("sem alterações", tasks),
+        (f"{args.changed:.0%} alteradas", changed),
+    ]
+
+    print(f"{args.tasks} tarefas sintéticas, lotes de {args.batch}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, save in (("anterior", save_row_by_row), ("lote", save_tasks_to_db)):
+            db_path = os.path.join(tmp_dir, f"{label}.db")
+            conn = sqlite3.connect(db_path)
+            create_tasks_table(conn)
+            conn.close()
+            for scenario, scenario_tasks in scenarios:
+                elapsed, inserted, updated = run(save, scenario_tasks, db_path, args.batch)
+                print(f"  {label:<9} {scenario:<16} {elapsed:7.2f}s  "
+                      f"({args.tasks / elapsed:8.0f} tarefas/s)  inseridas={inserted} atualizadas={updated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Eventos de alteração dos dados do painel, publicados dentro do processo da API.
+
+Cada evento recebe um número de sequência crescente (`seq`) e fica em um buffer
+circular com os últimos CHANGE_FEED_SIZE eventos, de onde os consumidores leem
+com `events_since(seq)` e esperam novos eventos com `wait_for_events(seq)`.
+
+O feed vive na memória do processo: a sequência recomeça a cada inicialização
+(`epoch` identifica a instância) e processos diferentes (vários workers do
+uvicorn/gunicorn) têm feeds independentes. Os consumidores do feed devem rodar no
+mesmo processo que recebe os webhooks, ou seja, a API com um único worker.
+
+Uso:
+    from change_feed import publish
+    publish({"type": "tasks", "group_ids": [12], "tasks": [...]})
+"""
+import os
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+
+# Eventos mantidos em memória (configurável no .env/ambiente)
+CHANGE_FEED_SIZE = int(os.getenv("CHANGE_FEED_SIZE") or 1000)
+
+
+class ChangeFeed:
+    """Buffer circular de eventos com número de sequência, seguro entre threads."""
+
+    def __init__(self, maxlen=CHANGE_FEED_SIZE):
+        # Identifica esta instância do feed: cursores de outra instância (antes de
+        # um reinício ou de outro worker) não valem aqui
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=maxlen)
+        self._seq = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def publish(self, event):
+        """
+        Publica um evento.
+
+        Args:
+            event (dict): Conteúdo do evento (serializável em JSON)
+
+        Returns:
+            dict: O evento com `seq` e `at` preenchidos
+        """
+        with self._condition:
+            self._seq += 1
+            event = dict(event, seq=self._seq, at=datetime.now().isoformat(timespec="seconds"))
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def events_since(self, seq):
+        """Retorna os eventos com número de sequência maior que `seq`, em ordem."""
+        with self._condition:
+            return [event for event in self._events if event["seq"] > seq]
+
+    def oldest_seq(self):
+        """Número de sequência do evento mais antigo ainda no buffer (None se vazio)."""
+        with self._condition:
+            return self._events[0]["seq"] if self._events else None
+
+    def wait_for_events(self, seq, timeout=None):
+        """Bloqueia até haver eventos depois de `seq` (ou até o timeout). Retorna se há."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._seq > seq, timeout=timeout)
+
+
+feed = ChangeFeed()
+
+
+def publish(event):
+    """Publica um evento no feed do processo (ver ChangeFeed.publish)."""
+    return feed.publish(event)
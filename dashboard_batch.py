@@ -0,0 +1,90 @@
+"""
+Execução concorrente dos dashboards de /api/dashboard/batch.
+
+Os contratos do lote são montados em paralelo por um pool de threads limitado,
+cada thread com sua própria conexão SQLite somente leitura. Falhas de um contrato
+não derrubam o lote: o resultado traz os dashboards montados e a lista de erros.
+"""
+import contextvars
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from api_logging import get_logger
+
+logger = get_logger("dashboard_batch")
+
+# Número máximo de contratos montados ao mesmo tempo (configurável no .env/ambiente)
+BATCH_MAX_WORKERS = int(os.getenv("DASHBOARD_BATCH_WORKERS") or min(5, os.cpu_count() or 1))
+
+_pool = None
+_pool_lock = threading.Lock()
+_worker_state = threading.local()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="dashboard-batch")
+        return _pool
+
+
+def get_read_only_connection(db_path, row_factory=None):
+    """
+    Retorna a conexão somente leitura da thread atual para `db_path`, criando-a na
+    primeira chamada. Cada worker do pool reaproveita a sua entre requisições.
+    """
+    connections = getattr(_worker_state, "connections", None)
+    if connections is None:
+        connections = _worker_state.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.row_factory = row_factory
+        connections[db_path] = conn
+    return conn
+
+
+def _run_contract(build, contract_id, db_path, row_factory):
+    conn = get_read_only_connection(db_path, row_factory)
+    return build(contract_id, conn)
+
+
+def run_dashboard_batch(contract_ids, build, db_path, row_factory=None):
+    """
+    Monta os dashboards de vários contratos em paralelo.
+
+    Args:
+        contract_ids (list): IDs dos contratos, na ordem desejada
+        build (callable): build(contract_id, read_only_conn) -> dashboard do contrato
+        db_path (str): Caminho do banco SQLite
+        row_factory: row_factory aplicada às conexões dos workers
+
+    Returns:
+        tuple: (results, errors) - resultados na ordem de contract_ids (apenas os que
+               deram certo) e lista de {"contract_id", "status_code", "detail"}
+    """
+    pool = _get_pool()
+    # Cada tarefa roda numa cópia do contexto atual (mantém o ID da requisição nos logs)
+    futures = [
+        (contract_id, pool.submit(contextvars.copy_context().run, _run_contract, build, contract_id, db_path, row_factory))
+        for contract_id in contract_ids
+    ]
+
+    results = []
+    errors = []
+    for contract_id, future in futures:
+        try:
+            results.append(future.result())
+        except HTTPException as e:
+            logger.warning("Contrato %s do lote falhou: %s %s", contract_id, e.status_code, e.detail)
+            errors.append({"contract_id": contract_id, "status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception("Erro inesperado no contrato %s do lote", contract_id)
+            errors.append({"contract_id": contract_id, "status_code": 500, "detail": str(e)})
+    return results, errors
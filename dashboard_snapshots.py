@@ -0,0 +1,252 @@
+"""
+Snapshots materializados do dashboard por contrato.
+
+O payload de /api/dashboard/{group_id}, /api/dashboard/batch e
+/api/faturamento-report/{group_id} é o mesmo para todos os usuários do painel, então
+ele é guardado já serializado em `dashboard_snapshots`, com chave
+(group_id, start_date, end_date, data_version).
+
+`contract_data_versions` guarda a versão dos dados de cada contrato. Gatilhos em
+tasks, equipments, customers e customer_group_members incrementam a versão apenas
+dos contratos da escola afetada, de modo que qualquer escrita (scripts de
+sincronização, webhook) invalida somente os snapshots daquele contrato.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+
+from api_logging import get_logger
+from json_encoding import dumps
+
+logger = get_logger("dashboard_snapshots")
+
+# Colunas que ligam cada tabela monitorada a uma escola (customers.id)
+WATCHED_TABLES = {
+    'tasks': 'customerId',
+    'equipments': 'associatedCustomerId',
+    'customers': 'id',
+    'customer_group_members': 'customer_id',
+}
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def create_dashboard_snapshot_tables(conn):
+    """Cria as tabelas de snapshots e de versão dos dados por contrato."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contract_data_versions (
+            group_id INTEGER PRIMARY KEY,
+            data_version INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dashboard_snapshots (
+            group_id INTEGER NOT NULL,
+            start_date TEXT NOT NULL DEFAULT '',
+            end_date TEXT NOT NULL DEFAULT '',
+            data_version INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (group_id, start_date, end_date, data_version)
+        )
+    ''')
+
+
+def _bump_versions_sql(table, row_ref, key_column):
+    """SQL (corpo de gatilho) que incrementa a versão dos contratos de uma linha NEW/OLD."""
+    if table == 'customer_group_members':
+        # A própria linha diz o contrato; na remoção ela já não está mais na tabela
+        source = f"SELECT {row_ref}.group_id, 1, datetime('now') WHERE true"
+    else:
+        source = f'''SELECT group_id, 1, datetime('now') FROM customer_group_members
+        WHERE customer_id = {row_ref}.{key_column}'''
+    return f'''
+        INSERT INTO contract_data_versions (group_id, data_version, updated_at)
+        {source}
+        ON CONFLICT(group_id) DO UPDATE SET
+            data_version = data_version + 1,
+            updated_at = excluded.updated_at;
+    '''
+
+
+def create_invalidation_triggers(conn, table, customer_column):
+    """
+    Cria os gatilhos que invalidam os snapshots dos contratos afetados por escritas em `table`.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        table (str): Tabela monitorada
+        customer_column (str): Coluna da tabela com o ID da escola
+    """
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_dashboard_version
+        AFTER INSERT ON {table} BEGIN
+            {_bump_versions_sql(table, "NEW", customer_column)}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_dashboard_version
+        AFTER DELETE ON {table} BEGIN
+            {_bump_versions_sql(table, "OLD", customer_column)}
+        END
+    ''')
+    # Em updates, a escola pode ter mudado: invalida a antiga e a nova
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_update_dashboard_version
+        AFTER UPDATE ON {table} BEGIN
+            {_bump_versions_sql(table, "OLD", customer_column)}
+            {_bump_versions_sql(table, "NEW", customer_column)}
+        END
+    ''')
+
+
+def get_data_version(conn, group_id):
+    """Retorna a versão atual dos dados de um contrato (0 se nunca alterado)."""
+    row = conn.execute(
+        "SELECT data_version FROM contract_data_versions WHERE group_id = ?", (group_id,)
+    ).fetchone()
+    if not row:
+        return 0
+    return row['data_version'] if isinstance(row, dict) else row[0]
+
+
+def invalidate_contracts(conn, group_ids):
+    """
+    Incrementa a versão dos dados dos contratos informados.
+
+    Os gatilhos já cobrem escritas em tasks/equipments/customers; esta função serve
+    para invalidações explícitas (ex.: mudanças em tabelas não monitoradas).
+    """
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn.executemany('''
+        INSERT INTO contract_data_versions (group_id, data_version, updated_at) VALUES (?, 1, ?)
+        ON CONFLICT(group_id) DO UPDATE SET
+            data_version = data_version + 1,
+            updated_at = excluded.updated_at
+    ''', [(group_id, now) for group_id in group_ids])
+    conn.commit()
+
+
+def _normalize_period(start_date, end_date):
+    return start_date or '', end_date or ''
+
+
+def load_snapshot(conn, group_id, start_date, end_date, data_version):
+    """
+    Busca o snapshot de um contrato/período para a versão de dados informada.
+
+    Returns:
+        tuple: (payload, created_at) ou None se não houver snapshot válido
+    """
+    start_date, end_date = _normalize_period(start_date, end_date)
+    row = conn.execute('''
+        SELECT payload, created_at FROM dashboard_snapshots
+        WHERE group_id = ? AND start_date = ? AND end_date = ? AND data_version = ?
+    ''', (group_id, start_date, end_date, data_version)).fetchone()
+    if not row:
+        return None
+    return (row['payload'], row['created_at']) if isinstance(row, dict) else (row[0], row[1])
+
+
+def save_snapshot(conn, group_id, start_date, end_date, data_version, payload):
+    """Grava o snapshot e remove os de versões anteriores do mesmo contrato/período."""
+    start_date, end_date = _normalize_period(start_date, end_date)
+    created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    conn.execute('''
+        DELETE FROM dashboard_snapshots
+        WHERE group_id = ? AND start_date = ? AND end_date = ? AND data_version < ?
+    ''', (group_id, start_date, end_date, data_version))
+    conn.execute('''
+        INSERT OR REPLACE INTO dashboard_snapshots
+            (group_id, start_date, end_date, data_version, payload, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (group_id, start_date, end_date, data_version, payload, created_at))
+    conn.commit()
+    return created_at
+
+
+def snapshot_age_seconds(created_at):
+    """Idade em segundos de um snapshot a partir do seu created_at."""
+    return max(0, int((datetime.now() - datetime.strptime(created_at, '%Y-%m-%d %H:%M:%S')).total_seconds()))
+
+
+def serialize_payload(data):
+    """Serializa o payload com o codificador JSON das APIs (orjson quando disponível)."""
+    return dumps(data)
+
+
+def get_or_build_snapshot(conn, group_id, start_date, end_date, build):
+    """
+    Retorna o payload serializado do dashboard, usando o snapshot se estiver válido.
+
+    A versão é lida antes de montar o payload: se os dados mudarem durante a montagem,
+    o snapshot fica gravado com a versão antiga e não será servido.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        group_id (int): ID do contrato
+        start_date (str | None): Início do período
+        end_date (str | None): Fim do período
+        build (callable): Função sem argumentos que monta o payload (dict)
+
+    Returns:
+        tuple: (payload_json, cache_status "HIT"/"MISS"/"BYPASS", idade em segundos)
+    """
+    try:
+        data_version = get_data_version(conn, group_id)
+        snapshot = load_snapshot(conn, group_id, start_date, end_date, data_version)
+    except sqlite3.OperationalError:
+        # Migração dos snapshots ainda não aplicada (ex.: banco sem tabela de tarefas)
+        _record("misses")
+        return serialize_payload(build()), "BYPASS", 0
+
+    if snapshot:
+        payload, created_at = snapshot
+        _record("hits")
+        return payload, "HIT", snapshot_age_seconds(created_at)
+
+    _record("misses")
+    payload = serialize_payload(build())
+    try:
+        save_snapshot(conn, group_id, start_date, end_date, data_version, payload)
+    except sqlite3.OperationalError as e:
+        # Banco ocupado por uma sincronização: serve o payload sem gravar o snapshot
+        conn.rollback()
+        _record("errors")
+        logger.warning("Não foi possível gravar o snapshot do contrato %s: %s", group_id, e)
+    return payload, "MISS", 0
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def get_snapshot_stats(conn):
+    """
+    Retorna os contadores de hit/miss deste processo e a idade dos snapshots gravados.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / total * 100, 2) if total else 0
+
+    rows = conn.execute('''
+        SELECT s.group_id, s.start_date, s.end_date, s.data_version, s.created_at,
+               LENGTH(CAST(s.payload AS BLOB)) AS size_bytes,
+               COALESCE(v.data_version, 0) AS current_version
+        FROM dashboard_snapshots s
+        LEFT JOIN contract_data_versions v ON v.group_id = s.group_id
+        ORDER BY s.group_id, s.start_date, s.end_date
+    ''').fetchall()
+    columns = ['group_id', 'start_date', 'end_date', 'data_version', 'created_at', 'size_bytes', 'current_version']
+    snapshots = []
+    for row in rows:
+        snapshot = dict(row) if isinstance(row, dict) else dict(zip(columns, row))
+        snapshot['age_seconds'] = snapshot_age_seconds(snapshot['created_at'])
+        snapshot['stale'] = snapshot.pop('current_version') != snapshot['data_version']
+        snapshots.append(snapshot)
+    stats["snapshots"] = snapshots
+    return stats
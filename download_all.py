@@ -7,6 +7,9 @@ import time
 import importlib
 from datetime import datetime
 
+from downloads.utils import DB_PATH
+from migrations import migrate_database
+
 def run_download_script(script_name):
     try:
         print(f"\n{'=' * 50}")
@@ -65,6 +68,10 @@ def main():
         else:
             print(f"Script {script_path} não encontrado. Pulando...")
     
+    # Aplicar migrações pendentes agora que as tabelas baixadas existem
+    print("\nAplicando migrações do banco de dados...")
+    migrate_database(DB_PATH)
+
     print(f"\n{'=' * 50}")
     print(f"RESUMO FINAL")
     print(f"{'=' * 50}")
@@ -2,46 +2,33 @@
 Funções comuns para os scripts de download de dados da API Auvo.
 """
 import os
-import sys
 import json
-import requests
 from datetime import datetime
 
 from downloads.utils import load_env_vars
+from auvo_client import AuvoAPIError, get_client
 
 def login_to_auvo():
     """
     Realiza login na API Auvo e retorna o token de acesso e a URL base.
-    
+
+    O login é feito pelo cliente compartilhado (auvo_client), que guarda o token e o
+    renova antes de expirar; chamadas repetidas no mesmo processo reaproveitam o token.
+
     Returns:
         tuple: (token, base_url) - Token de acesso e URL base da API
+
+    Raises:
+        AuvoAPIError: Sem credenciais ou se o login falhar
     """
-    # Carregar credenciais do arquivo .env
-    env_vars = load_env_vars()
-    api_key = env_vars["API_KEY"]
-    api_token = env_vars["API_TOKEN"]
-    base_url = env_vars["API_URL"]
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
+    client = get_client()
+    print(f"Usando credenciais do arquivo .env: API_KEY={client.api_key[:4]}...{client.api_key[-4:]}")
+
     try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
+        return client.login(), client.base_url
+    except AuvoAPIError as e:
         print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+        raise
 
 def get_api_headers(token):
     """
@@ -112,64 +99,23 @@ def process_api_response(data, entity_name):
     
     return entities
 
-def paginate_api_request(url, headers, entity_name, params=None):
+def paginate_api_request(url, headers, entity_name, params=None, page_size=100):
     """
     Realiza requisições paginadas à API Auvo.
-    
+
+    Usa o cliente compartilhado (auvo_client): sessão com pool de conexões, limite
+    de taxa, novas tentativas em 429/5xx e busca concorrente das páginas quando o
+    total é conhecido. `headers` é mantido por compatibilidade; a autenticação é
+    feita pelo cliente.
+
     Args:
         url (str): URL do endpoint da API
-        headers (dict): Cabeçalhos da requisição
+        headers (dict): Cabeçalhos da requisição (ignorado)
         entity_name (str): Nome da entidade para mensagens de log
         params (dict, optional): Parâmetros adicionais para a requisição
-        
+        page_size (int, optional): Tamanho da página
+
     Returns:
         list: Lista completa de entidades de todas as páginas
     """
-    if params is None:
-        params = {}
-    
-    all_entities = []
-    page = 1
-    page_size = 100
-    total_entities = 0
-    
-    try:
-        while True:
-            # Adicionar parâmetros de paginação
-            page_params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc",
-                **params
-            }
-            
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=page_params)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar {entity_name}: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            entities = process_api_response(data, entity_name)
-            
-            if not entities:
-                break
-                
-            entities_count = len(entities)
-            total_entities += entities_count
-            all_entities.extend(entities)
-            
-            print(f"Encontrados {entities_count} {entity_name} na página {page}")
-            
-            if entities_count < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar {entity_name}: {e}")
-    
-    print(f"Total de {entity_name} encontrados: {total_entities}")
-    return all_entities
+    return get_client().get_all(url, params=params, entity_name=entity_name, page_size=page_size)
@@ -0,0 +1,166 @@
+"""
+Tabela normalizada de associação contrato (grupo de clientes) -> escola (cliente).
+
+A coluna customers.groupsId guarda a lista de grupos como JSON string, o que obriga
+as consultas por contrato a usar `groupsId LIKE '%id%'` (varredura completa da
+tabela e falsos positivos, ex.: 15675 casa com 156750). Este módulo mantém a tabela
+customer_group_members(group_id, customer_id), reconstruída a partir de groupsId a
+cada download de clientes, e expõe as funções de consulta usadas pelas APIs.
+"""
+import json
+
+
+def create_customer_group_members_table(conn):
+    """
+    Cria a tabela customer_group_members e seus índices, se ainda não existirem.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco de dados
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS customer_group_members (
+            group_id INTEGER NOT NULL,
+            customer_id INTEGER NOT NULL,
+            PRIMARY KEY (group_id, customer_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_customer_group_members_customer
+        ON customer_group_members (customer_id, group_id)
+    ''')
+
+
+def parse_groups_id(groups_id):
+    """
+    Converte o valor de customers.groupsId em uma lista de IDs de grupo.
+
+    Aceita JSON (lista ou número) e, como fallback, texto separado por vírgulas.
+
+    Args:
+        groups_id: Valor bruto da coluna groupsId
+
+    Returns:
+        list: IDs de grupo (int), sem repetições
+    """
+    if groups_id is None or groups_id == "":
+        return []
+
+    try:
+        parsed = json.loads(groups_id) if isinstance(groups_id, str) else groups_id
+    except (json.JSONDecodeError, TypeError):
+        parsed = [part.strip() for part in str(groups_id).strip("[]").split(",")]
+
+    if not isinstance(parsed, list):
+        parsed = [parsed]
+
+    group_ids = []
+    for value in parsed:
+        if isinstance(value, dict):
+            value = value.get("id")
+        if str(value).strip().isdigit() and int(value) not in group_ids:
+            group_ids.append(int(value))
+    return group_ids
+
+
+def rebuild_customer_group_members(conn):
+    """
+    Reconstrói customer_group_members a partir de customers.groupsId.
+
+    A reconstrução é feita em uma única transação: leitores veem a versão anterior
+    completa até o commit. Se a conexão já estiver em uma transação (ex.: dentro de
+    uma migração), o commit fica a cargo de quem a abriu.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco de dados
+
+    Returns:
+        int: Número de associações gravadas
+    """
+    create_customer_group_members_table(conn)
+
+    rows = conn.execute("SELECT id, groupsId FROM customers").fetchall()
+    members = set()
+    for row in rows:
+        customer_id, groups_id = (row["id"], row["groupsId"]) if isinstance(row, dict) else (row[0], row[1])
+        for group_id in parse_groups_id(groups_id):
+            members.add((group_id, customer_id))
+
+    own_transaction = not conn.in_transaction
+    try:
+        conn.execute("DELETE FROM customer_group_members")
+        conn.executemany(
+            "INSERT INTO customer_group_members (group_id, customer_id) VALUES (?, ?)",
+            sorted(members)
+        )
+        if own_transaction:
+            conn.commit()
+    except Exception:
+        if own_transaction:
+            conn.rollback()
+        raise
+
+    print(f"Tabela 'customer_group_members' reconstruída: {len(members)} associações")
+    return len(members)
+
+
+def ensure_customer_group_members(conn):
+    """
+    Garante que customer_group_members exista e esteja populada.
+
+    Usada na inicialização das APIs e na migração 0001 para bancos baixados antes
+    da existência da tabela; não faz nada se ela já tiver dados.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco de dados
+    """
+    create_customer_group_members_table(conn)
+    has_members = conn.execute("SELECT 1 FROM customer_group_members LIMIT 1").fetchone()
+    has_customers = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='customers'"
+    ).fetchone()
+    if not has_members and has_customers:
+        rebuild_customer_group_members(conn)
+
+
+def get_schools_by_group(cursor, group_ids, columns="c.*"):
+    """
+    Retorna os clientes (escolas) associados a um ou mais contratos.
+
+    Args:
+        cursor: Cursor ou conexão SQLite (a row_factory configurada é respeitada)
+        group_ids (int | list): ID do contrato ou lista de IDs
+        columns (str): Colunas de customers a retornar (alias `c`)
+
+    Returns:
+        list: Linhas de customers, na ordem de customers.id, sem repetições
+    """
+    if isinstance(group_ids, int):
+        group_ids = [group_ids]
+    group_ids = list(group_ids)
+    if not group_ids:
+        return []
+
+    placeholders = ','.join('?' for _ in group_ids)
+    cursor = cursor.execute(f"""
+        SELECT {columns} FROM customers c
+        WHERE c.id IN (
+            SELECT customer_id FROM customer_group_members WHERE group_id IN ({placeholders})
+        )
+        ORDER BY c.id
+    """, group_ids)
+    return cursor.fetchall()
+
+
+def get_school_ids_by_group(cursor, group_ids):
+    """
+    Retorna apenas os IDs dos clientes (escolas) associados aos contratos.
+
+    Args:
+        cursor: Cursor ou conexão SQLite
+        group_ids (int | list): ID do contrato ou lista de IDs
+
+    Returns:
+        list: IDs de clientes (int)
+    """
+    rows = get_schools_by_group(cursor, group_ids, columns="c.id")
+    return [row["id"] if isinstance(row, dict) else row[0] for row in rows]
@@ -1,11 +1,14 @@
 import sqlite3
-import requests
 import json
 import os
 import sys
-from dotenv import load_dotenv
 from datetime import datetime, timedelta
-import time
+
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
 
 def create_tasks_table(conn):
     """Cria a tabela de tarefas se não existir"""
@@ -100,39 +103,6 @@ def create_tasks_table(conn):
     
     conn.commit()
 
-def login_to_auvo():
-    """Faz login na API Auvo e retorna o token de acesso"""
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
-
 def get_all_users_from_db(db_path):
     """Obtém todos os IDs de usuários do banco de dados"""
     try:
@@ -174,69 +144,17 @@ def get_current_month_dates():
 
 def get_tasks_for_user(token, base_url, user_id, user_name, start_date, end_date):
     """Busca tarefas da API Auvo para um usuário específico com lógica de busca robusta."""
-    url = f"{base_url}/tasks"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": os.getenv("API_KEY"),
-        "Content-Type": "application/json"
-    }
-    
-    all_tasks = []
-    page = 1
-    
     print(f"\nBuscando tarefas para o usuário {user_name} (ID: {user_id})...")
-    
-    while True:
-        params = {
-            "paramFilter": json.dumps({
-                "idUserTo": user_id,
-                "startDate": f"{start_date}T00:00:00",
-                "endDate": f"{end_date}T23:59:59"
-            }),
-            "page": page,
-            "pageSize": 50
-        }
-        
-        try:
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 404:
-                break
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            tasks = []
-            if "result" in data:
-                if isinstance(data["result"], list):
-                    tasks = data["result"]
-                elif isinstance(data["result"], dict) and "entityList" in data["result"]:
-                    tasks = data["result"]["entityList"]
-            elif "entityList" in data:
-                tasks = data["entityList"]
-            
-            if not tasks:
-                break
-            
-            valid_tasks = [task for task in tasks if isinstance(task, dict)]
-            all_tasks.extend(valid_tasks)
-            
-            print(f"Encontradas {len(valid_tasks)} tarefas na página {page}")
-            
-            if len(tasks) < 50:
-                break
-            
-            page += 1
-            time.sleep(0.2)
-        
-        except requests.exceptions.HTTPError as http_err:
-            if http_err.response.status_code != 404:
-                print(f"    -> Erro HTTP ao buscar tarefas para {user_name}: {http_err}")
-            break
-        except Exception as e:
-            print(f"    -> Erro inesperado ao buscar tarefas para {user_name}: {e}")
-            break
+    params = {
+        "paramFilter": json.dumps({
+            "idUserTo": user_id,
+            "startDate": f"{start_date}T00:00:00",
+            "endDate": f"{end_date}T23:59:59"
+        })
+    }
+    tasks = get_client().get_all(f"{base_url}/tasks", params=params, entity_name="tarefas",
+                                 page_size=50, order=None)
+    all_tasks = [task for task in tasks if isinstance(task, dict)]
     
     if not all_tasks:
         print(f"Nenhuma tarefa encontrada para o usuário {user_name}")
@@ -423,9 +341,6 @@ def main():
             print(f"Tarefas inseridas: {inserted}, atualizadas: {updated}")
         else:
             print(f"Nenhuma tarefa encontrada para o usuário {user_name}")
-        
-        # Pequena pausa entre usuários para não sobrecarregar a API
-        time.sleep(1)
     
     end_time = datetime.now()
     duration = end_time - start_time
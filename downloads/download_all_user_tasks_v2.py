@@ -1,11 +1,24 @@
 import sqlite3
-import requests
 import json
 import os
+import queue
 import sys
-from dotenv import load_dotenv
-from datetime import datetime, timedelta
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Adicionar o diretório raiz ao path para permitir importações relativas
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
+
+from migrations import apply_migrations
+from downloads.task_upsert import save_tasks, upsert_tasks
+
+# Usuários buscados em paralelo (o limite de requisições é o do cliente compartilhado)
+HARVEST_WORKERS = int(os.getenv("AUVO_HARVEST_WORKERS", "4"))
 
 def create_tasks_table(conn):
     """Cria a tabela de tarefas e adiciona colunas faltantes automaticamente."""
@@ -57,22 +70,6 @@ def create_tasks_table(conn):
             cursor.execute(f"ALTER TABLE tasks ADD COLUMN {col_name} {col_type}")
     conn.commit()
 
-def login_to_auvo():
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    resp = requests.get(login_url)
-    data = resp.json()
-    if "result" in data and data["result"].get("authenticated"):
-        return data["result"]["accessToken"], base_url
-    print("Falha na autenticação!")
-    sys.exit(1)
-
 def get_all_users_from_db(db_path):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
@@ -113,182 +110,272 @@ def safe_json_serialize(value):
         return str(value)
 
 def get_tasks_for_user(token, base_url, user_id, user_name, start_date, end_date):
-    url = f"{base_url}/tasks"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "x-api-key": os.getenv("API_KEY"),
-        "Content-Type": "application/json"
-    }
-    all_tasks = []
-    page = 1
     # Formato correto para busca incremental: 2025-06-01T00:00:00
     start_date_str = start_date.strftime('%Y-%m-%dT%H:%M:%S')
     end_date_str = end_date.strftime('%Y-%m-%dT%H:%M:%S')
-    while True:
-        params = {
-            "paramFilter": json.dumps({
-                "idUserTo": user_id,
-                "startDate": start_date_str,
-                "endDate": end_date_str
-            }),
-            "page": page,
-            "pageSize": 50
-        }
-        resp = requests.get(url, headers=headers, params=params)
-        if resp.status_code != 200:
-            print(f"Erro na requisição para usuário {user_name}: {resp.text}")
-            break
-        data = resp.json()
-        tasks = data.get("result", {}).get("entityList", [])
-        if not tasks:
-            break
-        all_tasks.extend(tasks)
-        if len(tasks) < 50:
-            break
-        page += 1
-        time.sleep(0.2)
-    return all_tasks
+    params = {
+        "paramFilter": json.dumps({
+            "idUserTo": user_id,
+            "startDate": start_date_str,
+            "endDate": end_date_str
+        })
+    }
+    # Sem mensagens por página: a saída deste script é lida linha a linha pelo painel
+    return get_client().get_all(f"{base_url}/tasks", params=params, entity_name=f"tarefas de {user_name}",
+                                page_size=50, order=None, verbose=False)
+
+
+# Colunas gravadas em tasks, na ordem da tupla de task_to_row
+TASK_COLUMNS = (
+    "taskID", "externalId", "idUserFrom", "userFromName", "idUserTo", "userToName", "customerId",
+    "equipmentsId", "customerDescription", "taskType", "creationDate", "taskDate", "latitude",
+    "longitude", "address", "orientation", "priority", "deliveredOnSmarthPhone", "deliveredDate",
+    "finished", "report", "checkInDate", "checkOutDate", "products", "services", "summary",
+    "signatureUrl", "signatureName", "signatureDocument", "taskUrl", "taskStatus", "lastUpdate",
+)
+
+
+def task_key(task):
+    """taskID da tarefa crua, como gravado em tasks."""
+    return int(task.get("taskID") or task.get("id"))
+
+
+def task_version(task):
+    """Versão da tarefa crua, como gravada na coluna lastUpdate."""
+    return str(task.get("lastUpdate") or task.get("dateLastUpdate", ""))
+
+
+def task_to_row(task):
+    """Converte uma tarefa da API na tupla de TASK_COLUMNS (None para ignorá-la)."""
+    task_id = task.get("taskID") or task.get("id")
+    if not task_id:
+        return None
+    products = str(safe_json_serialize(task.get("products")))
+    services = str(safe_json_serialize(task.get("services")))
+    summary = str(safe_json_serialize(task.get("summary")))
+    # Campos de assinatura (robusto)
+    signature_url = task.get("signatureUrl") or (task.get("signature", {}) or {}).get("url", "")
+    signature_name = task.get("signatureName") or (task.get("signature", {}) or {}).get("name", "")
+    signature_document = task.get("signatureDocument") or (task.get("signature", {}) or {}).get("document", "")
+    try:
+        # Lógica para tratar o campo 'report' que pode ser string ou booleano
+        report_value = task.get("report")
+        if isinstance(report_value, str):
+            report_int = 1 if report_value else 0
+        else:
+            report_int = int(report_value or 0)
+
+        # Monta a tupla de dados na ordem correta das colunas
+        return (
+            int(task_id),
+            str(task.get("externalId", "")),
+            int(task.get("idUserFrom") or 0),
+            str(task.get("userFromName", "")),
+            int(task.get("idUserTo") or 0),
+            str(task.get("userToName", "")),
+            int(task.get("customerId") or 0),
+            safe_json_serialize(task.get('equipmentsId')), # Coluna corrigida
+            str(task.get("customerDescription", "")),
+            int(task.get("taskType") or 0),
+            str(task.get("creationDate", "")),
+            str(task.get("taskDate", "")),
+            float(task.get("latitude") or 0.0),
+            float(task.get("longitude") or 0.0),
+            str(task.get("address", "")),
+            str(task.get("orientation", "")),
+            int(task.get("priority") or 0),
+            int(task.get("deliveredOnSmarthPhone") or 0),
+            str(task.get("deliveredDate", "")),
+            int(task.get("finished") or 0),
+            report_int,
+            str(task.get("checkInDate", "")),
+            str(task.get("checkOutDate", "")),
+            products,
+            services,
+            summary,
+            signature_url,
+            signature_name,
+            signature_document,
+            str(task.get("taskUrl", "")),
+            int(task.get("taskStatus") or 0),
+            str(task.get("lastUpdate") or task.get("dateLastUpdate", "")) # Usa lastUpdate ou dateLastUpdate
+        )
+    except (ValueError, TypeError) as e:
+        print(f"[ERRO] Tarefa taskID={task_id} ignorada por erro de tipo/valor: {e}")
+        print(f"[ERRO] Dados brutos: {json.dumps(task, ensure_ascii=False)}")
+        return None
+
 
 def save_tasks_to_db(tasks, db_path):
+    """
+    Grava as tarefas em lote (um executemany com ON CONFLICT DO UPDATE).
+
+    Tarefas com o mesmo lastUpdate já gravado não são reescritas nem contadas.
+
+    Returns:
+        tuple: (inseridas, atualizadas)
+    """
     if not tasks:
         return 0, 0
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    inserted_count = 0
-    updated_count = 0
-    for task in tasks:
-        task_id = task.get("taskID") or task.get("id")
-        if not task_id:
-            continue
-        cursor.execute("SELECT taskID FROM tasks WHERE taskID = ?", (task_id,))
-        exists = cursor.fetchone()
-        products = str(safe_json_serialize(task.get("products")))
-        services = str(safe_json_serialize(task.get("services")))
-        summary = str(safe_json_serialize(task.get("summary")))
-        # Campos de assinatura (robusto)
-        signature_url = task.get("signatureUrl") or (task.get("signature", {}) or {}).get("url", "")
-        signature_name = task.get("signatureName") or (task.get("signature", {}) or {}).get("name", "")
-        signature_document = task.get("signatureDocument") or (task.get("signature", {}) or {}).get("document", "")
+    inserted, updated, _ = save_tasks(db_path, tasks, TASK_COLUMNS, task_to_row,
+                                      task_key=task_key, task_version=task_version)
+    return inserted, updated
+
+
+def harvest_tasks(users, start_date, end_date, db_path, workers=HARVEST_WORKERS, on_progress=None):
+    """
+    Busca as tarefas dos usuários em paralelo e grava no banco por uma única thread.
+
+    Até `workers` usuários são buscados ao mesmo tempo; o total de requisições é
+    limitado pelo token bucket do cliente compartilhado da API. As tarefas de cada
+    usuário vão para uma fila consumida por uma thread escritora, dona da única
+    conexão de escrita com o SQLite. As linhas de progresso em JSON são as mesmas
+    da versão sequencial.
+
+    Args:
+        users (list): Tuplas (userId, name)
+        start_date (datetime): Início do período
+        end_date (datetime): Fim do período
+        db_path (str): Caminho do banco
+        workers (int): Usuários buscados em paralelo
+        on_progress (callable): Recebe cada mensagem de progresso (dict); por
+            padrão, elas são impressas em JSON no stdout
+
+    Returns:
+        dict: Totais de tarefas, inseridas e atualizadas
+    """
+    output = on_progress or (lambda payload: print(json.dumps(payload)))
+    token, base_url = login_to_auvo()
+    num_users = len(users)
+    totals = {"tasks": 0, "inserted": 0, "updated": 0}
+    fetched = queue.Queue(maxsize=max(1, workers) * 2)
+    print_lock = threading.Lock()
+    started = [0]
+    write_error = []
+
+    def emit(payload):
+        with print_lock:
+            output(payload)
+
+    def fetch(user_id, user_name):
+        with print_lock:
+            started[0] += 1
+            percentage = int((started[0] / num_users) * 100)
+            message = f"({started[0]}/{num_users}) Buscando tarefas para {user_name}..."
+            output({"message": message, "percentage": percentage})
         try:
-            # Lógica para tratar o campo 'report' que pode ser string ou booleano
-            report_value = task.get("report")
-            if isinstance(report_value, str):
-                report_int = 1 if report_value else 0
-            else:
-                report_int = int(report_value or 0)
-
-            # Monta a tupla de dados na ordem correta das colunas
-            task_data = (
-                int(task_id),
-                str(task.get("externalId", "")),
-                int(task.get("idUserFrom") or 0),
-                str(task.get("userFromName", "")),
-                int(task.get("idUserTo") or 0),
-                str(task.get("userToName", "")),
-                int(task.get("customerId") or 0),
-                safe_json_serialize(task.get('equipmentsId')), # Coluna corrigida
-                str(task.get("customerDescription", "")),
-                int(task.get("taskType") or 0),
-                str(task.get("creationDate", "")),
-                str(task.get("taskDate", "")),
-                float(task.get("latitude") or 0.0),
-                float(task.get("longitude") or 0.0),
-                str(task.get("address", "")),
-                str(task.get("orientation", "")),
-                int(task.get("priority") or 0),
-                int(task.get("deliveredOnSmarthPhone") or 0),
-                str(task.get("deliveredDate", "")),
-                int(task.get("finished") or 0),
-                report_int,
-                str(task.get("checkInDate", "")),
-                str(task.get("checkOutDate", "")),
-                products,
-                services,
-                summary,
-                signature_url,
-                signature_name,
-                signature_document,
-                str(task.get("taskUrl", "")),
-                int(task.get("taskStatus") or 0),
-                str(task.get("lastUpdate") or task.get("dateLastUpdate", "")) # Usa lastUpdate ou dateLastUpdate
-            )
-        except (ValueError, TypeError) as e:
-            print(f"[ERRO] Tarefa taskID={task_id} ignorada por erro de tipo/valor: {e}")
-            print(f"[ERRO] Dados brutos: {json.dumps(task, ensure_ascii=False)}")
-            continue
-
-        if exists:
-            # A tupla para UPDATE não inclui o task_id no início
-            update_data = task_data[1:] + (task_id,)
-            update_query = """
-            UPDATE tasks SET
-                externalId=?, idUserFrom=?, userFromName=?, idUserTo=?, userToName=?, customerId=?, equipmentsId=?, customerDescription=?, taskType=?, creationDate=?, taskDate=?, latitude=?, longitude=?, address=?, orientation=?, priority=?, deliveredOnSmarthPhone=?, deliveredDate=?, finished=?, report=?, checkInDate=?, checkOutDate=?, products=?, services=?, summary=?, signatureUrl=?, signatureName=?, signatureDocument=?, taskUrl=?, taskStatus=?, lastUpdate=?
-            WHERE taskID=?
-            """
-            cursor.execute(update_query, update_data)
-            updated_count += 1
-        else:
-            # A tupla para INSERT inclui todos os campos
-            insert_query = """
-            INSERT INTO tasks (
-                taskID, externalId, idUserFrom, userFromName, idUserTo, userToName, customerId, equipmentsId, customerDescription, taskType, creationDate, taskDate, latitude, longitude, address, orientation, priority, deliveredOnSmarthPhone, deliveredDate, finished, report, checkInDate, checkOutDate, products, services, summary, signatureUrl, signatureName, signatureDocument, taskUrl, taskStatus, lastUpdate
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """
-            cursor.execute(insert_query, task_data)
-            inserted_count += 1
-    conn.commit()
-    conn.close()
-    return inserted_count, updated_count
+            tasks = get_tasks_for_user(token, base_url, user_id, user_name, start_date, end_date)
+        except Exception as e:
+            emit({"message": f"Erro ao buscar tarefas para {user_name}: {e}"})
+            tasks = []
+        fetched.put((user_name, tasks))
 
-def main(start_date_str, end_date_str):
-    # Garante que a saída seja lida em tempo real
-    sys.stdout.reconfigure(line_buffering=True)
+    def write():
+        conn = None
+        try:
+            # Uma falha ao abrir o banco também é registrada em write_error: a fila
+            # continua sendo esvaziada para as buscas não ficarem presas no put()
+            conn = sqlite3.connect(db_path)
+        except Exception as e:
+            write_error.append(e)
+        try:
+            while True:
+                item = fetched.get()
+                if item is None:
+                    break
+                user_name, tasks = item
+                if write_error:
+                    continue  # continua esvaziando a fila para não travar as buscas
+                if not tasks:
+                    emit({"message": f"Nenhuma tarefa nova encontrada para {user_name}."})
+                    continue
+                try:
+                    inserted, updated, _ = upsert_tasks(conn, tasks, TASK_COLUMNS, task_to_row,
+                                                        task_key=task_key, task_version=task_version)
+                except Exception as e:
+                    write_error.append(e)
+                    continue
+                totals["tasks"] += len(tasks)
+                totals["inserted"] += inserted
+                totals["updated"] += updated
+                summary_msg = f"{len(tasks)} tarefas encontradas para {user_name}. Inseridas: {inserted}, Atualizadas: {updated}."
+                emit({"message": summary_msg})
+        finally:
+            if conn is not None:
+                conn.close()
+
+    writer = threading.Thread(target=write, name="tasks-writer", daemon=True)
+    writer.start()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tasks-user") as pool:
+            for user_id, user_name in users:
+                pool.submit(fetch, user_id, user_name)
+    finally:
+        fetched.put(None)
+        writer.join()
+    if write_error:
+        raise write_error[0]
+    return totals
+
+
+def baixar_tarefas(start_date_str, end_date_str, workers=HARVEST_WORKERS, on_progress=None):
+    """
+    Baixa as tarefas de todos os usuários no período para o auvo.db.
+
+    Args:
+        start_date_str (str): Data inicial (YYYY-MM-DD)
+        end_date_str (str): Data final (YYYY-MM-DD)
+        workers (int): Usuários buscados em paralelo
+        on_progress (callable): Recebe as mensagens de progresso (ver harvest_tasks)
+
+    Returns:
+        dict: Totais de usuários, tarefas, inseridas e atualizadas
 
+    Raises:
+        ValueError: Se as datas não estiverem no formato YYYY-MM-DD
+    """
+    output = on_progress or (lambda payload: print(json.dumps(payload)))
     db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'auvo.db'))
-    
+
     # Converte as strings de data para objetos datetime
-    try:
-        start_date_obj = datetime.strptime(start_date_str, '%Y-%m-%d')
-        end_date_obj = datetime.strptime(end_date_str, '%Y-%m-%d')
-    except ValueError:
-        print(json.dumps({"message": "Formato de data inválido. Use YYYY-MM-DD.", "error": True}))
-        sys.exit(1)
+    start_date_obj = datetime.strptime(start_date_str, '%Y-%m-%d')
+    end_date_obj = datetime.strptime(end_date_str, '%Y-%m-%d')
 
     # Garante que a tabela exista
     conn = sqlite3.connect(db_path)
     create_tasks_table(conn)
+    apply_migrations(conn, verbose=False)
     conn.close()
 
-    token, base_url = login_to_auvo()
     users = get_all_users_from_db(db_path)
     num_users = len(users)
 
-    total_tasks = 0
-    total_inserted = 0
-    total_updated = 0
-
-    for i, (user_id, user_name) in enumerate(users):
-        percentage = int(((i + 1) / num_users) * 100)
-        message = f"({i+1}/{num_users}) Buscando tarefas para {user_name}..."
-        print(json.dumps({"message": message, "percentage": percentage}))
-
-        tasks = get_tasks_for_user(token, base_url, user_id, user_name, start_date_obj, end_date_obj)
-        
-        if tasks:
-            inserted, updated = save_tasks_to_db(tasks, db_path)
-            total_tasks += len(tasks)
-            total_inserted += inserted
-            total_updated += updated
-            
-            summary_msg = f"{len(tasks)} tarefas encontradas para {user_name}. Inseridas: {inserted}, Atualizadas: {updated}."
-            print(json.dumps({"message": summary_msg}))
-        else:
-            print(json.dumps({"message": f"Nenhuma tarefa nova encontrada para {user_name}."}))
-        
-        time.sleep(1)
+    start = time.perf_counter()
+    requests_before = get_client().stats["requests"]
+    totals = harvest_tasks(users, start_date_obj, end_date_obj, db_path, workers, on_progress)
+    elapsed = time.perf_counter() - start
+
+    final_summary = f"Resumo: {num_users} usuários processados, {totals['tasks']} tarefas encontradas, {totals['inserted']} inseridas, {totals['updated']} atualizadas."
+    output({"message": final_summary, "percentage": 100})
+    output({"message": (
+        f"Tempo: {elapsed:.1f}s ({totals['tasks'] / elapsed if elapsed else 0:.0f} tarefas/s, "
+        f"{get_client().stats['requests'] - requests_before} requisições, {workers} usuários em paralelo)."
+    )})
+    return dict(totals, users=num_users)
+
+
+def main(start_date_str, end_date_str, workers=HARVEST_WORKERS):
+    # Garante que a saída seja lida em tempo real
+    sys.stdout.reconfigure(line_buffering=True)
+
+    try:
+        datetime.strptime(start_date_str, '%Y-%m-%d')
+        datetime.strptime(end_date_str, '%Y-%m-%d')
+    except ValueError:
+        print(json.dumps({"message": "Formato de data inválido. Use YYYY-MM-DD.", "error": True}))
+        sys.exit(1)
 
-    final_summary = f"Resumo: {num_users} usuários processados, {total_tasks} tarefas encontradas, {total_inserted} inseridas, {total_updated} atualizadas."
-    print(json.dumps({"message": final_summary, "percentage": 100}))
+    baixar_tarefas(start_date_str, end_date_str, workers)
 
 def baixar_tarefas_periodo(start_date, end_date):
     """
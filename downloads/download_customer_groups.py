@@ -2,31 +2,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        if "result" in data and data["result"].get("authenticated"):
-            token = data["result"]["accessToken"]
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
 
 def create_customer_groups_table():
     conn = sqlite3.connect('auvo.db')
@@ -44,51 +26,7 @@ def create_customer_groups_table():
     conn.close()
 
 def get_customer_groups(token, base_url):
-    url = f"{base_url}/customerGroups/"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    all_groups = []
-    page = 1
-    page_size = 100
-    try:
-        while True:
-            params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            print(f"Buscando grupos página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code != 200:
-                print(f"Erro ao buscar grupos: {response.status_code}")
-                print(response.text)
-                break
-            data = response.json()
-            # Tratar diferentes formatos de resposta
-            entity_list = []
-            if isinstance(data, dict):
-                entity_list = data.get("result", [])
-            elif isinstance(data, list):
-                entity_list = data
-            else:
-                print("Resposta inesperada da API:", data)
-            count = len(entity_list)
-            all_groups.extend(entity_list)
-            print(f"Encontrados {count} grupos na página {page}")
-            if count < page_size:
-                break
-            page += 1
-    except Exception as e:
-        print(f"Erro ao buscar grupos: {e}")
-        try:
-            print("Resposta bruta da API:", response.text)
-        except:
-            pass
-    print(f"Total de grupos encontrados: {len(all_groups)}")
-    return all_groups
+    return get_client().get_all(f"{base_url}/customerGroups/", entity_name="grupos")
 
 def save_customer_groups_to_db(groups):
     conn = sqlite3.connect('auvo.db')
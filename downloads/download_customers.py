@@ -2,41 +2,19 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para permitir importações relativas
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
+
+try:
+    from downloads.customer_group_members import rebuild_customer_group_members
+except ImportError:
+    # Importação direta quando executado da pasta downloads
+    from customer_group_members import rebuild_customer_group_members
 
 def create_customers_table():
     conn = sqlite3.connect('auvo.db')
@@ -117,54 +95,7 @@ def create_customers_table():
     conn.close()
 
 def get_customers(token, base_url):
-    url = f"{base_url}/customers/"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-
-    all_customers = []
-    page = 1
-    page_size = 100
-    total_customers = 0
-
-    try:
-        while True:
-            params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-
-            if response.status_code != 200:
-                print(f"Erro ao buscar clientes: {response.status_code}")
-                print(response.text)
-                break
-
-            data = response.json()
-
-            # Corrigir para acessar a lista correta
-            entity_list = data.get("result", {}).get("entityList", [])
-            customers_count = len(entity_list)
-            total_customers += customers_count
-            all_customers.extend(entity_list)
-
-            print(f"Encontrados {customers_count} clientes na página {page}")
-
-            # Se menos que page_size, acabou
-            if customers_count < page_size:
-                break
-            page += 1
-
-    except Exception as e:
-        print(f"Erro ao buscar clientes: {e}")
-
-    print(f"Total de clientes encontrados: {total_customers}")
-    return all_customers
+    return get_client().get_all(f"{base_url}/customers/", entity_name="clientes")
 
 def safe_json_serialize(value):
     if value is None:
@@ -177,7 +108,18 @@ def safe_json_serialize(value):
         # Para qualquer outro tipo, converter para string
         return str(value)
 
-def save_customers_to_db(customers):
+def save_customers_to_db(customers, failed=None):
+    """
+    Grava os clientes no auvo.db (um commit por cliente).
+
+    Args:
+        customers (list): Clientes da API
+        failed (list): Se informada, recebe os ids dos clientes que não foram
+            gravados por erro
+
+    Raises:
+        Exception: Falha fora do processamento de um cliente (ex.: esquema da tabela)
+    """
     customers = [c for c in customers if isinstance(c, dict)]
     conn = sqlite3.connect('auvo.db')
     conn.execute("PRAGMA foreign_keys = ON")
@@ -300,12 +242,18 @@ def save_customers_to_db(customers):
                 print(f"Erro ao processar cliente {customer.get('id')}: {e}")
                 errors += 1
                 conn.rollback()
+                if failed is not None:
+                    failed.append(customer.get("id"))
                 
         print(f"\nResumo: {inserted} inseridos, {updated} atualizados, {skipped} pulados, {errors} erros")
+
+        # Reconstruir a associação contrato -> escola a partir de groupsId
+        rebuild_customer_group_members(conn)
         
     except Exception as e:
         print(f"Erro ao salvar clientes no banco de dados: {e}")
         conn.rollback()
+        raise
     finally:
         conn.close()
 
@@ -1,11 +1,15 @@
 import sqlite3
-import requests
 import json
 import os
 import sys
-from dotenv import load_dotenv
 from datetime import datetime
 
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
+
 def create_equipments_table(conn):
     """Verifica e atualiza a estrutura da tabela de equipamentos"""
     cursor = conn.cursor()
@@ -70,96 +74,12 @@ def create_equipments_table(conn):
         
         conn.commit()
 
-def login_to_auvo():
-    """Faz login na API Auvo e retorna o token de acesso"""
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
-
 def get_equipments(token, base_url):
     """Busca todos os equipamentos da API Auvo"""
-    url = f"{base_url}/equipments"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    
-    all_equipments = []
-    page = 1
-    page_size = 100
-    
     print("\nBuscando equipamentos da API Auvo...")
-    
-    try:
-        while True:
-            print(f"Buscando página {page}...")
-            response = requests.get(f"{url}?Page={page}&PageSize={page_size}", headers=headers)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar equipamentos: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            # Verificar o formato da resposta
-            equipments = []
-            if "result" in data:
-                if isinstance(data["result"], list):
-                    equipments = data["result"]
-                elif isinstance(data["result"], dict) and "entityList" in data["result"]:
-                    equipments = data["result"]["entityList"]
-            elif "entityList" in data:
-                equipments = data["entityList"]
-            
-            if not equipments:
-                print(f"Nenhum equipamento encontrado na página {page} ou formato de resposta desconhecido.")
-                print(f"Resposta: {json.dumps(data)[:200]}...")
-                break
-            
-            # Filtrar apenas os equipamentos válidos (dicionários)
-            valid_equipments = [equip for equip in equipments if isinstance(equip, dict)]
-            all_equipments.extend(valid_equipments)
-            
-            print(f"Encontrados {len(valid_equipments)} equipamentos na página {page}")
-            
-            # Verificar se há mais páginas
-            if len(equipments) < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar equipamentos: {e}")
-    
-    return all_equipments
+    equipments = get_client().get_all(f"{base_url}/equipments", entity_name="equipamentos", order=None)
+    # Filtrar apenas os equipamentos válidos (dicionários)
+    return [equip for equip in equipments if isinstance(equip, dict)]
 
 def save_equipments_to_db(equipments, db_path):
     """Salva os equipamentos no banco de dados SQLite"""
@@ -8,42 +8,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
-import time
 
-def login_to_auvo():
-    """Faz login na API Auvo e retorna o token de acesso"""
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("❌ Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"🔑 Usando credenciais: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"✅ Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("❌ Falha na autenticação!")
-            print(f"Resposta: {data}")
-            sys.exit(1)
-    except Exception as e:
-        print(f"❌ Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
 
 def create_equipments_table():
     """Cria ou atualiza a tabela de equipamentos com estrutura correta"""
@@ -122,97 +93,25 @@ def get_all_equipments(token, base_url):
     """
     Busca TODOS os equipamentos da API Auvo usando paginação
     Baseado na documentação oficial: GET /equipments/
+
+    As páginas seguintes à primeira são buscadas em paralelo pelo cliente compartilhado.
     """
     url = f"{base_url}/equipments/"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
-    all_equipments = []
-    page = 1
-    page_size = 100  # Máximo recomendado
-    total_found = 0
-    
     print(f"\n🔍 Iniciando busca de equipamentos...")
     print(f"📡 URL base: {url}")
-    
-    try:
-        while True:
-            print(f"📄 Buscando página {page} (pageSize={page_size})...")
-            
-            # Parâmetros conforme documentação oficial
-            params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"❌ Erro HTTP {response.status_code} ao buscar equipamentos")
-                print(f"Resposta: {response.text[:500]}...")
-                break
-            
-            try:
-                data = response.json()
-            except json.JSONDecodeError as e:
-                print(f"❌ Erro ao decodificar JSON: {e}")
-                print(f"Resposta bruta: {response.text[:200]}...")
-                break
-            
-            # Extrair lista de equipamentos conforme documentação
-            equipments_list = []
-            if "result" in data:
-                if isinstance(data["result"], dict) and "entityList" in data["result"]:
-                    equipments_list = data["result"]["entityList"]
-                    # Informações de paginação
-                    paged_data = data["result"].get("pagedSearchReturnData", {})
-                    total_items = paged_data.get("totalItems", 0)
-                    if page == 1 and total_items > 0:
-                        print(f"📊 Total de equipamentos disponíveis na API: {total_items}")
-                elif isinstance(data["result"], list):
-                    equipments_list = data["result"]
-            
-            if not equipments_list:
-                print(f"⚠️  Nenhum equipamento encontrado na página {page}")
-                if page == 1:
-                    print(f"Estrutura da resposta: {json.dumps(data, indent=2)[:300]}...")
-                break
-            
-            # Validar e filtrar equipamentos válidos
-            valid_equipments = []
-            for equipment in equipments_list:
-                if isinstance(equipment, dict) and "id" in equipment:
-                    valid_equipments.append(equipment)
-                else:
-                    print(f"⚠️  Equipamento inválido ignorado: {equipment}")
-            
-            all_equipments.extend(valid_equipments)
-            total_found += len(valid_equipments)
-            
-            print(f"✅ Página {page}: {len(valid_equipments)} equipamentos válidos encontrados")
-            print(f"📈 Total acumulado: {total_found} equipamentos")
-            
-            # Verificar se há mais páginas
-            if len(equipments_list) < page_size:
-                print(f"📋 Última página alcançada (retornou {len(equipments_list)} < {page_size})")
-                break
-            
-            page += 1
-            
-            # Pequena pausa para não sobrecarregar a API
-            time.sleep(0.1)
-    
-    except Exception as e:
-        print(f"❌ Erro ao buscar equipamentos: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    print(f"\n🎯 Busca finalizada: {total_found} equipamentos encontrados no total")
-    return all_equipments
+
+    equipments_list = get_client().get_all(url, entity_name="equipamentos")
+
+    # Validar e filtrar equipamentos válidos
+    valid_equipments = []
+    for equipment in equipments_list:
+        if isinstance(equipment, dict) and "id" in equipment:
+            valid_equipments.append(equipment)
+        else:
+            print(f"⚠️  Equipamento inválido ignorado: {equipment}")
+
+    print(f"\n🎯 Busca finalizada: {len(valid_equipments)} equipamentos encontrados no total")
+    return valid_equipments
 
 def safe_json_dumps(value):
     """Converte valor para JSON string de forma segura"""
@@ -223,8 +122,21 @@ def safe_json_dumps(value):
     else:
         return str(value)
 
-def save_equipments_to_db(equipments):
-    """Salva equipamentos no banco de dados SQLite"""
+def save_equipments_to_db(equipments, failed=None):
+    """
+    Salva equipamentos no banco de dados SQLite.
+
+    Args:
+        equipments (list): Equipamentos da API
+        failed (list): Se informada, recebe os ids dos equipamentos que não foram
+            gravados por erro
+
+    Returns:
+        tuple: (inseridos, atualizados)
+
+    Raises:
+        Exception: Falha fora do processamento de um equipamento (ex.: commit)
+    """
     if not equipments:
         print("⚠️  Nenhum equipamento para salvar!")
         return 0, 0
@@ -322,6 +234,8 @@ def save_equipments_to_db(equipments):
             except Exception as e:
                 error_count += 1
                 print(f"❌ Erro ao processar equipamento {equipment.get('id', 'desconhecido')}: {e}")
+                if failed is not None:
+                    failed.append(equipment.get("id"))
                 continue
         
         conn.commit()
@@ -333,6 +247,7 @@ def save_equipments_to_db(equipments):
     except Exception as e:
         print(f"❌ Erro crítico ao salvar no banco: {e}")
         conn.rollback()
+        raise
     finally:
         conn.close()
     
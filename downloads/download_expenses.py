@@ -2,32 +2,7 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
-
-def login_to_auvo():
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas!")
-        sys.exit(1)
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        if "result" in data and data["result"].get("authenticated"):
-            token = data["result"]["accessToken"]
-            print("Login realizado com sucesso!")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
 
 def create_expenses_table():
     conn = sqlite3.connect('auvo.db')
@@ -55,52 +30,20 @@ def create_expenses_table():
 from datetime import date, datetime
 import json
 
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
+
 def get_all_expenses(token, base_url):
-    url = f"{base_url}/expenses/"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    all_expenses = []
-    page = 1
-    page_size = 100
     # Definir período: do início do ano até hoje, formato yyyy-mm-ddTHH:MM:SS
     today = date.today()
     start_date = datetime(today.year, 1, 1, 0, 0, 0).strftime("%Y-%m-%dT%H:%M:%S")
     end_date = datetime(today.year, today.month, today.day, 23, 59, 59).strftime("%Y-%m-%dT%H:%M:%S")
-    try:
-        while True:
-            param_filter = {
-                "startDate": start_date,
-                "endDate": end_date
-            }
-            params = {
-                "paramFilter": json.dumps(param_filter),
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            print(f"Buscando página {page} de despesas ({start_date} a {end_date})...")
-            response = requests.get(url, headers=headers, params=params)
-            if response.status_code != 200:
-                print(f"Erro ao buscar despesas: {response.status_code}")
-                print(response.text)
-                break
-            data = response.json()
-            if "result" not in data or not data["result"]:
-                break
-            expenses = data["result"]
-            expenses_count = len(expenses)
-            all_expenses.extend(expenses)
-            print(f"Encontradas {expenses_count} despesas na página {page}")
-            if expenses_count < page_size:
-                break
-            page += 1
-    except Exception as e:
-        print(f"Erro ao buscar despesas: {e}")
-    print(f"Total de despesas encontradas: {len(all_expenses)}")
-    return all_expenses
+    print(f"Buscando despesas ({start_date} a {end_date})...")
+    params = {"paramFilter": json.dumps({"startDate": start_date, "endDate": end_date})}
+    return get_client().get_all(f"{base_url}/expenses/", params=params, entity_name="despesas")
 
 def save_expense_to_db(expense):
     if not expense or not isinstance(expense, dict):
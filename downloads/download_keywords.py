@@ -2,41 +2,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
 
 def create_keywords_table():
     conn = sqlite3.connect('auvo.db')
@@ -51,56 +23,7 @@ def create_keywords_table():
     conn.close()
 
 def get_keywords(token, base_url):
-    url = f"{base_url}/keywords"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
-    all_keywords = []
-    page = 1
-    page_size = 100
-    total_keywords = 0
-    
-    try:
-        while True:
-            params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar palavras-chave: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            if "result" not in data or not data["result"]:
-                break
-            
-            keywords = data["result"]
-            keywords_count = len(keywords)
-            total_keywords += keywords_count
-            all_keywords.extend(keywords)
-            
-            print(f"Encontradas {keywords_count} palavras-chave na página {page}")
-            
-            if keywords_count < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar palavras-chave: {e}")
-    
-    print(f"Total de palavras-chave encontradas: {total_keywords}")
-    return all_keywords
+    return get_client().get_all(f"{base_url}/keywords", entity_name="palavras-chave")
 
 def save_keywords_to_db(keywords):
     keywords = [k for k in keywords if isinstance(k, dict)]
@@ -2,41 +2,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
 
 def create_products_table():
     conn = sqlite3.connect('auvo.db')
@@ -74,57 +46,8 @@ def create_products_table():
     conn.close()
 
 def get_products(token, base_url):
-    url = f"{base_url}/products"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
-    all_products = []
-    page = 1
-    page_size = 100
-    total_products = 0
-    
-    try:
-        while True:
-            params = {
-                "paramFilter": json.dumps({}),  # Filtro vazio para trazer todos
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar produtos: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            if "result" not in data or not data["result"]:
-                break
-            
-            products = data["result"]
-            products_count = len(products)
-            total_products += products_count
-            all_products.extend(products)
-            
-            print(f"Encontrados {products_count} produtos na página {page}")
-            
-            if products_count < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar produtos: {e}")
-    
-    print(f"Total de produtos encontrados: {total_products}")
-    return all_products
+    params = {"paramFilter": json.dumps({})}  # Filtro vazio para trazer todos
+    return get_client().get_all(f"{base_url}/products", params=params, entity_name="produtos")
 
 def save_products_to_db(products):
     # Filtrar apenas dicionários para evitar erro de 'str' object has no attribute 'get'
@@ -2,41 +2,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import AuvoAPIError, get_client
 
 def create_questionnaires_table():
     conn = sqlite3.connect('auvo.db')
@@ -66,97 +38,27 @@ def create_questionnaires_table():
     conn.close()
 
 def get_questionnaires(token, base_url):
-    url = f"{base_url}/questionnaires"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
-    all_questionnaires = []
-    page = 1
-    page_size = 100
-    total_questionnaires = 0
-    
-    try:
-        while True:
-            params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar questionários: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            if "result" not in data or not data["result"]:
-                break
-            
-            questionnaires = data["result"]
-            print(f"[DEBUG] Lista bruta de questionários recebida: {questionnaires}")
-            questionnaires_count = len(questionnaires)
-            total_questionnaires += questionnaires_count
-            
-            # Filtrar apenas dicionários para evitar erro de 'str' object has no attribute 'get'
-            questionnaires = [q for q in questionnaires if isinstance(q, dict)]
-            print(f"[DEBUG] Lista de questionários após filtro dict: {questionnaires}")
-            # Para cada questionário na lista, buscar detalhes completos
-            for questionnaire in questionnaires:
-                questionnaire_id = questionnaire.get("id")
-                print(f"[DEBUG] Processando questionário id={questionnaire_id}")
-                if questionnaire_id:
-                    all_questionnaires.append(questionnaire)
-                else:
-                    print(f"[DEBUG] Questionário sem id válido: {questionnaire}")
-            
-            print(f"Encontrados {questionnaires_count} questionários na página {page}")
-            
-            if questionnaires_count < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar questionários: {e}")
-    
-    print(f"Total de questionários encontrados: {total_questionnaires}")
-    return all_questionnaires
+    questionnaires = get_client().get_all(f"{base_url}/questionnaires", entity_name="questionários")
+    # Filtrar apenas dicionários com id para evitar erro de 'str' object has no attribute 'get'
+    valid_questionnaires = [q for q in questionnaires if isinstance(q, dict) and q.get("id")]
+    if len(valid_questionnaires) != len(questionnaires):
+        print(f"Ignorados {len(questionnaires) - len(valid_questionnaires)} questionários sem id válido")
+    return valid_questionnaires
 
 def get_questionnaire_detail(token, base_url, questionnaire_id):
-    url = f"{base_url}/questionnaires/{questionnaire_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
     try:
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-            print(f"Erro ao buscar detalhes do questionário {questionnaire_id}: {response.status_code}")
-            return None
-        
-        data = response.json()
-        print(f"[DEBUG] Detalhe do questionário {questionnaire_id}: {data}")
-        if "result" in data:
-            return data["result"]
-        elif isinstance(data, dict) and "id" in data:
-            return data
-        else:
-            return None
-    
-    except Exception as e:
+        data = get_client().get(f"{base_url}/questionnaires/{questionnaire_id}")
+    except AuvoAPIError as e:
         print(f"Erro ao buscar detalhes do questionário {questionnaire_id}: {e}")
         return None
 
+    if "result" in data:
+        return data["result"]
+    elif isinstance(data, dict) and "id" in data:
+        return data
+    else:
+        return None
+
 def save_questionnaires_to_db(questionnaires):
     conn = sqlite3.connect('auvo.db')
     cursor = conn.cursor()
@@ -2,41 +2,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
 
 def create_services_table():
     conn = sqlite3.connect('auvo.db')
@@ -69,57 +41,8 @@ def create_services_table():
     conn.close()
 
 def get_services(token, base_url):
-    url = f"{base_url}/services"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
-    all_services = []
-    page = 1
-    page_size = 100
-    total_services = 0
-    
-    try:
-        while True:
-            params = {
-                "paramFilter": json.dumps({}),  # Filtro vazio para trazer todos
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar serviços: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            if "result" not in data or not data["result"]:
-                break
-            
-            services = data["result"]
-            services_count = len(services)
-            total_services += services_count
-            all_services.extend(services)
-            
-            print(f"Encontrados {services_count} serviços na página {page}")
-            
-            if services_count < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar serviços: {e}")
-    
-    print(f"Total de serviços encontrados: {total_services}")
-    return all_services
+    params = {"paramFilter": json.dumps({})}  # Filtro vazio para trazer todos
+    return get_client().get_all(f"{base_url}/services", params=params, entity_name="serviços")
 
 def save_services_to_db(services):
     # Filtrar apenas dicionários para evitar erro de 'str' object has no attribute 'get'
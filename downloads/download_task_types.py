@@ -2,41 +2,13 @@ import os
 import sys
 import json
 import sqlite3
-import requests
 from datetime import datetime
-from dotenv import load_dotenv
 
-def login_to_auvo():
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import AuvoAPIError, get_client
 
 def create_task_types_table():
     conn = sqlite3.connect('auvo.db')
@@ -91,83 +63,17 @@ def create_task_types_table():
     conn.close()
 
 def get_task_types(token, base_url):
-    url = f"{base_url}/taskTypes"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
-    
-    all_task_types = []
-    page = 1
-    page_size = 100
-    total_task_types = 0
-    
-    try:
-        while True:
-            params = {
-                "page": page,
-                "pageSize": page_size,
-                "order": "asc"
-            }
-            
-            print(f"Buscando página {page}...")
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar tipos de tarefas: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            if "result" not in data or not data["result"]:
-                break
-            
-            print("[DEBUG] Estrutura de data['result']:", data["result"])
-            result = data["result"]
-            # Se result for dict e tiver 'entityList', use ela
-            if isinstance(result, dict) and "entityList" in result:
-                task_types = result["entityList"]
-            else:
-                task_types = result if isinstance(result, list) else []
-            task_types_count = len(task_types)
-            total_task_types += task_types_count
-            all_task_types.extend(task_types)
-            
-            print(f"Encontrados {task_types_count} tipos de tarefas na página {page}")
-            
-            if task_types_count < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar tipos de tarefas: {e}")
-    
-    print(f"Total de tipos de tarefas encontrados: {total_task_types}")
-    return all_task_types
+    return get_client().get_all(f"{base_url}/taskTypes", entity_name="tipos de tarefas")
 
 def get_task_type_detail(token, base_url, task_type_id):
-    url = f"{base_url}/taskTypes/{task_type_id}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-        "x-api-key": os.getenv("API_KEY")
-    }
     try:
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            if "result" in data:
-                return data["result"]
-        else:
-            print(f"Erro ao buscar detalhe do tipo de tarefa {task_type_id}: {response.status_code}")
-    except Exception as e:
+        data = get_client().get(f"{base_url}/taskTypes/{task_type_id}")
+        if "result" in data:
+            return data["result"]
+    except AuvoAPIError as e:
         print(f"Erro ao buscar detalhe do tipo de tarefa {task_type_id}: {e}")
     return None
 
-
 def save_task_types_to_db(task_types):
     # Filtrar apenas dicionários para evitar erro de 'str' object has no attribute 'get'
     task_types = [t for t in task_types if isinstance(t, dict)]
@@ -224,6 +130,7 @@ def save_task_types_to_db(task_types):
     except Exception as e:
         print(f"Erro ao salvar tipos de tarefas no banco de dados: {e}")
         conn.rollback()
+        raise
     
     finally:
         conn.close()
@@ -150,6 +150,7 @@ def save_teams_to_db(teams, available_columns):
     except Exception as e:
         print(f"Erro ao salvar times no banco de dados: {e}")
         conn.rollback()
+        raise
     
     finally:
         conn.close()
@@ -1,11 +1,15 @@
 import sqlite3
-import requests
 import json
 import os
 import sys
-from dotenv import load_dotenv
 from datetime import datetime
 
+# Adicionar o diretório raiz ao path para usar o cliente compartilhado da API Auvo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from downloads.common import login_to_auvo
+from auvo_client import get_client
+
 def create_users_table(conn):
     """Cria a tabela de usuários se não existir"""
     cursor = conn.cursor()
@@ -38,99 +42,29 @@ def create_users_table(conn):
     """)
     conn.commit()
 
-def login_to_auvo():
-    """Faz login na API Auvo e retorna o token de acesso"""
-    # Carregar credenciais do arquivo .env
-    load_dotenv()
-    api_key = os.getenv("API_KEY")
-    api_token = os.getenv("API_TOKEN")
-    base_url = os.getenv("API_URL") or "https://api.auvo.com.br/v2"
-    
-    if not api_key or not api_token:
-        print("Credenciais da API não encontradas no arquivo .env!")
-        sys.exit(1)
-    
-    print(f"Usando credenciais do arquivo .env: API_KEY={api_key[:4]}...{api_key[-4:]}")
-    
-    # Fazer login
-    login_url = f"{base_url}/login/?apiKey={api_key}&apiToken={api_token}"
-    
-    try:
-        response = requests.get(login_url)
-        data = response.json()
-        
-        if "result" in data and data["result"]["authenticated"]:
-            token = data["result"]["accessToken"]
-            expiration = data["result"]["expiration"]
-            print(f"Login realizado com sucesso! Token válido até: {expiration}")
-            return token, base_url
-        else:
-            print("Falha na autenticação!")
-            sys.exit(1)
-    except Exception as e:
-        print(f"Erro ao fazer login: {e}")
-        sys.exit(1)
-
 def get_users(token, base_url):
     """Busca todos os usuários da API Auvo"""
-    url = f"{base_url}/users"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    
-    all_users = []
-    page = 1
-    page_size = 100
-    
     print("\nBuscando usuários da API Auvo...")
-    
-    try:
-        while True:
-            print(f"Buscando página {page}...")
-            response = requests.get(f"{url}?Page={page}&PageSize={page_size}", headers=headers)
-            
-            if response.status_code != 200:
-                print(f"Erro ao buscar usuários: {response.status_code}")
-                print(response.text)
-                break
-            
-            data = response.json()
-            
-            # Verificar o formato da resposta
-            users = []
-            if "result" in data:
-                if isinstance(data["result"], list):
-                    users = data["result"]
-                elif isinstance(data["result"], dict) and "entityList" in data["result"]:
-                    users = data["result"]["entityList"]
-            elif "entityList" in data:
-                users = data["entityList"]
-            
-            if not users:
-                print(f"Nenhum usuário encontrado na página {page} ou formato de resposta desconhecido.")
-                print(f"Resposta: {json.dumps(data)[:200]}...")
-                break
-            
-            # Filtrar apenas os usuários válidos (dicionários)
-            valid_users = [user for user in users if isinstance(user, dict)]
-            all_users.extend(valid_users)
-            
-            print(f"Encontrados {len(valid_users)} usuários na página {page}")
-            
-            # Verificar se há mais páginas
-            if len(users) < page_size:
-                break
-            
-            page += 1
-    
-    except Exception as e:
-        print(f"Erro ao buscar usuários: {e}")
-    
-    return all_users
+    users = get_client().get_all(f"{base_url}/users", entity_name="usuários", order=None)
+    # Filtrar apenas os usuários válidos (dicionários)
+    return [user for user in users if isinstance(user, dict)]
+
+def save_users_to_db(users, db_path, failed=None):
+    """
+    Salva os usuários no banco de dados SQLite.
 
-def save_users_to_db(users, db_path):
-    """Salva os usuários no banco de dados SQLite"""
+    Args:
+        users (list): Usuários da API
+        db_path (str): Caminho do banco
+        failed (list): Se informada, recebe os ids dos usuários que não foram
+            gravados por erro
+
+    Returns:
+        tuple: (inseridos, atualizados)
+
+    Raises:
+        Exception: Falha fora do processamento de um usuário (ex.: commit)
+    """
     if not users:
         print("Nenhum usuário para salvar no banco de dados.")
         return 0, 0
@@ -231,6 +165,8 @@ def save_users_to_db(users, db_path):
             
             except Exception as e:
                 print(f"Erro ao processar usuário {user.get('userId', 'desconhecido')}: {e}")
+                if failed is not None:
+                    failed.append(user.get("userId"))
                 continue
         
         conn.commit()
@@ -240,7 +176,7 @@ def save_users_to_db(users, db_path):
     
     except Exception as e:
         print(f"Erro ao salvar usuários no banco de dados: {e}")
-        return 0, 0
+        raise
 
 def main():
     """Função principal"""
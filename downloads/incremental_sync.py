@@ -0,0 +1,472 @@
+"""
+Sincronização incremental (CDC) das entidades da API Auvo para o auvo.db.
+
+Cada entidade (tarefas, clientes, equipamentos, usuários, times e tipos de tarefa)
+tem uma marca d'água (`watermark`) na tabela `update_control`: a maior versão
+(`dateLastUpdate`/`lastUpdate`) já recebida. Em cada execução:
+
+1. A busca envia o filtro de data de atualização ao servidor nas entidades em que a
+   API o aceita; nas demais, a coleção é listada inteira.
+2. Cada registro recebido é comparado com o hash gravado na última sincronização
+   (`sync_row_hashes`); só os novos ou alterados são passados à função de gravação
+   do script de download da entidade.
+3. Opcionalmente (`reconcile=True`), uma passada separada lista apenas as chaves
+   existentes na API e remove do banco os registros que deixaram de existir.
+
+Cada execução fica registrada em `sync_runs` com os registros buscados, alterados e
+removidos, para acompanhar que as sincronizações noturnas gravam só o delta.
+
+Uso:
+    from downloads.incremental_sync import sync_all
+    sync_all(DB_PATH, ["users", "tasks"], reconcile=True)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from api_logging import get_logger
+from auvo_client import get_client
+
+logger = get_logger("incremental_sync")
+
+# Janela de datas das tarefas sincronizadas (a API exige startDate/endDate)
+TASKS_LOOKBACK_DAYS = int(os.getenv("AUVO_SYNC_TASKS_LOOKBACK_DAYS") or 60)
+TASKS_LOOKAHEAD_DAYS = int(os.getenv("AUVO_SYNC_TASKS_LOOKAHEAD_DAYS") or 30)
+
+# A remoção é cancelada se a API devolver menos chaves que esta fração das locais
+# (ex.: listagem incompleta ou filtro inesperado no servidor)
+MIN_RECONCILE_RATIO = 0.5
+
+# Chaves por consulta (abaixo do limite de variáveis do SQLite)
+LOTE_CONSULTA = 900
+
+
+class Entity:
+    """
+    Descrição de uma entidade sincronizada.
+
+    Args:
+        name (str): Nome da entidade em `update_control`/`sync_runs`
+        label (str): Nome para as mensagens
+        path (str): Endpoint da API
+        table (str): Tabela local
+        key (str): Campo da chave, igual na API e na tabela
+        save (callable): Grava os registros alterados: save(items, db_path). Pode
+            devolver as chaves dos registros que não conseguiu gravar; falhas do
+            lote inteiro devem levantar exceção
+        prepare (callable): Cria/ajusta a tabela antes da gravação: prepare(db_path)
+        version_field (str): Campo com a data da última alteração na API
+        since_param (str): Chave do paramFilter com a data mínima de atualização,
+            para entidades em que a API filtra no servidor; None lista tudo
+        task_window (bool): Limita a busca e a remoção à janela de datas das tarefas
+    """
+
+    def __init__(self, name, label, path, table, key, save, prepare=None, version_field=None,
+                 since_param=None, task_window=False):
+        self.name = name
+        self.label = label
+        self.path = path
+        self.table = table
+        self.key = key
+        self.save = save
+        self.prepare = prepare
+        self.version_field = version_field
+        self.since_param = since_param
+        self.task_window = task_window
+
+    def params(self, watermark=None, today=None):
+        """Parâmetros da listagem; com `watermark`, só o que mudou desde então."""
+        param_filter = {}
+        if self.task_window:
+            start, end = task_window(today)
+            param_filter.update(startDate=f"{start}T00:00:00", endDate=f"{end}T23:59:59")
+        if watermark and self.since_param:
+            param_filter[self.since_param] = watermark
+        return {"paramFilter": json.dumps(param_filter)} if param_filter else None
+
+
+def task_window(today=None):
+    """Retorna (início, fim) da janela de datas das tarefas sincronizadas (YYYY-MM-DD)."""
+    today = today or datetime.now().date()
+    return ((today - timedelta(days=TASKS_LOOKBACK_DAYS)).isoformat(),
+            (today + timedelta(days=TASKS_LOOKAHEAD_DAYS)).isoformat())
+
+
+def _save_users(items, db_path):
+    from downloads.download_users import save_users_to_db
+    failed = []
+    save_users_to_db(items, db_path, failed=failed)
+    return failed
+
+
+def _prepare_users(db_path):
+    from downloads.download_users import create_users_table
+    conn = sqlite3.connect(db_path)
+    try:
+        create_users_table(conn)
+    finally:
+        conn.close()
+
+
+def _save_customers(items, db_path):
+    from downloads.download_customers import save_customers_to_db
+    failed = []
+    save_customers_to_db(items, failed=failed)
+    return failed
+
+
+def _prepare_customers(db_path):
+    from downloads.download_customers import create_customers_table
+    create_customers_table()
+
+
+def _save_equipments(items, db_path):
+    from downloads.download_equipments_new import save_equipments_to_db
+    failed = []
+    save_equipments_to_db(items, failed=failed)
+    return failed
+
+
+def _prepare_equipments(db_path):
+    from downloads.download_equipments_new import create_equipments_table
+    create_equipments_table()
+
+
+def _save_teams(items, db_path):
+    from downloads.download_teams import create_teams_table, save_teams_to_db
+    save_teams_to_db(items, create_teams_table())
+
+
+def _save_task_types(items, db_path):
+    from downloads.download_task_types import save_task_types_to_db
+    save_task_types_to_db(items)
+
+
+def _prepare_task_types(db_path):
+    from downloads.download_task_types import create_task_types_table
+    create_task_types_table()
+
+
+def _save_tasks(items, db_path):
+    from downloads.download_all_user_tasks_v2 import save_tasks_to_db
+    save_tasks_to_db(items, db_path)
+
+
+def _prepare_tasks(db_path):
+    from downloads.download_all_user_tasks_v2 import create_tasks_table
+    conn = sqlite3.connect(db_path)
+    try:
+        create_tasks_table(conn)
+    finally:
+        conn.close()
+
+
+# Entidades na ordem de sincronização (as tarefas referenciam usuários e clientes).
+# Os scripts de clientes, equipamentos e tipos de tarefa gravam no auvo.db do
+# diretório atual: a sincronização deve rodar na raiz do projeto.
+ENTITIES = {
+    entity.name: entity for entity in (
+        Entity("users", "usuários", "/users", "users", "userId", _save_users, _prepare_users),
+        Entity("teams", "times", "/teams", "teams", "id", _save_teams,
+               version_field="dateLastUpdate"),
+        Entity("task_types", "tipos de tarefas", "/taskTypes", "task_types", "id", _save_task_types,
+               _prepare_task_types, version_field="dateLastUpdate"),
+        Entity("customers", "clientes", "/customers/", "customers", "id", _save_customers,
+               _prepare_customers, version_field="dateLastUpdate", since_param="dateLastUpdate"),
+        Entity("equipments", "equipamentos", "/equipments/", "equipments", "id", _save_equipments,
+               _prepare_equipments),
+        Entity("tasks", "tarefas", "/tasks/", "tasks", "taskID", _save_tasks, _prepare_tasks,
+               version_field="dateLastUpdate", since_param="dateLastUpdate", task_window=True),
+    )
+}
+
+
+def create_sync_tables(conn):
+    """
+    Cria (ou completa) `update_control`, `sync_row_hashes` e `sync_runs`.
+
+    Não faz commit: dentro da migração 0007 a transação é do apply_migrations.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS update_control (
+            entity_type TEXT PRIMARY KEY,
+            last_update TIMESTAMP,
+            records_updated INTEGER,
+            status TEXT
+        )
+    """)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(update_control)")}
+    for column, column_type in (("watermark", "TEXT"), ("records_fetched", "INTEGER"),
+                                ("records_deleted", "INTEGER")):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE update_control ADD COLUMN {column} {column_type}")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_row_hashes (
+            entity_type TEXT NOT NULL,
+            record_key TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            PRIMARY KEY (entity_type, record_key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entity_type TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            finished_at TEXT,
+            watermark_from TEXT,
+            watermark_to TEXT,
+            server_filtered INTEGER,
+            records_fetched INTEGER,
+            records_changed INTEGER,
+            records_deleted INTEGER,
+            requests INTEGER,
+            status TEXT,
+            error TEXT
+        )
+    """)
+
+
+def record_hash(item):
+    """Hash do registro como veio da API (independente da ordem das chaves)."""
+    payload = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get_watermark(conn, entity_name):
+    row = conn.execute("SELECT watermark FROM update_control WHERE entity_type = ?", (entity_name,)).fetchone()
+    return row[0] if row else None
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), LOTE_CONSULTA):
+        yield values[start:start + LOTE_CONSULTA]
+
+
+def _stored_hashes(conn, entity_name, keys):
+    hashes = {}
+    for chunk in _chunks(keys):
+        placeholders = ", ".join("?" for _ in chunk)
+        hashes.update(conn.execute(
+            f"SELECT record_key, hash FROM sync_row_hashes WHERE entity_type = ? AND record_key IN ({placeholders})",
+            [entity_name] + chunk,
+        ).fetchall())
+    return hashes
+
+
+def _local_keys(conn, entity, keys=None):
+    """Chaves presentes na tabela da entidade (todas ou só as de `keys`), como texto."""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (entity.table,)).fetchone():
+        return set()
+    window = ""
+    window_params = []
+    if entity.task_window:
+        window = " AND substr(taskDate, 1, 10) BETWEEN ? AND ?"
+        window_params = list(task_window())
+    if keys is None:
+        rows = conn.execute(f"SELECT {entity.key} FROM {entity.table} WHERE 1 = 1{window}", window_params)
+        return {str(row[0]) for row in rows}
+    found = set()
+    for chunk in _chunks(keys):
+        placeholders = ", ".join("?" for _ in chunk)
+        rows = conn.execute(f"SELECT {entity.key} FROM {entity.table} WHERE {entity.key} IN ({placeholders})", chunk)
+        found.update(str(row[0]) for row in rows)
+    return found
+
+
+def changed_records(conn, entity, items):
+    """
+    Separa os registros novos ou alterados desde a última sincronização.
+
+    Um registro é considerado alterado se o hash mudou ou se ele não está na tabela
+    (ex.: banco recriado ou registro removido localmente).
+
+    Returns:
+        tuple: (registros alterados, {chave: hash} deles)
+    """
+    by_key = {}
+    for item in items:
+        if isinstance(item, dict) and item.get(entity.key) is not None:
+            by_key[str(item[entity.key])] = item
+    stored = _stored_hashes(conn, entity.name, by_key.keys())
+    present = _local_keys(conn, entity, [int(key) if key.isdigit() else key for key in by_key])
+
+    changed, hashes = [], {}
+    for key, item in by_key.items():
+        item_hash = record_hash(item)
+        if stored.get(key) != item_hash or key not in present:
+            changed.append(item)
+            hashes[key] = item_hash
+    return changed, hashes
+
+
+def list_keys(entity, client=None):
+    """
+    Passada de remoção: lista só as chaves existentes na API, sem converter nem
+    gravar registros. Falhas interrompem a passada (uma listagem parcial removeria
+    registros válidos).
+    """
+    client = client or get_client()
+    params = entity.params()
+    keys = set()
+    page = 1
+    while True:
+        entities, _ = client.get_page(entity.path, page, 100, params, None)
+        keys.update(str(item[entity.key]) for item in entities
+                    if isinstance(item, dict) and item.get(entity.key) is not None)
+        if len(entities) < 100:
+            return keys
+        page += 1
+
+
+def delete_missing(conn, entity, api_keys):
+    """Remove da tabela os registros cujas chaves não existem mais na API."""
+    local = _local_keys(conn, entity)
+    missing = local - api_keys
+    if not missing:
+        return 0
+    if len(api_keys) < len(local) * MIN_RECONCILE_RATIO:
+        logger.warning("%s: remoção cancelada, API devolveu %d chaves para %d registros locais",
+                       entity.label, len(api_keys), len(local))
+        return 0
+
+    values = [int(key) if key.isdigit() else key for key in missing]
+    with conn:
+        for chunk in _chunks(values):
+            placeholders = ", ".join("?" for _ in chunk)
+            conn.execute(f"DELETE FROM {entity.table} WHERE {entity.key} IN ({placeholders})", chunk)
+        for chunk in _chunks(missing):
+            placeholders = ", ".join("?" for _ in chunk)
+            conn.execute(f"DELETE FROM sync_row_hashes WHERE entity_type = ? AND record_key IN ({placeholders})",
+                         [entity.name] + chunk)
+    return len(missing)
+
+
+def sync_entity(db_path, entity, reconcile=False, client=None):
+    """
+    Sincroniza uma entidade: busca o delta, grava só os registros alterados e
+    registra a execução em `sync_runs`.
+
+    Se alguma página falhar, a execução termina com status "error": nada é gravado,
+    a marca d'água anterior é mantida e a passada de remoção não roda (uma listagem
+    parcial removeria registros válidos). Se a gravação de algum registro falhar,
+    o hash só é registrado para os gravados e a execução também termina com status
+    "error" e a marca d'água anterior: os registros com falha voltam na próxima.
+
+    Args:
+        db_path (str): Caminho do auvo.db
+        entity (Entity): Entidade (ver ENTITIES)
+        reconcile (bool): Executa a passada de remoção dos registros excluídos na API
+        client (AuvoClient): Cliente da API (padrão: o compartilhado)
+
+    Returns:
+        dict: Estatísticas da execução (fetched, changed, deleted, requests, seconds...)
+    """
+    client = client or get_client()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        create_sync_tables(conn)
+    watermark = get_watermark(conn, entity.name)
+    server_filtered = bool(watermark and entity.since_param)
+    started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    run_id = conn.execute(
+        "INSERT INTO sync_runs (entity_type, started_at, watermark_from, server_filtered, status) "
+        "VALUES (?, ?, ?, ?, 'running')", (entity.name, started_at, watermark, int(server_filtered))
+    ).lastrowid
+    conn.commit()
+
+    start = time.perf_counter()
+    requests_before = client.stats["requests"]
+    stats = {"entity": entity.name, "fetched": 0, "changed": 0, "deleted": 0,
+             "watermark_from": watermark, "watermark_to": watermark, "server_filtered": server_filtered}
+    try:
+        logger.info("Sincronizando %s (%s)...", entity.label,
+                    "alterados desde " + watermark if server_filtered else "listagem completa")
+        # strict: uma página com erro interrompe a execução em vez de devolver a
+        # listagem parcial como se fosse a completa
+        items = [item for item in client.get_all(entity.path, params=entity.params(watermark),
+                                                 entity_name=entity.label, order=None, verbose=False,
+                                                 strict=True)
+                 if isinstance(item, dict)]
+        stats["fetched"] = len(items)
+
+        changed, hashes = changed_records(conn, entity, items)
+        failed = set()
+        if changed:
+            if entity.prepare:
+                entity.prepare(db_path)
+            failed = {str(key) for key in entity.save(changed, db_path) or () if key is not None}
+            with conn:
+                conn.executemany(
+                    "INSERT INTO sync_row_hashes (entity_type, record_key, hash) VALUES (?, ?, ?) "
+                    "ON CONFLICT(entity_type, record_key) DO UPDATE SET hash = excluded.hash",
+                    [(entity.name, key, item_hash) for key, item_hash in hashes.items() if key not in failed],
+                )
+        stats["changed"] = len(changed) - len(failed & hashes.keys())
+        if failed:
+            # A marca d'água não avança: a próxima busca incremental traz de novo
+            # os registros que não foram gravados
+            stats["failed"] = len(failed)
+            raise RuntimeError(f"{len(failed)} registro(s) não gravado(s): "
+                               f"{', '.join(sorted(failed)[:10])}")
+
+        if entity.version_field:
+            versions = [str(item[entity.version_field]) for item in items if item.get(entity.version_field)]
+            stats["watermark_to"] = max(versions + ([watermark] if watermark else []), default=None)
+
+        if reconcile:
+            # Sem filtro no servidor, a própria listagem (completa, pelo strict) já
+            # traz todas as chaves
+            api_keys = ({str(item[entity.key]) for item in items if item.get(entity.key) is not None}
+                        if not server_filtered else list_keys(entity, client))
+            stats["deleted"] = delete_missing(conn, entity, api_keys)
+    except Exception as e:
+        stats.update(status="error", error=str(e))
+        logger.error("Erro ao sincronizar %s: %s", entity.label, e)
+    else:
+        stats["status"] = "success"
+
+    stats["requests"] = client.stats["requests"] - requests_before
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    finished_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with conn:
+        conn.execute(
+            "UPDATE sync_runs SET finished_at = ?, watermark_to = ?, records_fetched = ?, records_changed = ?, "
+            "records_deleted = ?, requests = ?, status = ?, error = ? WHERE id = ?",
+            (finished_at, stats["watermark_to"], stats["fetched"], stats["changed"], stats["deleted"],
+             stats["requests"], stats["status"], stats.get("error"), run_id),
+        )
+        conn.execute(
+            "INSERT INTO update_control (entity_type, last_update, records_updated, status, watermark, "
+            "records_fetched, records_deleted) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(entity_type) DO UPDATE SET last_update = excluded.last_update, "
+            "records_updated = excluded.records_updated, status = excluded.status, "
+            "watermark = excluded.watermark, records_fetched = excluded.records_fetched, "
+            "records_deleted = excluded.records_deleted",
+            (entity.name, finished_at, stats["changed"], stats["status"],
+             stats["watermark_to"] if stats["status"] == "success" else watermark,
+             stats["fetched"], stats["deleted"]),
+        )
+    conn.close()
+
+    logger.info("%s: %d buscados, %d alterados, %d removidos, %d requisições (%ss)", entity.label,
+                stats["fetched"], stats["changed"], stats["deleted"], stats["requests"], stats["seconds"])
+    return stats
+
+
+def sync_all(db_path, entities=None, reconcile=False, client=None):
+    """
+    Sincroniza as entidades informadas (padrão: todas, na ordem de ENTITIES).
+
+    Returns:
+        list: Estatísticas de cada entidade (ver sync_entity)
+    """
+    names = entities or list(ENTITIES)
+    unknown = [name for name in names if name not in ENTITIES]
+    if unknown:
+        raise ValueError(f"Entidades desconhecidas: {', '.join(unknown)}")
+    return [sync_entity(db_path, ENTITIES[name], reconcile, client) for name in names]
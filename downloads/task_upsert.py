@@ -0,0 +1,150 @@
+"""
+Gravação em lote das tarefas da API Auvo na tabela `tasks`.
+
+Substitui o padrão "SELECT taskID + UPDATE ou INSERT por tarefa" dos scripts de
+download de tarefas: cada tarefa é convertida uma única vez na tupla de colunas e a
+página inteira é gravada com um `executemany` de
+`INSERT ... ON CONFLICT(taskID) DO UPDATE`, em uma transação.
+
+Para devolver contagens exatas de inseridas/atualizadas, as versões já gravadas
+(coluna de versão, ex.: `lastUpdate`) são lidas com uma consulta por lote de IDs.
+Tarefas cuja versão não mudou desde a última gravação não são reescritas (e, com
+`task_key`/`task_version`, nem chegam a ser convertidas).
+"""
+import sqlite3
+
+# IDs por consulta de versões (abaixo do limite de variáveis do SQLite)
+LOTE_CONSULTA = 900
+
+
+def build_upsert_sql(table, columns, key="taskID"):
+    """
+    Monta o INSERT ... ON CONFLICT DO UPDATE de todas as colunas.
+
+    Args:
+        table (str): Tabela de destino
+        columns (tuple): Colunas na ordem das tuplas gravadas
+        key (str): Coluna da chave primária
+
+    Returns:
+        str: Comando SQL para executemany
+    """
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != key)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+        f"ON CONFLICT({key}) DO UPDATE SET {updates}"
+    )
+
+
+def _existing_versions(conn, table, key, version_column, keys):
+    versions = {}
+    keys = list(keys)
+    select_column = version_column or key
+    for start in range(0, len(keys), LOTE_CONSULTA):
+        chunk = keys[start:start + LOTE_CONSULTA]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor = conn.execute(
+            f"SELECT {key}, {select_column} FROM {table} WHERE {key} IN ({placeholders})", chunk
+        )
+        versions.update(cursor.fetchall())
+    return versions
+
+
+def upsert_tasks(conn, tasks, columns, to_row, table="tasks", key="taskID", version_column="lastUpdate",
+                 task_key=None, task_version=None, written=None):
+    """
+    Grava uma página de tarefas em um único executemany com ON CONFLICT DO UPDATE.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        tasks (list): Tarefas como vieram da API
+        columns (tuple): Colunas na ordem das tuplas devolvidas por `to_row`
+        to_row (callable): Converte uma tarefa na tupla de colunas; devolve None
+            para ignorar a tarefa (ex.: sem ID)
+        table (str): Tabela de destino
+        key (str): Coluna da chave primária (deve estar em `columns`)
+        version_column (str): Coluna comparada para pular tarefas não alteradas;
+            None grava sempre. Versões vazias nunca são consideradas iguais.
+        task_key (callable): Chave da tarefa crua, no formato gravado em `key`
+        task_version (callable): Versão da tarefa crua, no formato gravado em
+            `version_column`. Com `task_key`, as tarefas não alteradas são
+            descartadas antes da conversão por `to_row`.
+        written (list): Se informada, recebe as tuplas efetivamente gravadas
+
+    Returns:
+        tuple: (inseridas, atualizadas, sem alteração)
+    """
+    key_index = columns.index(key)
+    version_index = columns.index(version_column) if version_column else None
+    prefilter = bool(version_column and task_key and task_version)
+
+    inserted = updated = unchanged = 0
+    with conn:
+        # Leitura das versões e gravação na mesma transação de escrita
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+        if prefilter:
+            raw = {}
+            pending = []
+            for task in tasks:
+                try:
+                    raw[task_key(task)] = task
+                except (TypeError, ValueError, AttributeError):
+                    pending.append(task)  # a conversão registra o erro
+            versions = _existing_versions(conn, table, key, version_column, raw.keys())
+            for task_id, task in raw.items():
+                version = task_version(task)
+                if task_id in versions and version and versions[task_id] == version:
+                    unchanged += 1
+                else:
+                    pending.append(task)
+        else:
+            pending = tasks
+
+        # Uma tupla por taskID (a última ocorrência vence, como nas gravações uma a uma)
+        rows = {}
+        for task in pending:
+            try:
+                row = to_row(task)
+            except Exception as e:
+                task_id = task.get("taskID", "desconhecida") if isinstance(task, dict) else "desconhecida"
+                print(f"Erro ao processar tarefa {task_id}: {e}")
+                continue
+            if row is not None:
+                rows[row[key_index]] = row
+        if not rows:
+            return inserted, updated, unchanged
+
+        if not prefilter:
+            versions = _existing_versions(conn, table, key, version_column, rows.keys())
+        to_write = []
+        for row_key, row in rows.items():
+            if row_key not in versions:
+                inserted += 1
+            elif (not prefilter and version_index is not None and row[version_index]
+                  and versions[row_key] == row[version_index]):
+                unchanged += 1
+                continue
+            else:
+                updated += 1
+            to_write.append(row)
+        if to_write:
+            conn.executemany(build_upsert_sql(table, columns, key), to_write)
+            if written is not None:
+                written.extend(to_write)
+    return inserted, updated, unchanged
+
+
+def save_tasks(db_path, tasks, columns, to_row, **kwargs):
+    """
+    Abre o banco, grava as tarefas com `upsert_tasks` e fecha a conexão.
+
+    Returns:
+        tuple: (inseridas, atualizadas, sem alteração)
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return upsert_tasks(conn, tasks, columns, to_row, **kwargs)
+    finally:
+        conn.close()
@@ -1,36 +1,29 @@
 import sqlite3
-import requests
 import json
 import os
 import sys
 import time
 from dotenv import load_dotenv
 
+from auvo_client import AuvoAPIError, AuvoClient
+
 class AuvoAPI:
-    """Classe para interagir com a API Auvo"""
+    """Classe para interagir com a API Auvo (sobre o cliente compartilhado auvo_client)"""
     
     def __init__(self, api_key, api_token):
         self.api_key = api_key
         self.api_token = api_token
-        self.base_url = "https://api.auvo.com.br/v2"
+        self.client = AuvoClient(api_key, api_token, base_url="https://api.auvo.com.br/v2")
+        self.base_url = self.client.base_url
         self.token = None
     
     def login(self):
         """Faz login na API Auvo e obtém o token de autenticação"""
-        url = f"{self.base_url}/login/?apiKey={self.api_key}&apiToken={self.api_token}"
-        
         try:
-            response = requests.get(url)
-            data = response.json()
-            
-            if "result" in data and data["result"]["authenticated"]:
-                self.token = data["result"]["accessToken"]
-                print(f"Login realizado com sucesso! Token válido até: {data['result']['expiration']}")
-                return True
-            else:
-                print("Falha na autenticação!")
-                return False
-        except Exception as e:
+            self.token = self.client.login()
+            print("Login realizado com sucesso!")
+            return True
+        except AuvoAPIError as e:
             print(f"Erro ao fazer login: {e}")
             return False
     
@@ -40,24 +33,10 @@ class AuvoAPI:
             print("Você precisa fazer login primeiro!")
             return None
         
-        url = f"{self.base_url}{endpoint}"
-        
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-        
         try:
-            response = requests.get(url, headers=headers, params=params)
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Erro ao acessar {endpoint}: {response.status_code}")
-                print(response.text)
-                return None
-        except Exception as e:
-            print(f"Erro na requisição para {endpoint}: {e}")
+            return self.client.get(endpoint, params=params)
+        except AuvoAPIError as e:
+            print(f"Erro ao acessar {endpoint}: {e}")
             return None
 
 def extract_data_from_response(response):
@@ -0,0 +1,243 @@
+"""
+Jobs em segundo plano da API (ex.: POST /api/download-tasks).
+
+Um job é enfileirado em um pool de threads limitado e o endpoint devolve o ID na
+hora; o progresso é consultado em GET /api/jobs/{id} ou acompanhado pelo stream
+SSE de GET /api/jobs/{id}/events.
+
+O estado corrente fica em memória e cada mudança de status/percentual é gravada
+na tabela `jobs` do auvo.db, para que o resultado de jobs anteriores continue
+disponível após um reinício. Jobs que estavam na fila ou em execução quando o
+processo parou são marcados como `interrupted` na inicialização.
+
+Pedidos duplicados são agrupados: um período que se sobrepõe a um job ainda na
+fila amplia esse job (união dos períodos); um período coberto por um job em
+execução reaproveita o job em execução.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from api_logging import get_logger
+
+logger = get_logger("jobs")
+
+# Jobs executados ao mesmo tempo (configurável no .env/ambiente)
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS") or 1)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+INTERRUPTED = "interrupted"
+FINISHED_STATUSES = (DONE, ERROR, INTERRUPTED)
+
+JOB_COLUMNS = ("id", "kind", "params", "period_start", "period_end", "status", "progress",
+               "message", "result", "error", "created_at", "started_at", "finished_at")
+
+
+def create_jobs_table(conn):
+    """
+    Cria a tabela `jobs` se ela não existir.
+
+    Não faz commit: dentro da migração 0006 a transação é do apply_migrations.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            params TEXT,
+            period_start TEXT,
+            period_end TEXT,
+            status TEXT NOT NULL,
+            progress INTEGER NOT NULL DEFAULT 0,
+            message TEXT,
+            result TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at)")
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _row_to_job(row):
+    job = dict(zip(JOB_COLUMNS, row))
+    for column in ("params", "result"):
+        if job[column]:
+            job[column] = json.loads(job[column])
+    return job
+
+
+class JobManager:
+    """
+    Fila de jobs com persistência na tabela `jobs`.
+
+    Args:
+        db_path (str): Caminho do auvo.db
+        runners (dict): Função de cada tipo de job. Recebe (params, report), onde
+            `report(progress, message)` atualiza o percentual, e devolve o resultado
+            (dict serializável em JSON)
+        max_workers (int): Jobs executados ao mesmo tempo
+    """
+
+    def __init__(self, db_path, runners, max_workers=JOBS_MAX_WORKERS):
+        self.db_path = db_path
+        self.runners = runners
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                create_jobs_table(conn)
+                interrupted = conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error = 'Processo reiniciado antes do fim do job' "
+                    "WHERE status IN (?, ?)", (INTERRUPTED, _now(), QUEUED, RUNNING)
+                ).rowcount
+        finally:
+            conn.close()
+        if interrupted:
+            logger.warning("%d job(s) interrompido(s) pelo reinício do processo", interrupted)
+
+    def _save(self, job):
+        values = dict(job, params=json.dumps(job["params"]),
+                      result=json.dumps(job["result"]) if job["result"] is not None else None)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT INTO jobs ({', '.join(JOB_COLUMNS)}) VALUES ({', '.join('?' for _ in JOB_COLUMNS)}) "
+                    f"ON CONFLICT(id) DO UPDATE SET "
+                    f"{', '.join(f'{column} = excluded.{column}' for column in JOB_COLUMNS[1:])}",
+                    [values[column] for column in JOB_COLUMNS],
+                )
+        except sqlite3.Error:
+            logger.exception("Erro ao gravar o job %s", job["id"])
+        finally:
+            conn.close()
+
+    def _find_duplicate(self, kind, start, end):
+        for job in self._jobs.values():
+            if job["kind"] != kind or job["status"] in FINISHED_STATUSES:
+                continue
+            if job["status"] == QUEUED and job["period_start"] <= end and start <= job["period_end"]:
+                return job
+            if job["status"] == RUNNING and job["period_start"] <= start and end <= job["period_end"]:
+                return job
+        return None
+
+    def submit(self, kind, start, end, params=None):
+        """
+        Enfileira um job para o período [start, end] (datas YYYY-MM-DD) ou devolve
+        o job equivalente já pendente.
+
+        Returns:
+            dict: Cópia do estado do job
+        """
+        with self._lock:
+            job = self._find_duplicate(kind, start, end)
+            if job is not None:
+                if job["status"] == QUEUED:
+                    job["period_start"] = min(job["period_start"], start)
+                    job["period_end"] = max(job["period_end"], end)
+                    job["params"].update(start_date=job["period_start"], end_date=job["period_end"])
+                    self._save(job)
+                logger.info("Pedido %s %s..%s agrupado no job %s", kind, start, end, job["id"])
+                return dict(job)
+
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "params": dict(params or {}, start_date=start, end_date=end),
+                "period_start": start,
+                "period_end": end,
+                "status": QUEUED,
+                "progress": 0,
+                "message": None,
+                "result": None,
+                "error": None,
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+            }
+            self._jobs[job["id"]] = job
+            self._save(job)
+
+        self._pool.submit(self._run, job)
+        logger.info("Job %s (%s %s..%s) enfileirado", job["id"], kind, start, end)
+        return dict(job)
+
+    def _update(self, job, **changes):
+        with self._lock:
+            job.update(changes)
+            self._save(job)
+
+    def _run(self, job):
+        with self._lock:
+            job["status"] = RUNNING
+            job["started_at"] = _now()
+            params = dict(job["params"])
+            self._save(job)
+
+        def report(progress, message=None):
+            with self._lock:
+                changed = progress is not None and progress != job["progress"]
+                if progress is not None:
+                    job["progress"] = progress
+                job["message"] = message
+                # Só grava no banco quando o percentual muda
+                if changed:
+                    self._save(job)
+
+        try:
+            result = self.runners[job["kind"]](params, report)
+        except BaseException as e:
+            # Inclui SystemExit (ex.: sys.exit de um script de download): o job não
+            # pode ficar em "running" para sempre, reaproveitado pelos novos pedidos
+            logger.exception("Job %s falhou", job["id"])
+            self._update(job, status=ERROR, error=str(e) or type(e).__name__, finished_at=_now())
+        else:
+            self._update(job, status=DONE, progress=100, result=result, finished_at=_now())
+            logger.info("Job %s concluído", job["id"])
+
+    def get(self, job_id):
+        """Retorna o job (memória ou tabela `jobs`), ou None se não existir."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return _row_to_job(row) if row else None
+
+    def list(self, limit=50):
+        """Retorna os jobs mais recentes gravados na tabela `jobs`."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs ORDER BY created_at DESC, rowid DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [_row_to_job(row) for row in rows]
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,125 @@
+"""
+Codificação JSON das respostas grandes das APIs (dashboards de contrato).
+
+`dumps`/`loads` usam o orjson quando ele está instalado (bem mais rápido e sem a
+string intermediária do json padrão) e o módulo json caso contrário. O codificador
+pode ser forçado com a variável de ambiente JSON_ENCODER=json|orjson.
+
+`iter_json` gera o JSON de um dict em pedaços, elemento a elemento das listas do
+primeiro nível (ex.: escolas do dashboard), para uso com StreamingResponse: o
+payload completo nunca é montado em uma única string.
+"""
+import json
+import os
+
+from api_logging import get_logger
+
+logger = get_logger("json_encoding")
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson" if orjson else "json").strip().lower()
+if JSON_ENCODER == "orjson" and orjson is None:
+    logger.warning("JSON_ENCODER=orjson, mas o orjson não está instalado; usando json")
+    JSON_ENCODER = "json"
+
+# Número de elementos de lista codificados por pedaço em iter_json
+STREAM_CHUNK_ITEMS = 20
+
+
+def _stdlib_dumps(obj):
+    # Mesmas opções do JSONResponse do FastAPI
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def dumps(obj):
+    """
+    Serializa `obj` em JSON compacto (str).
+
+    Com o orjson, o resultado é JSON válido, mas não idêntico ao do json padrão:
+    floats podem ser escritos de outra forma (1e16 em vez de 1e+16), NaN e infinito
+    viram null (o json padrão, com allow_nan=False, levanta ValueError) e datetime,
+    date e UUID são serializados em ISO/texto (o json padrão levanta TypeError).
+    Valores que o orjson não suporta (ex.: inteiros acima de 64 bits) caem para o
+    json padrão.
+    """
+    if JSON_ENCODER == "orjson":
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
+    return _stdlib_dumps(obj)
+
+
+def loads(data):
+    """Desserializa um JSON (str ou bytes)."""
+    if JSON_ENCODER == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def iter_json(obj, chunk_items=STREAM_CHUNK_ITEMS):
+    """
+    Gera a serialização JSON de um dict em pedaços.
+
+    As listas do primeiro nível são codificadas de `chunk_items` em `chunk_items`
+    elementos; os demais valores, de uma vez. A concatenação dos pedaços é igual a
+    `dumps(obj)`.
+
+    Args:
+        obj (dict): Objeto a serializar
+        chunk_items (int): Elementos de lista por pedaço
+
+    Yields:
+        str: Pedaços do JSON
+    """
+    yield "{"
+    for index, (key, value) in enumerate(obj.items()):
+        prefix = ("," if index else "") + dumps(str(key)) + ":"
+        if not isinstance(value, list):
+            yield prefix + dumps(value)
+            continue
+        yield prefix + "["
+        for start in range(0, len(value), chunk_items):
+            chunk = dumps(value[start:start + chunk_items])[1:-1]
+            if chunk:
+                yield ("," if start else "") + chunk
+        yield "]"
+    yield "}"
+
+
+def parse_fields(fields):
+    """
+    Interpreta o parâmetro `fields=` das rotas de dashboard.
+
+    Aceita nomes separados por vírgula. Nomes simples formam uma projeção (apenas
+    essas colunas são mantidas); nomes com "-" são removidos
+    (ex.: "-questionnaires,-summary").
+
+    Args:
+        fields (str | None): Valor do parâmetro
+
+    Returns:
+        tuple: (colunas a manter ou None, colunas a remover)
+    """
+    include, exclude = [], set()
+    for name in (fields or "").split(","):
+        name = name.strip()
+        if name.startswith("-"):
+            if name[1:].strip():
+                exclude.add(name[1:].strip())
+        elif name:
+            include.append(name)
+    return (include or None), exclude
+
+
+def project_row(row, include=None, exclude=()):
+    """Aplica a projeção de `parse_fields` a uma linha (dict)."""
+    if include is not None:
+        return {key: row[key] for key in include if key in row and key not in exclude}
+    if exclude:
+        return {key: value for key, value in row.items() if key not in exclude}
+    return row
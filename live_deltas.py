@@ -0,0 +1,232 @@
+"""
+Deltas ao vivo do dashboard por contrato (GET /api/live/{group_id}/events).
+
+Os deltas são calculados a partir dos eventos de tarefas publicados no change_feed
+(webhook), sem remontar o dashboard: cada tarefa gravada contribui com a diferença
+entre o estado novo e o anterior para
+
+- `task_status`: mudanças de status (de/para) das tarefas do contrato;
+- `schools`: contadores por escola (tarefas e tarefas por status);
+- `kpis`: contadores do contrato (total_tasks, completed_tasks, non_pmoc_tasks e
+  tarefas por tipo), com as mesmas regras de /api/dashboard/{group_id}. O
+  completion_rate do dashboard é completed_tasks / non_pmoc_tasks * 100: o cliente
+  o recalcula a partir desses dois contadores.
+
+Os contadores ficam separados pelo dia da tarefa (`taskDate`): a tarefa que muda
+de dia sai do dia anterior e entra no novo. Assim, quem assina o contrato para um
+período (o mesmo do dashboard carregado) recebe só os incrementos desse período.
+
+O cliente aplica os deltas sobre o dashboard já carregado e guarda o cursor do
+último evento recebido ("<epoch>-<seq>") para retomar a conexão. O epoch identifica
+o processo da API: um cursor de antes de um reinício, ou de outro worker, recebe
+`reset`. Por isso o feed ao vivo exige a API com um único worker (o mesmo processo
+que recebe os webhooks).
+"""
+from change_feed import feed
+
+# Tipos de tarefa considerados no dashboard dos contratos
+DASHBOARD_TASK_TYPE_IDS = (175644, 175648, 175652, 175656, 175164, 175641, 175642, 175646, 175649, 175650,
+                           175653, 175654, 177626, 184713, 184714, 184715, 184717)
+CANCELLED_STATUS = 7
+COMPLETED_STATUS = 6
+
+
+def _add(counters, key, value):
+    if value:
+        counters[key] = counters.get(key, 0) + value
+        if not counters[key]:
+            del counters[key]
+
+
+def _task_day(task):
+    return (task.get("taskDate") or "")[:10]
+
+
+def _contribute(delta, task, sign, pmoc_task_type_id):
+    """
+    Soma (sign=1) ou subtrai (sign=-1) a contribuição de uma tarefa aos contadores
+    do dia da tarefa.
+    """
+    task_type = task.get("taskType")
+    status = task.get("taskStatus")
+    if task_type not in DASHBOARD_TASK_TYPE_IDS or status == CANCELLED_STATUS:
+        return
+
+    delta = delta["by_date"].setdefault(_task_day(task), {"schools": {}, "kpis": {}})
+    school = delta["schools"].setdefault(str(task.get("customerId")), {})
+    _add(school, "tasks", sign)
+    _add(school.setdefault("by_status", {}), str(status), sign)
+
+    kpis = delta["kpis"]
+    _add(kpis, "total_tasks", sign)
+    if task_type != pmoc_task_type_id:
+        # Denominador do completion_rate (sem PMOC)
+        _add(kpis, "non_pmoc_tasks", sign)
+        if status == COMPLETED_STATUS:
+            _add(kpis, "completed_tasks", sign)
+    _add(kpis.setdefault("task_types", {}), str(task_type), sign)
+
+
+def _prune(counters):
+    for school_id in list(counters["schools"]):
+        school = counters["schools"][school_id]
+        if not school.get("by_status"):
+            school.pop("by_status", None)
+        if not school:
+            del counters["schools"][school_id]
+    if not counters["kpis"].get("task_types"):
+        counters["kpis"].pop("task_types", None)
+    return counters
+
+
+def _merge(target, source):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        else:
+            _add(target, key, value)
+
+
+def _in_period(day, start_date, end_date):
+    return (not start_date or day >= start_date) and (not end_date or day <= end_date)
+
+
+def merge_days(delta, start_date=None, end_date=None):
+    """
+    Junta os contadores por dia de um delta de contrato nos contadores do período.
+
+    Args:
+        delta (dict): Delta de build_contract_deltas ("task_status" e "by_date")
+        start_date (str): Primeiro dia (YYYY-MM-DD); None sem limite
+        end_date (str): Último dia (YYYY-MM-DD), inclusive; None sem limite
+
+    Returns:
+        dict: {"task_status": [...], "schools": {...}, "kpis": {...}} só com as
+            tarefas do período
+    """
+    merged = {"schools": {}, "kpis": {}}
+    for day, counters in delta["by_date"].items():
+        if _in_period(day, start_date, end_date):
+            _merge(merged, counters)
+    # Remove os contadores que se anularam (tarefa que mudou de dia dentro do período)
+    _prune(merged)
+    task_status = [change for change in delta["task_status"]
+                   if _in_period((change.get("taskDate") or "")[:10], start_date, end_date)]
+    return {"task_status": task_status, "schools": merged["schools"], "kpis": merged["kpis"]}
+
+
+def build_contract_deltas(changes, groups_by_customer, pmoc_task_type_id=None):
+    """
+    Calcula os deltas de cada contrato afetado por um lote de tarefas gravadas.
+
+    Args:
+        changes (list): {"task": estado novo, "previous": estado anterior ou None};
+            os estados têm taskID, customerId, taskType, taskStatus e taskDate
+        groups_by_customer (dict): {customerId: [group_id, ...]}
+        pmoc_task_type_id (int): Tipo "Levantamento de PMOC" (fora de completed_tasks)
+
+    Returns:
+        dict: {str(group_id): {"task_status": [...], "by_date": {dia: {"schools": {...},
+            "kpis": {...}}}}}, só com os contratos que tiveram alguma mudança (ver
+            merge_days)
+    """
+    deltas = {}
+
+    def delta_for(group_id):
+        return deltas.setdefault(str(group_id), {"task_status": [], "by_date": {}})
+
+    for change in changes:
+        task, previous = change["task"], change.get("previous")
+        new_groups = groups_by_customer.get(task.get("customerId"), [])
+        old_groups = groups_by_customer.get(previous.get("customerId"), []) if previous else []
+
+        for group_id in old_groups:
+            _contribute(delta_for(group_id), previous, -1, pmoc_task_type_id)
+        for group_id in new_groups:
+            delta = delta_for(group_id)
+            _contribute(delta, task, 1, pmoc_task_type_id)
+            old_status = previous.get("taskStatus") if previous else None
+            if old_status != task.get("taskStatus"):
+                delta["task_status"].append({
+                    "taskID": task.get("taskID"),
+                    "school_id": task.get("customerId"),
+                    "taskDate": task.get("taskDate"),
+                    "from": old_status,
+                    "to": task.get("taskStatus"),
+                })
+
+    for delta in deltas.values():
+        days = {day: _prune(counters) for day, counters in delta["by_date"].items()}
+        delta["by_date"] = {day: counters for day, counters in days.items()
+                            if counters["schools"] or counters["kpis"]}
+    return {group_id: delta for group_id, delta in deltas.items() if delta["task_status"] or delta["by_date"]}
+
+
+def format_cursor(seq, change_feed=feed):
+    """Cursor do evento `seq` no feed do processo ("<epoch>-<seq>")."""
+    return f"{change_feed.epoch}-{seq}"
+
+
+def parse_cursor(value):
+    """
+    Interpreta o cursor enviado pelo cliente.
+
+    Returns:
+        tuple | None: (epoch, seq), ou None se o cursor estiver vazio
+
+    Raises:
+        ValueError: Se o cursor não estiver no formato "<epoch>-<seq>"
+    """
+    if value in (None, ""):
+        return None
+    epoch, separator, seq = str(value).rpartition("-")
+    if not separator or not epoch or not seq.isdigit():
+        raise ValueError(f"Cursor inválido: {value}")
+    return epoch, int(seq)
+
+
+def contract_deltas_since(group_id, cursor, change_feed=feed, start_date=None, end_date=None):
+    """
+    Lê os deltas de um contrato publicados depois do cursor.
+
+    Args:
+        group_id (int): ID do contrato
+        cursor (str | None): Cursor do último evento recebido pelo cliente
+            (format_cursor); None começa do evento mais recente (o cliente acabou
+            de carregar o dashboard)
+        change_feed (ChangeFeed): Feed de eventos
+        start_date (str): Início do período do dashboard (YYYY-MM-DD), opcional
+        end_date (str): Fim do período do dashboard (YYYY-MM-DD), opcional
+
+    Returns:
+        tuple: (deltas com `seq` e `cursor`, novo cursor, reset). `reset` indica que
+            o cursor é de outro processo ou que eventos depois dele já saíram do
+            buffer: o dashboard deve ser recarregado.
+
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    parsed = parse_cursor(cursor)
+    if parsed is None:
+        return [], format_cursor(change_feed.last_seq, change_feed), False
+    epoch, seq = parsed
+    if epoch != change_feed.epoch or seq > change_feed.last_seq:
+        # Cursor de antes de um reinício do processo ou de outro worker
+        return [], format_cursor(change_feed.last_seq, change_feed), True
+
+    reset = False
+    oldest = change_feed.oldest_seq()
+    if oldest is not None and seq < oldest - 1:
+        reset, seq = True, change_feed.last_seq
+
+    deltas = []
+    for event in change_feed.events_since(seq):
+        seq = event["seq"]
+        delta = (event.get("contracts") or {}).get(str(group_id))
+        if not delta:
+            continue
+        delta = merge_days(delta, start_date, end_date)
+        if delta["task_status"] or delta["schools"] or delta["kpis"]:
+            deltas.append(dict(delta, seq=seq, cursor=format_cursor(seq, change_feed), at=event["at"],
+                               group_id=group_id))
+    return deltas, format_cursor(seq, change_feed), reset
@@ -0,0 +1,8 @@
+"""
+Cria e popula customer_group_members (associação contrato -> escola).
+"""
+from downloads.customer_group_members import ensure_customer_group_members
+
+
+def upgrade(conn):
+    ensure_customer_group_members(conn)
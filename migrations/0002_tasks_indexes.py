@@ -0,0 +1,21 @@
+"""
+Índices de tasks para os caminhos de acesso das APIs e dos scripts de download.
+
+- customerId + taskType + taskStatus: dashboards por contrato
+  (`customerId IN (...) AND taskStatus != 7 AND taskType IN (...)`)
+- customerId + taskDate / date: filtros de período por escola
+- idUserTo + taskDate: tarefas por colaborador
+- lastUpdate: `MAX(lastUpdate)` da busca incremental
+"""
+from migrations import MigrationDeferred, table_exists, create_index
+
+
+def upgrade(conn):
+    if not table_exists(conn, 'tasks'):
+        raise MigrationDeferred("tabela 'tasks' ainda não existe")
+
+    create_index(conn, 'idx_tasks_customer_type_status', 'tasks', ['customerId', 'taskType', 'taskStatus'])
+    create_index(conn, 'idx_tasks_customer_taskdate', 'tasks', ['customerId', 'taskDate'])
+    create_index(conn, 'idx_tasks_customer_date', 'tasks', ['customerId', 'date'])
+    create_index(conn, 'idx_tasks_user_taskdate', 'tasks', ['idUserTo', 'taskDate'])
+    create_index(conn, 'idx_tasks_lastupdate', 'tasks', ['lastUpdate'])
@@ -0,0 +1,11 @@
+"""
+Índice de equipments por escola e situação (`associatedCustomerId = ? AND active = 1`).
+"""
+from migrations import MigrationDeferred, table_exists, create_index
+
+
+def upgrade(conn):
+    if not table_exists(conn, 'equipments'):
+        raise MigrationDeferred("tabela 'equipments' ainda não existe")
+
+    create_index(conn, 'idx_equipments_customer_active', 'equipments', ['associatedCustomerId', 'active'])
@@ -0,0 +1,7 @@
+"""
+Atualiza as estatísticas do planejador de consultas para os novos índices.
+"""
+
+
+def upgrade(conn):
+    conn.execute("ANALYZE")
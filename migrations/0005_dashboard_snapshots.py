@@ -0,0 +1,15 @@
+"""
+Snapshots materializados do dashboard e gatilhos de invalidação por contrato.
+"""
+from migrations import MigrationDeferred, table_exists
+from dashboard_snapshots import WATCHED_TABLES, create_dashboard_snapshot_tables, create_invalidation_triggers
+
+
+def upgrade(conn):
+    missing = [table for table in WATCHED_TABLES if not table_exists(conn, table)]
+    if missing:
+        raise MigrationDeferred(f"tabelas ainda não existem: {', '.join(missing)}")
+
+    create_dashboard_snapshot_tables(conn)
+    for table, customer_column in WATCHED_TABLES.items():
+        create_invalidation_triggers(conn, table, customer_column)
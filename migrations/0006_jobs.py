@@ -0,0 +1,8 @@
+"""
+Tabela `jobs`: estado e resultado dos jobs em segundo plano da API.
+"""
+from jobs import create_jobs_table
+
+
+def upgrade(conn):
+    create_jobs_table(conn)
@@ -0,0 +1,9 @@
+"""
+Controle da sincronização incremental: marcas d'água em `update_control`, hashes
+dos registros sincronizados e histórico de execuções (`sync_runs`).
+"""
+from downloads.incremental_sync import create_sync_tables
+
+
+def upgrade(conn):
+    create_sync_tables(conn)
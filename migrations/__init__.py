@@ -0,0 +1,161 @@
+"""
+Migrações versionadas do banco de dados auvo.db.
+
+Cada arquivo `NNNN_descricao.py` deste pacote define uma função `upgrade(conn)`.
+As migrações são aplicadas em ordem numérica e a versão aplicada é registrada na
+tabela `schema_version`. Todas devem ser idempotentes (`CREATE ... IF NOT EXISTS`),
+pois os scripts de download continuam criando suas próprias tabelas.
+
+Uso:
+    from migrations import apply_migrations
+    apply_migrations(conn)
+"""
+import os
+import re
+import sqlite3
+import importlib
+from datetime import datetime
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_([a-z0-9_]+)\.py$")
+
+
+class MigrationDeferred(Exception):
+    """Sinaliza que a migração depende de uma tabela que ainda não existe.
+
+    A migração não é registrada e será tentada novamente na próxima execução
+    (ex.: banco novo, antes do primeiro download de tarefas).
+    """
+
+
+def create_schema_version_table(conn):
+    """Cria a tabela schema_version se ela não existir."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+
+
+def get_current_version(conn):
+    """Retorna a maior versão aplicada (0 se nenhuma)."""
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    value = row[0] if not isinstance(row, dict) else list(row.values())[0]
+    return value or 0
+
+
+def list_migrations():
+    """
+    Lista as migrações disponíveis no pacote, em ordem de versão.
+
+    Returns:
+        list: Tuplas (version, name, module_name)
+    """
+    migrations = []
+    for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_PATTERN.match(file_name)
+        if match:
+            version, name = int(match.group(1)), match.group(2)
+            migrations.append((version, name, f"{__name__}.{file_name[:-3]}"))
+    return migrations
+
+
+def table_exists(conn, table):
+    """Verifica se uma tabela existe no banco."""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def table_columns(conn, table):
+    """Retorna o conjunto de colunas de uma tabela (vazio se ela não existir)."""
+    return {row[1] if not isinstance(row, dict) else row['name']
+            for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+
+
+def create_index(conn, name, table, columns):
+    """
+    Cria um índice se a tabela e todas as colunas existirem.
+
+    As tabelas deste banco são criadas por scripts diferentes e nem todas têm as
+    mesmas colunas (ex.: tasks.date), por isso colunas ausentes não são erro.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        name (str): Nome do índice
+        table (str): Tabela
+        columns (list): Colunas do índice, na ordem
+
+    Returns:
+        bool: True se o índice existe ao final, False se foi ignorado
+    """
+    existing = table_columns(conn, table)
+    if not existing or not set(columns) <= existing:
+        return False
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+    return True
+
+
+def apply_migrations(conn, verbose=True):
+    """
+    Aplica, em ordem, as migrações ainda não registradas em schema_version.
+
+    Cada migração roda em sua própria transação (BEGIN IMMEDIATE), de modo que dois
+    processos iniciando juntos (API e script de download) não apliquem a mesma
+    versão duas vezes.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco
+        verbose (bool): Se True, imprime as migrações aplicadas
+
+    Returns:
+        list: Versões aplicadas nesta execução
+    """
+    create_schema_version_table(conn)
+    applied = []
+
+    for version, name, module_name in list_migrations():
+        if version <= get_current_version(conn):
+            continue
+
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Outro processo pode ter aplicado a migração enquanto aguardávamos o lock
+            if version <= get_current_version(conn):
+                conn.rollback()
+                continue
+
+            module = importlib.import_module(module_name)
+            module.upgrade(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (version, name, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.commit()
+        except MigrationDeferred as e:
+            conn.rollback()
+            if verbose:
+                print(f"Migração {version:04d}_{name} adiada: {e}")
+            break
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(version)
+        if verbose:
+            print(f"Migração aplicada: {version:04d}_{name}")
+
+    return applied
+
+
+def migrate_database(db_path, verbose=True):
+    """Abre o banco em `db_path`, aplica as migrações pendentes e fecha a conexão."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return apply_migrations(conn, verbose=verbose)
+    finally:
+        conn.close()
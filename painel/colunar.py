@@ -0,0 +1,430 @@
+"""
+Cache analítico colunar (Parquet) das tarefas, equipamentos e escolas dos painéis.
+
+Etapa executada depois da sincronização (atualizacao/atualizar_tarefas.py ou
+`python painel/colunar.py`): as tarefas de `tarefas_raw` são achatadas uma vez e
+gravadas em Parquet, junto com os equipamentos esperados/respondidos de cada
+tarefa, os equipamentos e as escolas, em uma subpasta por exportação de
+`data/parquet/`:
+
+    ATUAL                      nome da exportação publicada (ex.: v1752412345000000000)
+    v.../tarefas/mes=2025-07/setor=Setor 1/*.parquet
+    v.../tarefas_equipamentos/mes=.../setor=.../*.parquet
+    v.../tarefas_equipamentos_respondidos/mes=.../setor=.../*.parquet
+    v.../equipamentos/setor=.../*.parquet
+    v.../clientes/setor=.../*.parquet
+    v.../manifesto.json
+
+O manifesto guarda a versão (data e tamanho) dos bancos de origem, as colunas e
+as partições de cada tabela. Uma exportação nova é gravada inteira na sua subpasta
+e publicada trocando o arquivo ATUAL (os.replace): não há intervalo sem cache, e
+quem resolve ATUAL uma vez (`pasta_publicada`) lê todas as tabelas da mesma
+exportação. A exportação anterior é mantida para os leitores que ainda estejam nela. Os leitores (`ler`, `ler_tarefas`) só abrem as
+colunas pedidas e as partições (mês, setor) que passam no filtro; os painéis usam
+o cache só enquanto ele corresponde ao banco de tarefas atual (`atual`), e voltam
+ao SQLite quando o banco muda depois da exportação.
+
+Uso:
+    python painel/colunar.py [--destino data/parquet]
+    from colunar import ler
+    equipamentos = ler(PARQUET_DIR, "tarefas_equipamentos", ["taskID", "equipamento_id"],
+                       filtro=ds.field("mes") >= "2025-07")
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from functools import reduce
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+from dados import (
+    CAMPOS_TAREFA,
+    COLUNAS_INTEIRAS,
+    DB_CLIENTES,
+    DB_EQUIPAMENTOS,
+    DB_TAREFAS,
+    ENTREGA_INVALIDA,
+    PARQUET_DIR,
+    SETORES,
+    STATUS_DESCONHECIDO,
+    STATUS_TAREFA,
+    versao_banco,
+)
+
+MANIFESTO = "manifesto.json"
+VERSAO_FORMATO = 2
+# Arquivo da pasta do cache com o nome da exportação publicada
+PONTEIRO = "ATUAL"
+# Exportações anteriores mantidas além da publicada
+VERSOES_MANTIDAS = 1
+# Leituras dos bancos por exportação, se algum deles mudar durante a leitura
+TENTATIVAS = 3
+
+# Partições (diretórios) de cada tabela
+PARTICOES = {
+    "tarefas": ("mes", "setor"),
+    "tarefas_equipamentos": ("mes", "setor"),
+    "tarefas_equipamentos_respondidos": ("mes", "setor"),
+    "equipamentos": ("setor",),
+    "clientes": ("setor",),
+}
+SEM_SETOR = "Sem setor"
+SEM_DATA = "sem-data"
+
+# Coluna das tarefas -> caminho no JSON (as de CAMPOS_TAREFA e o tipo da tarefa)
+CAMINHOS_TAREFA = {
+    "escola": "$.customerDescription",
+    "customer_id": "$.customerId",
+    "task_type_id": "$.taskType",
+    "tipo": "$.taskTypeDescription",
+    "status_id": "$.taskStatus",
+    "checkin": "$.checkIn",
+    "checkout": "$.checkOut",
+    "assinatura": "$.signatureName",
+    "observacao": "$.report",
+    "equipamentos_id": "$.equipmentsId",
+    "questionarios": "$.questionnaires",
+    "taskUrl": "$.taskUrl",
+    "deliveredDate": "$.deliveredDate",
+    "deliveredOnSmarthPhone": "$.deliveredOnSmarthPhone",
+}
+# Booleanos do JSON (json_extract devolve 1/0)
+COLUNAS_BOOLEANAS = ("checkin", "checkout", "deliveredOnSmarthPhone")
+# Listas do JSON, guardadas como texto JSON e decodificadas só nas linhas lidas
+COLUNAS_JSON = ("equipamentos_id", "questionarios")
+
+
+def _ler_sql(db_path, query):
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql(query, conn)
+    finally:
+        conn.close()
+
+
+def _setor_por_cliente(db_clientes, setores):
+    """{customer_id: setor} (escola em mais de um setor: o primeiro de `setores`)."""
+    clientes = _clientes(db_clientes, setores).drop_duplicates("id")
+    return dict(zip(clientes["id"], clientes["setor"]))
+
+
+def _clientes(db_clientes, setores):
+    partes = [_ler_sql(db_clientes, f"SELECT * FROM clientes_grupo_{grupo}").assign(setor=setor)
+              for setor, grupo in setores.items()]
+    return pd.concat(partes, ignore_index=True)
+
+
+def _tarefas(db_tarefas):
+    colunas = ", ".join(f"json_extract(r.json, '{caminho}') AS {coluna}"
+                        for coluna, caminho in CAMINHOS_TAREFA.items())
+    tarefas = _ler_sql(db_tarefas, f"""
+        SELECT r.rowid AS ordem, r.taskID, r.user_id, r.data_referencia, {colunas}
+        FROM tarefas_raw AS r WHERE json_valid(r.json) ORDER BY r.rowid
+    """)
+    for coluna in COLUNAS_INTEIRAS + ("task_type_id",):
+        tarefas[coluna] = pd.to_numeric(tarefas[coluna], errors="coerce").astype("Int64")
+    for coluna in COLUNAS_BOOLEANAS:
+        tarefas[coluna] = tarefas[coluna].map({1: True, 0: False}).astype("boolean")
+    # Mesmos padrões de CAMPOS_TAREFA para chaves ausentes
+    tarefas["deliveredDate"] = tarefas["deliveredDate"].fillna(CAMPOS_TAREFA["deliveredDate"][1])
+    tarefas["deliveredOnSmarthPhone"] = tarefas["deliveredOnSmarthPhone"].fillna(
+        CAMPOS_TAREFA["deliveredOnSmarthPhone"][1])
+    return tarefas
+
+
+def _equipamentos_tarefa(db_tarefas):
+    return _ler_sql(db_tarefas, """
+        SELECT r.taskID, r.user_id, e.key AS posicao, e.value AS equipamento_id
+        FROM tarefas_raw AS r, json_each(r.json, '$.equipmentsId') AS e
+        WHERE json_valid(r.json) AND json_type(r.json, '$.equipmentsId') = 'array'
+    """)
+
+
+def _respondidos_tarefa(db_tarefas):
+    # Sem repetição dentro da tarefa, na ordem da primeira resposta (explodir_questionarios)
+    respondido = "json_extract(q.value, '$.questionnaireEquipamentId')"
+    return _ler_sql(db_tarefas, f"""
+        SELECT r.taskID, r.user_id, MIN(q.key) AS posicao, {respondido} AS equipamento_id
+        FROM tarefas_raw AS r, json_each(r.json, '$.questionnaires') AS q
+        WHERE json_valid(r.json) AND json_type(r.json, '$.questionnaires') = 'array'
+          AND q.type = 'object' AND {respondido} IS NOT NULL AND {respondido} NOT IN (0, '')
+        GROUP BY r.rowid, {respondido}
+    """)
+
+
+def _gravar(tabela, df, destino):
+    particoes = PARTICOES[tabela]
+    ds.write_dataset(
+        pa.Table.from_pandas(df, preserve_index=False),
+        os.path.join(destino, tabela),
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([(coluna, pa.string()) for coluna in particoes]), flavor="hive"),
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return {
+        "particoes": list(particoes),
+        "colunas": [coluna for coluna in df.columns if coluna not in particoes],
+        "linhas": len(df),
+        "valores": {coluna: sorted(df[coluna].unique().tolist()) for coluna in particoes},
+    }
+
+
+def _ler_tabelas(db_tarefas, db_equipamentos, db_clientes, setores):
+    setor_por_cliente = _setor_por_cliente(db_clientes, setores)
+    tarefas = _tarefas(db_tarefas)
+    tarefas["mes"] = tarefas["data_referencia"].str[:7].fillna(SEM_DATA)
+    tarefas["setor"] = tarefas["customer_id"].map(setor_por_cliente).fillna(SEM_SETOR)
+    particao = tarefas[["taskID", "user_id", "mes", "setor"]].drop_duplicates(["taskID", "user_id"])
+    tabelas = {
+        "tarefas": tarefas,
+        "tarefas_equipamentos": _equipamentos_tarefa(db_tarefas).merge(particao, on=["taskID", "user_id"]),
+        "tarefas_equipamentos_respondidos": _respondidos_tarefa(db_tarefas).merge(particao, on=["taskID", "user_id"]),
+    }
+    for tabela in ("tarefas_equipamentos", "tarefas_equipamentos_respondidos"):
+        tabelas[tabela]["equipamento_id"] = pd.to_numeric(
+            tabelas[tabela]["equipamento_id"], errors="coerce").astype("Int64")
+
+    equipamentos = _ler_sql(db_equipamentos, "SELECT * FROM equipamentos")
+    equipamentos["setor"] = equipamentos["associated_customer_id"].map(setor_por_cliente).fillna(SEM_SETOR)
+    tabelas["equipamentos"] = equipamentos
+    tabelas["clientes"] = _clientes(db_clientes, setores)
+    return tabelas
+
+
+def _publicar(destino, nome):
+    """Aponta ATUAL para a exportação `nome` e remove as exportações antigas."""
+    anterior = os.path.basename(pasta_publicada(destino))
+    temporario = os.path.join(destino, f"{PONTEIRO}.tmp-{os.getpid()}")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        arquivo.write(nome)
+    os.replace(temporario, os.path.join(destino, PONTEIRO))
+
+    # Exportações mais antigas que a publicada, exceto as VERSOES_MANTIDAS mais
+    # recentes; as mais novas podem ser de outra exportação ainda em andamento
+    antigas = sorted((entrada for entrada in os.listdir(destino)
+                      if entrada.startswith("v") and entrada < nome
+                      and os.path.isdir(os.path.join(destino, entrada))), reverse=True)
+    for entrada in antigas[VERSOES_MANTIDAS:]:
+        shutil.rmtree(os.path.join(destino, entrada), ignore_errors=True)
+    # Formato anterior: tabelas direto na pasta do cache
+    if anterior == os.path.basename(destino):
+        for entrada in list(PARTICOES) + [MANIFESTO]:
+            caminho = os.path.join(destino, entrada)
+            if os.path.isdir(caminho):
+                shutil.rmtree(caminho, ignore_errors=True)
+            elif os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def exportar(destino=PARQUET_DIR, db_tarefas=DB_TAREFAS, db_equipamentos=DB_EQUIPAMENTOS,
+             db_clientes=DB_CLIENTES, setores=SETORES):
+    """
+    Recria o cache Parquet a partir dos bancos.
+
+    As versões dos bancos são lidas antes da leitura; se algum banco mudar até o
+    fim dela, a leitura é refeita (até TENTATIVAS vezes) e, persistindo a mudança,
+    a exportação publicada continua a anterior. A nova exportação é gravada em uma
+    subpasta própria e só então publicada em ATUAL (ver o início do módulo).
+
+    Args:
+        destino (str): Pasta do cache (padrão: data/parquet)
+        setores (dict): Setor -> grupo de clientes (tabelas clientes_grupo_{grupo})
+
+    Returns:
+        dict: Manifesto gravado, ou None se os bancos mudaram em todas as tentativas
+    """
+    inicio = time.perf_counter()
+    bancos = {"tarefas": db_tarefas, "equipamentos": db_equipamentos, "clientes": db_clientes}
+    for tentativa in range(1, TENTATIVAS + 1):
+        versoes = {nome: versao_banco(caminho) for nome, caminho in bancos.items()}
+        tabelas = _ler_tabelas(db_tarefas, db_equipamentos, db_clientes, setores)
+        if versoes == {nome: versao_banco(caminho) for nome, caminho in bancos.items()}:
+            break
+        print(f"⚠️ Bancos alterados durante a leitura do cache Parquet ({tentativa}/{TENTATIVAS})")
+    else:
+        print("⚠️ Cache Parquet não atualizado: os bancos mudaram em todas as tentativas")
+        return None
+
+    os.makedirs(destino, exist_ok=True)
+    nome = f"v{time.time_ns()}"
+    pasta = os.path.join(destino, nome)
+    manifesto = {
+        "formato": VERSAO_FORMATO,
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "tabelas": {tabela: _gravar(tabela, df, pasta) for tabela, df in tabelas.items()},
+        # Versões de antes da leitura, iguais às de depois
+        "fontes": {nome_banco: {"caminho": bancos[nome_banco], "versao": versao}
+                   for nome_banco, versao in versoes.items()},
+    }
+    manifesto["segundos"] = round(time.perf_counter() - inicio, 2)
+    with open(os.path.join(pasta, MANIFESTO), "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    _publicar(destino, nome)
+    return manifesto
+
+
+def pasta_publicada(pasta=PARQUET_DIR):
+    """
+    Subpasta da exportação publicada em `pasta` (ATUAL).
+
+    Sem o arquivo ATUAL (formato anterior, ou `pasta` já é a subpasta de uma
+    exportação), devolve a própria `pasta`.
+    """
+    try:
+        with open(os.path.join(pasta, PONTEIRO), encoding="utf-8") as arquivo:
+            return os.path.join(pasta, arquivo.read().strip())
+    except FileNotFoundError:
+        return pasta
+
+
+def ler_manifesto(pasta=PARQUET_DIR):
+    """Manifesto da exportação publicada (None se ainda não foi exportado)."""
+    try:
+        with open(os.path.join(pasta_publicada(pasta), MANIFESTO), encoding="utf-8") as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return None
+
+
+def atual(pasta=PARQUET_DIR, db_tarefas=DB_TAREFAS):
+    """Indica se o cache foi exportado do banco de tarefas como ele está agora."""
+    manifesto = ler_manifesto(pasta)
+    if not manifesto or manifesto.get("formato") != VERSAO_FORMATO:
+        return False
+    # O manifesto é JSON: tuplas viram listas
+    return manifesto["fontes"]["tarefas"]["versao"] == json.loads(json.dumps(versao_banco(db_tarefas)))
+
+
+def ler(pasta, tabela, colunas=None, filtro=None):
+    """
+    Lê uma tabela do cache só com as colunas e as linhas pedidas.
+
+    Os filtros sobre as partições (`mes`, `setor`) descartam diretórios inteiros;
+    os demais usam as estatísticas de cada arquivo Parquet.
+
+    Args:
+        pasta (str): Pasta do cache ou de uma exportação (`pasta_publicada`)
+        tabela (str): Uma das tabelas de PARTICOES
+        colunas (list): Colunas lidas (None: todas)
+        filtro (pyarrow.compute.Expression): Ex.: `ds.field("mes") >= "2025-07"`
+
+    Returns:
+        DataFrame
+    """
+    particoes = PARTICOES[tabela]
+    dataset = ds.dataset(
+        os.path.join(pasta_publicada(pasta), tabela),
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([(coluna, pa.string()) for coluna in particoes]), flavor="hive"),
+    )
+    return dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+
+
+def filtro_tarefas(clientes=None, status=None, tipos=None, data_ini=None, data_fim=None, ignorar_caixa=False):
+    """
+    Filtro das tarefas válidas dos painéis, com os mesmos critérios de
+    `dados.consultar_tarefas`.
+
+    Returns:
+        pyarrow.compute.Expression
+    """
+    filtro = ~((pc.field("deliveredOnSmarthPhone") == True)  # noqa: E712
+               & (pc.field("deliveredDate") == ENTREGA_INVALIDA))
+    if clientes is not None:
+        filtro &= pc.field("customer_id").isin(pa.array([int(cliente) for cliente in clientes], pa.int64()))
+    if status is not None:
+        ids = [status_id for status_id, descricao in STATUS_TAREFA.items() if descricao in status]
+        condicao = pc.field("status_id").isin(pa.array(ids, pa.int64()))
+        if STATUS_DESCONHECIDO in status:
+            condicao |= pc.field("status_id").is_null() | ~pc.field("status_id").isin(list(STATUS_TAREFA))
+        filtro &= condicao
+    if tipos is not None:
+        filtro &= reduce(lambda a, b: a | b,
+                         [pc.match_substring(pc.field("tipo"), tipo, ignore_case=ignorar_caixa) for tipo in tipos],
+                         pc.scalar(False))
+    # Mês (partição) e dia: só os diretórios dos meses do período são abertos
+    if data_ini is not None:
+        filtro &= (pc.field("mes") >= data_ini.isoformat()[:7]) & (pc.field("data_referencia") >= data_ini.isoformat())
+    if data_fim is not None:
+        filtro &= (pc.field("mes") <= data_fim.isoformat()[:7]) & (pc.field("data_referencia") <= data_fim.isoformat())
+    return filtro
+
+
+def ler_tarefas(pasta=PARQUET_DIR, filtro=None, campos=None):
+    """
+    Tarefas achatadas e equipamentos esperados/respondidos lidos do cache, no
+    mesmo formato de `dados.carregar_tarefas_planas` e `dados.consultar_tarefas`.
+
+    Args:
+        pasta (str): Pasta do cache
+        filtro (pyarrow.compute.Expression): Filtro das tarefas (`filtro_tarefas`)
+        campos (tuple): Colunas de CAMPOS_TAREFA lidas (None: todas); sem
+            `questionarios`, o JSON dos questionários nem é lido
+
+    Returns:
+        tuple: (tarefas, equipamentos_tarefa, questionarios_tarefa)
+    """
+    campos = list(CAMPOS_TAREFA) if campos is None else [campo for campo in CAMPOS_TAREFA if campo in campos]
+    # As três tabelas da mesma exportação, mesmo que outra seja publicada no meio
+    pasta = pasta_publicada(pasta)
+    tarefas = ler(pasta, "tarefas", ["ordem", "taskID", "user_id", "data_referencia", "mes"] + campos,
+                  filtro).sort_values("ordem", kind="stable")
+    for coluna in COLUNAS_JSON:
+        if coluna in campos:
+            tarefas[coluna] = [None if texto is None else _json_loads(texto) for texto in tarefas[coluna]]
+    for coluna in COLUNAS_BOOLEANAS:
+        if coluna in campos:
+            tarefas[coluna] = tarefas[coluna].astype(object).where(tarefas[coluna].notna(), None)
+    if "deliveredOnSmarthPhone" in campos:
+        tarefas["deliveredOnSmarthPhone"] = tarefas["deliveredOnSmarthPhone"].astype(bool)
+    for coluna in COLUNAS_INTEIRAS:
+        if coluna in campos:
+            tarefas[coluna] = tarefas[coluna].astype("Int64")
+
+    # Ligações das tarefas lidas: só os meses dessas tarefas
+    meses = ds.field("mes").isin(pa.array(tarefas["mes"].unique().tolist(), pa.string()))
+    chaves = tarefas[["taskID", "user_id", "ordem"]]
+    equipamentos = (ler(pasta, "tarefas_equipamentos", ["taskID", "user_id", "posicao", "equipamento_id"], meses)
+                    .merge(chaves, on=["taskID", "user_id"])
+                    .sort_values(["ordem", "posicao"], kind="stable"))
+    questionarios = (ler(pasta, "tarefas_equipamentos_respondidos",
+                         ["taskID", "user_id", "posicao", "equipamento_id"], meses)
+                     .merge(chaves, on=["taskID", "user_id"])
+                     .sort_values(["ordem", "posicao"], kind="stable"))
+
+    tarefas = tarefas.rename(columns={"data_referencia": "data"})[["taskID", "user_id", "data"] + campos]
+    return (tarefas.reset_index(drop=True),
+            equipamentos[["taskID", "equipamento_id"]].reset_index(drop=True),
+            questionarios[["taskID", "equipamento_id"]].reset_index(drop=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o cache Parquet dos painéis a partir dos bancos")
+    parser.add_argument("--destino", default=PARQUET_DIR, help="pasta do cache (padrão: data/parquet)")
+    parser.add_argument("--tarefas", default=DB_TAREFAS, help="banco de tarefas")
+    parser.add_argument("--equipamentos", default=DB_EQUIPAMENTOS, help="banco de equipamentos")
+    parser.add_argument("--clientes", default=DB_CLIENTES, help="banco de escolas por grupo")
+    args = parser.parse_args()
+
+    manifesto = exportar(args.destino, args.tarefas, args.equipamentos, args.clientes)
+    if manifesto is None:
+        return
+    tabelas = ", ".join(f"{tabela}: {info['linhas']}" for tabela, info in manifesto["tabelas"].items())
+    print(f"✅ Cache Parquet gerado em {manifesto['segundos']:.1f}s ({tabelas})")
+
+
+if __name__ == "__main__":
+    main()
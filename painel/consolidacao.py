@@ -0,0 +1,215 @@
+"""
+Consolidado de equipamentos por setor (dashboard_mensal e dashboard_semestral).
+
+`consolidar_equipamentos` calcula de uma vez, para todos os setores e para o geral
+("Todos"), os equipamentos esperados (ativos nas escolas do setor), feitos
+(respondidos em tarefas finalizadas do tipo) e não feitos, a partir das tarefas já
+achatadas (dados.carregar_tarefas_planas). O resultado é uma tabela com uma linha
+por (setor, equipamento), usada no resumo, nas listas e nas exportações.
+
+`consolidado_preventivas` faz o mesmo sobre os dados em cache de dados.py e guarda
+o resultado no mesmo cache, para os painéis e as exportações (exportacao.py)
+compartilharem o cálculo.
+"""
+import pandas as pd
+
+from dados import (
+    CACHE_CONSULTAS,
+    DB_CLIENTES,
+    DB_EQUIPAMENTOS,
+    DB_TAREFAS,
+    ENTREGA_INVALIDA,
+    cached,
+    carregar_clientes_por_setor,
+    carregar_equipamentos,
+    carregar_tarefas_planas,
+)
+
+TODOS = "Todos"
+# Colunas das tarefas usadas no consolidado (carregar_tarefas_planas)
+CAMPOS_CONSOLIDADO = ("escola", "customer_id", "tipo", "status_id", "taskUrl", "deliveredDate",
+                      "deliveredOnSmarthPhone")
+STATUS_FINALIZADA = 5
+
+
+def _inteiros(serie):
+    return pd.to_numeric(serie, errors="coerce").astype("Int64")
+
+
+def consolidar_equipamentos(tarefas, equipamentos_tarefa, questionarios_tarefa, equipamentos_df,
+                            clientes_por_setor, tipo, data_ini=None, data_fim=None):
+    """
+    Equipamentos esperados, feitos e não feitos de cada setor e do geral.
+
+    Args:
+        tarefas (DataFrame): Tarefas achatadas (dados.achatar_tarefas)
+        equipamentos_tarefa (DataFrame): Equipamentos esperados por tarefa
+        questionarios_tarefa (DataFrame): Equipamentos respondidos por tarefa
+        equipamentos_df (DataFrame): Equipamentos ativos (id, name,
+            associated_customer_id, identificador)
+        clientes_por_setor (dict): {"Setor 1": [customer_id, ...], ...}
+        tipo (str): Trecho da descrição do tipo de tarefa (sem diferenciar caixa)
+        data_ini (date): Primeiro dia das tarefas feitas (None: sem limite)
+        data_fim (date): Último dia das tarefas feitas (None: sem limite)
+
+    Returns:
+        DataFrame: setor (categórico, setores de clientes_por_setor e TODOS),
+            equipamento_id, esperado, feito, nao_feito, identificador (ou "ID n"),
+            nome (None se o equipamento não estiver ativo), escola e link. Nos
+            feitos, escola e link são os da primeira tarefa finalizada que respondeu
+            o equipamento; nos não feitos, a escola do equipamento e a primeira
+            tarefa que o lista.
+    """
+    setores = list(clientes_por_setor)
+    setor_cliente = pd.DataFrame(
+        [(setor, cliente) for setor, clientes in clientes_por_setor.items() for cliente in clientes],
+        columns=["setor", "customer_id"],
+    )
+    setor_cliente["customer_id"] = _inteiros(setor_cliente["customer_id"])
+
+    # Tarefas finalizadas do tipo no período
+    validas = tarefas[~((tarefas["deliveredOnSmarthPhone"] == True)  # noqa: E712
+                        & (tarefas["deliveredDate"] == ENTREGA_INVALIDA))]
+    feitas = validas[(validas["status_id"] == STATUS_FINALIZADA)
+                     & validas["tipo"].str.contains(tipo, case=False, na=False, regex=False)]
+    datas = feitas["data"].str[:10]
+    mascara = pd.Series(True, index=feitas.index)
+    if data_ini is not None:
+        mascara &= datas >= data_ini.isoformat()
+    if data_fim is not None:
+        mascara &= datas <= data_fim.isoformat()
+    feitas = feitas[mascara]
+
+    respondidos = questionarios_tarefa.assign(equipamento_id=_inteiros(questionarios_tarefa["equipamento_id"]))
+    feitos = (
+        respondidos.dropna(subset=["equipamento_id"])
+        .merge(feitas[["taskID", "customer_id", "escola", "taskUrl"]].drop_duplicates("taskID"), on="taskID")
+        .merge(setor_cliente, on="customer_id")
+        .drop_duplicates(["setor", "equipamento_id"])
+        .rename(columns={"taskUrl": "link"})
+        [["setor", "equipamento_id", "escola", "link"]]
+        .assign(feito=True)
+    )
+
+    equipamentos = equipamentos_df.assign(
+        equipamento_id=_inteiros(equipamentos_df["id"]),
+        customer_id=_inteiros(equipamentos_df["associated_customer_id"]),
+    ).drop_duplicates("equipamento_id")
+    esperados = (
+        equipamentos[["equipamento_id", "customer_id"]]
+        .merge(setor_cliente, on="customer_id")
+        .drop_duplicates(["setor", "equipamento_id"])
+        .assign(esperado=True)
+    )
+
+    consolidado = esperados.merge(feitos, on=["setor", "equipamento_id"], how="outer")
+    consolidado["esperado"] = consolidado["esperado"].fillna(False).astype(bool)
+    consolidado["feito"] = consolidado["feito"].fillna(False).astype(bool)
+
+    # Geral: um equipamento é esperado/feito se for em algum setor
+    geral = (
+        consolidado.groupby("equipamento_id", sort=False)
+        .agg(esperado=("esperado", "any"), feito=("feito", "any"), customer_id=("customer_id", "first"),
+             escola=("escola", "first"), link=("link", "first"))
+        .reset_index()
+        .assign(setor=TODOS)
+    )
+    consolidado = pd.concat([consolidado, geral], ignore_index=True)
+    consolidado["nao_feito"] = consolidado["esperado"] & ~consolidado["feito"]
+
+    # Não feitos: escola do equipamento e primeira tarefa que lista o equipamento
+    escola_cliente = tarefas.dropna(subset=["customer_id"]).drop_duplicates("customer_id").set_index("customer_id")["escola"]
+    listados = equipamentos_tarefa.assign(equipamento_id=_inteiros(equipamentos_tarefa["equipamento_id"]))
+    link_equipamento = (
+        listados.dropna(subset=["equipamento_id"])
+        .drop_duplicates("equipamento_id")
+        .merge(tarefas[["taskID", "taskUrl"]].drop_duplicates("taskID"), on="taskID")
+        .set_index("equipamento_id")["taskUrl"]
+    )
+    nao_feito = ~consolidado["feito"]
+    consolidado.loc[nao_feito, "escola"] = consolidado.loc[nao_feito, "customer_id"].map(escola_cliente)
+    consolidado.loc[nao_feito, "link"] = consolidado.loc[nao_feito, "equipamento_id"].map(link_equipamento)
+
+    info = equipamentos.set_index("equipamento_id")
+    consolidado["nome"] = consolidado["equipamento_id"].map(info["name"])
+    identificador = consolidado["equipamento_id"].map(info["identificador"])
+    consolidado["identificador"] = identificador.where(
+        identificador.notna(), "ID " + consolidado["equipamento_id"].astype(str))
+    consolidado["escola"] = consolidado["escola"].fillna("")
+    consolidado["link"] = consolidado["link"].fillna("")
+
+    consolidado["setor"] = pd.Categorical(consolidado["setor"], categories=setores + [TODOS], ordered=True)
+    consolidado = consolidado.sort_values(["setor", "equipamento_id"], ignore_index=True)
+    return consolidado[["setor", "equipamento_id", "esperado", "feito", "nao_feito",
+                        "identificador", "nome", "escola", "link"]]
+
+
+def consolidado_preventivas(tipo, data_ini=None, data_fim=None):
+    """
+    `consolidar_equipamentos` sobre as tarefas, equipamentos e setores em cache,
+    refeito quando algum dos três bancos muda.
+
+    Args:
+        tipo (str): Trecho da descrição do tipo de tarefa (sem diferenciar caixa)
+        data_ini (date): Primeiro dia das tarefas feitas (None: sem limite)
+        data_fim (date): Último dia das tarefas feitas (None: sem limite)
+    """
+    def load():
+        tarefas, equipamentos_tarefa, questionarios_tarefa = carregar_tarefas_planas(CAMPOS_CONSOLIDADO)
+        return consolidar_equipamentos(
+            tarefas, equipamentos_tarefa, questionarios_tarefa, carregar_equipamentos(),
+            carregar_clientes_por_setor(), tipo, data_ini, data_fim,
+        )
+
+    return cached(("consolidado", tipo, data_ini, data_fim), (DB_TAREFAS, DB_EQUIPAMENTOS, DB_CLIENTES), load,
+                  limite=CACHE_CONSULTAS)
+
+
+def resumo_consolidado(consolidado):
+    """Totais de equipamentos esperados, feitos e não feitos por setor (e geral)."""
+    totais = consolidado.groupby("setor", observed=False)[["esperado", "feito", "nao_feito"]].sum()
+    return pd.DataFrame({
+        "Setor": totais.index.astype(str),
+        "Total Equipamentos Esperados": totais["esperado"].astype(int).to_numpy(),
+        "Total Equipamentos Feitos": totais["feito"].astype(int).to_numpy(),
+        "Total Equipamentos Não Feitos": totais["nao_feito"].astype(int).to_numpy(),
+    })
+
+
+def linhas_por_escola(equipamentos, status):
+    """
+    Linhas das exportações (CSV/Excel): a escola (Nível 0) seguida dos seus
+    equipamentos (Nível 1).
+
+    Args:
+        equipamentos (DataFrame): Linhas de `consolidar_equipamentos`
+        status (str): Texto da coluna Status dos equipamentos ("Feito"/"Não Feito")
+
+    Returns:
+        list: Dicts com Escola/Equipamento, Identificador, Status, Link e Nível
+    """
+    linhas = []
+    for escola, grupo in equipamentos.groupby("escola", sort=False):
+        linhas.append({"Escola/Equipamento": escola, "Identificador": "", "Status": "", "Link": "", "Nível": 0})
+        for equipamento in grupo.itertuples(index=False):
+            nome = equipamento.nome if pd.notna(equipamento.nome) else (
+                f"Nome Desconhecido (ID {equipamento.equipamento_id})")
+            linhas.append({
+                "Escola/Equipamento": nome,
+                "Identificador": equipamento.identificador,
+                "Status": status,
+                "Link": equipamento.link,
+                "Nível": 1,
+            })
+    return linhas
+
+
+def html_lista_escola(escola, equipamentos, link_html=""):
+    """Bloco <details> de uma escola com os seus equipamentos (expansores dos painéis)."""
+    html = (f"<details><summary><span style=\"font-weight:bold;\">{escola}</span>{link_html} "
+            f"<span>({len(equipamentos)})</span></summary><ul>")
+    for equipamento in equipamentos.itertuples(index=False):
+        nome = equipamento.nome if pd.notna(equipamento.nome) else f"ID {equipamento.equipamento_id}"
+        texto = f"{equipamento.identificador}, \"{nome}\"".replace('"', '&quot;')
+        html += f"<li>{texto}</li>"
+    return html + "</ul></details>"
@@ -0,0 +1,578 @@
+"""
+Acesso aos dados dos painéis Streamlit (setor1–5, dashboard_mapa, dashboard_mensal
+e dashboard_semestral).
+
+Os DataFrames ficam em um cache único do processo do Streamlit, compartilhado por
+todas as páginas e sessões: cada leitura é feita uma vez e devolvida a todos até
+que o banco de origem mude (data e tamanho do arquivo e do -wal) ou o TTL expire.
+Com várias sessões pedindo o mesmo dado ao mesmo tempo, só uma faz a leitura.
+
+Os DataFrames devolvidos são compartilhados: as páginas não devem alterá-los no
+lugar (usar cópias/derivados, como `df[...]`, `merge`, `assign`).
+
+As tarefas são achatadas uma vez (`carregar_tarefas_planas`): o JSON de cada
+tarefa vira colunas, e as listas de equipamentos esperados e respondidos viram
+tabelas (taskID, equipamento_id), para as contagens dos painéis serem feitas com
+filtros/groupby em vez de percorrer as tarefas com `iterrows`.
+
+Os painéis de setor filtram as tarefas no SQL (`consultar_tarefas`), sobre as
+tabelas indexadas de tarefas_normalizadas.py: a cada mudança de filtro só as
+tarefas do setor, status, tipo e período escolhidos são lidas e decodificadas.
+Sem essas tabelas (banco ainda não atualizado), o filtro é feito em memória sobre
+`carregar_tarefas_planas`.
+
+Quando o cache Parquet de colunar.py foi exportado do banco de tarefas atual, as
+tarefas vêm dele (só as colunas e os meses pedidos, sem decodificar o JSON das
+tarefas); se o banco mudou depois da exportação, a leitura volta ao SQLite.
+
+Uso:
+    from dados import carregar_tarefas_planas, consultar_tarefas
+    df, equipamentos_tarefa, questionarios_tarefa = carregar_tarefas_planas()
+    df, equipamentos_tarefa, questionarios_tarefa = consultar_tarefas(
+        clientes=ids, status=["Finalizada"], tipos=["Corretiva"], data_ini=ini, data_fim=fim)
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.getenv("PAINEL_DATA_DIR") or os.path.join(BASE_DIR, "data")
+
+DB_TAREFAS = os.path.join(DATA_DIR, "tarefas.sqlite3")
+DB_USUARIOS = os.path.join(DATA_DIR, "usuarios.sqlite3")
+DB_EQUIPAMENTOS = os.path.join(DATA_DIR, "db.sqlite3")
+DB_CLIENTES = os.path.join(DATA_DIR, "clientes_por_grupo.sqlite3")
+# Cache Parquet exportado depois da sincronização (colunar.py)
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
+# Tempo máximo (segundos) de um dado em cache, mesmo sem mudança no banco
+CACHE_TTL = int(os.getenv("PAINEL_CACHE_TTL") or 600)
+# Resultados guardados por tipo de consulta filtrada (filtros de setor, status, tipo e período)
+CACHE_CONSULTAS = int(os.getenv("PAINEL_CACHE_CONSULTAS") or 64)
+
+# Setor do painel -> contrato (grupo de clientes)
+SETORES = {
+    "Setor 1": 156750,
+    "Setor 2": 156751,
+    "Setor 3": 156752,
+    "Setor 4": 156753,
+    "Setor 5": 156754,
+}
+
+COLUNAS_TAREFAS = ("taskID", "user_id", "data_referencia", "json")
+COLUNAS_EQUIPAMENTOS = ("id", "name", "associated_customer_id", "identificador")
+
+# Coluna do DataFrame de tarefas -> (chave no JSON da tarefa, valor padrão)
+CAMPOS_TAREFA = {
+    "escola": ("customerDescription", None),
+    "customer_id": ("customerId", None),
+    "tipo": ("taskTypeDescription", None),
+    "status_id": ("taskStatus", None),
+    "checkin": ("checkIn", None),
+    "checkout": ("checkOut", None),
+    "assinatura": ("signatureName", None),
+    "observacao": ("report", None),
+    "equipamentos_id": ("equipmentsId", None),
+    "questionarios": ("questionnaires", None),
+    "taskUrl": ("taskUrl", None),
+    "deliveredDate": ("deliveredDate", ""),
+    "deliveredOnSmarthPhone": ("deliveredOnSmarthPhone", False),
+}
+# Colunas inteiras (Int64, aceita vazios)
+COLUNAS_INTEIRAS = ("customer_id", "status_id")
+
+STATUS_TAREFA = {
+    1: "Aberta",
+    2: "Em Deslocamento",
+    3: "Check-in",
+    4: "Check-out",
+    5: "Finalizada",
+    6: "Pausada",
+}
+STATUS_DESCONHECIDO = "Desconhecido"
+
+# Tarefas entregues no app sem data de entrega (inválidas/canceladas), fora dos painéis
+ENTREGA_INVALIDA = "0001-01-01T00:00:00"
+
+_cache = {}
+_cache_lock = threading.Lock()
+_key_locks = {}
+
+
+def versao_banco(db_path):
+    """Versão do banco para o cache: (mtime, tamanho) do arquivo e do -wal."""
+    versao = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            stat = os.stat(path)
+            versao.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            versao.append(None)
+    return tuple(versao)
+
+
+def bancos_ausentes(*db_paths):
+    """Retorna os bancos (caminhos) que não existem."""
+    return [path for path in db_paths if not os.path.exists(path)]
+
+
+def versao_bancos(db_paths):
+    """Versão de um banco (caminho) ou de vários (tupla de caminhos) para o cache."""
+    if isinstance(db_paths, str):
+        return versao_banco(db_paths)
+    return tuple(versao_banco(path) for path in db_paths)
+
+
+def cached(key, db_path, load, limite=None):
+    """
+    Retorna o valor em cache de `key`, carregando-o com `load()` se o banco mudou,
+    se o TTL expirou ou na primeira chamada.
+
+    `db_path` pode ser uma tupla de caminhos, para dados derivados de vários bancos.
+    Com `limite`, só as `limite` entradas mais recentes do mesmo tipo (`key[0]`)
+    são mantidas: resultados de filtros, que variam a cada combinação escolhida.
+    """
+    with _cache_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    with key_lock:
+        versao = versao_bancos(db_path)
+        entry = _cache.get(key)
+        if entry and entry[0] == versao and time.monotonic() - entry[1] < CACHE_TTL:
+            return entry[2]
+        # Libera a versão anterior antes de carregar a nova (uma cópia por vez)
+        _cache.pop(key, None)
+        value = load()
+        _cache[key] = (versao, time.monotonic(), value)
+
+    if limite:
+        with _cache_lock:
+            mesmas = sorted((entrada[1], chave) for chave, entrada in list(_cache.items()) if chave[0] == key[0])
+            for _, antiga in mesmas[:-limite]:
+                _cache.pop(antiga, None)
+                _key_locks.pop(antiga, None)
+    return value
+
+
+def limpar_cache():
+    """Descarta todos os dados em cache (ex.: botão "Atualizar dados")."""
+    with _cache_lock:
+        _cache.clear()
+
+
+def _ler(db_path, query, params=()):
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql(query, conn, params=params)
+    finally:
+        conn.close()
+
+
+def carregar_tarefas(colunas=COLUNAS_TAREFAS):
+    """
+    Tarefas de `tarefas_raw`, com a coluna `json` já decodificada.
+
+    Args:
+        colunas (tuple): Colunas lidas da tabela
+    """
+    colunas = tuple(colunas)
+
+    def load():
+        df = _ler(DB_TAREFAS, f"SELECT {', '.join(colunas)} FROM tarefas_raw")
+        if "json" in df.columns:
+            df["json"] = df["json"].map(_json_loads)
+        return df
+
+    return cached(("tarefas",) + colunas, DB_TAREFAS, load)
+
+
+def carregar_usuarios():
+    """Usuários (user_id, nome)."""
+    return cached(("usuarios",), DB_USUARIOS,
+                  lambda: _ler(DB_USUARIOS, "SELECT user_id, nome FROM usuarios"))
+
+
+def carregar_equipamentos(colunas=COLUNAS_EQUIPAMENTOS):
+    """
+    Equipamentos ativos.
+
+    Args:
+        colunas (tuple): Colunas lidas da tabela
+    """
+    colunas = tuple(colunas)
+    return cached(("equipamentos",) + colunas, DB_EQUIPAMENTOS,
+                  lambda: _ler(DB_EQUIPAMENTOS, f"SELECT {', '.join(colunas)} FROM equipamentos WHERE ativo = 1"))
+
+
+def nomes_equipamentos():
+    """
+    Nome exibido de cada equipamento ativo: "identificador - nome", ou só o nome
+    quando não há identificador.
+
+    Returns:
+        dict: {id: nome exibido}
+    """
+    def load():
+        equipamentos = carregar_equipamentos(("id", "name", "identificador"))
+        identificador = equipamentos["identificador"]
+        com_identificador = identificador.notna() & identificador.astype(str).str.strip().ne("")
+        nomes = equipamentos["name"].where(
+            ~com_identificador, identificador.astype(str) + " - " + equipamentos["name"].astype(str))
+        return dict(zip(equipamentos["id"], nomes))
+
+    return cached(("nomes_equipamentos",), DB_EQUIPAMENTOS, load)
+
+
+def carregar_clientes_por_setor():
+    """IDs das escolas de cada setor: {"Setor 1": [ids], ...}."""
+    def load():
+        conn = sqlite3.connect(DB_CLIENTES)
+        try:
+            return {
+                setor: [row[0] for row in conn.execute(f"SELECT id FROM clientes_grupo_{grupo}")]
+                for setor, grupo in SETORES.items()
+            }
+        finally:
+            conn.close()
+
+    return cached(("clientes_por_setor",), DB_CLIENTES, load)
+
+
+def carregar_escolas():
+    """Escolas de todos os setores (id, nome, latitude, longitude), uma linha por escola."""
+    consulta = " UNION ALL ".join(
+        f"SELECT id, description AS nome, latitude, longitude FROM clientes_grupo_{grupo}"
+        for grupo in SETORES.values()
+    )
+    return cached(("escolas",), DB_CLIENTES,
+                  lambda: _ler(DB_CLIENTES, consulta).drop_duplicates("id", ignore_index=True))
+
+
+def achatar_tarefas(df_raw):
+    """
+    Extrai os campos do JSON das tarefas (CAMPOS_TAREFA) para colunas.
+
+    Args:
+        df_raw (DataFrame): Tarefas de `carregar_tarefas` (json decodificado)
+
+    Returns:
+        DataFrame: taskID, user_id, data (texto de data_referencia) e as colunas de
+            CAMPOS_TAREFA, com customer_id e status_id inteiros
+    """
+    jsons = df_raw["json"].tolist()
+    colunas = {"taskID": df_raw["taskID"].to_numpy()}
+    if "user_id" in df_raw.columns:
+        colunas["user_id"] = df_raw["user_id"].to_numpy()
+    colunas["data"] = df_raw["data_referencia"].to_numpy()
+    for coluna, (chave, padrao) in CAMPOS_TAREFA.items():
+        colunas[coluna] = [tarefa.get(chave, padrao) for tarefa in jsons]
+
+    df = pd.DataFrame(colunas)
+    for coluna in COLUNAS_INTEIRAS:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce").astype("Int64")
+    return df
+
+
+def _explodir(task_ids, listas):
+    listas = [lista if isinstance(lista, list) else [] for lista in listas]
+    tamanhos = np.fromiter(map(len, listas), dtype=np.int64, count=len(listas))
+    return pd.DataFrame({
+        "taskID": np.repeat(np.asarray(task_ids), tamanhos),
+        "equipamento_id": pd.Series(list(chain.from_iterable(listas)), dtype=object),
+    })
+
+
+def explodir_equipamentos(tarefas):
+    """
+    Equipamentos esperados de cada tarefa (equipmentsId), um por linha.
+
+    Mantém as repetições da lista, como `len(equipamentos_id)`.
+
+    Returns:
+        DataFrame: taskID, equipamento_id
+    """
+    return _explodir(tarefas["taskID"].to_numpy(), tarefas["equipamentos_id"].tolist())
+
+
+def explodir_questionarios(tarefas):
+    """
+    Equipamentos respondidos de cada tarefa (questionnaireEquipamentId dos
+    questionários), sem repetição dentro da tarefa.
+
+    Returns:
+        DataFrame: taskID, equipamento_id
+    """
+    # Sem repetição por linha: a mesma tarefa pode aparecer para mais de um usuário
+    respondidos = [
+        list(dict.fromkeys(q.get("questionnaireEquipamentId") for q in questionarios
+                           if q.get("questionnaireEquipamentId")))
+        if isinstance(questionarios, list) else []
+        for questionarios in tarefas["questionarios"].tolist()
+    ]
+    return _explodir(tarefas["taskID"].to_numpy(), respondidos)
+
+
+def carregar_tarefas_planas(campos=None):
+    """
+    Tarefas achatadas e as tabelas de equipamentos esperados/respondidos, em cache.
+
+    Args:
+        campos (tuple): Colunas de CAMPOS_TAREFA necessárias (None: todas). Com o
+            cache Parquet atual, só essas colunas são lidas
+
+    Returns:
+        tuple: (tarefas, equipamentos_tarefa, questionarios_tarefa); ver
+            `achatar_tarefas`, `explodir_equipamentos` e `explodir_questionarios`
+    """
+    def load():
+        if parquet_atual():
+            return _colunar().ler_tarefas(PARQUET_DIR, campos=campos)
+        tarefas = achatar_tarefas(carregar_tarefas())
+        return tarefas, explodir_equipamentos(tarefas), explodir_questionarios(tarefas)
+
+    if campos is None:
+        return cached(("tarefas_planas",), DB_TAREFAS, load)
+    if parquet_atual():
+        return cached(("tarefas_planas",) + tuple(campos), DB_TAREFAS, load)
+    # Sem o cache Parquet o JSON é decodificado inteiro: recorta as tarefas completas
+    tarefas, equipamentos, questionarios = carregar_tarefas_planas()
+    colunas = ["taskID", "user_id", "data"] + [campo for campo in CAMPOS_TAREFA if campo in campos]
+    return tarefas[colunas], equipamentos, questionarios
+
+
+def contar_por_tarefas(tabela, task_ids):
+    """Linhas de `tabela` (equipamentos/questionários por tarefa) das tarefas informadas."""
+    return int(tabela["taskID"].isin(task_ids).sum())
+
+
+def equipamentos_das_tarefas(tabela, task_ids):
+    """IDs distintos de equipamento de `tabela` nas tarefas informadas."""
+    return set(tabela.loc[tabela["taskID"].isin(task_ids), "equipamento_id"])
+
+
+def pendentes_por_tarefa(equipamentos_tarefa, questionarios_tarefa, task_ids):
+    """
+    Equipamentos esperados e não respondidos (distintos) de cada tarefa.
+
+    Returns:
+        Series: taskID -> quantidade (só tarefas com pendências)
+    """
+    esperados = equipamentos_tarefa[equipamentos_tarefa["taskID"].isin(task_ids)].drop_duplicates()
+    cruzado = esperados.merge(questionarios_tarefa.drop_duplicates(), on=["taskID", "equipamento_id"], how="left", indicator=True)
+    return cruzado[cruzado["_merge"] == "left_only"].groupby("taskID").size()
+
+
+def _colunar():
+    """Módulo do cache Parquet (colunar.py), ou None sem o pyarrow instalado."""
+    try:
+        import colunar
+    except ImportError:
+        return None
+    return colunar
+
+
+def parquet_atual():
+    """Indica se o cache Parquet (colunar.py) foi exportado do banco de tarefas atual."""
+    colunar = _colunar()
+    if colunar is None:
+        return False
+    return cached(("parquet_atual",), (DB_TAREFAS, os.path.join(PARQUET_DIR, colunar.PONTEIRO)),
+                  lambda: colunar.atual(PARQUET_DIR, DB_TAREFAS))
+
+
+def tabelas_normalizadas():
+    """Indica se o banco de tarefas já tem as tabelas de tarefas_normalizadas.py."""
+    def load():
+        conn = sqlite3.connect(DB_TAREFAS)
+        try:
+            return conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tarefas_equipamentos_respondidos'"
+            ).fetchone() is not None
+        finally:
+            conn.close()
+
+    return cached(("tabelas_normalizadas",), DB_TAREFAS, load)
+
+
+def tipos_por_descricao(trechos, ignorar_caixa=False):
+    """
+    IDs dos tipos de tarefa cuja descrição contém algum dos trechos.
+
+    Args:
+        trechos (list): Trechos da descrição (ex.: TIPOS_FIXOS dos painéis)
+        ignorar_caixa (bool): Compara sem diferenciar maiúsculas/minúsculas
+
+    Returns:
+        list: task_type_id encontrados
+    """
+    descricoes = cached(("tipos",), DB_TAREFAS, lambda: _ler(
+        DB_TAREFAS, "SELECT DISTINCT task_type_id, tipo FROM tarefas WHERE task_type_id IS NOT NULL"))
+    if ignorar_caixa:
+        trechos = [trecho.lower() for trecho in trechos]
+    ids = set()
+    for task_type_id, tipo in descricoes.itertuples(index=False):
+        if not isinstance(tipo, str):
+            continue
+        tipo = tipo.lower() if ignorar_caixa else tipo
+        if any(trecho in tipo for trecho in trechos):
+            ids.add(int(task_type_id))
+    return sorted(ids)
+
+
+def _ids_status(status):
+    """(status_id das descrições, inclui "Desconhecido")."""
+    ids = [status_id for status_id, descricao in STATUS_TAREFA.items() if descricao in status]
+    return ids, STATUS_DESCONHECIDO in status
+
+
+def _filtro_sql(clientes, status, tipos, data_ini, data_fim, ignorar_caixa):
+    """Cláusula WHERE (sobre `tarefas AS t`) e parâmetros dos filtros dos painéis."""
+    condicoes = ["NOT (t.deliveredOnSmarthPhone = 1 AND t.deliveredDate = ?)"]
+    params = [ENTREGA_INVALIDA]
+    # Listas como um único parâmetro JSON (sem limite de variáveis do SQLite)
+    if clientes is not None:
+        condicoes.append("t.customer_id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps([int(cliente) for cliente in clientes]))
+    if status is not None:
+        ids, desconhecido = _ids_status(status)
+        condicao = "t.status_id IN (SELECT value FROM json_each(?))"
+        if desconhecido:
+            condicao = (f"({condicao} OR t.status_id IS NULL "
+                        f"OR t.status_id NOT IN ({', '.join(str(i) for i in STATUS_TAREFA)}))")
+        condicoes.append(condicao)
+        params.append(json.dumps(ids))
+    if tipos is not None:
+        condicoes.append("t.task_type_id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(tipos_por_descricao(tipos, ignorar_caixa)))
+    if data_ini is not None:
+        condicoes.append("t.data_referencia >= ?")
+        params.append(data_ini.isoformat())
+    if data_fim is not None:
+        condicoes.append("t.data_referencia <= ?")
+        params.append(data_fim.isoformat())
+    return " AND ".join(condicoes), params
+
+
+def _consultar_sql(filtro, params):
+    conn = sqlite3.connect(DB_TAREFAS)
+    try:
+        df_raw = pd.read_sql(
+            f"SELECT r.taskID, r.user_id, r.data_referencia, r.json FROM tarefas AS t "
+            f"JOIN tarefas_raw AS r ON r.taskID = t.taskID AND r.user_id = t.user_id "
+            f"WHERE {filtro} ORDER BY r.rowid", conn, params=params)
+        equipamentos = pd.read_sql(
+            f"SELECT e.taskID, e.equipamento_id FROM tarefas AS t JOIN tarefas_equipamentos AS e "
+            f"ON e.taskID = t.taskID AND e.user_id = t.user_id WHERE {filtro} "
+            f"ORDER BY t.rowid, e.posicao", conn, params=params)
+        questionarios = pd.read_sql(
+            f"SELECT q.taskID, q.equipamento_id FROM tarefas AS t JOIN tarefas_equipamentos_respondidos AS q "
+            f"ON q.taskID = t.taskID AND q.user_id = t.user_id WHERE {filtro}", conn, params=params)
+    finally:
+        conn.close()
+    df_raw["json"] = df_raw["json"].map(_json_loads)
+    return achatar_tarefas(df_raw), equipamentos, questionarios
+
+
+def _consultar_memoria(clientes, status, tipos, data_ini, data_fim, ignorar_caixa):
+    tarefas, equipamentos, questionarios = carregar_tarefas_planas()
+    manter = ~((tarefas["deliveredOnSmarthPhone"] == True) & (tarefas["deliveredDate"] == ENTREGA_INVALIDA))  # noqa: E712
+    if clientes is not None:
+        manter &= tarefas["customer_id"].isin(clientes)
+    if status is not None:
+        ids, desconhecido = _ids_status(status)
+        conhecido = tarefas["status_id"].isin(list(STATUS_TAREFA))
+        manter &= (tarefas["status_id"].isin(ids) | (~conhecido if desconhecido else False)).fillna(desconhecido)
+    if tipos is not None:
+        manter &= tarefas["tipo"].str.contains(
+            "|".join(re.escape(tipo) for tipo in tipos) or "(?!)", case=not ignorar_caixa, na=False)
+    datas = tarefas["data"].str[:10]
+    if data_ini is not None:
+        manter &= datas >= data_ini.isoformat()
+    if data_fim is not None:
+        manter &= datas <= data_fim.isoformat()
+    tarefas = tarefas[manter.fillna(False).astype(bool)]
+    return (tarefas,
+            equipamentos[equipamentos["taskID"].isin(tarefas["taskID"])],
+            questionarios[questionarios["taskID"].isin(tarefas["taskID"])])
+
+
+def consultar_tarefas(clientes=None, status=None, tipos=None, data_ini=None, data_fim=None, ignorar_caixa=False):
+    """
+    Tarefas válidas dos filtros dos painéis, lidas direto do SQL.
+
+    Tarefas entregues no app sem data de entrega são sempre excluídas.
+
+    Args:
+        clientes (list): IDs das escolas (None: todas)
+        status (list): Descrições de status (STATUS_TAREFA ou "Desconhecido")
+        tipos (list): Trechos da descrição do tipo; convertidos nos IDs dos tipos
+        data_ini (date): Primeiro dia (data_referencia)
+        data_fim (date): Último dia (data_referencia)
+        ignorar_caixa (bool): Compara os trechos de tipo sem diferenciar caixa
+
+    Returns:
+        tuple: (tarefas, equipamentos_tarefa, questionarios_tarefa) como em
+            `carregar_tarefas_planas`; tarefas com as colunas `status` (descrição)
+            e `data` (date). Em cache por conjunto de filtros (até CACHE_CONSULTAS),
+            compartilhado por todas as páginas de setor
+    """
+    chave = ("consulta", _chave_filtro(clientes), _chave_filtro(status), _chave_filtro(tipos),
+             data_ini, data_fim, bool(ignorar_caixa))
+    return cached(chave, DB_TAREFAS,
+                  lambda: _consultar(clientes, status, tipos, data_ini, data_fim, ignorar_caixa),
+                  limite=CACHE_CONSULTAS)
+
+
+def _chave_filtro(valores):
+    return None if valores is None else tuple(valores)
+
+
+def _consultar(clientes, status, tipos, data_ini, data_fim, ignorar_caixa):
+    if parquet_atual():
+        colunar = _colunar()
+        tarefas, equipamentos, questionarios = colunar.ler_tarefas(
+            PARQUET_DIR, colunar.filtro_tarefas(clientes, status, tipos, data_ini, data_fim, ignorar_caixa))
+    elif tabelas_normalizadas():
+        filtro, params = _filtro_sql(clientes, status, tipos, data_ini, data_fim, ignorar_caixa)
+        tarefas, equipamentos, questionarios = _consultar_sql(filtro, params)
+    else:
+        tarefas, equipamentos, questionarios = _consultar_memoria(
+            clientes, status, tipos, data_ini, data_fim, ignorar_caixa)
+
+    tarefas = tarefas.assign(
+        status=tarefas["status_id"].map(STATUS_TAREFA).fillna(STATUS_DESCONHECIDO),
+        data=pd.to_datetime(tarefas["data"]).dt.date,
+    )
+    return tarefas, equipamentos, questionarios
+
+
+def status_das_tarefas(clientes=None):
+    """Descrições de status (ordenadas) das tarefas válidas das escolas."""
+    return cached(("status_tarefas", _chave_filtro(clientes)), DB_TAREFAS,
+                  lambda: _status_das_tarefas(clientes), limite=CACHE_CONSULTAS)
+
+
+def _status_das_tarefas(clientes):
+    if tabelas_normalizadas():
+        filtro, params = _filtro_sql(clientes, None, None, None, None, False)
+        conn = sqlite3.connect(DB_TAREFAS)
+        try:
+            ids = [row[0] for row in conn.execute(f"SELECT DISTINCT t.status_id FROM tarefas AS t WHERE {filtro}", params)]
+        finally:
+            conn.close()
+    else:
+        ids = _consultar_memoria(clientes, None, None, None, None, False)[0]["status_id"].unique().tolist()
+    return sorted({STATUS_TAREFA.get(status_id, STATUS_DESCONHECIDO) for status_id in ids})
@@ -0,0 +1,153 @@
+"""
+Planilhas Excel dos equipamentos "Não Feitos"/"Feitos" das preventivas
+(dashboard_mensal, dashboard_semestral e GET /api/painel/equipamentos.xlsx do
+api_backend).
+
+As planilhas são escritas pelo xlsxwriter em modo `constant_memory` (uma linha por
+vez, sem manter a planilha inteira em memória), com a largura e o formato definidos
+por coluna e por linha (escola, cabeçalho) em vez de célula a célula.
+
+A geração roda em um pool de threads próprio, fora da renderização do Streamlit e
+do loop da API: `exportar_equipamentos` devolve um Future, guardado em cache por
+(tipo, relatório, setores, período) e pela versão dos bancos de tarefas,
+equipamentos e setores. Pedidos iguais reaproveitam a mesma planilha, pronta ou
+ainda em geração.
+
+Uso:
+    from exportacao import exportar_equipamentos
+    futuro = exportar_equipamentos("Preventiva Mensal", "nao_feitos", ["Setor 1"], ini, fim)
+    conteudo = futuro.result()  # bytes do .xlsx
+"""
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import xlsxwriter
+
+from consolidacao import consolidado_preventivas, linhas_por_escola
+from dados import CACHE_TTL, DB_CLIENTES, DB_EQUIPAMENTOS, DB_TAREFAS, versao_bancos
+
+# Planilhas geradas ao mesmo tempo
+EXPORT_WORKERS = int(os.getenv("PAINEL_EXPORT_WORKERS") or 2)
+
+# Relatório -> (nome da aba, coluna do consolidado, status dos equipamentos)
+RELATORIOS = {
+    "nao_feitos": ("Não Feitos", "nao_feito", "Não Feito"),
+    "feitos": ("Feitos", "feito", "Feito"),
+}
+COLUNAS = ("Escola/Equipamento", "Identificador", "Status", "Link")
+LARGURAS = (40, 25, 15, 40)
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_pool = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="exportacao")
+_exportacoes = {}
+_lock = threading.Lock()
+
+
+def escrever_planilha(consolidado, relatorio, setores, destino):
+    """
+    Escreve a planilha do relatório, com uma aba por setor.
+
+    Cada escola é uma linha em negrito seguida dos seus equipamentos, agrupados
+    (outline) e recolhidos. No relatório de feitos (faturamento), a primeira linha
+    após o cabeçalho traz o total de equipamentos do setor.
+
+    Args:
+        consolidado (DataFrame): Resultado de consolidacao.consolidar_equipamentos
+        relatorio (str): "nao_feitos" ou "feitos"
+        setores (list): Setores exportados (ex.: ["Setor 1", "Todos"])
+        destino: Caminho do arquivo ou objeto de arquivo (ex.: BytesIO)
+    """
+    aba, coluna, status = RELATORIOS[relatorio]
+    workbook = xlsxwriter.Workbook(destino, {"constant_memory": True})
+    cabecalho = workbook.add_format({"bold": True, "bg_color": "#D9D9D9"})
+    negrito = workbook.add_format({"bold": True})
+    try:
+        for setor in setores:
+            equipamentos = consolidado[(consolidado["setor"] == setor) & consolidado[coluna]]
+            # Abas: o nome do relatório para um setor, o nome do setor para vários
+            worksheet = workbook.add_worksheet((aba if len(setores) == 1 else setor)[:31])
+            for indice, largura in enumerate(LARGURAS):
+                worksheet.set_column(indice, indice, largura)
+            worksheet.outline_settings(True, False, True, True)
+
+            worksheet.set_row(0, None, cabecalho)
+            worksheet.write_row(0, 0, COLUNAS)
+            linha = 1
+            if relatorio == "feitos":
+                worksheet.set_row(linha, None, cabecalho, {"level": 0})
+                worksheet.write_row(linha, 0, ["Total de equipamentos", len(equipamentos)])
+                linha += 1
+            for dados_linha in linhas_por_escola(equipamentos, status):
+                if dados_linha["Nível"] == 0:
+                    worksheet.set_row(linha, None, negrito, {"level": 0})
+                    worksheet.write_string(linha, 0, dados_linha["Escola/Equipamento"])
+                else:
+                    worksheet.set_row(linha, None, None, {"level": 1, "hidden": True})
+                    # write_string/write_url direto: sem a detecção de tipo de write_row
+                    for indice, coluna_planilha in enumerate(COLUNAS[:3]):
+                        worksheet.write_string(linha, indice, str(dados_linha[coluna_planilha]))
+                    if dados_linha["Link"]:
+                        worksheet.write_url(linha, 3, dados_linha["Link"])
+                linha += 1
+    finally:
+        workbook.close()
+
+
+def _gerar(tipo, relatorio, setores, data_ini, data_fim):
+    consolidado = consolidado_preventivas(tipo, data_ini, data_fim)
+    saida = BytesIO()
+    escrever_planilha(consolidado, relatorio, setores, saida)
+    return saida.getvalue()
+
+
+def exportar_equipamentos(tipo, relatorio, setores=None, data_ini=None, data_fim=None):
+    """
+    Planilha do relatório gerada em segundo plano (ou a já gerada, se os bancos não
+    mudaram e o TTL do cache não expirou).
+
+    Args:
+        tipo (str): Trecho da descrição do tipo de tarefa (ex.: "Preventiva Mensal")
+        relatorio (str): "nao_feitos" ou "feitos"
+        setores (list): Setores exportados, uma aba por setor (None: todos e "Todos")
+        data_ini (date): Primeiro dia das tarefas feitas (None: sem limite)
+        data_fim (date): Último dia das tarefas feitas (None: sem limite)
+
+    Returns:
+        concurrent.futures.Future: Future com os bytes do .xlsx
+    """
+    if relatorio not in RELATORIOS:
+        raise ValueError(f"Relatório inválido: {relatorio}")
+    if setores is None:
+        setores = list(consolidado_preventivas(tipo, data_ini, data_fim)["setor"].cat.categories)
+    chave = (tipo, relatorio, tuple(setores), data_ini, data_fim)
+    versao = versao_bancos((DB_TAREFAS, DB_EQUIPAMENTOS, DB_CLIENTES))
+
+    with _lock:
+        # Planilhas de versões anteriores dos bancos não serão mais pedidas
+        for antiga in [c for c, (v, _, _) in _exportacoes.items() if v != versao]:
+            del _exportacoes[antiga]
+        entrada = _exportacoes.get(chave)
+        if entrada:
+            versao_anterior, inicio, futuro = entrada
+            falhou = futuro.done() and futuro.exception() is not None
+            if versao_anterior == versao and time.monotonic() - inicio < CACHE_TTL and not falhou:
+                return futuro
+        futuro = _pool.submit(_gerar, tipo, relatorio, list(setores), data_ini, data_fim)
+        _exportacoes[chave] = (versao, time.monotonic(), futuro)
+        return futuro
+
+
+def limpar_exportacoes():
+    """Descarta as planilhas em cache."""
+    with _lock:
+        _exportacoes.clear()
+
+
+def nome_arquivo(tipo, relatorio, setores):
+    """Nome do .xlsx baixado (ex.: preventiva_mensal_setor_1_nao_feitos.xlsx)."""
+    partes = [tipo, setores[0] if len(setores) == 1 else "setores", relatorio]
+    return "_".join(re.sub(r"\W+", "_", parte.lower()).strip("_") for parte in partes) + ".xlsx"
@@ -0,0 +1,135 @@
+"""
+Dados do "Mapa de Escolas e Equipamentos" (setor1–5 e dashboard_mapa).
+
+`montar_camada_mapa` calcula os agregados de cada escola (equipamentos esperados,
+pendências, tarefas finalizadas/pausadas/em aberto e status predominante) com
+groupby sobre as tarefas filtradas e as tabelas de equipamentos por tarefa, e
+devolve um DataFrame pronto para o ScatterplotLayer do pydeck.
+
+O tooltip não é montado por escola em Python: `TOOLTIP_MAPA` é um modelo do pydeck
+preenchido pelo navegador com as colunas do ponto sob o cursor. `camada_mapa`
+guarda o DataFrame no cache de dados.py por conjunto de filtros.
+
+Uso:
+    from mapa import TOOLTIP_MAPA, camada_mapa
+    mapa_df = camada_mapa(filtros, df_filt, equipamentos_tarefa, questionarios_tarefa, equipamentos_dict)
+"""
+import pandas as pd
+
+from dados import (
+    CACHE_CONSULTAS,
+    DB_CLIENTES,
+    DB_EQUIPAMENTOS,
+    DB_TAREFAS,
+    STATUS_DESCONHECIDO,
+    cached,
+    carregar_escolas,
+    pendentes_por_tarefa,
+)
+
+# Cor do ponto pelo status predominante das tarefas da escola
+CORES_STATUS = {
+    "Finalizada": [0, 200, 0],  # Verde
+    "Pausada": [255, 165, 0],  # Laranja
+    "Aberta": [200, 0, 0],  # Vermelho
+}
+COR_PADRAO = [150, 150, 150]  # Cinza para status desconhecidos
+
+TOOLTIP_MAPA = (
+    "<b>{nome}</b><br>"
+    "Total de equipamentos: {equipamentos}<br>"
+    "🔧 Pendências: {pendencias}<br>"
+    "⏸️ Em Pausa: {pausadas}<br>"
+    "📊 Finalizadas: {finalizadas} | Em Pausa: {pausadas} | Em Aberto: {em_aberto}"
+    "{lista_equipamentos}"
+)
+
+COLUNAS_MAPA = ["id", "nome", "lat", "lon", "equipamentos", "pendencias", "finalizadas", "pausadas",
+                "em_aberto", "status", "cor", "lista_equipamentos"]
+
+
+def status_predominante(tarefas):
+    """
+    Status mais frequente das tarefas de cada escola (empate: o que aparece primeiro).
+
+    Args:
+        tarefas (DataFrame): Tarefas com customer_id e status
+
+    Returns:
+        Series: Status por customer_id
+    """
+    contagem = tarefas.groupby(["customer_id", "status"], sort=False).size().rename("total").reset_index()
+    contagem = contagem.sort_values("total", ascending=False, kind="stable").drop_duplicates("customer_id")
+    return contagem.set_index("customer_id")["status"]
+
+
+def montar_camada_mapa(tarefas, equipamentos_tarefa, questionarios_tarefa, escolas, nomes_equipamentos):
+    """
+    Um ponto por escola com tarefas nos filtros e coordenadas.
+
+    Args:
+        tarefas (DataFrame): Tarefas filtradas (taskID, customer_id, status)
+        equipamentos_tarefa (DataFrame): Equipamentos esperados por tarefa
+        questionarios_tarefa (DataFrame): Equipamentos respondidos por tarefa
+        escolas (DataFrame): id, nome, latitude e longitude (dados.carregar_escolas)
+        nomes_equipamentos (dict): Nome exibido de cada equipamento (sem nome: "ID n")
+
+    Returns:
+        DataFrame: Colunas de COLUNAS_MAPA, usadas pelo ScatterplotLayer e por TOOLTIP_MAPA
+    """
+    por_escola = tarefas[["taskID", "customer_id", "status"]]
+    pontos = escolas[escolas["id"].isin(por_escola["customer_id"].unique())].rename(
+        columns={"latitude": "lat", "longitude": "lon"})
+    pontos = pontos.assign(
+        lat=pd.to_numeric(pontos["lat"], errors="coerce"),
+        lon=pd.to_numeric(pontos["lon"], errors="coerce"),
+    ).dropna(subset=["lat", "lon"])
+    if pontos.empty:
+        return pd.DataFrame(columns=COLUNAS_MAPA)
+
+    # Equipamentos esperados (com nomes) e pendências de cada escola
+    esperados = por_escola[["taskID", "customer_id"]].merge(equipamentos_tarefa, on="taskID")
+    esperados["nome"] = [nomes_equipamentos.get(eq, f"ID {eq}") for eq in esperados["equipamento_id"]]
+    lista = esperados.groupby("customer_id")["nome"].agg(
+        lambda nomes: "<br><br>" + "<br>".join("- " + nomes.astype(str)))
+    pendentes = pendentes_por_tarefa(equipamentos_tarefa, questionarios_tarefa, por_escola["taskID"])
+    pendencias = (por_escola.assign(pendentes=por_escola["taskID"].map(pendentes).fillna(0))
+                  .groupby("customer_id")["pendentes"].sum())
+
+    # Tarefas por status
+    status = pd.crosstab(por_escola["customer_id"], por_escola["status"])
+    total = status.sum(axis=1)
+    finalizadas = status.get("Finalizada", pd.Series(0, index=status.index))
+    pausadas = status.get("Pausada", pd.Series(0, index=status.index))
+
+    ids = pontos["id"]
+    predominante = ids.map(status_predominante(por_escola)).fillna(STATUS_DESCONHECIDO)
+    pontos = pontos.assign(
+        equipamentos=ids.map(esperados.groupby("customer_id").size()).fillna(0).astype(int),
+        pendencias=ids.map(pendencias).fillna(0).astype(int),
+        finalizadas=ids.map(finalizadas).fillna(0).astype(int),
+        pausadas=ids.map(pausadas).fillna(0).astype(int),
+        em_aberto=ids.map(total - finalizadas - pausadas).fillna(0).astype(int),
+        status=predominante,
+        cor=[CORES_STATUS.get(s, COR_PADRAO) for s in predominante],
+        lista_equipamentos=ids.map(lista).fillna(""),
+    )
+    return pontos[COLUNAS_MAPA].reset_index(drop=True)
+
+
+def camada_mapa(filtros, tarefas, equipamentos_tarefa, questionarios_tarefa, nomes_equipamentos):
+    """
+    `montar_camada_mapa` em cache por conjunto de filtros, refeito quando os bancos
+    de tarefas, escolas ou equipamentos mudam.
+
+    Args:
+        filtros (tuple): Filtros que geraram `tarefas` (setor, status, tipos, período),
+            chave do cache
+    """
+    return cached(
+        ("mapa",) + tuple(filtros),
+        (DB_TAREFAS, DB_CLIENTES, DB_EQUIPAMENTOS),
+        lambda: montar_camada_mapa(tarefas, equipamentos_tarefa, questionarios_tarefa,
+                                   carregar_escolas(), nomes_equipamentos),
+        limite=CACHE_CONSULTAS,
+    )
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Colunas normalizadas das tarefas de `tarefas_raw` (data/tarefas.sqlite3).
+
+`tarefas_raw` guarda cada tarefa como um JSON; os painéis precisavam ler e decodificar
+todos os JSONs para filtrar por data, escola ou status. Gatilhos em `tarefas_raw`
+mantêm, a cada gravação ou exclusão (atualizar_tarefas, limpeza de tarefas
+inexistentes ou qualquer outro script), as tabelas
+
+- `tarefas`: uma linha por (taskID, user_id), com escola, tipo, status, datas,
+  check-in/out e entrega em colunas tipadas e indexadas;
+- `tarefas_equipamentos`: equipamentos esperados (equipmentsId), na ordem da lista;
+- `tarefas_equipamentos_respondidos`: equipamentos respondidos nos questionários
+  (questionnaireEquipamentId), sem repetição.
+
+JSONs inválidos continuam gravados em `tarefas_raw`, só sem as linhas normalizadas.
+
+Uso:
+    python tarefas_normalizadas.py [caminho/tarefas.sqlite3]   # recria a partir de tarefas_raw
+"""
+import argparse
+import os
+import sqlite3
+import time
+
+DB_TAREFAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tarefas.sqlite3")
+
+# Coluna de `tarefas` -> (tipo, caminho no JSON, valor padrão)
+COLUNAS_TAREFA = {
+    "customer_id": ("INTEGER", "$.customerId", None),
+    "escola": ("TEXT", "$.customerDescription", None),
+    "task_type_id": ("INTEGER", "$.taskType", None),
+    "tipo": ("TEXT", "$.taskTypeDescription", None),
+    "status_id": ("INTEGER", "$.taskStatus", None),
+    "task_date": ("TEXT", "$.taskDate", None),
+    "checkin": ("INTEGER", "$.checkIn", None),
+    "checkout": ("INTEGER", "$.checkOut", None),
+    "checkin_date": ("TEXT", "$.checkInDate", None),
+    "checkout_date": ("TEXT", "$.checkOutDate", None),
+    "deliveredDate": ("TEXT", "$.deliveredDate", "''"),
+    "deliveredOnSmarthPhone": ("INTEGER", "$.deliveredOnSmarthPhone", "0"),
+    "taskUrl": ("TEXT", "$.taskUrl", None),
+    "last_update": ("TEXT", "$.lastUpdate", None),
+}
+
+INDICES = {
+    "idx_tarefas_data": "tarefas (data_referencia)",
+    "idx_tarefas_customer_data": "tarefas (customer_id, data_referencia)",
+    "idx_tarefas_status": "tarefas (status_id)",
+    "idx_tarefas_tipo": "tarefas (task_type_id)",
+    "idx_tarefas_equipamentos_equipamento": "tarefas_equipamentos (equipamento_id)",
+    "idx_tarefas_respondidos_equipamento": "tarefas_equipamentos_respondidos (equipamento_id)",
+}
+
+
+def _gravar_sql(src, origem=""):
+    """
+    Comandos que gravam as linhas normalizadas das tarefas de `src`.
+
+    Args:
+        src (str): Linha de tarefas_raw ("NEW" nos gatilhos)
+        origem (str): Tabela de onde vem `src` ("" nos gatilhos,
+            "tarefas_raw AS r, " na reconstrução)
+    """
+    valida = f"json_valid({src}.json)"
+    colunas = ", ".join(COLUNAS_TAREFA)
+    valores = ", ".join(
+        f"COALESCE(json_extract({src}.json, '{caminho}'), {padrao})" if padrao else f"json_extract({src}.json, '{caminho}')"
+        for _, caminho, padrao in COLUNAS_TAREFA.values()
+    )
+    tabela = f" FROM {origem.rstrip(', ')}" if origem else ""
+    respondido = "json_extract(q.value, '$.questionnaireEquipamentId')"
+    return [
+        f"INSERT OR REPLACE INTO tarefas (taskID, user_id, data_referencia, {colunas}) "
+        f"SELECT {src}.taskID, {src}.user_id, {src}.data_referencia, {valores}{tabela} WHERE {valida}",
+
+        f"INSERT INTO tarefas_equipamentos (taskID, user_id, posicao, equipamento_id) "
+        f"SELECT {src}.taskID, {src}.user_id, e.key, e.value FROM {origem}json_each({src}.json, '$.equipmentsId') AS e "
+        f"WHERE {valida} AND json_type({src}.json, '$.equipmentsId') = 'array'",
+
+        f"INSERT OR IGNORE INTO tarefas_equipamentos_respondidos (taskID, user_id, equipamento_id) "
+        f"SELECT {src}.taskID, {src}.user_id, {respondido} "
+        f"FROM {origem}json_each({src}.json, '$.questionnaires') AS q "
+        f"WHERE {valida} AND json_type({src}.json, '$.questionnaires') = 'array' AND q.type = 'object' "
+        f"AND {respondido} IS NOT NULL AND {respondido} NOT IN (0, '')",
+    ]
+
+
+def _apagar_sql(src):
+    return [
+        f"DELETE FROM {tabela} WHERE taskID = {src}.taskID AND user_id = {src}.user_id"
+        for tabela in ("tarefas", "tarefas_equipamentos", "tarefas_equipamentos_respondidos")
+    ]
+
+
+def _corpo(comandos):
+    return "\n".join(f"            {comando};" for comando in comandos)
+
+
+def criar_tabelas_normalizadas(conn):
+    """
+    Cria as tabelas normalizadas, os índices e os gatilhos em `tarefas_raw`.
+
+    Na primeira vez (tabelas recém-criadas e `tarefas_raw` com dados), preenche as
+    tabelas a partir das tarefas já gravadas.
+
+    Args:
+        conn (sqlite3.Connection): Conexão com o banco de tarefas (com tarefas_raw)
+    """
+    existia = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tarefas'"
+    ).fetchone() is not None
+
+    colunas = ",\n".join(f"            {coluna} {tipo}" for coluna, (tipo, _, _) in COLUNAS_TAREFA.items())
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS tarefas (
+            taskID TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            data_referencia TEXT,
+{colunas},
+            PRIMARY KEY (taskID, user_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_equipamentos (
+            taskID TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            posicao INTEGER NOT NULL,
+            equipamento_id INTEGER,
+            PRIMARY KEY (taskID, user_id, posicao)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tarefas_equipamentos_respondidos (
+            taskID TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            equipamento_id INTEGER NOT NULL,
+            PRIMARY KEY (taskID, user_id, equipamento_id)
+        )
+    ''')
+    for nome, definicao in INDICES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {definicao}")
+
+    # INSERT OR REPLACE em tarefas_raw não dispara o gatilho de exclusão: o de
+    # inserção apaga as linhas antigas antes de gravar as novas
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_tarefas_raw_insert_normalizadas
+        AFTER INSERT ON tarefas_raw BEGIN
+{_corpo(_apagar_sql("NEW") + _gravar_sql("NEW"))}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_tarefas_raw_update_normalizadas
+        AFTER UPDATE ON tarefas_raw BEGIN
+{_corpo(_apagar_sql("OLD") + _apagar_sql("NEW") + _gravar_sql("NEW"))}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_tarefas_raw_delete_normalizadas
+        AFTER DELETE ON tarefas_raw BEGIN
+{_corpo(_apagar_sql("OLD"))}
+        END
+    ''')
+    conn.commit()
+
+    if not existia and conn.execute("SELECT 1 FROM tarefas_raw LIMIT 1").fetchone():
+        reconstruir_tarefas_normalizadas(conn)
+
+
+def reconstruir_tarefas_normalizadas(conn):
+    """
+    Recria as tabelas normalizadas a partir de todas as linhas de `tarefas_raw`.
+
+    Returns:
+        int: Tarefas normalizadas
+    """
+    with conn:
+        for tabela in ("tarefas", "tarefas_equipamentos", "tarefas_equipamentos_respondidos"):
+            conn.execute(f"DELETE FROM {tabela}")
+        for comando in _gravar_sql("r", "tarefas_raw AS r, "):
+            conn.execute(comando)
+    return conn.execute("SELECT COUNT(*) FROM tarefas").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recria as tabelas normalizadas a partir de tarefas_raw")
+    parser.add_argument("db", nargs="?", default=DB_TAREFAS, help="banco de tarefas (padrão: data/tarefas.sqlite3)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        criar_tabelas_normalizadas(conn)
+        inicio = time.perf_counter()
+        total = reconstruir_tarefas_normalizadas(conn)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    print(f"✅ {total} tarefa(s) normalizada(s) em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes do logging das APIs e do ID de requisição (api_logging.py).
+
+Uso:
+    python -m pytest -q test_api_logging.py
+"""
+
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_logging import (
+    REQUEST_ID_HEADER,
+    RequestIdFilter,
+    get_log_level,
+    get_logger,
+    get_request_id,
+    install_request_id_middleware,
+    reset_request_id,
+    set_request_id,
+)
+
+
+def make_app():
+    app = FastAPI()
+    install_request_id_middleware(app)
+
+    @app.get("/async")
+    async def endpoint_async():
+        return {"request_id": get_request_id()}
+
+    @app.get("/sync")
+    def endpoint_sync():
+        return {"request_id": get_request_id()}
+
+    return app
+
+
+def test_set_and_reset_request_id():
+    assert get_request_id() == "-"
+    token = set_request_id("  abc  ")
+    assert get_request_id() == "abc"
+    reset_request_id(token)
+    assert get_request_id() == "-"
+
+    token = set_request_id("")
+    gerado = get_request_id()
+    reset_request_id(token)
+    assert len(gerado) == 12 and gerado != "-"
+    # IDs muito longos são cortados
+    token = set_request_id("x" * 100)
+    assert get_request_id() == "x" * 64
+    reset_request_id(token)
+
+
+def test_middleware_propagates_and_returns_request_id():
+    client = TestClient(make_app())
+
+    for path in ("/async", "/sync"):
+        response = client.get(path, headers={REQUEST_ID_HEADER: "req-42"})
+        assert response.json() == {"request_id": "req-42"}
+        assert response.headers[REQUEST_ID_HEADER] == "req-42"
+
+    response = client.get("/sync")
+    gerado = response.headers[REQUEST_ID_HEADER]
+    assert len(gerado) == 12 and response.json() == {"request_id": gerado}
+    # Fora da requisição o contexto volta ao padrão
+    assert get_request_id() == "-"
+
+
+def test_logger_records_request_id(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL_TESTE_API_LOGGING", "debug")
+    logger = get_logger("teste_api_logging")
+    assert logger.level == logging.DEBUG and not logger.propagate
+    # Sem handlers duplicados em chamadas repetidas
+    assert get_logger("teste_api_logging").handlers == logger.handlers
+
+    registros = []
+    handler = logging.Handler()
+    handler.addFilter(RequestIdFilter())
+    handler.emit = registros.append
+    logger.addHandler(handler)
+    token = set_request_id("req-7")
+    try:
+        logger.debug("mensagem")
+    finally:
+        reset_request_id(token)
+        logger.removeHandler(handler)
+    assert registros[0].request_id == "req-7"
+
+
+def test_log_level_from_environment(monkeypatch):
+    monkeypatch.delenv("LOG_LEVEL", raising=False)
+    assert get_log_level("modulo") == logging.INFO
+    monkeypatch.setenv("LOG_LEVEL", "warning")
+    monkeypatch.setenv("LOG_LEVEL_MODULO_X", "ERROR")
+    assert get_log_level("modulo") == logging.WARNING
+    assert get_log_level("modulo.x") == logging.ERROR
+    monkeypatch.setenv("LOG_LEVEL", "inexistente")
+    assert get_log_level("modulo") == logging.INFO
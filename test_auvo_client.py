@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes do cliente compartilhado da API Auvo contra o servidor mock local.
+
+Uso:
+    python -m pytest -q test_auvo_client.py
+"""
+
+import time
+
+import pytest
+
+from auvo_client import AuvoAPIError, AuvoClient, TokenBucket
+from auvo_client.mock_server import MockAuvoServer, save_recording
+
+USERS = [{"userID": user_id, "name": f"Usuario {user_id}"} for user_id in range(1, 251)]
+
+
+def make_client(server, **kwargs):
+    options = {"rate_limit": 0, "backoff_base": 0.01, "max_workers": 4}
+    options.update(kwargs)
+    return AuvoClient("api-key", "api-token", base_url=server.url, **options)
+
+
+@pytest.fixture
+def server():
+    with MockAuvoServer(collections={"/users": USERS}) as mock:
+        yield mock
+
+
+def test_get_all_prefetches_remaining_pages_in_order(server):
+    client = make_client(server)
+    users = client.get_all("/users", entity_name="usuários", verbose=False)
+
+    assert users == USERS
+    assert server.count_requests("/users") == 3
+    assert server.count_requests("/login") == 1
+    # Páginas 2 e 3 pedidas depois do total conhecido pela página 1
+    pages = sorted(int(params["page"]) for path, params in server.requests_log if path == "/users")
+    assert pages == [1, 2, 3]
+
+
+def test_get_all_accepts_full_url(server):
+    client = make_client(server)
+    # URL completa, como os scripts montam a partir da base_url
+    assert client.get_all(f"{server.url}/users", verbose=False) == USERS
+
+
+def test_get_all_without_page_count_falls_back_to_sequential(tmp_path):
+    # Formato antigo: `result` é a própria lista, sem total de páginas
+    for page in (1, 2, 3):
+        save_recording(str(tmp_path), "/keywords", {"page": page, "pageSize": 100, "order": "asc"},
+                       {"result": USERS[(page - 1) * 100:page * 100]})
+
+    with MockAuvoServer(recordings_dir=str(tmp_path)) as server:
+        assert make_client(server).get_all("/keywords", verbose=False) == USERS
+        assert server.count_requests("/keywords") == 3
+
+
+def test_retries_on_429_and_5xx():
+    with MockAuvoServer(collections={"/users": USERS}, failures={"/users": [429, 503, 500]}) as server:
+        client = make_client(server)
+        users = client.get_all("/users", verbose=False)
+
+    assert users == USERS
+    assert client.stats["retries"] == 3
+
+
+def test_gives_up_after_max_retries_and_returns_collected_pages():
+    with MockAuvoServer(collections={"/users": USERS}, failures={"/users": [500] * 10}) as server:
+        client = make_client(server, max_retries=2)
+        assert client.get_all("/users", verbose=False) == []
+
+
+def test_get_all_strict_raises_instead_of_returning_partial_pages():
+    with MockAuvoServer(collections={"/users": USERS}, failures={"/users": [500] * 10}) as server:
+        client = make_client(server, max_retries=2)
+        with pytest.raises(AuvoAPIError) as info:
+            client.get_all("/users", verbose=False, strict=True)
+    assert info.value.status_code == 500
+
+
+def test_token_is_cached_and_refreshed_before_expiry():
+    with MockAuvoServer(collections={"/users": USERS}, token_lifetime=3) as server:
+        client = make_client(server, refresh_margin=2)
+        client.get("/users")
+        client.get("/users")
+        assert server.count_requests("/login") == 1
+
+        time.sleep(1.2)  # faltando menos de 2s para expirar
+        client.get("/users")
+        assert server.count_requests("/login") == 2
+
+
+def test_relogin_once_after_401(server):
+    client = make_client(server)
+    client.get("/users")
+    server.revoke_tokens()
+
+    assert client.get_all("/users", verbose=False) == USERS
+    assert server.count_requests("/login") == 2
+
+
+def test_replays_recorded_responses(server, tmp_path):
+    params = {"paramFilter": '{"idUserTo": 7}'}
+    recorder = make_client(server, record_dir=str(tmp_path))
+    recorded = recorder.get_all("/users", params=params, verbose=False)
+    assert list(tmp_path.glob("users_*.json"))
+
+    with MockAuvoServer(recordings_dir=str(tmp_path)) as replay:
+        replayed = make_client(replay).get_all("/users", params=params, verbose=False)
+    assert replayed == recorded == USERS
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # 1 token imediato + 5 a 20/s
+    assert time.monotonic() - start >= 0.2
+
+
+def test_app_api_auvo_reuses_cached_token(monkeypatch):
+    from app import api_auvo
+
+    tasks = [{"taskID": task_id} for task_id in range(10)]
+    with MockAuvoServer(collections={"/tasks": tasks}) as server:
+        monkeypatch.setattr(api_auvo, "_client", make_client(server))
+        # Um dia por chamada, como em atualizar_tarefas.baixar_tarefas_mes_atual
+        for day in range(1, 6):
+            assert api_auvo.get_user_tasks(7, f"2025-07-0{day}", f"2025-07-0{day}") == tasks
+
+        assert server.count_requests("/login") == 1
+        assert server.count_requests("/tasks") == 5
+
+
+def test_app_api_auvo_tasks_period_reports_failed_pages(monkeypatch):
+    from app import api_auvo
+
+    tasks = [{"taskID": task_id} for task_id in range(150)]
+    with MockAuvoServer(collections={"/tasks": tasks}, failures={"/tasks": [503] * 10}) as server:
+        monkeypatch.setattr(api_auvo, "_client", make_client(server, max_retries=1))
+        resultado = api_auvo.get_tasks_periodo("2025-07-01", "2025-07-31")
+
+    # O erro chega a quem chama (atualizar_tarefas conta em `erros`), sem lista parcial
+    assert resultado["erro"] == "Erro 503"
+
+
+def test_shared_client_without_credentials_raises(monkeypatch):
+    import auvo_client.client
+
+    monkeypatch.setattr(auvo_client.client, "_shared_client", None)
+    monkeypatch.setattr(auvo_client.client, "load_dotenv", lambda *args, **kwargs: None)
+    monkeypatch.delenv("API_KEY", raising=False)
+    monkeypatch.delenv("API_TOKEN", raising=False)
+    with pytest.raises(AuvoAPIError):
+        auvo_client.client.get_client()
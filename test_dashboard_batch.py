@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da execução concorrente de /api/dashboard/batch (dashboard_batch.py).
+
+Uso:
+    python -m pytest -q test_dashboard_batch.py
+"""
+
+import sqlite3
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import dashboard_batch
+from api_logging import get_request_id, reset_request_id, set_request_id
+from dashboard_batch import get_read_only_connection, run_dashboard_batch
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "auvo.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE contracts (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO contracts VALUES (?, ?)", [(1, "A"), (2, "B"), (3, "C")])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def build_name(contract_id, conn):
+    row = conn.execute("SELECT name FROM contracts WHERE id = ?", (contract_id,)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Contrato não encontrado")
+    if contract_id == 3:
+        raise ValueError("falha ao montar")
+    return {"id": contract_id, "name": row[0]}
+
+
+def test_results_in_order_and_errors_per_contract(db_path):
+    results, errors = run_dashboard_batch([2, 99, 1, 3], build_name, db_path)
+
+    assert results == [{"id": 2, "name": "B"}, {"id": 1, "name": "A"}]
+    assert errors == [
+        {"contract_id": 99, "status_code": 404, "detail": "Contrato não encontrado"},
+        {"contract_id": 3, "status_code": 500, "detail": "falha ao montar"},
+    ]
+
+
+def test_pool_is_bounded(db_path, monkeypatch):
+    monkeypatch.setattr(dashboard_batch, "_pool", None)
+    monkeypatch.setattr(dashboard_batch, "BATCH_MAX_WORKERS", 2)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+    release = threading.Event()
+
+    def build(contract_id, conn):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        release.wait(0.05)
+        with lock:
+            running["now"] -= 1
+        return contract_id
+
+    results, errors = run_dashboard_batch(list(range(8)), build, db_path)
+    assert results == list(range(8)) and errors == []
+    assert running["max"] <= 2
+    dashboard_batch._pool.shutdown()
+
+
+def test_read_only_connections_per_thread(db_path):
+    def build(contract_id, conn):
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO contracts VALUES (?, 'X')", (contract_id + 10,))
+        return threading.get_ident(), id(conn), get_read_only_connection(db_path) is conn
+
+    results, errors = run_dashboard_batch([1, 2, 3, 4], build, db_path)
+    assert errors == [] and all(same for _, _, same in results)
+    # Uma conexão por thread: a mesma thread sempre reaproveita a sua
+    por_thread = {}
+    for thread_id, conn_id, _ in results:
+        assert por_thread.setdefault(thread_id, conn_id) == conn_id
+
+    # Conexões de threads diferentes são distintas
+    principal = get_read_only_connection(db_path)
+    assert id(principal) not in {conn_id for _, conn_id, _ in results}
+
+
+def test_request_id_reaches_workers(db_path):
+    token = set_request_id("lote-1")
+    try:
+        results, _ = run_dashboard_batch([1, 2], lambda contract_id, conn: get_request_id(), db_path)
+    finally:
+        reset_request_id(token)
+    assert results == ["lote-1", "lote-1"]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Teste de regressão do processamento por escola de _get_dashboard_by_contract_data.
+
+Compara a resposta do dashboard usando a implementação atual (consulta única de
+equipamentos + índice invertido) com a resposta usando a implementação anterior
+(uma consulta de equipamentos por escola e json.loads por equipamento/tarefa),
+sobre um banco de fixture gerado em diretório temporário.
+
+Uso:
+    python -m pytest -q test_dashboard_equipments.py
+"""
+
+import json
+import random
+import sqlite3
+
+import pytest
+
+import api_backend
+from downloads.customer_group_members import rebuild_customer_group_members
+
+CONTRACT_ID = 156750
+PMOC_TYPE_ID = 184717
+TASK_TYPE_IDS = [175644, 175648, 175164, 175646, 177626, PMOC_TYPE_ID]
+
+
+def legacy_build_schools_data(cur, schools_raw, tasks_to_process, task_type_map, pmoc_task_type_id):
+    """Implementação anterior do processamento por escola (sem os prints de depuração)."""
+    schools_data = []
+    all_tasks = []
+    for school_raw in schools_raw:
+        school_id = school_raw['id']
+        school_tasks = [t for t in tasks_to_process if t['customerId'] == school_id]
+        all_tasks.extend(school_tasks)
+
+        cur.execute("SELECT * FROM equipments WHERE associatedCustomerId = ? AND active = 1", (school_id,))
+        equipments_to_process = cur.fetchall()
+        total_ativos = len(equipments_to_process)
+
+        equipments_with_status = []
+        for equip in equipments_to_process:
+            equip_dict = dict(equip)
+            equip_dict['completed_tasks'] = []
+            for task in school_tasks:
+                if task.get('taskStatus') in [5, 6]:
+                    try:
+                        task_equip_ids_str = task.get('equipmentsId', '[]')
+                        task_equip_ids = json.loads(task_equip_ids_str if task_equip_ids_str else '[]')
+                        if equip_dict['id'] in task_equip_ids:
+                            task_type_id = task.get('taskType')
+                            task_type_desc = task_type_map.get(task_type_id, "Desconhecido")
+                            equip_dict['completed_tasks'].append({
+                                'task_type_id': task_type_id,
+                                'task_type_description': task_type_desc,
+                                'task_id': task.get('taskID')
+                            })
+                    except (json.JSONDecodeError, TypeError):
+                        continue
+            equipments_with_status.append(equip_dict)
+
+        tasks_for_metrics = [t for t in school_tasks if t.get('taskType') != pmoc_task_type_id]
+        answered_equipments_ids = set()
+        for task in tasks_for_metrics:
+            if task['taskStatus'] == 5 and task.get('questionnaires'):
+                try:
+                    questionnaires_list = json.loads(task['questionnaires'])
+                    if isinstance(questionnaires_list, list):
+                        for q in questionnaires_list:
+                            if q and q.get('questionnaireEquipamentId'):
+                                answered_equipments_ids.add(q['questionnaireEquipamentId'])
+                except (json.JSONDecodeError, TypeError): pass
+
+        total_realizadas = len(answered_equipments_ids)
+        percentual = round((total_realizadas / total_ativos) * 100) if total_ativos > 0 else 0
+
+        schools_data.append({
+            "school_info": dict(school_raw),
+            "equipments": equipments_with_status,
+            "tasks": [dict(t) for t in school_tasks],
+            "metrics": {"ativos": total_ativos, "realizadas": total_realizadas, "percentual": percentual}
+        })
+    return schools_data, all_tasks
+
+
+def create_fixture_db(db_path, seed=None):
+    """Cria um banco com um contrato, escolas, equipamentos e tarefas (incluindo casos malformados)."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE customer_groups (id INTEGER PRIMARY KEY, description TEXT);
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, description TEXT, groupsId TEXT, managersId TEXT);
+        CREATE TABLE task_types (id INTEGER PRIMARY KEY, description TEXT);
+        CREATE TABLE teams (id INTEGER PRIMARY KEY, description TEXT, teamUsers TEXT);
+        CREATE TABLE users (userId INTEGER PRIMARY KEY, name TEXT, jobPosition TEXT);
+        CREATE TABLE equipments (id INTEGER PRIMARY KEY, name TEXT, description TEXT,
+                                 associatedCustomerId INTEGER, active INTEGER);
+        CREATE TABLE tasks (taskID INTEGER PRIMARY KEY, idUserTo INTEGER, customerId INTEGER,
+                            taskType INTEGER, taskStatus INTEGER, taskDate TEXT, date TEXT,
+                            equipmentsId TEXT, questionnaires TEXT, orientation TEXT);
+    ''')
+    conn.execute("INSERT INTO customer_groups VALUES (?, ?)", (CONTRACT_ID, "SETOR 01"))
+    conn.execute("INSERT INTO teams VALUES (1, 'STS Setor 01', ?)", (json.dumps(["Ana", "Bruno"]),))
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)", [
+        (10, "Ana", "Prestador de Serviços"), (11, "Bruno", "Oficial"), (12, "Carla", "Técnico"),
+    ])
+    conn.executemany("INSERT INTO task_types VALUES (?, ?)", [
+        (175644, "Mensal"), (175648, "Mensal 2"), (175164, "Semestral"),
+        (175646, "Corretiva"), (177626, "PMOC"), (PMOC_TYPE_ID, "Levantamento de PMOC"),
+    ])
+
+    # Escolas: 1-3 no contrato (a 3 sem equipamentos), 4 em outro grupo com prefixo parecido
+    conn.executemany("INSERT INTO customers VALUES (?, ?, ?, ?)", [
+        (1, "ESCOLA WALDERY", json.dumps([CONTRACT_ID]), json.dumps([10, 11])),
+        (2, "ESCOLA CAMARA", json.dumps([CONTRACT_ID, 156751]), "12"),
+        (3, "ESCOLA SEM EQUIPAMENTOS", json.dumps([CONTRACT_ID]), None),
+        (4, "OUTRO CONTRATO", json.dumps([15675]), None),
+    ])
+
+    equipments = [
+        (100, "Split 1", "Sala 1", 1, 1), (101, "Split 2", None, 1, 1), (102, None, "Antigo", 1, 0),
+        (103, "Split 3", "Sala 3", 1, 1), (200, "Split A", "Sala A", 2, 1), (201, "Split B", None, 2, 1),
+        (400, "Outro", None, 4, 1),
+    ]
+    tasks = [
+        # taskID, user, customer, type, status, taskDate, date, equipmentsId, questionnaires
+        (1, 10, 1, 175644, 5, "2025-07-01", "2025-07-01", "[100, 101]",
+         json.dumps([{"questionnaireEquipamentId": 100}, {"questionnaireEquipamentId": 101}, None])),
+        (2, 11, 1, 175648, 6, "2025-07-02", "2025-07-02", "[100, 100, 103]", None),
+        (3, 10, 1, PMOC_TYPE_ID, 5, "2025-07-03", "2025-07-03", "[103]",
+         json.dumps([{"questionnaireEquipamentId": 103}])),
+        (4, 12, 1, 175164, 1, "2025-07-04", "2025-07-04", "[101]", None),
+        (5, 10, 1, 175646, 5, "2025-07-05", "2025-07-05", "not json", "also not json"),
+        (6, 11, 1, 175644, 5, "2025-07-06", "2025-07-06", None, ""),
+        (7, 10, 2, 175644, 5, "2025-07-07", "2025-07-07", '{"200": true}',
+         json.dumps({"questionnaireEquipamentId": 200})),
+        (8, 10, 2, 175644, 6, "2025-07-08", "2025-07-08", "200", None),
+        (9, 12, 2, 177626, 5, "2025-07-09", "2025-07-09", "[200, 201, 999]",
+         json.dumps([{"questionnaireEquipamentId": 201}, {"questionnaireEquipamentId": 0}, {}])),
+        (10, 11, 2, 175644, 7, "2025-07-10", "2025-07-10", "[200]", None),
+        (11, 10, 4, 175644, 5, "2025-07-11", "2025-07-11", "[400]", None),
+        (12, 10, 2, 175644, 5, "2025-07-12", "2025-07-12", "[200.0, true]", None),
+    ]
+
+    if seed is not None:
+        rng = random.Random(seed)
+        next_equipment_id = 1000
+        for school_id in range(10, 40):
+            conn.execute("INSERT INTO customers VALUES (?, ?, ?, ?)",
+                         (school_id, f"ESCOLA {school_id}", json.dumps([CONTRACT_ID]), json.dumps([10])))
+            school_equipment_ids = []
+            for _ in range(rng.randint(0, 12)):
+                equipments.append((next_equipment_id, f"Equip {next_equipment_id}", None, school_id, rng.choice([0, 1, 1, 1])))
+                school_equipment_ids.append(next_equipment_id)
+                next_equipment_id += 1
+            for _ in range(rng.randint(0, 25)):
+                sample = rng.sample(school_equipment_ids, min(len(school_equipment_ids), rng.randint(0, 4)))
+                tasks.append((
+                    len(tasks) + 1, rng.choice([10, 11, 12]), school_id, rng.choice(TASK_TYPE_IDS),
+                    rng.choice([0, 1, 5, 5, 6, 6, 7]), "2025-07-15", "2025-07-15", json.dumps(sample),
+                    json.dumps([{"questionnaireEquipamentId": eq} for eq in sample if rng.random() < 0.7]),
+                ))
+
+    conn.executemany("INSERT INTO equipments VALUES (?, ?, ?, ?, ?)", equipments)
+    conn.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'Tarefa')", tasks)
+    conn.commit()
+    rebuild_customer_group_members(conn)
+    conn.close()
+
+
+@pytest.fixture(params=[None, 1, 2], ids=["casos-limite", "aleatorio-1", "aleatorio-2"])
+def fixture_db(request, tmp_path, monkeypatch):
+    db_path = tmp_path / "auvo.db"
+    create_fixture_db(str(db_path), seed=request.param)
+    monkeypatch.setattr(api_backend, "DB_PATH", str(db_path))
+    return db_path
+
+
+def _dashboard_json(group_id, **kwargs):
+    """Resposta do dashboard após o ciclo de serialização JSON (como o cliente a recebe)."""
+    return json.loads(json.dumps(api_backend._get_dashboard_by_contract_data(group_id, **kwargs)))
+
+
+@pytest.mark.parametrize("period", [{}, {"start_date": "2025-07-01", "end_date": "2025-07-06"}])
+def test_dashboard_matches_legacy_implementation(fixture_db, monkeypatch, period):
+    new_output = _dashboard_json(CONTRACT_ID, **period)
+
+    monkeypatch.setattr(api_backend, "_build_schools_data", legacy_build_schools_data)
+    legacy_output = _dashboard_json(CONTRACT_ID, **period)
+
+    # Compara escola a escola para manter a mensagem de falha legível
+    assert len(new_output["schools"]) == len(legacy_output["schools"])
+    for new_school, legacy_school in zip(new_output["schools"], legacy_output["schools"]):
+        assert new_school == legacy_school
+    assert json.dumps(new_output, sort_keys=True) == json.dumps(legacy_output, sort_keys=True)
+
+
+def test_completed_tasks_attached_once_per_equipment(fixture_db):
+    data = api_backend._get_dashboard_by_contract_data(CONTRACT_ID)
+    schools = {s["school_info"]["id"]: s for s in data["schools"]}
+
+    equipments = {e["id"]: e for e in schools[1]["equipments"]}
+    assert 102 not in equipments  # inativo
+    assert [t["task_id"] for t in equipments[100]["completed_tasks"]] == [1, 2]
+    assert [t["task_id"] for t in equipments[103]["completed_tasks"]] == [2, 3]
+    assert schools[1]["metrics"] == {"ativos": 3, "realizadas": 2, "percentual": 67}
+    assert 4 not in schools  # prefixo 15675 não pertence ao contrato 156750
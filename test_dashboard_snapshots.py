@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos snapshots materializados do dashboard (dashboard_snapshots.py).
+
+Uso:
+    python -m pytest -q test_dashboard_snapshots.py
+"""
+
+import sqlite3
+
+import dashboard_snapshots
+from dashboard_snapshots import (
+    create_dashboard_snapshot_tables,
+    create_invalidation_triggers,
+    get_data_version,
+    get_or_build_snapshot,
+)
+
+# Contrato 10: escolas 100 e 101; contrato 20: escola 200
+MEMBERS = [(10, 100), (10, 101), (20, 200)]
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tasks (taskID INTEGER PRIMARY KEY, customerId INTEGER)")
+    conn.execute("CREATE TABLE customer_group_members (group_id INTEGER, customer_id INTEGER, "
+                 "PRIMARY KEY (group_id, customer_id))")
+    conn.executemany("INSERT INTO customer_group_members VALUES (?, ?)", MEMBERS)
+    create_dashboard_snapshot_tables(conn)
+    create_invalidation_triggers(conn, "tasks", "customerId")
+    create_invalidation_triggers(conn, "customer_group_members", "customer_id")
+    conn.commit()
+    return conn
+
+
+def versions(conn):
+    return get_data_version(conn, 10), get_data_version(conn, 20)
+
+
+def test_snapshot_hit_miss_and_invalidation(tmp_path):
+    conn = make_db(str(tmp_path / "auvo.db"))
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {"group_id": 10, "total": len(builds)}
+
+    payload, status, age = get_or_build_snapshot(conn, 10, "2025-07-01", "2025-07-31", build)
+    assert (status, age, len(builds)) == ("MISS", 0, 1)
+    assert get_or_build_snapshot(conn, 10, "2025-07-01", "2025-07-31", build)[:2] == (payload, "HIT")
+    assert len(builds) == 1
+    # Outro período: outro snapshot
+    assert get_or_build_snapshot(conn, 10, None, None, build)[1] == "MISS"
+
+    # Escrita em escola do contrato: nova versão, snapshot refeito e o antigo removido
+    conn.execute("INSERT INTO tasks VALUES (1, 100)")
+    conn.commit()
+    payload, status, _ = get_or_build_snapshot(conn, 10, "2025-07-01", "2025-07-31", build)
+    assert status == "MISS" and '"total":3' in payload.replace(" ", "")
+    rows = conn.execute("SELECT COUNT(*) FROM dashboard_snapshots WHERE group_id = 10 "
+                        "AND start_date = '2025-07-01'").fetchone()[0]
+    assert rows == 1
+
+
+def test_snapshot_bypass_without_tables(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "auvo.db"))
+    hits = dashboard_snapshots._stats["hits"]
+
+    payload, status, age = get_or_build_snapshot(conn, 10, None, None, lambda: {"ok": True})
+    assert (status, age) == ("BYPASS", 0) and '"ok"' in payload
+    assert dashboard_snapshots._stats["hits"] == hits
+
+
+def test_triggers_bump_only_affected_contracts(tmp_path):
+    conn = make_db(str(tmp_path / "auvo.db"))
+    assert versions(conn) == (0, 0)
+
+    conn.execute("INSERT INTO tasks VALUES (1, 100)")
+    assert versions(conn) == (1, 0)
+    conn.execute("UPDATE tasks SET customerId = 101 WHERE taskID = 1")
+    # Mesmo contrato antes e depois: invalida as duas escolas do contrato 10
+    assert versions(conn) == (3, 0)
+
+    # Tarefa muda de escola (e de contrato): os dois contratos são invalidados
+    conn.execute("UPDATE tasks SET customerId = 200 WHERE taskID = 1")
+    assert versions(conn) == (4, 1)
+    conn.execute("DELETE FROM tasks WHERE taskID = 1")
+    assert versions(conn) == (4, 2)
+
+    # Escola sem contrato: nenhuma versão muda
+    conn.execute("INSERT INTO tasks VALUES (2, 999)")
+    assert versions(conn) == (4, 2)
+
+    # Escola entra no contrato 20: só ele é invalidado
+    conn.execute("INSERT INTO customer_group_members VALUES (20, 999)")
+    assert versions(conn) == (4, 3)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da coleta concorrente de tarefas (downloads/download_all_user_tasks_v2.py)
+contra o servidor mock da API Auvo.
+
+Uso:
+    python -m pytest -q test_download_tasks_v2.py
+"""
+
+import json
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+import auvo_client.client
+from auvo_client import AuvoClient
+from auvo_client.mock_server import MockAuvoServer
+from downloads import download_all_user_tasks_v2 as v2
+
+TASKS = [{"taskID": task_id, "idUserTo": 1, "lastUpdate": "2025-07-01T10:00:00"} for task_id in range(1, 121)]
+USERS = [(user_id, f"Usuario {user_id}") for user_id in range(1, 9)]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "auvo.db")
+    conn = sqlite3.connect(path)
+    v2.create_tasks_table(conn)
+    conn.close()
+    return path
+
+
+def harvest(monkeypatch, server, db_path, workers):
+    client = AuvoClient("api-key", "api-token", base_url=server.url, rate_limit=0)
+    monkeypatch.setattr(auvo_client.client, "_shared_client", client)
+    return v2.harvest_tasks(USERS, datetime(2025, 7, 1), datetime(2025, 7, 31), db_path, workers=workers)
+
+
+def test_harvest_writes_tasks_and_keeps_progress_lines(monkeypatch, capsys, db_path):
+    with MockAuvoServer(collections={"/tasks": TASKS}) as server:
+        totals = harvest(monkeypatch, server, db_path, workers=4)
+
+    # O mock ignora o filtro por usuário: todos recebem as mesmas tarefas
+    assert totals == {"tasks": 120 * len(USERS), "inserted": 120, "updated": 0}
+    assert sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 120
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    progress = [line for line in lines if "percentage" in line]
+    assert [line["percentage"] for line in progress] == [int(i / len(USERS) * 100) for i in range(1, len(USERS) + 1)]
+    assert progress[0]["message"].startswith("(1/8) Buscando tarefas para ")
+    assert sum("tarefas encontradas para" in line["message"] for line in lines) == len(USERS)
+
+
+def test_harvest_throughput_scales_with_workers(monkeypatch, db_path):
+    elapsed = {}
+    for workers in (1, 4):
+        with MockAuvoServer(collections={"/tasks": TASKS[:10]}, latency=0.05) as server:
+            start = time.perf_counter()
+            harvest(monkeypatch, server, db_path, workers=workers)
+            elapsed[workers] = time.perf_counter() - start
+
+    assert elapsed[4] < elapsed[1] / 2
+
+
+def test_harvest_write_error_does_not_block_fetchers(monkeypatch, tmp_path):
+    # Banco impossível de abrir: o erro é propagado depois de todas as buscas
+    missing = str(tmp_path / "inexistente" / "auvo.db")
+    with MockAuvoServer(collections={"/tasks": TASKS[:10]}) as server:
+        with pytest.raises(sqlite3.OperationalError):
+            harvest(monkeypatch, server, missing, workers=1)
+        assert server.count_requests("/tasks") == len(USERS)
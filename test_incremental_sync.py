@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da sincronização incremental (downloads/incremental_sync.py) contra o
+servidor mock da API Auvo.
+
+Uso:
+    python -m pytest -q test_incremental_sync.py
+"""
+
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from auvo_client import AuvoAPIError, AuvoClient
+from auvo_client.mock_server import MockAuvoServer
+from downloads.incremental_sync import ENTITIES, Entity, sync_entity
+
+USERS = [{"userId": user_id, "name": f"Usuario {user_id}", "active": True} for user_id in range(1, 251)]
+
+
+def make_tasks(count):
+    today = datetime.now().date().isoformat()
+    return [{"taskID": task_id, "idUserTo": 1, "taskDate": f"{today}T09:00:00",
+             "dateLastUpdate": f"2025-07-01T10:00:{task_id % 60:02d}"} for task_id in range(1, count + 1)]
+
+
+@pytest.fixture
+def server():
+    with MockAuvoServer(collections={"/users": USERS, "/tasks": make_tasks(30)}) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return AuvoClient("api-key", "api-token", base_url=server.url, rate_limit=0)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "auvo.db")
+
+
+def test_second_run_writes_only_the_delta(server, client, db_path):
+    first = sync_entity(db_path, ENTITIES["users"], client=client)
+    assert (first["status"], first["fetched"], first["changed"]) == ("success", 250, 250)
+
+    assert sync_entity(db_path, ENTITIES["users"], client=client)["changed"] == 0
+
+    server.collections["/users"] = [dict(user, name="Renomeado") if user["userId"] == 7 else user for user in USERS]
+    assert sync_entity(db_path, ENTITIES["users"], client=client)["changed"] == 1
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT name FROM users WHERE userId = 7").fetchone() == ("Renomeado",)
+    runs = conn.execute("SELECT records_fetched, records_changed FROM sync_runs ORDER BY id").fetchall()
+    assert runs == [(250, 250), (250, 0), (250, 1)]
+
+
+def test_rows_missing_locally_are_rewritten(client, db_path):
+    sync_entity(db_path, ENTITIES["users"], client=client)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM users WHERE userId IN (1, 2)")
+
+    assert sync_entity(db_path, ENTITIES["users"], client=client)["changed"] == 2
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone() == (250,)
+
+
+def test_watermark_filter_and_reconcile(server, client, db_path):
+    first = sync_entity(db_path, ENTITIES["tasks"], client=client)
+    assert first["watermark_to"] == "2025-07-01T10:00:30"
+
+    server.collections["/tasks"] = make_tasks(25)
+    second = sync_entity(db_path, ENTITIES["tasks"], reconcile=True, client=client)
+    assert second["server_filtered"] and second["watermark_from"] == "2025-07-01T10:00:30"
+    assert (second["changed"], second["deleted"]) == (0, 5)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone() == (25,)
+    assert conn.execute("SELECT watermark, records_deleted FROM update_control WHERE entity_type = 'tasks'"
+                        ).fetchone() == ("2025-07-01T10:00:30", 5)
+
+
+def test_reconcile_is_skipped_when_listing_looks_incomplete(server, client, db_path):
+    sync_entity(db_path, ENTITIES["users"], client=client)
+    server.collections["/users"] = USERS[:10]
+
+    assert sync_entity(db_path, ENTITIES["users"], reconcile=True, client=client)["deleted"] == 0
+    assert sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM users").fetchone() == (250,)
+
+
+def test_failed_page_ends_run_with_error_and_keeps_state(server, client, db_path, monkeypatch):
+    sync_entity(db_path, ENTITIES["users"], client=client)
+    sync_entity(db_path, ENTITIES["tasks"], client=client)
+    get_page = client.get_page
+
+    def failing_get_page(path, page, *args, **kwargs):
+        if page >= fail_from:
+            raise AuvoAPIError("Erro 500", status_code=500)
+        return get_page(path, page, *args, **kwargs)
+
+    monkeypatch.setattr(client, "get_page", failing_get_page)
+    # Listagem parcial (só a página 1): nada é removido nem gravado
+    fail_from = 2
+    users = sync_entity(db_path, ENTITIES["users"], reconcile=True, client=client)
+    assert (users["status"], users["deleted"]) == ("error", 0)
+    fail_from = 1
+    tasks = sync_entity(db_path, ENTITIES["tasks"], reconcile=True, client=client)
+    assert tasks["status"] == "error" and tasks["watermark_to"] == "2025-07-01T10:00:30"
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone() == (250,)
+    assert conn.execute("SELECT entity_type, status, watermark FROM update_control ORDER BY entity_type").fetchall() == [
+        ("tasks", "error", "2025-07-01T10:00:30"), ("users", "error", None)]
+
+
+def test_rows_that_fail_to_save_are_not_recorded_as_synced(server, client, db_path):
+    users = ENTITIES["users"]
+    entity = Entity(users.name, users.label, users.path, users.table, users.key, users.save, users.prepare,
+                    version_field="dateLastUpdate")
+    server.collections["/users"] = [dict(user, dateLastUpdate="2025-07-01T10:00:00") for user in USERS]
+    assert sync_entity(db_path, entity, client=client)["watermark_to"] == "2025-07-01T10:00:00"
+
+    # O valor do usuário 7 não pode ser gravado no SQLite: o salvador só registra o erro
+    server.collections["/users"] = [
+        dict(user, dateLastUpdate="2025-07-02T10:00:00",
+             name="Renomeado", hourValue={"invalido": 1} if user["userId"] == 7 else 0.0)
+        if user["userId"] in (7, 8) else dict(user, dateLastUpdate="2025-07-01T10:00:00") for user in USERS]
+    stats = sync_entity(db_path, entity, client=client)
+    assert (stats["status"], stats["changed"], stats["failed"]) == ("error", 1, 1)
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT userId, name FROM users WHERE userId IN (7, 8) ORDER BY userId").fetchall() == [
+        (7, "Usuario 7"), (8, "Renomeado")]
+    assert conn.execute("SELECT status, watermark FROM update_control").fetchone() == (
+        "error", "2025-07-01T10:00:00")
+
+    # Corrigido na API, o usuário 7 é regravado na próxima execução
+    server.collections["/users"][6]["hourValue"] = 0.0
+    stats = sync_entity(db_path, entity, client=client)
+    assert (stats["status"], stats["changed"], stats["watermark_to"]) == ("success", 1, "2025-07-02T10:00:00")
+    assert conn.execute("SELECT name FROM users WHERE userId = 7").fetchone() == ("Renomeado",)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos jobs em segundo plano (jobs.py).
+
+Uso:
+    python -m pytest -q test_jobs.py
+"""
+
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+from downloads.incremental_sync import create_sync_tables
+from jobs import DONE, ERROR, INTERRUPTED, QUEUED, RUNNING, JobManager, create_jobs_table
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "auvo.db")
+
+
+def wait_finished(manager, job_id, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        job = manager.get(job_id)
+        if job["status"] in (DONE, ERROR):
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job_id} não terminou")
+
+
+def test_job_runs_in_background_and_reports_progress(db_path):
+    release = threading.Event()
+
+    def runner(params, report):
+        report(50, "metade")
+        release.wait(5)
+        return {"period": [params["start_date"], params["end_date"]]}
+
+    manager = JobManager(db_path, {"download": runner})
+    job = manager.submit("download", "2025-07-01", "2025-07-31")
+    assert job["status"] in (QUEUED, RUNNING)
+
+    release.set()
+    job = wait_finished(manager, job["id"])
+    assert job["status"] == DONE and job["progress"] == 100
+    assert job["result"] == {"period": ["2025-07-01", "2025-07-31"]}
+    manager.shutdown()
+
+
+def test_sys_exit_in_runner_marks_job_as_error(db_path):
+    def runner(params, report):
+        sys.exit(1)
+
+    manager = JobManager(db_path, {"download": runner})
+    job = wait_finished(manager, manager.submit("download", "2025-07-01", "2025-07-31")["id"])
+    assert job["status"] == ERROR and job["error"] == "1"
+    # O job terminado não absorve os novos pedidos do mesmo período
+    assert manager.submit("download", "2025-07-01", "2025-07-31")["id"] != job["id"]
+    manager.shutdown()
+
+
+def test_overlapping_requests_are_coalesced(db_path):
+    started = threading.Event()
+    release = threading.Event()
+    periods = []
+
+    def runner(params, report):
+        periods.append((params["start_date"], params["end_date"]))
+        started.set()
+        release.wait(5)
+        return {}
+
+    manager = JobManager(db_path, {"download": runner}, max_workers=1)
+    running = manager.submit("download", "2025-07-01", "2025-07-31")
+    started.wait(5)
+
+    # Coberto pelo job em execução
+    assert manager.submit("download", "2025-07-10", "2025-07-20")["id"] == running["id"]
+    # Sobreposição parcial: novo job na fila, ampliado pelo pedido seguinte
+    queued = manager.submit("download", "2025-07-15", "2025-08-10")
+    assert queued["id"] != running["id"]
+    assert manager.submit("download", "2025-08-05", "2025-08-20")["id"] == queued["id"]
+
+    release.set()
+    wait_finished(manager, queued["id"])
+    assert periods == [("2025-07-01", "2025-07-31"), ("2025-07-15", "2025-08-20")]
+    manager.shutdown()
+
+
+def test_outcomes_survive_restart_and_pending_jobs_are_interrupted(db_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def runner(params, report):
+        if params["start_date"] == "2025-01-01":
+            raise RuntimeError("falha na API")
+        started.set()
+        release.wait(5)
+        return {}
+
+    manager = JobManager(db_path, {"download": runner})
+    failed = wait_finished(manager, manager.submit("download", "2025-01-01", "2025-01-31")["id"])
+    assert failed["status"] == ERROR and failed["error"] == "falha na API"
+    pending = manager.submit("download", "2025-02-01", "2025-02-28")
+    started.wait(5)
+
+    restarted = JobManager(db_path, {"download": runner})
+    assert restarted.get(failed["id"])["status"] == ERROR
+    assert restarted.get(pending["id"])["status"] == INTERRUPTED
+    assert [job["id"] for job in restarted.list()] == [pending["id"], failed["id"]]
+    assert restarted.get("inexistente") is None
+
+    release.set()
+    manager.shutdown()
+
+
+def test_table_helpers_leave_the_transaction_to_the_migration_runner(db_path):
+    # Como em apply_migrations: as migrações 0006 e 0007 rodam dentro de BEGIN IMMEDIATE
+    conn = sqlite3.connect(db_path)
+    conn.execute("BEGIN IMMEDIATE")
+    create_jobs_table(conn)
+    create_sync_tables(conn)
+    assert conn.in_transaction
+    conn.rollback()
+    tables = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    conn.close()
+    assert tables == []
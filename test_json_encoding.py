@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da codificação JSON das APIs (json_encoding.py).
+
+Uso:
+    python -m pytest -q test_json_encoding.py
+"""
+
+import json
+import math
+from datetime import date
+
+import pytest
+
+import json_encoding
+from json_encoding import dumps, iter_json, loads, parse_fields, project_row
+
+ENCODERS = ["json"] + (["orjson"] if json_encoding.orjson else [])
+
+PAYLOAD = {
+    "group_id": 10,
+    "nome": "Contrato São João",
+    "summary": {"total": 3, "taxa": 0.5},
+    "schools": [{"id": i, "nome": f"Escola {i}", "ok": i % 2 == 0} for i in range(45)],
+    "vazia": [],
+    "nulo": None,
+}
+
+
+@pytest.fixture(params=ENCODERS)
+def encoder(request, monkeypatch):
+    monkeypatch.setattr(json_encoding, "JSON_ENCODER", request.param)
+    return request.param
+
+
+def test_dumps_is_compact_and_round_trips(encoder):
+    texto = dumps(PAYLOAD)
+    assert texto == json.dumps(PAYLOAD, ensure_ascii=False, separators=(",", ":"))
+    assert loads(texto) == PAYLOAD and loads(texto.encode("utf-8")) == PAYLOAD
+    # Inteiros acima de 64 bits caem para o json padrão
+    assert dumps({"n": 2 ** 70}) == '{"n":%d}' % 2 ** 70
+
+
+def test_dumps_differences_between_encoders(encoder):
+    if encoder == "json":
+        with pytest.raises(ValueError):
+            dumps({"x": math.nan})
+        with pytest.raises(TypeError):
+            dumps({"d": date(2025, 7, 1)})
+    else:
+        assert dumps({"x": math.nan}) == '{"x":null}'
+        assert dumps({"d": date(2025, 7, 1)}) == '{"d":"2025-07-01"}'
+    assert loads(dumps({"f": 1e16}))["f"] == 1e16
+
+
+@pytest.mark.parametrize("chunk_items", [1, 7, 20, 45, 100])
+def test_iter_json_joined_equals_dumps(encoder, chunk_items):
+    pedacos = list(iter_json(PAYLOAD, chunk_items))
+    assert "".join(pedacos) == dumps(PAYLOAD)
+    # Escolas em pedaços de chunk_items elementos
+    assert len(pedacos) > math.ceil(45 / chunk_items)
+    assert "".join(iter_json({})) == dumps({}) == "{}"
+    assert "".join(iter_json({"a": []}, chunk_items)) == dumps({"a": []})
+
+
+def test_parse_fields():
+    assert parse_fields(None) == (None, set())
+    assert parse_fields("") == (None, set())
+    assert parse_fields(" id , nome,,") == (["id", "nome"], set())
+    assert parse_fields("-questionnaires, - summary,-") == (None, {"questionnaires", "summary"})
+    assert parse_fields("id,-nome") == (["id"], {"nome"})
+
+
+def test_project_row():
+    row = {"id": 1, "nome": "Escola", "questionnaires": [1, 2]}
+    assert project_row(row) is row
+    assert project_row(row, ["nome", "id", "inexistente"]) == {"nome": "Escola", "id": 1}
+    assert project_row(row, None, {"questionnaires"}) == {"id": 1, "nome": "Escola"}
+    assert project_row(row, ["id", "nome"], {"nome"}) == {"id": 1}
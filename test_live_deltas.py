@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes dos deltas ao vivo do dashboard (live_deltas.py).
+
+Uso:
+    python -m pytest -q test_live_deltas.py
+"""
+
+import pytest
+
+from change_feed import ChangeFeed
+from live_deltas import build_contract_deltas, contract_deltas_since, format_cursor, merge_days
+
+TYPE = 175644
+PMOC = 184717
+GROUPS = {100: [10], 101: [10], 200: [20]}
+
+
+def state(task_id, customer_id, status, task_type=TYPE, day="2025-07-01"):
+    return {"taskID": task_id, "customerId": customer_id, "taskType": task_type, "taskStatus": status,
+            "taskDate": f"{day}T09:00:00"}
+
+
+def test_new_task_and_status_change():
+    deltas = build_contract_deltas([
+        {"task": state(1, 100, 1), "previous": None},
+        {"task": state(2, 101, 6), "previous": state(2, 101, 3)},
+        {"task": state(3, 101, 6, PMOC), "previous": state(3, 101, 3, PMOC)},
+    ], GROUPS, pmoc_task_type_id=PMOC)
+
+    assert list(deltas) == ["10"] and list(deltas["10"]["by_date"]) == ["2025-07-01"]
+    delta = merge_days(deltas["10"])
+    assert [(c["taskID"], c["from"], c["to"]) for c in delta["task_status"]] == [(1, None, 1), (2, 3, 6), (3, 3, 6)]
+    assert delta["schools"] == {"100": {"tasks": 1, "by_status": {"1": 1}},
+                                "101": {"by_status": {"3": -2, "6": 2}}}
+    # PMOC não conta em completed_tasks nem em non_pmoc_tasks (denominador do completion_rate)
+    assert delta["kpis"] == {"total_tasks": 1, "non_pmoc_tasks": 1, "completed_tasks": 1,
+                             "task_types": {str(TYPE): 1}}
+
+
+
+def test_completion_rate_inputs_match_dashboard():
+    # Dashboard carregado: 4 tarefas sem PMOC, 1 concluída (25%), e 1 PMOC
+    kpis = {"total_tasks": 5, "non_pmoc_tasks": 4, "completed_tasks": 1}
+    deltas = build_contract_deltas([
+        {"task": state(1, 100, 6), "previous": state(1, 100, 3)},
+        {"task": state(2, 100, 7), "previous": state(2, 100, 1)},
+        {"task": state(3, 100, 6, PMOC), "previous": state(3, 100, 1, PMOC)},
+        {"task": state(4, 101, 1, PMOC), "previous": None},
+    ], GROUPS, pmoc_task_type_id=PMOC)
+    for key, value in merge_days(deltas["10"])["kpis"].items():
+        if key != "task_types":
+            kpis[key] += value
+
+    # Recarga: 3 tarefas sem PMOC (a cancelada saiu), 2 concluídas
+    assert kpis == {"total_tasks": 5, "non_pmoc_tasks": 3, "completed_tasks": 2}
+    assert round(kpis["completed_tasks"] / kpis["non_pmoc_tasks"] * 100, 2) == 66.67
+
+def test_school_move_and_cancellation():
+    deltas = build_contract_deltas([
+        {"task": state(1, 200, 1), "previous": state(1, 100, 1)},
+        {"task": state(2, 101, 7), "previous": state(2, 101, 1)},
+    ], GROUPS)
+
+    contract_10, contract_20 = merge_days(deltas["10"]), merge_days(deltas["20"])
+    assert contract_10["schools"] == {"100": {"tasks": -1, "by_status": {"1": -1}},
+                                      "101": {"tasks": -1, "by_status": {"1": -1}}}
+    assert contract_10["kpis"] == {"total_tasks": -2, "non_pmoc_tasks": -2, "task_types": {str(TYPE): -2}}
+    assert contract_20["schools"] == {"200": {"tasks": 1, "by_status": {"1": 1}}}
+    # Mudança de escola sem mudança de status aparece só nos contadores
+    assert deltas["20"]["task_status"] == []
+
+
+def test_unrelated_changes_produce_no_delta():
+    assert build_contract_deltas([{"task": state(1, 999, 1), "previous": None}], GROUPS) == {}
+    assert build_contract_deltas([{"task": state(1, 100, 1), "previous": state(1, 100, 1)}], GROUPS) == {}
+
+
+def test_task_date_moves_between_days_and_periods():
+    deltas = build_contract_deltas([
+        {"task": state(1, 100, 1, day="2025-08-02"), "previous": state(1, 100, 1, day="2025-07-30")},
+    ], GROUPS)
+
+    assert sorted(deltas["10"]["by_date"]) == ["2025-07-30", "2025-08-02"]
+    # Dashboard de julho: a tarefa saiu; de agosto: entrou; sem período: nada muda
+    july = merge_days(deltas["10"], "2025-07-01", "2025-07-31")
+    assert july["kpis"] == {"total_tasks": -1, "non_pmoc_tasks": -1, "task_types": {str(TYPE): -1}}
+    assert merge_days(deltas["10"], "2025-08-01", "2025-08-31")["schools"] == {"100": {"tasks": 1, "by_status": {"1": 1}}}
+    assert merge_days(deltas["10"]) == {"task_status": [], "schools": {}, "kpis": {}}
+
+
+def test_cursor_resume_and_reset():
+    feed = ChangeFeed(maxlen=3)
+    for group in ("10", "20", "10"):
+        feed.publish({"contracts": {group: {"task_status": [], "by_date": {"2025-07-01": {
+            "schools": {}, "kpis": {"total_tasks": 1}}}}}})
+
+    deltas, cursor, reset = contract_deltas_since(10, format_cursor(0, feed), feed)
+    assert [d["seq"] for d in deltas] == [1, 3] and cursor == format_cursor(3, feed) and not reset
+    assert deltas[0]["kpis"] == {"total_tasks": 1} and deltas[1]["cursor"] == cursor
+    assert contract_deltas_since(10, None, feed) == ([], cursor, False)
+    # Fora do período do dashboard
+    assert contract_deltas_since(10, format_cursor(0, feed), feed, "2025-08-01", "2025-08-31")[0] == []
+
+    for _ in range(3):
+        feed.publish({"contracts": {}})
+    last = format_cursor(6, feed)
+    # Eventos depois do cursor já saíram do buffer
+    assert contract_deltas_since(10, format_cursor(1, feed), feed) == ([], last, True)
+    # Cursor de antes de um reinício (outro epoch) ou além do último evento
+    assert contract_deltas_since(10, format_cursor(2, ChangeFeed()), feed) == ([], last, True)
+    assert contract_deltas_since(10, format_cursor(50, feed), feed) == ([], last, True)
+    with pytest.raises(ValueError):
+        contract_deltas_since(10, "3", feed)
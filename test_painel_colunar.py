@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes do cache Parquet dos painéis (painel/colunar.py).
+
+Uso:
+    python -m pytest -q test_painel_colunar.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+from datetime import date
+
+import pyarrow.dataset as ds
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel"))
+
+import colunar  # noqa: E402
+import dados  # noqa: E402
+
+TIPOS = {1: "# 1 - Preventiva Mensal", 2: "# 2 - Corretiva", 3: "# 3 - Preventiva Levantamento de PMOC"}
+
+
+def make_bancos(tmp_path):
+    db_tarefas = str(tmp_path / "tarefas.sqlite3")
+    conn = sqlite3.connect(db_tarefas)
+    conn.execute("CREATE TABLE tarefas_raw (taskID TEXT, user_id INTEGER, data_referencia TEXT, json TEXT, "
+                 "PRIMARY KEY (taskID, user_id))")
+    linhas = []
+    for task_id in range(1, 61):
+        tarefa = {"taskID": task_id, "customerId": 10 + task_id % 3, "customerDescription": f"Escola {task_id % 3}",
+                  "taskType": task_id % 3 + 1, "taskTypeDescription": TIPOS[task_id % 3 + 1],
+                  "taskStatus": task_id % 8 or None, "checkIn": task_id % 2 == 0,
+                  "equipmentsId": [task_id, task_id + 1, task_id],
+                  "questionnaires": [{"questionnaireEquipamentId": task_id + 1}, {"questionnaireEquipamentId": task_id},
+                                     {"questionnaireEquipamentId": task_id + 1}, {"questionnaireEquipamentId": 0}],
+                  "deliveredOnSmarthPhone": task_id % 10 == 0, "deliveredDate": "0001-01-01T00:00:00"}
+        if task_id % 7 == 0:
+            del tarefa["deliveredDate"], tarefa["checkIn"]
+        linhas.append((str(task_id), 1, f"2025-{task_id % 3 + 6:02d}-{task_id % 28 + 1:02d}", json.dumps(tarefa)))
+    conn.executemany("INSERT INTO tarefas_raw VALUES (?, ?, ?, ?)", linhas)
+    conn.commit()
+    conn.close()
+
+    db_equipamentos = str(tmp_path / "db.sqlite3")
+    conn = sqlite3.connect(db_equipamentos)
+    conn.execute("CREATE TABLE equipamentos (id INTEGER, name TEXT, associated_customer_id INTEGER, "
+                 "identificador TEXT, ativo INTEGER)")
+    conn.executemany("INSERT INTO equipamentos VALUES (?, 'Split', ?, NULL, 1)", [(1, 10), (2, 11), (3, 99)])
+    conn.commit()
+    conn.close()
+
+    db_clientes = str(tmp_path / "clientes.sqlite3")
+    conn = sqlite3.connect(db_clientes)
+    for setor, grupo in dados.SETORES.items():
+        conn.execute(f"CREATE TABLE clientes_grupo_{grupo} (id INTEGER, description TEXT, latitude REAL, longitude REAL)")
+    conn.execute(f"INSERT INTO clientes_grupo_{dados.SETORES['Setor 1']} VALUES (10, 'Escola 1', -23.5, -46.6)")
+    conn.execute(f"INSERT INTO clientes_grupo_{dados.SETORES['Setor 2']} VALUES (11, 'Escola 2', -23.6, -46.7)")
+    conn.commit()
+    conn.close()
+    return db_tarefas, db_equipamentos, db_clientes
+
+
+def test_export_partitions_and_manifest(tmp_path):
+    bancos = make_bancos(tmp_path)
+    destino = str(tmp_path / "parquet")
+    manifesto = colunar.exportar(destino, *bancos)
+
+    assert manifesto["tabelas"]["tarefas"]["linhas"] == 60
+    assert manifesto["tabelas"]["tarefas"]["valores"]["mes"] == ["2025-06", "2025-07", "2025-08"]
+    assert manifesto["tabelas"]["tarefas"]["valores"]["setor"] == ["Sem setor", "Setor 1", "Setor 2"]
+    assert manifesto["tabelas"]["tarefas_equipamentos"]["linhas"] == 180
+    # Respondidos sem repetição e sem ID 0
+    assert manifesto["tabelas"]["tarefas_equipamentos_respondidos"]["linhas"] == 120
+    publicada = colunar.pasta_publicada(destino)
+    assert os.path.dirname(publicada) == destino
+    assert os.path.isdir(os.path.join(publicada, "tarefas", "mes=2025-07", "setor=Setor%202"))
+    assert colunar.ler_manifesto(destino) == json.loads(json.dumps(manifesto))
+    assert colunar.atual(destino, bancos[0])
+
+    # Projeção e filtro por partição
+    equipamentos = colunar.ler(destino, "equipamentos", ["id"], ds.field("setor") == "Setor 1")
+    assert equipamentos["id"].tolist() == [1]
+    julho = colunar.ler(destino, "tarefas", ["taskID"], ds.field("mes") == "2025-07")
+    assert sorted(julho["taskID"].astype(int)) == list(range(1, 61, 3))
+
+    # Nova exportação publicada; só a anterior é mantida (leitores ainda nela)
+    colunar.exportar(destino, *bancos)
+    colunar.exportar(destino, *bancos)
+    versoes = sorted(nome for nome in os.listdir(destino) if nome != colunar.PONTEIRO)
+    assert len(versoes) == 2 and os.path.basename(colunar.pasta_publicada(destino)) == versoes[-1]
+    # Quem já resolveu a exportação anterior continua lendo dela
+    assert len(colunar.ler(os.path.join(destino, versoes[0]), "tarefas", ["taskID"])) == 60
+
+    # O banco mudou: cache desatualizado
+    with open(bancos[0], "ab") as banco:
+        banco.write(b"\0" * 4096)
+    assert not colunar.atual(destino, bancos[0])
+
+
+def test_export_retries_when_a_database_changes_while_reading(tmp_path, monkeypatch):
+    bancos = make_bancos(tmp_path)
+    destino = str(tmp_path / "parquet")
+    colunar.exportar(destino, *bancos)
+    ler_tabelas = colunar._ler_tabelas
+    leituras = []
+
+    def ler_tabelas_com_escrita(*args):
+        leituras.append(1)
+        if len(leituras) <= alteracoes:
+            # Gravação (ex.: webhook) durante a leitura
+            with open(bancos[0], "ab") as banco:
+                banco.write(b"\0" * 4096)
+        return ler_tabelas(*args)
+
+    monkeypatch.setattr(colunar, "_ler_tabelas", ler_tabelas_com_escrita)
+    alteracoes = 1
+    manifesto = colunar.exportar(destino, *bancos)
+    assert len(leituras) == 2 and colunar.atual(destino, bancos[0])
+    assert manifesto["fontes"]["tarefas"]["versao"] == dados.versao_banco(bancos[0])
+
+    # Banco mudando em todas as tentativas: a exportação publicada não muda
+    leituras.clear()
+    alteracoes = colunar.TENTATIVAS
+    publicada = colunar.pasta_publicada(destino)
+    assert colunar.exportar(destino, *bancos) is None
+    assert len(leituras) == colunar.TENTATIVAS and colunar.pasta_publicada(destino) == publicada
+
+
+def test_panel_reads_match_sqlite(tmp_path, monkeypatch):
+    db_tarefas, db_equipamentos, db_clientes = make_bancos(tmp_path)
+    monkeypatch.setattr(dados, "DB_TAREFAS", db_tarefas)
+    monkeypatch.setattr(dados, "PARQUET_DIR", str(tmp_path / "parquet"))
+    dados.limpar_cache()
+
+    filtros = [
+        {},
+        {"clientes": [10, 11], "status": ["Aberta", "Finalizada", "Desconhecido"], "tipos": ["Corretiva", "Mensal"],
+         "data_ini": date(2025, 7, 5), "data_fim": date(2025, 8, 20)},
+        {"tipos": ["preventiva levantamento de pmoc"], "ignorar_caixa": True},
+        {"status": []},
+    ]
+    assert not dados.parquet_atual()
+    planas_sqlite = dados.carregar_tarefas_planas()
+    sqlite = [dados.consultar_tarefas(**filtro) for filtro in filtros]
+
+    colunar.exportar(dados.PARQUET_DIR, db_tarefas, db_equipamentos, db_clientes)
+    dados.limpar_cache()
+    assert dados.parquet_atual()
+    planas_parquet = dados.carregar_tarefas_planas()
+    for esperado, obtido in zip(planas_sqlite, planas_parquet):
+        assert obtido.columns.tolist() == esperado.columns.tolist()
+        assert obtido.astype(str).values.tolist() == esperado.astype(str).values.tolist()
+    for filtro, esperado in zip(filtros, sqlite):
+        obtido = dados.consultar_tarefas(**filtro)
+        assert obtido[0].astype(str).values.tolist() == esperado[0].astype(str).values.tolist()
+        assert obtido[1].values.tolist() == esperado[1].values.tolist()
+        assert obtido[2].values.tolist() == esperado[2].values.tolist()
+    assert isinstance(planas_parquet[0]["questionarios"][0], list)
+    # Só as colunas pedidas
+    parcial = dados.carregar_tarefas_planas(("tipo", "status_id"))[0]
+    assert parcial.columns.tolist() == ["taskID", "user_id", "data", "tipo", "status_id"]
+    assert parcial.astype(str).values.tolist() == planas_sqlite[0][parcial.columns].astype(str).values.tolist()
+    assert len(sqlite[0][0]) == 54 and len(sqlite[3][0]) == 0
+    dados.limpar_cache()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes do consolidado por setor dos painéis de preventivas (painel/consolidacao.py).
+
+Uso:
+    python -m pytest -q test_painel_consolidacao.py
+"""
+
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel"))
+
+import dados  # noqa: E402
+from consolidacao import TODOS, consolidar_equipamentos, linhas_por_escola, resumo_consolidado  # noqa: E402
+
+
+def tarefa(task_id, cliente, tipo, status, equipamentos, respondidos, data="2025-07-10", **extra):
+    return {
+        "taskID": task_id, "user_id": 1, "data_referencia": data,
+        "json": {"taskID": task_id, "customerId": cliente, "customerDescription": f"Escola {cliente}",
+                 "taskTypeDescription": tipo, "taskStatus": status, "equipmentsId": equipamentos,
+                 "questionnaires": [{"questionnaireEquipamentId": e} for e in respondidos],
+                 "taskUrl": f"https://app.auvo.com.br/tarefa/{task_id}", **extra},
+    }
+
+
+def test_consolidates_all_sectors_in_one_pass():
+    df_raw = pd.DataFrame([
+        tarefa(1, 10, "# 1 - Preventiva Mensal", 5, [100, 101], [100]),
+        tarefa(2, 10, "# 1 - PREVENTIVA MENSAL", 5, [101], [101], data="2025-06-30"),  # fora do período
+        tarefa(3, 20, "# 1 - Preventiva Mensal", 6, [200], [200]),  # pausada
+        tarefa(4, 20, "# 1 - Preventiva Mensal", 5, [200, 201], [200, 999]),  # 999 não está ativo
+        tarefa(5, 20, "# 1 - Preventiva Mensal", 5, [201], [201],
+               deliveredOnSmarthPhone=True, deliveredDate=dados.ENTREGA_INVALIDA),
+        tarefa(6, 30, "# 2 - Corretiva", 5, [300], [300]),
+    ])
+    tarefas = dados.achatar_tarefas(df_raw)
+    equipamentos_df = pd.DataFrame({
+        "id": [100, 101, 200, 201, 300],
+        "name": ["Split", "Janela", "Split", "Cassete", "Piso teto"],
+        "associated_customer_id": [10, 10, 20, 20, 30],
+        "identificador": ["A1", None, "B1", "B2", "C1"],
+    })
+    clientes_por_setor = {"Setor 1": [10], "Setor 2": [20, 30], "Setor 3": [40]}
+
+    consolidado = consolidar_equipamentos(
+        tarefas, dados.explodir_equipamentos(tarefas), dados.explodir_questionarios(tarefas), equipamentos_df,
+        clientes_por_setor, "preventiva mensal", date(2025, 7, 1), date(2025, 7, 31),
+    )
+
+    resumo = resumo_consolidado(consolidado)
+    assert resumo.values.tolist() == [
+        ["Setor 1", 2, 1, 1],
+        ["Setor 2", 3, 2, 2],
+        ["Setor 3", 0, 0, 0],
+        [TODOS, 5, 3, 3],
+    ]
+
+    setor2 = consolidado[consolidado["setor"] == "Setor 2"].set_index("equipamento_id")
+    assert setor2.loc[200, ["feito", "escola", "link"]].tolist() == [True, "Escola 20", "https://app.auvo.com.br/tarefa/4"]
+    assert setor2.loc[999, ["esperado", "identificador"]].tolist() == [False, "ID 999"]
+    assert pd.isna(setor2.loc[999, "nome"])
+    # Não feito: escola do equipamento e primeira tarefa que o lista
+    assert setor2.loc[201, ["nao_feito", "escola", "link"]].tolist() == [True, "Escola 20", "https://app.auvo.com.br/tarefa/4"]
+    assert setor2.loc[300, ["nao_feito", "escola"]].tolist() == [True, "Escola 30"]
+
+    setor1 = consolidado[consolidado["setor"] == "Setor 1"]
+    assert setor1["identificador"].tolist() == ["A1", "ID 101"]
+    assert linhas_por_escola(setor1[setor1["nao_feito"]], "Não Feito") == [
+        {"Escola/Equipamento": "Escola 10", "Identificador": "", "Status": "", "Link": "", "Nível": 0},
+        {"Escola/Equipamento": "Janela", "Identificador": "ID 101", "Status": "Não Feito",
+         "Link": "https://app.auvo.com.br/tarefa/1", "Nível": 1},
+    ]
+
+    # Sem período: a tarefa de junho também conta
+    sem_periodo = consolidar_equipamentos(
+        tarefas, dados.explodir_equipamentos(tarefas), dados.explodir_questionarios(tarefas), equipamentos_df,
+        clientes_por_setor, "Preventiva Mensal",
+    )
+    assert resumo_consolidado(sem_periodo).values.tolist()[0] == ["Setor 1", 2, 2, 0]
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes do acesso aos dados dos painéis Streamlit (painel/dados.py).
+
+Uso:
+    python -m pytest -q test_painel_dados.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel"))
+
+import dados  # noqa: E402
+
+
+def raw(*tarefas):
+    return pd.DataFrame([
+        {"taskID": tarefa["taskID"], "user_id": 1, "data_referencia": "2025-07-01", "json": tarefa}
+        for tarefa in tarefas
+    ])
+
+
+def questionario(equipamento_id):
+    return {"questionnaireId": 1, "questionnaireEquipamentId": equipamento_id}
+
+
+def test_flatten_and_exploded_tables():
+    df_raw = raw(
+        {"taskID": 1, "customerId": 10, "taskStatus": 5, "equipmentsId": [7, 8, 8],
+         "questionnaires": [questionario(7), questionario(7), questionario(None)]},
+        {"taskID": 2, "customerId": "11", "taskStatus": None, "equipmentsId": None, "questionnaires": None},
+        {"taskID": 3, "customerId": 10, "equipmentsId": [9], "questionnaires": [questionario(9)],
+         "deliveredDate": "0001-01-01T00:00:00", "deliveredOnSmarthPhone": True},
+    )
+    df = dados.achatar_tarefas(df_raw)
+    assert list(df.columns[:3]) == ["taskID", "user_id", "data"]
+    assert df["customer_id"].tolist() == [10, 11, 10] and str(df["customer_id"].dtype) == "Int64"
+    assert df["status_id"].isna().tolist() == [False, True, True]
+    assert df["deliveredDate"].tolist() == ["", "", "0001-01-01T00:00:00"]
+    assert df["deliveredOnSmarthPhone"].tolist() == [False, False, True]
+
+    equipamentos = dados.explodir_equipamentos(df)
+    questionarios = dados.explodir_questionarios(df)
+    assert equipamentos.values.tolist() == [[1, 7], [1, 8], [1, 8], [3, 9]]
+    assert questionarios.values.tolist() == [[1, 7], [3, 9]]
+
+    # Mesmas contagens dos painéis: esperados com repetição, respondidos distintos por tarefa
+    assert dados.contar_por_tarefas(equipamentos, [1, 2]) == 3
+    assert dados.contar_por_tarefas(questionarios, [1, 3]) == 2
+    assert dados.equipamentos_das_tarefas(questionarios, df["taskID"]) == {7, 9}
+    assert dados.pendentes_por_tarefa(equipamentos, questionarios, [1, 2, 3]).to_dict() == {1: 1}
+
+
+def test_cache_reloads_when_database_changes(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "tarefas.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE tarefas_raw (taskID INTEGER, user_id INTEGER, data_referencia TEXT, json TEXT)")
+    conn.execute("INSERT INTO tarefas_raw VALUES (1, 1, '2025-07-01', ?)", (json.dumps({"customerId": 10}),))
+    conn.commit()
+    monkeypatch.setattr(dados, "DB_TAREFAS", db_path)
+    dados.limpar_cache()
+
+    primeira = dados.carregar_tarefas_planas()
+    assert dados.carregar_tarefas_planas() is primeira
+    assert dados.carregar_tarefas(("taskID",)).columns.tolist() == ["taskID"]
+
+    conn.execute("INSERT INTO tarefas_raw VALUES (2, 1, '2025-07-02', ?)", (json.dumps({"customerId": 11}),))
+    conn.commit()
+    os.utime(db_path, ns=(0, os.stat(db_path).st_mtime_ns + 10**9))
+    tarefas, _, _ = dados.carregar_tarefas_planas()
+    assert tarefas["customer_id"].tolist() == [10, 11]
+    conn.close()
+    dados.limpar_cache()
+
+
+def test_sql_filters_match_in_memory_filters(tmp_path, monkeypatch):
+    from datetime import date
+
+    from tarefas_normalizadas import criar_tabelas_normalizadas
+
+    db_path = str(tmp_path / "tarefas.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE tarefas_raw (taskID TEXT, user_id INTEGER, data_referencia TEXT, json TEXT, "
+                 "PRIMARY KEY (taskID, user_id))")
+    tipos = {1: "# 1 - Preventiva Mensal", 2: "# 2 - Corretiva", 3: "# 3 - Preventiva Levantamento de PMOC"}
+    linhas = []
+    for task_id in range(1, 61):
+        tarefa = {"taskID": task_id, "customerId": 10 + task_id % 3, "taskType": task_id % 3 + 1,
+                  "taskTypeDescription": tipos[task_id % 3 + 1], "taskStatus": task_id % 8 or None,
+                  "equipmentsId": [task_id, task_id + 1], "questionnaires": [questionario(task_id)],
+                  "deliveredOnSmarthPhone": task_id % 10 == 0, "deliveredDate": "0001-01-01T00:00:00"}
+        linhas.append((task_id, 1, f"2025-07-{task_id % 28 + 1:02d}", json.dumps(tarefa)))
+    conn.executemany("INSERT INTO tarefas_raw VALUES (?, ?, ?, ?)", linhas)
+    conn.commit()
+    monkeypatch.setattr(dados, "DB_TAREFAS", db_path)
+    dados.limpar_cache()
+
+    filtros = [
+        {},
+        {"clientes": [10, 11], "status": ["Aberta", "Finalizada", "Desconhecido"], "tipos": ["Corretiva", "Mensal"],
+         "data_ini": date(2025, 7, 5), "data_fim": date(2025, 7, 20)},
+        {"tipos": ["preventiva levantamento de pmoc"], "ignorar_caixa": True},
+        {"status": []},
+    ]
+    em_memoria = [dados.consultar_tarefas(**filtro) for filtro in filtros]
+    status_memoria = dados.status_das_tarefas([10])
+
+    criar_tabelas_normalizadas(conn)
+    conn.close()
+    dados.limpar_cache()
+    assert dados.tabelas_normalizadas()
+    for filtro, (tarefas, equipamentos, questionarios) in zip(filtros, em_memoria):
+        sql = dados.consultar_tarefas(**filtro)
+        assert sql[0]["taskID"].tolist() == tarefas["taskID"].tolist()
+        assert sql[0]["status"].tolist() == tarefas["status"].tolist()
+        assert sql[1].values.tolist() == equipamentos.values.tolist()
+        assert sorted(sql[2].values.tolist()) == sorted(questionarios.values.tolist())
+    assert len(em_memoria[0][0]) == 54 and len(em_memoria[3][0]) == 0
+    assert dados.status_das_tarefas([10]) == status_memoria
+    dados.limpar_cache()
+
+
+def test_filtered_queries_are_cached_per_filter_set(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "tarefas.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE tarefas_raw (taskID INTEGER, user_id INTEGER, data_referencia TEXT, json TEXT)")
+    for task_id, cliente in ((1, 10), (2, 11), (3, 12)):
+        conn.execute("INSERT INTO tarefas_raw VALUES (?, 1, '2025-07-01', ?)",
+                     (task_id, json.dumps({"taskID": task_id, "customerId": cliente, "taskStatus": 1})))
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(dados, "DB_TAREFAS", db_path)
+    monkeypatch.setattr(dados, "CACHE_CONSULTAS", 2)
+    dados.limpar_cache()
+
+    setor_a = dados.consultar_tarefas(clientes=[10], status=["Aberta"])
+    assert setor_a[0]["taskID"].tolist() == [1]
+    assert dados.consultar_tarefas(clientes=[10], status=["Aberta"]) is setor_a
+    setor_b = dados.consultar_tarefas(clientes=[11], status=["Aberta"])
+    assert setor_b is not setor_a and dados.consultar_tarefas(clientes=[11], status=["Aberta"]) is setor_b
+    assert dados.status_das_tarefas([10]) == ["Aberta"]
+
+    # Só as CACHE_CONSULTAS consultas mais recentes ficam em cache
+    dados.consultar_tarefas(clientes=[12], status=["Aberta"])
+    assert dados.consultar_tarefas(clientes=[11], status=["Aberta"]) is setor_b
+    assert dados.consultar_tarefas(clientes=[10], status=["Aberta"]) is not setor_a
+    assert sum(chave[0] == "consulta" for chave in dados._cache) == 2
+    dados.limpar_cache()
+
+
+def test_equipment_display_names(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "db.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE equipamentos (id INTEGER, name TEXT, associated_customer_id INTEGER, "
+                 "identificador TEXT, ativo INTEGER)")
+    conn.executemany("INSERT INTO equipamentos VALUES (?, ?, 10, ?, ?)", [
+        (1, "Split", "A1", 1), (2, "Cassete", " ", 1), (3, "Janela", None, 1), (4, "Piso teto", "B4", 0)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(dados, "DB_EQUIPAMENTOS", db_path)
+    dados.limpar_cache()
+
+    assert dados.nomes_equipamentos() == {1: "A1 - Split", 2: "Cassete", 3: "Janela"}
+    assert dados.nomes_equipamentos() is dados.nomes_equipamentos()
+    dados.limpar_cache()
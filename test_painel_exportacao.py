@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes das planilhas de equipamentos dos painéis (painel/exportacao.py).
+
+Uso:
+    python -m pytest -q test_painel_exportacao.py
+"""
+
+import os
+import subprocess
+import sys
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel"))
+
+import exportacao  # noqa: E402
+
+
+def consolidado():
+    return pd.DataFrame({
+        "setor": pd.Categorical(["Setor 1", "Setor 1", "Setor 1", "Todos", "Todos", "Todos"],
+                                categories=["Setor 1", "Todos"], ordered=True),
+        "equipamento_id": [1, 2, 3, 1, 2, 3],
+        "esperado": [True] * 6,
+        "feito": [True, False, False] * 2,
+        "nao_feito": [False, True, True] * 2,
+        "identificador": ["A1", "ID 2", "C3"] * 2,
+        "nome": ["Split", None, "Cassete"] * 2,
+        "escola": ["Escola 10", "Escola 10", "Escola 20"] * 2,
+        "link": ["https://app.auvo.com.br/tarefa/1", "", ""] * 2,
+    })
+
+
+def planilhas(conteudo):
+    with zipfile.ZipFile(BytesIO(conteudo)) as xlsx:
+        xml = {nome: xlsx.read(nome).decode("utf-8")
+               for nome in xlsx.namelist() if nome.startswith("xl/worksheets/sheet")}
+        xml["workbook"] = xlsx.read("xl/workbook.xml").decode("utf-8")
+        return xml
+
+
+def test_writes_one_sheet_per_sector_with_grouped_rows():
+    saida = BytesIO()
+    exportacao.escrever_planilha(consolidado(), "nao_feitos", ["Setor 1", "Todos"], saida)
+    xml = planilhas(saida.getvalue())
+
+    assert 'name="Setor 1"' in xml["workbook"] and 'name="Todos"' in xml["workbook"]
+    aba = xml["xl/worksheets/sheet1.xml"]
+    # Cabeçalho + 2 escolas + 2 equipamentos não feitos
+    assert aba.count("<row ") == 5
+    assert aba.count('outlineLevel="1"') == 2
+    for texto in ("Escola 10", "Nome Desconhecido (ID 2)", "Escola 20", "Cassete", "Não Feito"):
+        assert texto in aba
+    assert "Split" not in aba
+    # Larguras por coluna
+    assert aba.count("<col ") == 4
+
+    saida = BytesIO()
+    exportacao.escrever_planilha(consolidado(), "feitos", ["Setor 1"], saida)
+    aba = planilhas(saida.getvalue())["xl/worksheets/sheet1.xml"]
+    assert "Total de equipamentos" in aba and "Split" in aba and "https://app.auvo.com.br/tarefa/1" in aba
+
+
+def test_exports_are_cached_until_the_databases_change(tmp_path, monkeypatch):
+    bancos = []
+    for nome in ("tarefas", "equipamentos", "clientes"):
+        caminho = tmp_path / f"{nome}.sqlite3"
+        caminho.write_bytes(b"")
+        bancos.append(str(caminho))
+    monkeypatch.setattr(exportacao, "DB_TAREFAS", bancos[0])
+    monkeypatch.setattr(exportacao, "DB_EQUIPAMENTOS", bancos[1])
+    monkeypatch.setattr(exportacao, "DB_CLIENTES", bancos[2])
+    chamadas = []
+
+    def consolidado_preventivas(tipo, data_ini=None, data_fim=None):
+        chamadas.append((tipo, data_ini, data_fim))
+        return consolidado()
+
+    monkeypatch.setattr(exportacao, "consolidado_preventivas", consolidado_preventivas)
+    exportacao.limpar_exportacoes()
+
+    primeira = exportacao.exportar_equipamentos("Preventiva Mensal", "feitos", ["Setor 1"])
+    assert exportacao.exportar_equipamentos("Preventiva Mensal", "feitos", ["Setor 1"]) is primeira
+    assert primeira.result(timeout=10)[:2] == b"PK"
+    assert exportacao.exportar_equipamentos("Preventiva Mensal", "nao_feitos", ["Setor 1"]) is not primeira
+
+    with open(bancos[1], "ab") as banco:
+        banco.write(b"x")
+    segunda = exportacao.exportar_equipamentos("Preventiva Mensal", "feitos", ["Setor 1"])
+    assert segunda is not primeira
+    segunda.result(timeout=10)
+    # Sem setores: todos os setores do consolidado
+    assert exportacao.exportar_equipamentos("Preventiva Mensal", "feitos").result(timeout=10)[:2] == b"PK"
+    assert len(chamadas) == 5
+    exportacao.limpar_exportacoes()
+
+
+def test_api_imports_panel_modules_only_on_use():
+    # Processo novo: os testes deste arquivo já colocaram painel/ no sys.path
+    codigo = (
+        "import sys, api_backend\n"
+        "caminho = list(sys.path)\n"
+        "assert 'dados' not in sys.modules and api_backend.PAINEL_DIR not in sys.path\n"
+        "dados, consolidacao, exportacao = api_backend._painel_exportacao()\n"
+        "assert exportacao.RELATORIOS and sys.path == caminho\n"
+    )
+    raiz = os.path.dirname(os.path.abspath(__file__))
+    resultado = subprocess.run([sys.executable, "-c", codigo], cwd=raiz, capture_output=True, text=True)
+    assert resultado.returncode == 0, resultado.stderr
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da camada do mapa de escolas dos painéis (painel/mapa.py).
+
+Uso:
+    python -m pytest -q test_painel_mapa.py
+"""
+
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "painel"))
+
+import dados  # noqa: E402
+import mapa  # noqa: E402
+
+
+def tarefas():
+    return pd.DataFrame({
+        "taskID": ["1", "2", "3", "4", "5"],
+        "customer_id": [10, 10, 10, 20, 30],
+        "status": ["Pausada", "Finalizada", "Finalizada", "Aberta", "Check-in"],
+    })
+
+
+def test_aggregates_per_school():
+    equipamentos_tarefa = pd.DataFrame({"taskID": ["1", "2", "2", "4"], "equipamento_id": [7, 7, 8, 9]})
+    questionarios_tarefa = pd.DataFrame({"taskID": ["1", "2"], "equipamento_id": [7, 8]})
+    escolas = pd.DataFrame({
+        "id": [10, 20, 30, 40],
+        "nome": ["Escola A", "Escola B", "Escola C", "Escola D"],
+        "latitude": [-23.5, -23.6, None, -23.7],
+        "longitude": [-46.6, -46.7, -46.8, -46.9],
+    })
+
+    mapa_df = mapa.montar_camada_mapa(tarefas(), equipamentos_tarefa, questionarios_tarefa, escolas,
+                                      {7: "A1 - Split", 8: "Cassete"})
+
+    # Escola C sem coordenadas e escola D sem tarefas ficam fora
+    assert mapa_df["nome"].tolist() == ["Escola A", "Escola B"]
+    escola_a, escola_b = mapa_df.to_dict("records")
+    assert (escola_a["equipamentos"], escola_a["pendencias"], escola_a["finalizadas"],
+            escola_a["pausadas"], escola_a["em_aberto"]) == (3, 1, 2, 1, 0)
+    assert escola_a["status"] == "Finalizada" and escola_a["cor"] == [0, 200, 0]
+    assert escola_a["lista_equipamentos"] == "<br><br>- A1 - Split<br>- A1 - Split<br>- Cassete"
+    assert (escola_b["equipamentos"], escola_b["pendencias"], escola_b["em_aberto"]) == (1, 1, 1)
+    assert escola_b["status"] == "Aberta" and escola_b["lista_equipamentos"] == "<br><br>- ID 9"
+    # O modelo do tooltip só usa colunas da camada
+    assert mapa.TOOLTIP_MAPA.format(**escola_a).startswith("<b>Escola A</b>")
+
+
+def test_predominant_status_ties_keep_first_seen():
+    empate = pd.DataFrame({"customer_id": [1, 1, 2, 2, 2], "status": ["Pausada", "Aberta", "Aberta", "Pausada", "Pausada"]})
+    assert mapa.status_predominante(empate).to_dict() == {1: "Pausada", 2: "Pausada"}
+
+
+def test_layer_is_cached_per_filter_set(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "clientes.sqlite3")
+    conn = sqlite3.connect(db_path)
+    for grupo in dados.SETORES.values():
+        conn.execute(f"CREATE TABLE clientes_grupo_{grupo} (id INTEGER, description TEXT, latitude REAL, longitude REAL)")
+    conn.execute(f"INSERT INTO clientes_grupo_{dados.SETORES['Setor 1']} VALUES (10, 'Escola A', -23.5, -46.6)")
+    conn.execute(f"INSERT INTO clientes_grupo_{dados.SETORES['Setor 2']} VALUES (10, 'Escola A', -23.5, -46.6)")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(dados, "DB_CLIENTES", db_path)
+    monkeypatch.setattr(mapa, "DB_CLIENTES", db_path)
+    dados.limpar_cache()
+
+    vazio = pd.DataFrame(columns=["taskID", "equipamento_id"])
+    primeiro = mapa.camada_mapa(("Setor 1", ("Aberta",)), tarefas(), vazio, vazio, {})
+    assert primeiro["nome"].tolist() == ["Escola A"]
+    assert mapa.camada_mapa(("Setor 1", ("Aberta",)), tarefas(), vazio, vazio, {}) is primeiro
+    assert mapa.camada_mapa(("Setor 1", ("Pausada",)), tarefas(), vazio, vazio, {}) is not primeiro
+    dados.limpar_cache()
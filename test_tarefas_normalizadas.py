@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes das tabelas normalizadas de tarefas (tarefas_normalizadas.py).
+
+Uso:
+    python -m pytest -q test_tarefas_normalizadas.py
+"""
+
+import json
+import sqlite3
+
+from tarefas_normalizadas import criar_tabelas_normalizadas
+
+INSERT = "INSERT OR REPLACE INTO tarefas_raw (taskID, user_id, data_referencia, json) VALUES (?, ?, ?, ?)"
+
+
+def make_db():
+    conn = sqlite3.connect(":memory:")
+    # Mesmo esquema de atualizacao/atualizar_tarefas.criar_tabela_tarefas
+    conn.execute("""
+        CREATE TABLE tarefas_raw (
+            taskID TEXT,
+            user_id INTEGER,
+            data_referencia TEXT,
+            json TEXT,
+            PRIMARY KEY (taskID, user_id)
+        )
+    """)
+    return conn
+
+
+def tarefa(task_id, status=1, equipamentos=(7, 8, 8), respondidos=(7, 7, None)):
+    return json.dumps({
+        "taskID": task_id, "customerId": 10, "customerDescription": "Escola", "taskType": 175644,
+        "taskTypeDescription": "Preventiva Mensal", "taskStatus": status, "taskDate": "2025-07-01T09:00:00",
+        "checkIn": True, "checkOut": False, "equipmentsId": list(equipamentos),
+        "questionnaires": [{"questionnaireId": 1, "questionnaireEquipamentId": e} for e in respondidos],
+    })
+
+
+def estado(conn):
+    return (
+        conn.execute("SELECT taskID, user_id, customer_id, status_id, checkin, checkout, deliveredDate, "
+                     "deliveredOnSmarthPhone FROM tarefas ORDER BY taskID, user_id").fetchall(),
+        conn.execute("SELECT taskID, posicao, equipamento_id FROM tarefas_equipamentos "
+                     "ORDER BY taskID, user_id, posicao").fetchall(),
+        conn.execute("SELECT taskID, equipamento_id FROM tarefas_equipamentos_respondidos "
+                     "ORDER BY taskID, equipamento_id").fetchall(),
+    )
+
+
+def test_triggers_keep_normalized_tables_in_sync():
+    conn = make_db()
+    criar_tabelas_normalizadas(conn)
+
+    conn.executemany(INSERT, [(1, 5, "2025-07-01", tarefa(1)), (2, 5, "2025-07-01", tarefa(2, equipamentos=()))])
+    tarefas, equipamentos, respondidos = estado(conn)
+    assert tarefas == [("1", 5, 10, 1, 1, 0, "", 0), ("2", 5, 10, 1, 1, 0, "", 0)]
+    assert equipamentos == [("1", 0, 7), ("1", 1, 8), ("1", 2, 8)]
+    assert respondidos == [("1", 7), ("2", 7)]
+
+    # Regravação (INSERT OR REPLACE) troca as linhas filhas
+    conn.execute(INSERT, (1, 5, "2025-07-01", tarefa(1, status=5, equipamentos=(9,), respondidos=(9,))))
+    tarefas, equipamentos, respondidos = estado(conn)
+    assert tarefas[0][3] == 5
+    assert equipamentos == [("1", 0, 9)] and respondidos == [("1", 9), ("2", 7)]
+
+    conn.execute("DELETE FROM tarefas_raw WHERE taskID = '2'")
+    conn.execute(INSERT, (3, 5, "2025-07-01", "não é json"))
+    assert conn.execute("SELECT COUNT(*) FROM tarefas_raw").fetchone()[0] == 2
+    assert estado(conn) == ([tarefas[0]], [("1", 0, 9)], [("1", 9)])
+
+
+def test_existing_rows_are_backfilled():
+    conn = make_db()
+    conn.executemany(INSERT, [(1, 5, "2025-07-01", tarefa(1)), (1, 6, "2025-07-01", tarefa(1))])
+    criar_tabelas_normalizadas(conn)
+
+    tarefas, equipamentos, respondidos = estado(conn)
+    assert [(t[0], t[1]) for t in tarefas] == [("1", 5), ("1", 6)]
+    assert len(equipamentos) == 6 and respondidos == [("1", 7), ("1", 7)]
+    # Criar de novo não duplica nem reconstrói
+    criar_tabelas_normalizadas(conn)
+    assert estado(conn) == (tarefas, equipamentos, respondidos)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da gravação em lote de tarefas (downloads/task_upsert.py).
+
+Uso:
+    python -m pytest -q test_task_upsert.py
+"""
+
+import sqlite3
+
+import pytest
+
+from downloads.task_upsert import upsert_tasks
+
+COLUMNS = ("taskID", "taskStatus", "lastUpdate")
+
+
+def to_row(task):
+    if not task.get("taskID"):
+        return None
+    return (int(task["taskID"]), int(task.get("taskStatus") or 0), str(task.get("lastUpdate", "")))
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE tasks (taskID INTEGER PRIMARY KEY, taskStatus INTEGER, lastUpdate TEXT)")
+    yield conn
+    conn.close()
+
+
+def rows(conn):
+    return conn.execute("SELECT taskID, taskStatus, lastUpdate FROM tasks ORDER BY taskID").fetchall()
+
+
+def test_counts_inserted_updated_and_unchanged(conn):
+    tasks = [{"taskID": i, "taskStatus": 1, "lastUpdate": "v1"} for i in range(1, 1201)]
+    assert upsert_tasks(conn, tasks, COLUMNS, to_row) == (1200, 0, 0)
+
+    tasks[0] = {"taskID": 1, "taskStatus": 5, "lastUpdate": "v2"}
+    tasks.append({"taskID": 5000, "taskStatus": 1, "lastUpdate": "v1"})
+    assert upsert_tasks(conn, tasks, COLUMNS, to_row) == (1, 1, 1199)
+    assert rows(conn)[0] == (1, 5, "v2")
+    assert len(rows(conn)) == 1201
+
+
+def test_duplicates_in_page_keep_last_occurrence(conn):
+    tasks = [{"taskID": 1, "taskStatus": 1, "lastUpdate": "a"}, {"taskID": 1, "taskStatus": 2, "lastUpdate": "b"}]
+    assert upsert_tasks(conn, tasks, COLUMNS, to_row) == (1, 0, 0)
+    assert rows(conn) == [(1, 2, "b")]
+
+
+def test_empty_version_is_always_rewritten(conn):
+    tasks = [{"taskID": 1, "taskStatus": 1}]
+    upsert_tasks(conn, tasks, COLUMNS, to_row)
+    assert upsert_tasks(conn, [{"taskID": 1, "taskStatus": 3}], COLUMNS, to_row) == (0, 1, 0)
+    assert rows(conn) == [(1, 3, "")]
+
+
+def test_invalid_tasks_are_skipped(conn):
+    tasks = [{"taskID": "x"}, {"name": "sem id"}, {"taskID": 2, "lastUpdate": "v1"}]
+    assert upsert_tasks(conn, tasks, COLUMNS, to_row) == (1, 0, 0)
+    assert rows(conn) == [(2, 0, "v1")]
+
+
+def test_prefilter_skips_conversion_of_unchanged_tasks(conn):
+    tasks = [{"taskID": i, "lastUpdate": "v1"} for i in range(1, 11)]
+    upsert_tasks(conn, tasks, COLUMNS, to_row)
+
+    converted = []
+
+    def counting_to_row(task):
+        converted.append(task["taskID"])
+        return to_row(task)
+
+    tasks[3] = {"taskID": 4, "lastUpdate": "v2"}
+    result = upsert_tasks(conn, tasks + [{"taskID": "x"}], COLUMNS, counting_to_row,
+                          task_key=lambda task: int(task["taskID"]),
+                          task_version=lambda task: task.get("lastUpdate", ""))
+    assert result == (0, 1, 9)
+    assert sorted(converted, key=str) == [4, "x"]
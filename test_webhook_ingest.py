@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Testes da ingestão dos webhooks de tarefas (webhook_ingest.py).
+
+Uso:
+    python -m pytest -q test_webhook_ingest.py
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import webhook_ingest
+from change_feed import feed
+from dashboard_snapshots import create_dashboard_snapshot_tables, create_invalidation_triggers, get_data_version
+from downloads.customer_group_members import create_customer_group_members_table
+from downloads.download_all_user_tasks_v2 import create_tasks_table
+from webhook_ingest import ingest_task_webhook, parse_task_entities
+
+# Contrato 10: escolas 100 e 101; contrato 20: escola 200
+MEMBERS = [(10, 100), (10, 101), (20, 200)]
+
+
+def make_db(path, triggers=True):
+    conn = sqlite3.connect(path)
+    create_tasks_table(conn)
+    create_customer_group_members_table(conn)
+    conn.executemany("INSERT INTO customer_group_members (group_id, customer_id) VALUES (?, ?)", MEMBERS)
+    create_dashboard_snapshot_tables(conn)
+    if triggers:
+        create_invalidation_triggers(conn, "tasks", "customerId")
+    conn.commit()
+    return conn
+
+
+def payload(*tasks):
+    return {"result": {"Entities": list(tasks)}}
+
+
+def task(task_id, customer_id, status=1, last_update="2025-07-01T10:00:00"):
+    return {"taskID": task_id, "customerId": customer_id, "taskStatus": status, "lastUpdate": last_update}
+
+
+@pytest.mark.parametrize("triggers", [True, False])
+def test_webhook_upserts_tasks_and_invalidates_only_affected_contract(tmp_path, triggers):
+    db_path = str(tmp_path / "auvo.db")
+    conn = make_db(db_path, triggers)
+    last_seq = feed.last_seq
+
+    summary = ingest_task_webhook(db_path, payload(task(1, 100), task(2, 101)))
+    assert (summary["inserted"], summary["updated"], summary["group_ids"]) == (2, 0, [10])
+    assert get_data_version(conn, 10) > 0 and get_data_version(conn, 20) == 0
+
+    event = feed.events_since(last_seq)[-1]
+    assert event["seq"] == summary["seq"] and event["group_ids"] == [10]
+    assert [t["taskID"] for t in event["tasks"]] == [1, 2]
+
+    # Mesma versão: nada gravado, nenhum evento
+    assert ingest_task_webhook(db_path, payload(task(1, 100)))["seq"] is None
+
+    # Tarefa muda de escola: os dois contratos são invalidados
+    version_10 = get_data_version(conn, 10)
+    summary = ingest_task_webhook(db_path, payload(task(1, 200, status=3, last_update="2025-07-02T08:00:00")))
+    assert (summary["updated"], summary["group_ids"]) == (1, [10, 20])
+    assert get_data_version(conn, 10) > version_10 and get_data_version(conn, 20) > 0
+    assert conn.execute("SELECT customerId, taskStatus FROM tasks WHERE taskID = 1").fetchone() == (200, 3)
+
+
+def test_concurrent_webhooks_read_previous_state_inside_the_write(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "auvo.db")
+    make_db(db_path)
+    ingest_task_webhook(db_path, payload(task(1, 100)))
+    last_seq = feed.last_seq
+
+    upsert_tasks = webhook_ingest.upsert_tasks
+
+    def slow_upsert(*args, **kwargs):
+        # O primeiro webhook segura a transação depois de ler o estado anterior
+        if threading.current_thread().name == "primeiro":
+            time.sleep(0.3)
+        return upsert_tasks(*args, **kwargs)
+
+    monkeypatch.setattr(webhook_ingest, "upsert_tasks", slow_upsert)
+    first = threading.Thread(name="primeiro", target=ingest_task_webhook,
+                             args=(db_path, payload(task(1, 100, status=2, last_update="2025-07-02T08:00:00"))))
+    second = threading.Thread(target=ingest_task_webhook,
+                              args=(db_path, payload(task(1, 100, status=3, last_update="2025-07-02T09:00:00"))))
+    first.start()
+    time.sleep(0.1)
+    second.start()
+    first.join()
+    second.join()
+
+    changes = [(change["from"], change["to"]) for event in feed.events_since(last_seq)
+               for change in event["contracts"]["10"]["task_status"]]
+    # O segundo webhook vê o status gravado pelo primeiro, não o de antes dele
+    assert changes == [(1, 2), (2, 3)]
+
+
+def test_webhook_stores_questionnaires_of_completed_tasks(tmp_path):
+    db_path = str(tmp_path / "auvo.db")
+    conn = make_db(db_path)
+    ingest_task_webhook(db_path, payload(task(1, 100)))
+    assert conn.execute("SELECT questionnaires FROM tasks WHERE taskID = 1").fetchone() == ("[]",)
+
+    answers = [{"questionnaireId": 3, "questionnaireEquipamentId": 555, "answers": []}]
+    completed = dict(task(1, 100, status=5, last_update="2025-07-02T08:00:00"), questionnaires=answers)
+    assert ingest_task_webhook(db_path, payload(completed))["updated"] == 1
+
+    # Mesmo formato de download_tasks.py, lido pelo dashboard (equipamentos realizados)
+    status, questionnaires = conn.execute("SELECT taskStatus, questionnaires FROM tasks WHERE taskID = 1").fetchone()
+    assert status == 5 and json.loads(questionnaires) == answers
+
+
+def test_invalid_entities_are_rejected():
+    tasks, rejected = parse_task_entities(payload(task(1, 100), {"taskID": "x"}, "texto", {"customerId": 5}))
+    assert [t["taskID"] for t in tasks] == [1]
+    assert [r["index"] for r in rejected] == [1, 2, 3]
+
+    with pytest.raises(ValueError):
+        parse_task_entities({"result": {}})
@@ -0,0 +1,201 @@
+"""
+Ingestão dos webhooks de tarefas da Auvo (POST /api/webhook/auvo).
+
+O payload do webhook traz as tarefas em `result.Entities`, no mesmo formato da
+listagem /tasks da API. As tarefas válidas são gravadas em `tasks` com o gravador
+em lote dos scripts de download (downloads/task_upsert.py); tarefas com o mesmo
+lastUpdate já gravado são ignoradas. Além das colunas do download v2, o webhook
+grava `questionnaires` (JSON, como download_tasks.py), de onde o dashboard conta
+os equipamentos atendidos.
+
+A gravação incrementa a versão dos dados só dos contratos das escolas afetadas
+(gatilhos de dashboard_snapshots, ou invalidação explícita se os gatilhos ainda
+não existirem) e publica um evento compacto no change_feed, com os deltas de cada
+contrato (live_deltas) para o feed ao vivo do painel.
+"""
+import json
+import sqlite3
+
+from api_logging import get_logger
+from change_feed import publish
+from dashboard_snapshots import invalidate_contracts
+from downloads.download_all_user_tasks_v2 import TASK_COLUMNS, create_tasks_table, task_key, task_to_row, task_version
+from downloads.task_upsert import LOTE_CONSULTA, upsert_tasks
+from live_deltas import build_contract_deltas
+
+logger = get_logger("webhook_ingest")
+
+# Colunas gravadas pelo webhook: as do download v2 mais os questionários
+WEBHOOK_TASK_COLUMNS = TASK_COLUMNS + ("questionnaires",)
+
+# Campos das tarefas enviados no evento de alteração
+EVENT_TASK_FIELDS = ("taskID", "customerId", "idUserTo", "taskType", "taskDate", "taskStatus", "finished",
+                     "checkInDate", "checkOutDate", "lastUpdate")
+_EVENT_INDEXES = [WEBHOOK_TASK_COLUMNS.index(field) for field in EVENT_TASK_FIELDS]
+
+
+def webhook_task_to_row(task):
+    """Converte uma tarefa do webhook na tupla de WEBHOOK_TASK_COLUMNS (None para ignorá-la)."""
+    row = task_to_row(task)
+    if row is None:
+        return None
+    return row + (json.dumps(task.get("questionnaires") or []),)
+
+
+def _create_tasks_table(conn):
+    """Cria a tabela de tarefas do download v2 e garante a coluna `questionnaires`."""
+    create_tasks_table(conn)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    if "questionnaires" not in columns:
+        conn.execute("ALTER TABLE tasks ADD COLUMN questionnaires TEXT")
+        conn.commit()
+
+
+def parse_task_entities(payload):
+    """
+    Valida o payload do webhook e separa as tarefas aproveitáveis.
+
+    Args:
+        payload (dict): Corpo do webhook
+
+    Returns:
+        tuple: (tarefas válidas, lista de {"index", "error"} das rejeitadas)
+
+    Raises:
+        ValueError: Se o payload não tiver a lista `result.Entities`
+    """
+    result = payload.get("result") if isinstance(payload, dict) else None
+    entities = result.get("Entities") if isinstance(result, dict) else None
+    if not isinstance(entities, list):
+        raise ValueError("Payload sem a lista result.Entities")
+
+    tasks, rejected = [], []
+    for index, entity in enumerate(entities):
+        if not isinstance(entity, dict):
+            rejected.append({"index": index, "error": "entidade não é um objeto"})
+            continue
+        try:
+            if task_key(entity) <= 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            rejected.append({"index": index, "error": "taskID ausente ou inválido"})
+            continue
+        tasks.append(entity)
+    return tasks, rejected
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), LOTE_CONSULTA):
+        yield values[start:start + LOTE_CONSULTA]
+
+
+def _table_exists(conn, name, kind="table"):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (kind, name)).fetchone() is not None
+
+
+def _stored_tasks(conn, task_ids):
+    """Estado anterior (customerId, taskType, taskStatus, taskDate) das tarefas já gravadas."""
+    stored = {}
+    for chunk in _chunks(task_ids):
+        placeholders = ", ".join("?" for _ in chunk)
+        for task_id, customer_id, task_type, task_status, task_date in conn.execute(
+                f"SELECT taskID, customerId, taskType, taskStatus, taskDate FROM tasks "
+                f"WHERE taskID IN ({placeholders})", chunk):
+            stored[task_id] = {"taskID": task_id, "customerId": customer_id, "taskType": task_type,
+                               "taskStatus": task_status, "taskDate": task_date}
+    return stored
+
+
+def groups_by_customer(conn, customer_ids):
+    """Retorna {customerId: [group_id, ...]} das escolas informadas."""
+    if not customer_ids or not _table_exists(conn, "customer_group_members"):
+        return {}
+    groups = {}
+    for chunk in _chunks(customer_ids):
+        placeholders = ", ".join("?" for _ in chunk)
+        for group_id, customer_id in conn.execute(
+                f"SELECT group_id, customer_id FROM customer_group_members WHERE customer_id IN ({placeholders}) "
+                f"ORDER BY group_id", chunk):
+            groups.setdefault(customer_id, []).append(group_id)
+    return groups
+
+
+def _pmoc_task_type_id(conn):
+    if not _table_exists(conn, "task_types"):
+        return None
+    row = conn.execute("SELECT id FROM task_types WHERE description LIKE ?", ('%Levantamento de PMOC%',)).fetchone()
+    return row[0] if row else None
+
+
+def ingest_task_webhook(db_path, payload):
+    """
+    Grava as tarefas do webhook e publica o evento de alteração.
+
+    Args:
+        db_path (str): Caminho do auvo.db
+        payload (dict): Corpo do webhook
+
+    Returns:
+        dict: received, inserted, updated, unchanged, rejected, group_ids e seq do
+            evento publicado (None se nada mudou)
+
+    Raises:
+        ValueError: Se o payload não tiver a lista `result.Entities`
+    """
+    tasks, rejected = parse_task_entities(payload)
+    summary = {"received": len(tasks) + len(rejected), "inserted": 0, "updated": 0, "unchanged": 0,
+               "rejected": rejected, "group_ids": [], "seq": None}
+    if not tasks:
+        return summary
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        _create_tasks_table(conn)
+        # Estado anterior lido na mesma transação de escrita do upsert: um webhook
+        # concorrente não grava a mesma tarefa entre a leitura e a gravação (o que
+        # geraria deltas contados duas vezes)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = _stored_tasks(conn, {task_key(task) for task in tasks})
+        except Exception:
+            conn.rollback()
+            raise
+
+        written = []
+        inserted, updated, unchanged = upsert_tasks(conn, tasks, WEBHOOK_TASK_COLUMNS, webhook_task_to_row, task_key=task_key,
+                                                    task_version=task_version, written=written)
+        summary.update(inserted=inserted, updated=updated, unchanged=unchanged)
+        if not written:
+            return summary
+
+        changes = [{"task": {field: row[index] for field, index in zip(EVENT_TASK_FIELDS, _EVENT_INDEXES)},
+                    "previous": previous.get(row[0])} for row in written]
+
+        # Escola atual e, se a tarefa mudou de escola, a anterior
+        customer_ids = {change["task"]["customerId"] for change in changes}
+        customer_ids.update(change["previous"]["customerId"] for change in changes if change["previous"])
+        customer_ids.discard(0)
+        customer_ids.discard(None)
+        groups = groups_by_customer(conn, customer_ids)
+        group_ids = sorted({group_id for ids in groups.values() for group_id in ids})
+        contracts = build_contract_deltas(changes, groups, _pmoc_task_type_id(conn))
+
+        if group_ids and _table_exists(conn, "contract_data_versions") and not _table_exists(
+                conn, "trg_tasks_update_dashboard_version", "trigger"):
+            invalidate_contracts(conn, group_ids)
+    finally:
+        conn.close()
+
+    event = publish({
+        "type": "tasks",
+        "source": "webhook",
+        "group_ids": group_ids,
+        "inserted": inserted,
+        "updated": updated,
+        "tasks": [change["task"] for change in changes],
+        "contracts": contracts,
+    })
+    summary.update(group_ids=group_ids, seq=event["seq"])
+    logger.info("Webhook: %d tarefa(s) gravada(s) (%d nova(s)), contratos %s", len(written), inserted, group_ids)
+    return summary